@@ -0,0 +1,129 @@
+"""
+Access policy - which membership tiers can see which content.
+
+Every tier (plus anonymous visitors) is a bit, and each access level maps to a
+mask of tiers that get it in full and a mask of tiers that get a preview. The
+level × tier table of outcomes is computed once at import, so checking a row is
+a dict lookup, a page of rows is evaluated with the viewer's bit resolved once,
+and the same table can be compiled into SQL to exclude or annotate rows inside
+the query.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, literal
+
+from ..models.user import User, MembershipTierEnum
+
+ANONYMOUS = 1 << 0
+TIER_BITS = {
+    MembershipTierEnum.FREE: 1 << 1,
+    MembershipTierEnum.GYANI: 1 << 2,
+    MembershipTierEnum.PRAGYANI: 1 << 3,
+    MembershipTierEnum.PRAGYANI_PLUS: 1 << 4,
+}
+
+PRAGYANI_PLUS_ONLY = TIER_BITS[MembershipTierEnum.PRAGYANI_PLUS]
+PRAGYANI_AND_ABOVE = TIER_BITS[MembershipTierEnum.PRAGYANI] | PRAGYANI_PLUS_ONLY
+GYANI_AND_ABOVE = TIER_BITS[MembershipTierEnum.GYANI] | PRAGYANI_AND_ABOVE
+MEMBERS = TIER_BITS[MembershipTierEnum.FREE] | GYANI_AND_ABOVE
+EVERYONE = ANONYMOUS | MEMBERS
+
+DEFAULT_PREVIEW_MINUTES = 30
+
+# access level -> (tiers with full access, tiers with preview access)
+LEVEL_RULES: Dict[str, Tuple[int, int]] = {
+    "free": (EVERYONE, 0),
+    "preview": (GYANI_AND_ABOVE, ANONYMOUS | TIER_BITS[MembershipTierEnum.FREE]),
+    "gyani": (GYANI_AND_ABOVE, 0),
+    "pragyani": (PRAGYANI_AND_ABOVE, 0),
+    "pragyani_plus": (PRAGYANI_PLUS_ONLY, 0),
+}
+
+
+def _build_access_types() -> Dict[Tuple[str, int], str]:
+    table = {}
+    for level, (full_mask, preview_mask) in LEVEL_RULES.items():
+        for bit in (ANONYMOUS, *TIER_BITS.values()):
+            if bit & full_mask:
+                # Free content is reported as such rather than as a membership benefit
+                table[(level, bit)] = "free" if full_mask == EVERYONE else "full"
+            elif bit & preview_mask:
+                table[(level, bit)] = "preview"
+            else:
+                table[(level, bit)] = "restricted"
+    return table
+
+
+# (access level, tier bit) -> "free" | "full" | "preview" | "restricted"
+ACCESS_TYPES = _build_access_types()
+
+
+def tier_bit(user: Optional[User]) -> int:
+    """The viewer's bit; users without a known tier are treated as FREE"""
+    if user is None:
+        return ANONYMOUS
+    return TIER_BITS.get(user.membership_tier, TIER_BITS[MembershipTierEnum.FREE])
+
+
+def has_tier(user: Optional[User], mask: int) -> bool:
+    """Whether the user's tier is one of the tiers in `mask` (e.g. GYANI_AND_ABOVE)"""
+    return bool(tier_bit(user) & mask)
+
+
+def _level_key(access_level: Any) -> str:
+    return getattr(access_level, "value", access_level)
+
+
+def _access_info(access_type: str, preview_duration: Optional[int]) -> Dict[str, Any]:
+    if access_type == "free":
+        return {"can_access": True, "access_type": "free", "preview_duration": preview_duration}
+    if access_type == "preview":
+        return {
+            "can_access": True,
+            "access_type": "preview",
+            "preview_duration": preview_duration or DEFAULT_PREVIEW_MINUTES,
+        }
+    return {"can_access": access_type == "full", "access_type": access_type, "preview_duration": None}
+
+
+def evaluate_teachings(user: Optional[User], teachings: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Access info for a page of teachings, in order.
+
+    Each entry has can_access, access_type ("free" | "preview" | "restricted" |
+    "full") and preview_duration (minutes, for free and preview content).
+    """
+    bit = tier_bit(user)
+    return [
+        _access_info(ACCESS_TYPES.get((_level_key(t.access_level), bit), "restricted"), t.preview_duration)
+        for t in teachings
+    ]
+
+
+def evaluate_teaching(user: Optional[User], teaching: Any) -> Dict[str, Any]:
+    return evaluate_teachings(user, [teaching])[0]
+
+
+def accessible_levels(user: Optional[User]) -> List[str]:
+    """Access levels the user can open at all (in full or as a preview)"""
+    bit = tier_bit(user)
+    return [level for level in LEVEL_RULES if ACCESS_TYPES[(level, bit)] != "restricted"]
+
+
+def access_filter(user: Optional[User], access_level_column):
+    """SQL condition keeping only rows the user can open, e.g. query.filter(access_filter(user, Teaching.access_level))"""
+    return access_level_column.in_(accessible_levels(user))
+
+
+def access_type_expression(user: Optional[User], access_level_column):
+    """SQL expression computing the row's access_type for the user, for annotating query results"""
+    bit = tier_bit(user)
+    by_type: Dict[str, List[str]] = {}
+    for level in LEVEL_RULES:
+        by_type.setdefault(ACCESS_TYPES[(level, bit)], []).append(level)
+    whens = [
+        (access_level_column.in_(levels), literal(access_type))
+        for access_type, levels in by_type.items()
+        if access_type != "restricted"
+    ]
+    return case(*whens, else_=literal("restricted")) if whens else literal("restricted")
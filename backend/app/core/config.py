@@ -13,12 +13,56 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Async engine URL; defaults to DATABASE_URL on asyncpg / aiosqlite
+    DATABASE_ECHO: bool = False  # Log every SQL statement; independent of DEBUG
+    DATABASE_POOL_SIZE: int = 10  # Connections kept open per engine and worker (not used on SQLite)
+    DATABASE_MAX_OVERFLOW: int = 10  # Extra connections opened under load and closed when returned
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 10.0  # Wait this long for a free connection before failing
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800  # Replace connections older than this, before server/proxy idle cutoffs
+    DATABASE_POOL_PRE_PING: bool = True  # Test connections on checkout so a dropped one is replaced, not an error
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 30000  # PostgreSQL statement_timeout; routes may override it; 0 disables
+
+    # Media
+    MEDIA_INDEX_TTL_SECONDS: int = 300  # Rebuild the shared MediaAsset index at most this often
+
+    # Search
+    SEARCH_INDEX_SNAPSHOT_PATH: Optional[str] = None  # e.g. "search_index.json"; used when not on PostgreSQL
+    SUGGESTION_TRIE_TTL_SECONDS: int = 300  # Rebuild the typeahead trie this often so other workers' writes show up
+
+    # Response cache
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory", "file" (shared by all workers) or "none"
+    RESPONSE_CACHE_DIR: Optional[str] = None  # File backend directory, e.g. "/dev/shm/satyoga-cache"
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    HIDDEN_TAG_PAGE_CACHE_SECONDS: int = 300  # Hydrated hidden-tag pages; changes made in this process invalidate sooner
+    HIDDEN_TAG_PAGE_CACHE_MAX_ENTRIES: int = 256
+
+    # Courses
+    COURSE_INDEX_TTL_SECONDS: int = 300  # Rebuild a cached course component ordering at most this often
+    VIDEO_HEARTBEAT_FLUSH_SECONDS: int = 5  # Write buffered player positions this often; 0 writes each heartbeat through
+    VIDEO_HEARTBEAT_MAX_PENDING: int = 10000  # Flush early once this many positions are buffered
+
+    # Outbound HTTP (Mixpanel, GA4, Tilopay, Cloudflare)
+    OUTBOUND_HTTP_TIMEOUT_SECONDS: float = 10.0  # Default read/write timeout; calls may override it
+    OUTBOUND_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OUTBOUND_HTTP_MAX_CONNECTIONS: int = 100
+    OUTBOUND_HTTP_MAX_KEEPALIVE: int = 20
+    OUTBOUND_HTTP_RETRIES: int = 2
+    OUTBOUND_HTTP_BACKOFF_SECONDS: float = 0.2  # Base of the jittered exponential backoff between retries
+    OUTBOUND_HTTP2: bool = True  # Negotiate HTTP/2 when the h2 package is installed
+
+    # Pagination
+    PAGINATION_COUNT_CACHE_SECONDS: int = 60  # How long count=estimate reuses an exact count off PostgreSQL
 
     # Auth
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30  # Reuse an authenticated user's row this long; changes made in this process invalidate sooner
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    BCRYPT_ROUNDS: int = 12  # Cost of new password hashes; logins rehash passwords stored with another cost
+    PASSWORD_HASH_WORKERS: int = 2  # Threads that hash and verify passwords off the event loop
 
     # Cron Jobs
     CRON_SECRET_KEY: str = "default-cron-secret-change-me"  # Change this in production!
@@ -43,6 +87,18 @@ class Settings(BaseSettings):
     MIXPANEL_TOKEN: Optional[str] = None
     GA4_MEASUREMENT_ID: Optional[str] = None
     GA4_API_SECRET: Optional[str] = None
+    ANALYTICS_QUEUE_MAX: int = 10000  # Tracked events held in memory before new ones spill to disk (or are shed)
+    ANALYTICS_BATCH_SIZE: int = 500  # Events per insert/forward batch
+    ANALYTICS_FLUSH_SECONDS: float = 2.0  # Drain the event queue at least this often; 0 writes each event inline
+    ANALYTICS_SPILL_PATH: Optional[str] = None  # e.g. "/var/lib/satyoga/analytics"; journal replayed after a crash
+    EVENT_EXPORT_FLUSH_SECONDS: float = 5.0  # Send partly filled Mixpanel/GA4 batches at least this often
+    EVENT_EXPORT_MAX_ATTEMPTS: int = 5  # Sends of a failed batch before it is dropped
+    EVENT_EXPORT_BACKOFF_SECONDS: float = 2.0  # First retry delay, doubled per attempt
+    EVENT_EXPORT_MAX_BUFFERED: int = 50000
+    ANALYTICS_ROLLUP_FLUSH_SECONDS: float = 60.0  # Recompute daily rollups for days touched by recent writes this often
+    ANALYTICS_ROLLUP_REFRESH_DAYS: int = 2  # Trailing days the scheduled rollup job recomputes in full
+    ANALYTICS_ROLLUP_REBUILD_TIMEOUT_MS: int = 600000  # statement_timeout of full rollup rebuilds (backfill, cron full=true)
+    ANALYTICS_SCAN_WORKERS: int = 4  # Live dashboard table scans run in parallel, each on its own pooled connection
 
     # Email
     SENDGRID_API_KEY: Optional[str] = None
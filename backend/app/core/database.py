@@ -1,21 +1,109 @@
+"""
+Database engines and sessions.
+
+`get_db` hands out a synchronous Session. Queries made through it block
+whatever thread calls them, which for an `async def` endpoint is the event
+loop, so one slow query stalls every other request on the worker.
+
+`get_async_db` hands out an AsyncSession on an engine with an async driver
+(asyncpg on PostgreSQL, aiosqlite on SQLite): while a query waits on the
+database the loop keeps serving other requests, so concurrency per worker
+grows with I/O instead of with the number of workers.
+
+Migrating an endpoint to it:
+
+- Depend on `get_async_db` and write its queries as 2.0-style
+  `await db.execute(select(...))` / `await db.scalars(...)`. Relationships are
+  not lazy loaded on an AsyncSession; eager load them (selectinload,
+  joinedload) or query them separately.
+- Helpers that still take a sync Session (pagination, MediaService,
+  SearchService, course_index, ...) run unchanged through
+  `await db.run_sync(fn, ...)`: `fn` receives the sync Session behind the
+  AsyncSession and its queries go through the async driver too, so they do
+  not block the loop either. A legacy `Query` built without a session
+  (`Query(Model)`) is bound inside with `query.with_session(session)`.
+  Not for helpers that hold a threading lock while they query (e.g.
+  suggestion_trie.ensure_built, which runs on its own thread): the loop switches to other requests during
+  the query, and one of them waiting on that lock would block the loop.
+- Endpoints that are not migrated yet and never await anything can be
+  declared with plain `def`, which makes FastAPI run them on its threadpool
+  instead of on the loop.
+
+Sessions from `get_async_db` do not expire objects on commit, so rows loaded
+before a commit can still be serialized after it without another query.
+
+Pool sizes, statement timeouts and SQL logging (DATABASE_*) apply to both
+engines; see core/db_runtime.py.
+"""
+from typing import Any, AsyncIterator, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .db_runtime import engine_options, install_statement_timeouts, pool_stats
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG,
-)
+engine = create_engine(settings.DATABASE_URL, echo=settings.DATABASE_ECHO, **engine_options(settings.DATABASE_URL))
+install_statement_timeouts(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions; bound to the async engine when one is opened (see get_async_engine)
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_async_engine: Optional[AsyncEngine] = None
+
+
+def async_database_url(url: Optional[str] = None) -> str:
+    """
+    The URL of the async engine: ASYNC_DATABASE_URL if set, otherwise
+    DATABASE_URL with its driver swapped for the async one.
+    """
+    if url is None:
+        if settings.ASYNC_DATABASE_URL:
+            return settings.ASYNC_DATABASE_URL
+        url = settings.DATABASE_URL
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {parsed.get_backend_name()}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """The shared async engine, created on first use so the driver is only imported when needed"""
+    global _async_engine
+    if _async_engine is None:
+        url = async_database_url()
+        _async_engine = create_async_engine(url, echo=settings.DATABASE_ECHO, **engine_options(url, is_async=True))
+        install_statement_timeouts(_async_engine.sync_engine)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+def database_pool_stats() -> Dict[str, Any]:
+    """Pool state and checkout metrics of both engines (async is None until first used)"""
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(_async_engine) if _async_engine is not None else None,
+        "statement_timeout_ms": settings.DATABASE_STATEMENT_TIMEOUT_MS,
+    }
+
 
 def get_db():
     """Dependency to get database session."""
@@ -24,3 +112,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
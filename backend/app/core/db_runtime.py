@@ -0,0 +1,175 @@
+"""
+Database runtime - connection pool sizing, statement timeouts and pool metrics
+
+engine_options() gives both engines (sync and async) their pool settings from
+DATABASE_POOL_* and, on PostgreSQL, a per-connection statement_timeout of
+DATABASE_STATEMENT_TIMEOUT_MS, so a runaway query is cancelled by the server
+instead of holding its connection (and worker) indefinitely. SQLite keeps
+SQLAlchemy's default pools and has no statement timeout.
+
+Routes that legitimately run longer (reports) or should fail faster (search)
+override the timeout with `dependencies=[Depends(statement_timeout(ms))]`;
+every transaction of that request then starts with SET LOCAL
+statement_timeout, which PostgreSQL resets at commit or rollback. Background
+jobs do the same with `with statement_timeout_override(ms):`. The override
+lives in a ContextVar: work handed to another thread only keeps it when run
+in a copy of the context (contextvars.copy_context().run, asyncio.to_thread).
+
+The pools are MeteredQueuePool / MeteredAsyncQueuePool, which time every
+checkout, so pool_stats() can report how long requests waited for a
+connection next to the checked-out and overflow counts.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import settings
+
+_route_timeout_ms: ContextVar[Optional[int]] = ContextVar("statement_timeout_ms", default=None)
+
+
+class PoolMetrics:
+    """Checkout counts and wait times of one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float, checked_out: int = 0, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_ms": {
+                    "avg": round(self.total_wait_ms / attempts, 2) if attempts else 0.0,
+                    "max": round(self.max_wait_ms, 2),
+                },
+            }
+
+
+class _MeteredPool:
+    """Times every checkout, including waits for a free connection and opening new ones"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.metrics.record((time.perf_counter() - started) * 1000, self.checkedout())
+        return connection
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for `url`"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+
+    options: Dict[str, Any] = {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+    if parsed.get_backend_name() == "postgresql" and settings.DATABASE_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DATABASE_STATEMENT_TIMEOUT_MS)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def install_statement_timeouts(engine) -> None:
+    """Apply statement_timeout() route overrides on `engine` (a sync Engine; PostgreSQL only)"""
+    if engine.dialect.name == "postgresql":
+        event.listen(engine, "begin", _apply_route_timeout)
+
+
+def _apply_route_timeout(connection) -> None:
+    milliseconds = _route_timeout_ms.get()
+    if milliseconds is None:
+        return
+    # On the DBAPI cursor: the transaction is still being set up on `connection`
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {int(milliseconds)}")
+    finally:
+        cursor.close()
+
+
+def statement_timeout(milliseconds: int) -> Callable[[], Any]:
+    """Route dependency running the request's statements with another statement_timeout (0 = none)"""
+
+    async def apply_statement_timeout() -> None:
+        # Set in the request's context, which the endpoint (and a threadpool run of it) inherits
+        _route_timeout_ms.set(milliseconds)
+
+    return apply_statement_timeout
+
+
+@contextmanager
+def statement_timeout_override(milliseconds: int) -> Iterator[None]:
+    """Run transactions begun inside the block with another statement_timeout (0 = none)"""
+    token = _route_timeout_ms.set(milliseconds)
+    try:
+        yield
+    finally:
+        _route_timeout_ms.reset(token)
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Live state and checkout metrics of an engine's pool"""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # overflow() counts down from -size until every pooled connection has been opened
+            "overflow": max(0, pool.overflow()),
+            "timeout_seconds": pool.timeout(),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
@@ -1,14 +1,20 @@
 """FastAPI dependencies for authentication and authorization."""
 
+import logging
+
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Optional, Tuple
 
-from .database import get_db
+from .access_policy import GYANI_AND_ABOVE, has_tier
+from .database import get_async_db, get_db
 from .security import decode_token
-from ..models.user import User, MembershipTierEnum
-from ..models.forum import ForumUserBan
+from ..models.user import User
+from ..services.principal_cache import principal_cache, token_version
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
@@ -17,53 +23,46 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
 ) -> User:
-    """Get current authenticated user from JWT token."""
-    import logging
-    logger = logging.getLogger(__name__)
+    """
+    Get current authenticated user from JWT token.
 
-    token = credentials.credentials
-    logger.info(f"[AUTH] Attempting to authenticate with token: {token[:20]}...")
-
-    # Decode token
-    payload = decode_token(token)
+    The user row comes from the principal cache when possible, so most
+    requests do not query the users table.
+    """
+    payload = decode_token(credentials.credentials)
     if not payload:
-        logger.error(f"[AUTH] Failed to decode token: {token[:30]}...")
+        logger.info("[AUTH] Rejected a token that failed to decode")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logger.info(f"[AUTH] Token decoded successfully. Payload: {payload}")
-
     # Get user ID from payload
     user_id = payload.get("sub")
     if not user_id:
-        logger.error(f"[AUTH] No 'sub' field in token payload: {payload}")
+        logger.info("[AUTH] Rejected a token without a 'sub' claim")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload",
         )
 
-    logger.info(f"[AUTH] Extracted user_id from token: {user_id}")
-
-    # Fetch user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = principal_cache.load_user(db, user_id, token_version(payload))
     if not user:
-        logger.error(f"[AUTH] User not found in database: {user_id}")
+        logger.warning("[AUTH] User not found in database: %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
 
     if not user.is_active:
-        logger.warning(f"[AUTH] User account is inactive: {user_id}")
+        logger.warning("[AUTH] User account is inactive: %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive",
         )
 
-    logger.info(f"[AUTH] ✓ Successfully authenticated user: {user.email}")
+    logger.debug("[AUTH] Authenticated user %s", user_id)
     return user
 
 
@@ -95,11 +94,8 @@ async def get_current_admin(
 require_admin = get_current_admin
 
 
-async def get_optional_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
-) -> Optional[User]:
-    """Get user if authenticated, otherwise None."""
+def _optional_principal(authorization: Optional[str]) -> Optional[Tuple[Any, Any]]:
+    """(user id, token version) of a bearer token, or None if there is no valid one"""
     if not authorization or not authorization.startswith("Bearer "):
         return None
 
@@ -113,8 +109,38 @@ async def get_optional_user(
     if not user_id:
         return None
 
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    return user
+    return user_id, token_version(payload)
+
+
+async def get_optional_user(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Optional[User]:
+    """Get user if authenticated, otherwise None."""
+    principal = _optional_principal(authorization)
+    if principal is None:
+        return None
+
+    user = principal_cache.load_user(db, *principal)
+    return user if user is not None and user.is_active else None
+
+
+async def get_optional_user_async(
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[User]:
+    """
+    get_optional_user for endpoints on get_async_db.
+
+    The user is attached to the request's AsyncSession, and a principal cache
+    miss is loaded through the async driver instead of blocking the loop.
+    """
+    principal = _optional_principal(authorization)
+    if principal is None:
+        return None
+
+    user = await db.run_sync(principal_cache.load_user, *principal)
+    return user if user is not None and user.is_active else None
 
 
 # Alias for backward compatibility
@@ -127,18 +153,14 @@ async def get_forum_user(
 ) -> User:
     """Get user with forum access (blocks FREE tier users and banned users)."""
     # Check if user has FREE membership (not allowed)
-    if current_user.membership_tier == MembershipTierEnum.FREE:
+    if not has_tier(current_user, GYANI_AND_ABOVE):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Forum access requires GYANI membership or higher. Please upgrade your membership to access the forum.",
         )
 
-    # Check if user is banned from forum
-    from datetime import datetime
-    active_ban = db.query(ForumUserBan).filter(
-        ForumUserBan.user_id == current_user.id,
-        (ForumUserBan.is_permanent == True) | (ForumUserBan.expires_at > datetime.utcnow())
-    ).first()
+    # Check if user is banned from forum (cached with the principal)
+    active_ban = principal_cache.active_ban(db, current_user.id)
 
     if active_ban:
         if active_ban.is_permanent:
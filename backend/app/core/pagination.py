@@ -0,0 +1,201 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Instead of OFFSET, a page continues strictly after the sort key of the last row
+it returned, so every page is an index range scan no matter how deep it is. The
+position is handed to clients as an opaque, URL-safe cursor string.
+
+Counting is optional as well: "exact" runs COUNT(*), "estimate" reads the
+PostgreSQL planner's row estimate (or a briefly cached exact count elsewhere)
+and "none" skips counting altogether.
+"""
+import base64
+import json
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, DateTime, and_, false, or_, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from .config import settings
+from .db_types import UUID_TYPE
+
+COUNT_MODES = ("exact", "estimate", "none")
+COUNT_MODE_PATTERN = "^(exact|estimate|none)$"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the requested ordering"""
+
+
+class SortKey(NamedTuple):
+    """One column of a keyset ordering. Nullable columns sort their NULLs last."""
+    column: Any
+    descending: bool = True
+    nullable: bool = False
+
+
+# ----- cursors -----
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(key: SortKey, value: Any) -> Any:
+    if value is None:
+        return None
+    column_type = key.column.type
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, Date):
+        return date.fromisoformat(value)
+    if isinstance(column_type, UUID_TYPE):
+        return uuid.UUID(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong number of values")
+        return [_decode_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+
+
+# ----- keyset queries -----
+
+def _order_by(key: SortKey):
+    clause = key.column.desc() if key.descending else key.column.asc()
+    return clause.nulls_last() if key.nullable else clause
+
+
+def _after(key: SortKey, value: Any):
+    """Rows that sort strictly after `value` on this key"""
+    if value is None:
+        # NULLs sort last, so nothing comes after a NULL on this key
+        return false()
+    beyond = key.column < value if key.descending else key.column > value
+    return or_(beyond, key.column.is_(None)) if key.nullable else beyond
+
+
+def _equal(key: SortKey, value: Any):
+    return key.column.is_(None) if value is None else key.column == value
+
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any]):
+    """WHERE clause selecting the rows that follow `values` in the keys' ordering"""
+    if len({key.descending for key in keys}) == 1 and not any(key.nullable for key in keys):
+        # Single direction, no NULLs: a row-value comparison the planner can use as an index bound
+        columns = tuple_(*(key.column for key in keys))
+        return columns < tuple(values) if keys[0].descending else columns > tuple(values)
+
+    clauses = []
+    for i, key in enumerate(keys):
+        prefix = [_equal(k, v) for k, v in zip(keys[:i], values[:i])]
+        clauses.append(and_(*prefix, _after(key, values[i])))
+    return or_(*clauses)
+
+
+def keyset_page(
+    query: Query,
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of `query` ordered by `keys`.
+
+    With a cursor the page starts right after the row it points at; without one
+    the legacy `skip` offset is applied. Returns the rows and the cursor for the
+    next page (None on the last page).
+    """
+    ordered = query.order_by(*(_order_by(key) for key in keys))
+    if cursor:
+        ordered = ordered.filter(keyset_filter(keys, decode_cursor(cursor, keys)))
+    elif skip:
+        ordered = ordered.offset(skip)
+
+    # One extra row tells us whether there is a next page without counting
+    rows = ordered.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, key.column.key) for key in keys])
+
+
+# ----- counts -----
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+_count_cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+_count_cache_lock = threading.Lock()
+_COUNT_CACHE_MAX_ENTRIES = 512
+
+
+def _planner_estimate(query: Query) -> int:
+    plan = query.session.execute(_Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _cached_count(query: Query) -> int:
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    cache_key = (str(compiled), repr(sorted(compiled.params.items())))
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    total = query.count()
+    with _count_cache_lock:
+        if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+        _count_cache[cache_key] = (now + settings.PAGINATION_COUNT_CACHE_SECONDS, total)
+    return total
+
+
+def count_rows(query: Query, mode: str = "exact") -> Optional[int]:
+    """
+    Total number of rows `query` matches (before ordering/paging).
+
+    "estimate" trades accuracy for speed: the planner's estimate on PostgreSQL,
+    otherwise an exact count that is reused for PAGINATION_COUNT_CACHE_SECONDS.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        if query.session.get_bind().dialect.name == "postgresql":
+            return _planner_estimate(query)
+        return _cached_count(query)
+    return query.count()
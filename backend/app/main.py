@@ -2,11 +2,46 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 
 from .core.config import settings
-from .core.database import engine, Base
+from .core.database import engine, Base, SessionLocal, dispose_async_engine
+from .models.teaching import Teaching
 from .routers import auth, users, teachings, courses, retreats, book_groups, events, products, cart, payments, email, admin, forms, blog, search, analytics, forum, hidden_tags, dynamic_forms, testimonials, audit_logs, recommendations, cron
 from .routers import static_pages, static_content, online_retreats, faq, form_templates, admin_static_content
+from .services.analytics_ingest import analytics_ingest
+from .services.analytics_rollups import analytics_rollups
+from .services.conditional_get import ConditionalGetMiddleware, track_content_version
+from .services.event_exporter import event_exporter
+from .services.http_client import outbound_http
+from .services.password_hasher import password_hasher
+from .services.response_cache import ResponseCacheMiddleware
+from .services.search_index import search_index
+from .services.suggestions import suggestion_trie
+from .services.video_heartbeats import video_heartbeats
+
+
+logger = logging.getLogger(__name__)
+
+
+def start_search_index():
+    """Serve /api/search from the in-process index where PostgreSQL full-text search is unavailable."""
+    if engine.dialect.name == "postgresql":
+        return
+
+    db = SessionLocal()
+    try:
+        search_index.start(
+            db,
+            static_pages=search.get_static_navigation_pages(),
+            snapshot_path=settings.SEARCH_INDEX_SNAPSHOT_PATH,
+        )
+    except Exception as e:
+        # Search keeps working through the ILIKE fallback
+        logger.warning("Search index unavailable: %s", e)
+    finally:
+        db.close()
 
 
 @asynccontextmanager
@@ -14,8 +49,32 @@ async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown."""
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    start_search_index()
+    suggestion_trie.refresh_in_background()
+    await outbound_http.start()
+    exporter = asyncio.create_task(event_exporter.run())
+    heartbeat_flusher = asyncio.create_task(video_heartbeats.run())
+    analytics_consumer = asyncio.create_task(analytics_ingest.run())
+    analytics_rollups.register_listeners()
+    # Validates /api/teachings/ ETags; view counts are refreshed by the page rows' updated_at instead
+    track_content_version("teachings", [Teaching], ignored=("view_count", "updated_at"))
+    rollup_refresher = asyncio.create_task(analytics_rollups.run())
     yield
     # Cleanup if needed
+    heartbeat_flusher.cancel()
+    video_heartbeats.flush()
+    analytics_consumer.cancel()
+    await analytics_ingest.flush()
+    analytics_ingest.close()
+    rollup_refresher.cancel()
+    analytics_rollups.refresh_dirty()
+    await event_exporter.stop()
+    exporter.cancel()
+    await outbound_http.close()
+    password_hasher.shutdown()
+    await dispose_async_engine()
+    if search_index.is_ready:
+        search_index.save_snapshot()
 
 
 # Initialize FastAPI app
@@ -26,6 +85,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Cache public content responses (added before CORS so cached responses still get CORS headers)
+app.add_middleware(ResponseCacheMiddleware)
+
+# ETag / If-None-Match on read endpoints (outside the cache, so cached responses can be answered with 304)
+app.add_middleware(ConditionalGetMiddleware)
+
 # Configure CORS - Use dynamic origins for Vercel deployment support
 app.add_middleware(
     CORSMiddleware,
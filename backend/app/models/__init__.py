@@ -35,7 +35,7 @@ from .email import (
     EmailAutomation,
     EmailSent,
 )
-from .analytics import AnalyticsEvent, UserAnalytics
+from .analytics import AnalyticsEvent, UserAnalytics, AnalyticsDailyRollup, AnalyticsDailyRevenue
 from .static_content import (
     MediaAsset,
     PageSection,
@@ -137,6 +137,8 @@ __all__ = [
     "EmailSent",
     "AnalyticsEvent",
     "UserAnalytics",
+    "AnalyticsDailyRollup",
+    "AnalyticsDailyRevenue",
     # Static Content Models
     "MediaAsset",
     "PageSection",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, Date, DateTime, ForeignKey
 from sqlalchemy import String
 from ..core.db_types import UUID_TYPE, JSON_TYPE
 from sqlalchemy.orm import relationship
@@ -50,3 +50,27 @@ class UserAnalytics(Base):
 
     # Relationships
     user = relationship("User", back_populates="analytics")
+
+
+class AnalyticsDailyRollup(Base):
+    """Per-day dashboard facts, recomputed from the source tables by app.services.analytics_rollups."""
+    __tablename__ = "analytics_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    signups = Column(Integer, default=0, nullable=False)
+    active_users = Column(Integer, default=0, nullable=False)  # users whose last activity falls on this day
+    revenue = Column(Numeric(12, 2), default=0, nullable=False)  # completed payments
+    enrollments = Column(Integer, default=0, nullable=False)
+    orders = Column(Integer, default=0, nullable=False)  # completed orders
+    registrations = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class AnalyticsDailyRevenue(Base):
+    """Completed payment revenue per day and payment type."""
+    __tablename__ = "analytics_daily_revenue"
+
+    day = Column(Date, primary_key=True)
+    payment_type = Column(String(50), primary_key=True)
+    revenue = Column(Numeric(12, 2), default=0, nullable=False)
+    payments = Column(Integer, default=0, nullable=False)
@@ -37,8 +37,18 @@ class ForumCategory(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Statistics (maintained by app.services.forum_stats)
+    thread_count = Column(Integer, default=0, nullable=False)
+    post_count = Column(Integer, default=0, nullable=False)
+    latest_thread_id = Column(UUID_TYPE, nullable=True)  # Thread with the most recent post
+
     # Relationships
     threads = relationship("ForumThread", back_populates="category", cascade="all, delete-orphan")
+    latest_thread = relationship(
+        "ForumThread",
+        primaryjoin="foreign(ForumCategory.latest_thread_id) == ForumThread.id",
+        viewonly=True,
+    )
 
 
 class ForumThread(Base):
@@ -4,12 +4,12 @@ Manages which content entities (teachings, blog posts, products, etc.)
 appear on specific marketing pages with custom ordering.
 """
 from sqlalchemy import Column, String, Integer, DateTime, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
 import enum
 
 from app.core.database import Base
+from app.core.db_types import UUID_TYPE
 
 
 class EntityType(str, enum.Enum):
@@ -32,10 +32,10 @@ class HiddenTag(Base):
     """
     __tablename__ = "hidden_tags"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID_TYPE, primary_key=True, default=uuid.uuid4, index=True)
 
     # Entity reference
-    entity_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    entity_id = Column(UUID_TYPE, nullable=False, index=True)
     entity_type = Column(SQLEnum(EntityType), nullable=False, index=True)
 
     # Page tagging
@@ -2,8 +2,11 @@
 
 from fastapi import APIRouter, Depends
 
+from ..core.database import database_pool_stats
 from ..core.deps import get_current_admin
 from ..models.user import User
+from ..services.http_client import outbound_http
+from ..services.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -12,3 +15,21 @@ router = APIRouter()
 async def admin_dashboard(admin: User = Depends(get_current_admin)):
     """Admin dashboard."""
     return {"message": "Admin dashboard - to be implemented"}
+
+
+@router.get("/outbound-http")
+async def outbound_http_stats(admin: User = Depends(get_current_admin)):
+    """Request, error, retry and latency metrics per outbound destination."""
+    return outbound_http.stats()
+
+
+@router.get("/password-hashing")
+async def password_hashing_stats(admin: User = Depends(get_current_admin)):
+    """Queue depth, wait and run times of the password hashing pool."""
+    return password_hasher.stats()
+
+
+@router.get("/database-pool")
+async def database_pool(admin: User = Depends(get_current_admin)):
+    """Checked-out connections, overflow and checkout wait times of the database pools."""
+    return database_pool_stats()
@@ -10,7 +10,9 @@ from app.models.static_content import (
     PageSection, SectionContent, AccordionSection, AccordionItem,
     SectionTab, SectionDecoration, MediaAsset, OnlineRetreat
 )
-from app.services.media_service import MediaService
+from app.services.media_service import MediaService, media_index
+from app.services.response_cache import response_cache
+from app.services.http_client import outbound_http
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 import json
@@ -295,6 +297,7 @@ async def update_section(
 
     db.commit()
     db.refresh(section)
+    response_cache.purge(f"pages:{section.page_slug}")
 
     print(f"[Admin Content] Section {section_id} updated successfully")
 
@@ -342,6 +345,7 @@ async def update_accordion_section(
 
     db.commit()
     db.refresh(accordion)
+    response_cache.purge("pages")
 
     return {"message": "Accordion section updated successfully", "accordion_id": accordion.id}
 
@@ -445,6 +449,10 @@ async def upload_media(
         db.commit()
         db.refresh(media_asset)
 
+        # New asset must be visible to resolvers (and clear any cached miss for its path)
+        media_index.invalidate()
+        response_cache.purge("media")
+
         return {
             "id": media_asset.id,
             "original_path": original_path,
@@ -524,31 +532,33 @@ async def revalidate_page(
     }
 
     route = route_map.get(page_slug, f"/{page_slug}")
+    response_cache.purge(f"pages:{page_slug}")
 
     try:
         # Call Next.js revalidation endpoint
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{frontend_url}/api/revalidate",
-                json={"path": route},
-                headers={"Content-Type": "application/json"}
-            )
+        response = await outbound_http.post(
+            f"{frontend_url}/api/revalidate",
+            json={"path": route},
+            headers={"Content-Type": "application/json"},
+            timeout=10.0,
+            retries=0,
+        )
 
-            if response.status_code == 200:
-                print(f"[Admin Content] Successfully revalidated {route}")
-                return {
-                    "message": f"Page '{page_slug}' revalidated successfully",
-                    "route": route,
-                    "status": "success"
-                }
-            else:
-                print(f"[Admin Content] Revalidation failed: {response.status_code}")
-                return {
-                    "message": f"Revalidation returned status {response.status_code}",
-                    "route": route,
-                    "status": "warning",
-                    "hint": "Revalidation endpoint may not be configured"
-                }
+        if response.status_code == 200:
+            print(f"[Admin Content] Successfully revalidated {route}")
+            return {
+                "message": f"Page '{page_slug}' revalidated successfully",
+                "route": route,
+                "status": "success"
+            }
+        else:
+            print(f"[Admin Content] Revalidation failed: {response.status_code}")
+            return {
+                "message": f"Revalidation returned status {response.status_code}",
+                "route": route,
+                "status": "warning",
+                "hint": "Revalidation endpoint may not be configured"
+            }
 
     except httpx.RequestError as e:
         print(f"[Admin Content] Revalidation request failed: {e}")
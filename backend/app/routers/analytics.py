@@ -1,13 +1,14 @@
 """Analytics router for event tracking and admin analytics."""
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, status
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
 
 from ..core.database import get_db
-from ..core.deps import get_current_user, get_optional_current_user, require_admin
+from ..core.db_runtime import statement_timeout
+from ..core.deps import get_current_user, get_optional_user_async, require_admin
 from ..models.user import User
 from ..models.analytics import AnalyticsEvent, UserAnalytics
 from ..schemas.analytics import (
@@ -15,22 +16,29 @@ from ..schemas.analytics import (
     AnalyticsEventResponse,
     UserAnalyticsResponse,
 )
-from ..services import mixpanel_service, ga4_service
+from ..services.analytics_ingest import analytics_ingest, make_event
+from ..services.event_exporter import event_exporter
 from ..services.analytics_service import AnalyticsService
 
 router = APIRouter()
 
+# Admin reports scan long date ranges, so they get more than the default statement timeout
+REPORT_QUERIES = [Depends(statement_timeout(120_000))]
 
-@router.post("/track", response_model=AnalyticsEventResponse)
+
+@router.post("/track", response_model=AnalyticsEventResponse, status_code=status.HTTP_202_ACCEPTED)
 async def track_event(
     event_data: AnalyticsEventCreate,
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user),
+    current_user: Optional[User] = Depends(get_optional_user_async),
 ):
     """
     Track an analytics event from the frontend.
     Works for both authenticated and anonymous users.
+
+    The event is queued and returned straight away; storing it, updating the
+    user's analytics counters and forwarding it to Mixpanel and GA4 happen in
+    batches in the background (see services/analytics_ingest.py).
     """
     # Determine user ID
     user_id = None
@@ -50,60 +58,33 @@ async def track_event(
     ip_address = event_data.ip_address or request.client.host
     user_agent = event_data.user_agent or request.headers.get("user-agent")
 
-    # Store event in database
-    analytics_event = AnalyticsEvent(
+    event = make_event(
+        event_data.event_name,
+        distinct_id,
         user_id=user_id,
-        event_name=event_data.event_name,
         event_properties=event_data.event_properties,
         ip_address=ip_address,
         user_agent=user_agent,
     )
-    db.add(analytics_event)
-    db.commit()
-    db.refresh(analytics_event)
-
-    # Track in Mixpanel (async, don't wait)
-    await mixpanel_service.track_event(
-        event_data.event_name,
-        distinct_id,
-        event_data.event_properties,
-    )
-
-    # Track in Google Analytics 4 (async, don't wait)
-    await ga4_service.track_event(
-        distinct_id,
-        event_data.event_name.lower().replace(" ", "_"),
-        event_data.event_properties,
-    )
-
-    # Update user analytics if authenticated
-    if current_user:
-        user_analytics = (
-            db.query(UserAnalytics)
-            .filter(UserAnalytics.user_id == current_user.id)
-            .first()
+    if not analytics_ingest.submit(event):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics queue is full",
+            headers={"Retry-After": "5"},
         )
 
-        if user_analytics:
-            # Update last_active_at
-            from datetime import datetime
-            user_analytics.last_active_at = datetime.utcnow()
-
-            # Increment session count if it's a login or session start event
-            if event_data.event_name.lower() in ["login", "session_start", "page_view"]:
-                user_analytics.total_sessions += 1
+    if analytics_ingest.flush_seconds <= 0:
+        await analytics_ingest.flush()
 
-            # Update specific counters based on event type
-            if "teaching" in event_data.event_name.lower() and "view" in event_data.event_name.lower():
-                user_analytics.teachings_viewed += 1
-            elif "course" in event_data.event_name.lower() and "enroll" in event_data.event_name.lower():
-                user_analytics.courses_enrolled += 1
-            elif "retreat" in event_data.event_name.lower() and "register" in event_data.event_name.lower():
-                user_analytics.retreats_attended += 1
+    return event
 
-            db.commit()
 
-    return analytics_event
+@router.get("/ingest/stats")
+async def get_ingest_stats(
+    current_user: User = Depends(require_admin),
+):
+    """Queue depth, throughput and backpressure counters of the event ingestion pipeline - Admin only."""
+    return {**analytics_ingest.metrics(), "export": event_exporter.metrics()}
 
 
 @router.get("/user/{user_id}", response_model=UserAnalyticsResponse)
@@ -157,11 +138,13 @@ async def get_user_events(
 # ==================== ADMIN ANALYTICS ENDPOINTS ====================
 
 
-@router.get("/dashboard/summary")
+@router.get("/dashboard/summary", dependencies=REPORT_QUERIES)
 async def get_dashboard_summary(
     timeframe: str = Query("30d", description="Timeframe: 7d, 30d, 90d, this_month, last_month, this_year, last_year, lifetime, custom"),
     custom_start: Optional[datetime] = Query(None, description="Custom start date (ISO format)"),
     custom_end: Optional[datetime] = Query(None, description="Custom end date (ISO format)"),
+    source: str = Query("auto", description="Data source: auto, rollups, live"),
+    debug: bool = Query(False, description="Include the data source and per-query timings"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -172,14 +155,14 @@ async def get_dashboard_summary(
     """
     try:
         summary = AnalyticsService.get_dashboard_summary(
-            db, timeframe, custom_start, custom_end
+            db, timeframe, custom_start, custom_end, source=source, debug=debug
         )
         return summary
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/dashboard/activity-log")
+@router.get("/dashboard/activity-log", dependencies=REPORT_QUERIES)
 async def get_activity_log(
     limit: int = Query(20, ge=1, le=100, description="Number of activities to return"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
@@ -201,7 +184,7 @@ async def get_activity_log(
     }
 
 
-@router.get("/dashboard/events")
+@router.get("/dashboard/events", dependencies=REPORT_QUERIES)
 async def get_dashboard_events(
     timeframe: str = Query("7d", description="Timeframe for events"),
     limit: int = Query(10, ge=1, le=50, description="Number of top events"),
@@ -235,7 +218,7 @@ async def get_dashboard_events(
 
 # ==================== SALES & REVENUE ANALYTICS ====================
 
-@router.get("/sales/summary")
+@router.get("/sales/summary", dependencies=REPORT_QUERIES)
 async def get_sales_summary(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -249,7 +232,7 @@ async def get_sales_summary(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/sales/products/popular")
+@router.get("/sales/products/popular", dependencies=REPORT_QUERIES)
 async def get_popular_products(
     timeframe: str = Query("30d"),
     limit: int = Query(10, ge=1, le=50),
@@ -266,7 +249,7 @@ async def get_popular_products(
 
 # ==================== CUSTOMER ANALYTICS ====================
 
-@router.get("/customers/summary")
+@router.get("/customers/summary", dependencies=REPORT_QUERIES)
 async def get_customer_summary(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -280,7 +263,7 @@ async def get_customer_summary(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/customers/segmentation")
+@router.get("/customers/segmentation", dependencies=REPORT_QUERIES)
 async def get_customer_segmentation(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -296,7 +279,7 @@ async def get_customer_segmentation(
 
 # ==================== COURSE ANALYTICS ====================
 
-@router.get("/courses/enrollment")
+@router.get("/courses/enrollment", dependencies=REPORT_QUERIES)
 async def get_course_enrollment(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -310,7 +293,7 @@ async def get_course_enrollment(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/courses/engagement")
+@router.get("/courses/engagement", dependencies=REPORT_QUERIES)
 async def get_course_engagement(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -326,7 +309,7 @@ async def get_course_engagement(
 
 # ==================== TEACHING ANALYTICS ====================
 
-@router.get("/teachings/views")
+@router.get("/teachings/views", dependencies=REPORT_QUERIES)
 async def get_teaching_views(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -342,7 +325,7 @@ async def get_teaching_views(
 
 # ==================== MEMBERSHIP ANALYTICS ====================
 
-@router.get("/membership/tiers")
+@router.get("/membership/tiers", dependencies=REPORT_QUERIES)
 async def get_membership_tiers(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -356,7 +339,7 @@ async def get_membership_tiers(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/membership/conversion")
+@router.get("/membership/conversion", dependencies=REPORT_QUERIES)
 async def get_membership_conversion(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -372,7 +355,7 @@ async def get_membership_conversion(
 
 # ==================== RETREAT ANALYTICS ====================
 
-@router.get("/retreats/registration")
+@router.get("/retreats/registration", dependencies=REPORT_QUERIES)
 async def get_retreat_registration(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -386,7 +369,7 @@ async def get_retreat_registration(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/retreats/revenue")
+@router.get("/retreats/revenue", dependencies=REPORT_QUERIES)
 async def get_retreat_revenue(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -402,7 +385,7 @@ async def get_retreat_revenue(
 
 # ==================== CROSS ANALYTICS ====================
 
-@router.get("/cross/ltv")
+@router.get("/cross/ltv", dependencies=REPORT_QUERIES)
 async def get_ltv_metrics(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -418,7 +401,7 @@ async def get_ltv_metrics(
 
 # ==================== TREND DATA FOR CHARTS ====================
 
-@router.get("/trends/revenue")
+@router.get("/trends/revenue", dependencies=REPORT_QUERIES)
 async def get_revenue_trend(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -432,7 +415,7 @@ async def get_revenue_trend(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/trends/users")
+@router.get("/trends/users", dependencies=REPORT_QUERIES)
 async def get_user_growth_trend(
     timeframe: str = Query("30d"),
     db: Session = Depends(get_db),
@@ -8,6 +8,7 @@ import uuid
 
 from ..core.database import get_db
 from ..core.deps import require_admin
+from ..core.pagination import COUNT_MODE_PATTERN, InvalidCursor
 from ..models.user import User
 from ..models.audit_log import ActionType
 from ..schemas.audit_log import AuditLogListResponse, AuditLogResponse, AuditLogStats
@@ -27,6 +28,8 @@ async def get_audit_logs(
     search: Optional[str] = Query(None, description="Search in reason, names, or entity names"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total: exact, estimate or none"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
@@ -40,24 +43,31 @@ async def get_audit_logs(
     - target_user_id: Filter by user who was affected
     - search: Search in reason, admin_name, target_user_name, or entity_name
     - start_date/end_date: Filter by date range
+
+    Pagination: pass `next_cursor` back as `cursor` to fetch the following page.
     """
     # Convert string IDs to UUID if provided
     admin_uuid = uuid.UUID(admin_id) if admin_id else None
     target_user_uuid = uuid.UUID(target_user_id) if target_user_id else None
 
     # Get logs using the service
-    logs, total = AuditService.get_audit_logs(
-        db=db,
-        skip=skip,
-        limit=limit,
-        action_type=action_type,
-        entity_type=entity_type,
-        admin_id=admin_uuid,
-        target_user_id=target_user_uuid,
-        search=search,
-        start_date=start_date,
-        end_date=end_date,
-    )
+    try:
+        logs, total, next_cursor = AuditService.get_audit_logs(
+            db=db,
+            skip=skip,
+            limit=limit,
+            action_type=action_type,
+            entity_type=entity_type,
+            admin_id=admin_uuid,
+            target_user_id=target_user_uuid,
+            search=search,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            count_mode=count,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Convert to response models
     log_responses = [AuditLogResponse.model_validate(log) for log in logs]
@@ -67,6 +77,7 @@ async def get_audit_logs(
         total=total,
         skip=skip,
         limit=limit,
+        next_cursor=next_cursor,
     )
 
 
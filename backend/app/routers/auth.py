@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime, timedelta
 
 from ..core.database import get_db
-from ..core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from ..core.security import create_access_token, create_refresh_token
 from ..core.deps import get_current_user
 from ..models.user import User, UserProfile, MembershipTierEnum
 from ..models.analytics import UserAnalytics
@@ -14,6 +14,7 @@ from ..models.email import NewsletterSubscriber, SubscriberStatus
 from ..models.course import Course, CourseEnrollment, EnrollmentStatus
 from ..schemas.user import UserCreate, UserLogin, UserResponse, Token
 from ..services import mixpanel_service, ga4_service, sendgrid_service
+from ..services.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -37,7 +38,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     user = User(
         email=user_data.email,
         name=user_data.name,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await password_hasher.hash(user_data.password),
         membership_tier=MembershipTierEnum.FREE,
         is_active=False,
         email_verified=False,
@@ -210,7 +211,10 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Login user."""
     # Find user
     user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await password_hasher.verify(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -229,6 +233,11 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is inactive",
         )
 
+    # Stored with another cost than BCRYPT_ROUNDS: replace it while we have the password
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+
     # Auto-enroll in Fundamentals of Meditation if not already enrolled (safety check)
     fundamentals_course = db.query(Course).filter(
         Course.slug == "fundamentals-of-meditation"
@@ -1,13 +1,14 @@
 """Courses router with enrollment and progress tracking."""
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, select
+from typing import Dict, List, Optional
 from datetime import datetime
 
-from ..core.database import get_db
-from ..core.deps import get_current_user, get_optional_user, get_current_admin
+from ..core.database import get_async_db, get_db
+from ..core.deps import get_current_user, get_optional_user, get_optional_user_async, get_current_admin
 from ..models.user import User
 from ..models.course import (
     Course,
@@ -35,6 +36,8 @@ from ..schemas.course import (
     ComponentCommentCreate,
 )
 from ..services import mixpanel_service
+from ..services.course_tree import CourseIndex, CourseTree, course_index
+from ..services.video_heartbeats import ComponentNotFound, NotEnrolled, merged_progress, video_heartbeats
 
 router = APIRouter()
 
@@ -48,41 +51,62 @@ def calculate_course_progress(user_id: str, course_id: str, db: Session) -> floa
     Calculate the overall progress percentage for a user in a course.
     Progress is based on component-level completion.
     """
-    # Get total number of components in the course
-    total_components = (
-        db.query(func.count(CourseComponent.id))
-        .join(CourseClass)
-        .filter(CourseClass.course_id == course_id)
-        .scalar()
-    )
-
-    if total_components == 0:
+    # Total number of components comes from the cached course index
+    index = course_index.get(db, course_id)
+    if index.total_components == 0:
         return 0.0
 
-    # Get user's enrollment
-    enrollment = (
-        db.query(CourseEnrollment)
+    # Number of completed components for the user's enrollment (0 if not enrolled)
+    completed_components = (
+        db.query(func.count(CourseProgress.id))
+        .join(CourseEnrollment, CourseProgress.enrollment_id == CourseEnrollment.id)
         .filter(
             CourseEnrollment.user_id == user_id,
             CourseEnrollment.course_id == course_id,
+            CourseProgress.completed == True,
         )
-        .first()
+        .scalar()
     )
 
-    if not enrollment:
-        return 0.0
+    return index.progress_percentage(completed_components)
 
-    # Get number of completed components for this enrollment
-    completed_components = (
-        db.query(func.count(CourseProgress.id))
-        .filter(
-            CourseProgress.enrollment_id == enrollment.id,
+
+async def enrolled_progress(db: AsyncSession, user_id, course_ids: List) -> Dict[str, float]:
+    """
+    Progress percentage of each of `course_ids` the user is enrolled in.
+
+    Two queries whatever the number of courses: the user's enrollments and their
+    completed component counts per course; component totals come from course_index.
+    """
+    if not course_ids:
+        return {}
+    enrolled = (await db.scalars(
+        select(CourseEnrollment.course_id).where(
+            CourseEnrollment.user_id == user_id,
+            CourseEnrollment.course_id.in_(course_ids),
+        )
+    )).all()
+    if not enrolled:
+        return {}
+
+    completed = dict((await db.execute(
+        select(CourseEnrollment.course_id, func.count(CourseProgress.id))
+        .join(CourseProgress, CourseProgress.enrollment_id == CourseEnrollment.id)
+        .where(
+            CourseEnrollment.user_id == user_id,
+            CourseEnrollment.course_id.in_(enrolled),
             CourseProgress.completed == True,
         )
-        .scalar()
-    )
+        .group_by(CourseEnrollment.course_id)
+    )).all())
 
-    return (completed_components / total_components) * 100
+    def percentages(session: Session) -> Dict[str, float]:
+        return {
+            str(course_id): course_index.get(session, course_id).progress_percentage(completed.get(course_id, 0))
+            for course_id in enrolled
+        }
+
+    return await db.run_sync(percentages)
 
 
 def user_can_access_course(user: User, course: Course, db: Session) -> dict:
@@ -131,19 +155,23 @@ def user_can_access_course(user: User, course: Course, db: Session) -> dict:
 async def get_courses(
     skip: int = 0,
     limit: int = 50,
-    user: Optional[User] = Depends(get_optional_user),
-    db: Session = Depends(get_db),
+    user: Optional[User] = Depends(get_optional_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all published courses."""
-    query = db.query(Course).filter(Course.is_published == True)
+    published = select(Course).where(Course.is_published == True)
 
-    courses = query.offset(skip).limit(limit).all()
-    total = query.count()
+    courses = (await db.scalars(
+        published.options(selectinload(Course.instructor)).offset(skip).limit(limit)
+    )).all()
+    total = await db.scalar(select(func.count()).select_from(published.subquery()))
+
+    # Enrollment status for logged-in users
+    progress = await enrolled_progress(db, user.id, [course.id for course in courses]) if user else {}
 
-    # Add enrollment status for logged-in users
     result = []
     for course in courses:
-        course_data = {
+        result.append({
             "id": str(course.id),
             "slug": course.slug,
             "title": course.title,
@@ -151,28 +179,9 @@ async def get_courses(
             "thumbnail_url": course.thumbnail_url,
             "price": float(course.price) if course.price else 0.0,
             "instructor_name": course.instructor.name if course.instructor else None,
-            "is_enrolled": False,
-            "progress_percentage": 0.0,
-        }
-
-        # Check enrollment if user is logged in
-        if user:
-            enrollment = (
-                db.query(CourseEnrollment)
-                .filter(
-                    CourseEnrollment.user_id == user.id,
-                    CourseEnrollment.course_id == course.id,
-                )
-                .first()
-            )
-
-            if enrollment:
-                course_data["is_enrolled"] = True
-                course_data["progress_percentage"] = calculate_course_progress(
-                    str(user.id), str(course.id), db
-                )
-
-        result.append(course_data)
+            "is_enrolled": str(course.id) in progress,
+            "progress_percentage": progress.get(str(course.id), 0.0),
+        })
 
     return {"courses": result, "total": total, "skip": skip, "limit": limit}
 
@@ -184,7 +193,7 @@ async def get_course(
     db: Session = Depends(get_db),
 ):
     """Get a single course by slug with full details including component hierarchy."""
-    course = db.query(Course).filter(Course.slug == slug).first()
+    course = db.query(Course).options(joinedload(Course.instructor)).filter(Course.slug == slug).first()
 
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -214,15 +223,6 @@ async def get_course(
         "is_enrolled": False,
     }
 
-    # Calculate total duration across all classes
-    total_duration = (
-        db.query(func.sum(CourseComponent.duration))
-        .join(CourseClass)
-        .filter(CourseClass.course_id == course.id)
-        .scalar()
-    ) or 0
-    course_data["total_duration"] = int(total_duration)
-
     # Get enrollment info if user is logged in
     enrollment = None
     if user:
@@ -233,43 +233,30 @@ async def get_course(
         if access_info["is_enrolled"]:
             enrollment = access_info["enrollment"]
             course_data["enrolled_at"] = enrollment.enrolled_at.isoformat()
-            course_data["progress_percentage"] = calculate_course_progress(
-                str(user.id), str(course.id), db
-            )
 
-    # Always include course structure (for selling page syllabus)
-    classes = (
-        db.query(CourseClass)
-        .filter(CourseClass.course_id == course.id)
-        .order_by(CourseClass.order_index)
-        .all()
-    )
+    # Classes, components and the user's progress in a fixed number of queries
+    tree = CourseTree.load(db, course.id, enrollment)
+    course_index.put(course.id, CourseIndex.from_tree(tree))
 
-    course_data["classes"] = []
-    for cls in classes:
-        class_duration = sum(comp.duration for comp in cls.components if comp.duration)
+    # Calculate total duration across all classes
+    course_data["total_duration"] = int(tree.total_duration)
+    if enrollment:
+        course_data["progress_percentage"] = tree.progress_percentage()
 
+    # Always include course structure (for selling page syllabus)
+    course_data["classes"] = []
+    for cls in tree.classes:
         class_data = {
             "id": str(cls.id),
             "title": cls.title,
             "description": cls.description,
             "order_index": cls.order_index,
-            "duration": class_duration,
+            "duration": tree.class_durations[str(cls.id)],
             "components": [],
         }
 
-        # Get top-level components for this class (excluding sub-components)
-        components = (
-            db.query(CourseComponent)
-            .filter(
-                CourseComponent.class_id == cls.id,
-                CourseComponent.parent_component_id == None
-            )
-            .order_by(CourseComponent.order_index)
-            .all()
-        )
-
-        for component in components:
+        # Top-level components for this class (sub-components are nested below)
+        for component in tree.top_level[str(cls.id)]:
             component_data = {
                 "id": str(component.id),
                 "title": component.title,
@@ -282,15 +269,8 @@ async def get_course(
 
             # Only include full content and progress if user is enrolled
             if enrollment:
-                # Check if user has completed this component
-                progress = (
-                    db.query(CourseProgress)
-                    .filter(
-                        CourseProgress.enrollment_id == enrollment.id,
-                        CourseProgress.component_id == component.id,
-                    )
-                    .first()
-                )
+                progress = tree.progress_for(component.id)
+                pending = video_heartbeats.peek(enrollment.id, component.id)
 
                 component_data.update({
                     "content": component.content,
@@ -303,14 +283,15 @@ async def get_course(
                         "completed": progress.completed if progress else False,
                         "progress_percentage": progress.progress_percentage if progress else 0,
                         "last_accessed": progress.last_accessed.isoformat() if progress and progress.last_accessed else None,
-                        "video_timestamp": progress.video_timestamp if progress else 0,
+                        "video_timestamp": pending.timestamp if pending else progress.video_timestamp if progress else 0,
                     },
                 })
 
                 # Include sub-components if any
-                if component.has_tabs and component.sub_components:
+                sub_components = tree.sub_components_of(component.id)
+                if component.has_tabs and sub_components:
                     component_data["sub_components"] = []
-                    for sub_comp in component.sub_components:
+                    for sub_comp in sub_components:
                         component_data["sub_components"].append({
                             "id": str(sub_comp.id),
                             "title": sub_comp.title,
@@ -369,6 +350,7 @@ async def get_component(
         )
         .first()
     )
+    pending = video_heartbeats.peek(enrollment.id, component.id)
 
     # Get component's position within its class
     class_components = (
@@ -411,7 +393,7 @@ async def get_component(
             "completed": progress.completed if progress else False,
             "progress_percentage": progress.progress_percentage if progress else 0,
             "last_accessed": progress.last_accessed.isoformat() if progress and progress.last_accessed else None,
-            "video_timestamp": progress.video_timestamp if progress else 0,
+            "video_timestamp": pending.timestamp if pending else progress.video_timestamp if progress else 0,
         },
     }
 
@@ -461,68 +443,22 @@ async def get_component_navigation(
     if not enrollment:
         raise HTTPException(status_code=403, detail="Not enrolled in this course")
 
-    # Get current component
-    current_component = db.query(CourseComponent).filter(CourseComponent.id == component_id).first()
-    if not current_component:
-        raise HTTPException(status_code=404, detail="Component not found")
-
-    # Get all components for this course in order (only top-level, no sub-components)
-    all_classes = (
-        db.query(CourseClass)
-        .filter(CourseClass.course_id == course.id)
-        .order_by(CourseClass.order_index)
-        .all()
-    )
-
-    # Flatten all components across classes
-    all_components = []
-    for cls in all_classes:
-        components = (
-            db.query(CourseComponent)
-            .filter(
-                CourseComponent.class_id == cls.id,
-                CourseComponent.parent_component_id == None
-            )
-            .order_by(CourseComponent.order_index)
-            .all()
-        )
-        all_components.extend(components)
+    # Position of the component among the course's top-level components (no sub-components)
+    index = course_index.get(db, course.id)
+    neighbours = index.neighbours(component_id)
 
-    # Find current component index
-    current_index = None
-    for i, comp in enumerate(all_components):
-        if str(comp.id) == str(component_id):
-            current_index = i
-            break
-
-    if current_index is None:
+    if neighbours is None:
+        if not db.query(CourseComponent.id).filter(CourseComponent.id == component_id).first():
+            raise HTTPException(status_code=404, detail="Component not found")
         raise HTTPException(status_code=404, detail="Component not found in course")
 
-    # Get previous and next
-    previous = None
-    next_comp = None
-
-    if current_index > 0:
-        prev_comp = all_components[current_index - 1]
-        previous = {
-            "id": str(prev_comp.id),
-            "title": prev_comp.title,
-            "component_category": prev_comp.component_category.value if prev_comp.component_category else None,
-        }
-
-    if current_index < len(all_components) - 1:
-        next_component = all_components[current_index + 1]
-        next_comp = {
-            "id": str(next_component.id),
-            "title": next_component.title,
-            "component_category": next_component.component_category.value if next_component.component_category else None,
-        }
+    current_index, prev_comp, next_component = neighbours
 
     return {
-        "previous": previous,
-        "next": next_comp,
+        "previous": prev_comp._asdict() if prev_comp else None,
+        "next": next_component._asdict() if next_component else None,
         "current_index": current_index,
-        "total_components": len(all_components),
+        "total_components": len(index.ordered),
     }
 
 
@@ -753,18 +689,15 @@ async def get_course_progress(
     if not enrollment:
         raise HTTPException(status_code=403, detail="Not enrolled in this course")
 
-    # Get all progress records for this enrollment
-    progress_records = (
-        db.query(CourseProgress)
-        .filter(CourseProgress.enrollment_id == enrollment.id)
-        .all()
-    )
+    # Course structure and all progress records for this enrollment
+    tree = CourseTree.load(db, enrollment.course_id, enrollment)
 
     progress_data = []
-    for progress in progress_records:
+    for progress in tree.progress_rows:
+        component = tree.components_by_id.get(str(progress.component_id))
         progress_data.append({
             "component_id": str(progress.component_id),
-            "component_title": progress.component.title,
+            "component_title": component.title if component else None,
             "progress_percentage": progress.progress_percentage,
             "completed": progress.completed,
             "completed_at": (
@@ -775,7 +708,7 @@ async def get_course_progress(
             ),
         })
 
-    overall_progress = calculate_course_progress(str(current_user.id), course_id, db)
+    overall_progress = tree.progress_percentage()
 
     return {
         "course_id": course_id,
@@ -921,6 +854,7 @@ async def delete_course_admin(
 
     db.delete(course)
     db.commit()
+    course_index.invalidate(course_id)
 
     return {"message": "Course deleted successfully"}
 
@@ -967,6 +901,7 @@ async def create_class_admin(
         db.add(component)
 
     db.commit()
+    course_index.invalidate(course_id)
 
     return {
         "message": "Class created successfully",
@@ -997,6 +932,7 @@ async def update_class_admin(
     course_class.duration = class_data.duration
 
     db.commit()
+    course_index.invalidate(course_class.course_id)
 
     return {
         "message": "Class updated successfully",
@@ -1019,8 +955,10 @@ async def delete_class_admin(
     if not course_class:
         raise HTTPException(status_code=404, detail="Class not found")
 
+    course_id = course_class.course_id
     db.delete(course_class)
     db.commit()
+    course_index.invalidate(course_id)
 
     return {"message": "Class deleted successfully"}
 
@@ -1052,6 +990,7 @@ async def create_component_admin(
     db.add(component)
     db.commit()
     db.refresh(component)
+    course_index.invalidate(course_class.course_id)
 
     return {
         "message": "Component added successfully",
@@ -1079,8 +1018,10 @@ async def update_component_admin(
     component.title = component_data.title
     component.content = component_data.content
     component.order_index = component_data.order_index
+    course_id = component.course_class.course_id
 
     db.commit()
+    course_index.invalidate(course_id)
 
     return {
         "message": "Component updated successfully",
@@ -1102,8 +1043,10 @@ async def delete_component_admin(
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
 
+    course_id = component.course_class.course_id
     db.delete(component)
     db.commit()
+    course_index.invalidate(course_id)
 
     return {"message": "Component deleted successfully"}
 
@@ -1470,64 +1413,26 @@ async def save_video_timestamp(
     db: Session = Depends(get_db),
 ):
     """Save video timestamp for resume functionality."""
-    # Get component
-    component = db.query(CourseComponent).filter(CourseComponent.id == str(data.component_id)).first()
-    if not component:
+    # Verify the component exists and the user is enrolled in its course (cached per user/component)
+    try:
+        target = video_heartbeats.resolve_target(db, current_user.id, data.component_id)
+    except ComponentNotFound:
         raise HTTPException(status_code=404, detail="Component not found")
-
-    # Get course and verify enrollment
-    course_class = component.course_class
-    course = course_class.course
-
-    enrollment = (
-        db.query(CourseEnrollment)
-        .filter(
-            CourseEnrollment.user_id == current_user.id,
-            CourseEnrollment.course_id == course.id,
-        )
-        .first()
-    )
-
-    if not enrollment:
+    except NotEnrolled:
         raise HTTPException(status_code=403, detail="Not enrolled in this course")
 
-    # Get or create progress record
-    progress = (
-        db.query(CourseProgress)
-        .filter(
-            CourseProgress.enrollment_id == enrollment.id,
-            CourseProgress.component_id == str(data.component_id),
-        )
-        .first()
-    )
-
-    if not progress:
-        progress = CourseProgress(
-            enrollment_id=enrollment.id,
-            class_id=course_class.id,
-            component_id=str(data.component_id),
-        )
-        db.add(progress)
-
-    # Update timestamp and calculate progress percentage
-    progress.video_timestamp = data.timestamp
-    progress.last_accessed = datetime.utcnow()
-
-    # Calculate progress based on video duration
-    if component.duration and component.duration > 0:
-        progress.progress_percentage = min(int((data.timestamp / component.duration) * 100), 100)
+    # Buffered and written in batches; 95% watched marks the component completed
+    position = video_heartbeats.record(target, data.component_id, data.timestamp)
 
-        # Mark as completed if watched 95% or more
-        if progress.progress_percentage >= 95:
-            progress.completed = True
-
-    db.commit()
+    # Report the row as it will be once written: the stored completion and
+    # percentage (cached with the target) still count when this heartbeat does not set them
+    progress_percentage, completed = merged_progress(position, target)
 
     return {
         "message": "Timestamp saved successfully",
         "timestamp": data.timestamp,
-        "progress_percentage": progress.progress_percentage,
-        "completed": progress.completed,
+        "progress_percentage": progress_percentage,
+        "completed": completed,
     }
 
 
@@ -1563,6 +1468,18 @@ async def get_video_timestamp(
         .first()
     )
 
+    # Positions not yet flushed from the heartbeat buffer are newer than the stored row
+    pending = video_heartbeats.peek(enrollment.id, component_id)
+    if pending:
+        percentage = pending.progress_percentage
+        if percentage is None:
+            percentage = progress.progress_percentage if progress else 0
+        return {
+            "timestamp": pending.timestamp,
+            "progress_percentage": percentage,
+            "completed": pending.completed or bool(progress and progress.completed),
+        }
+
     if not progress:
         return {"timestamp": 0, "progress_percentage": 0, "completed": False}
 
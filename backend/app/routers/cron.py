@@ -6,11 +6,13 @@ Should be called by external cron service or internal scheduler.
 """
 
 import logging
-from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from ..core.database import get_db
 from ..core.config import settings
+from ..core.db_runtime import statement_timeout_override
+from ..services.analytics_rollups import analytics_rollups
 from ..services.subscription_manager import subscription_manager
 
 router = APIRouter()
@@ -43,6 +45,7 @@ async def cron_health_check():
         "service": "cron-jobs",
         "endpoints": {
             "process-trials": "/api/cron/process-trials",
+            "refresh-analytics-rollups": "/api/cron/refresh-analytics-rollups",
             "health": "/api/cron/health",
         }
     }
@@ -128,6 +131,44 @@ async def test_trial_processing(
         )
 
 
+@router.post("/refresh-analytics-rollups")
+def refresh_analytics_rollups(
+    days: int = Query(settings.ANALYTICS_ROLLUP_REFRESH_DAYS, ge=1, le=366),
+    full: bool = Query(False),
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_cron_secret)
+):
+    """
+    Recompute the daily analytics rollups behind the admin dashboard.
+
+    Write hooks keep recent days current; this job (run e.g. hourly) also
+    recomputes the trailing `days` days so deletes and bulk updates are picked
+    up. `full=true` rebuilds every day from the source tables.
+
+    Authentication: Requires X-Cron-Secret header with valid secret key
+    """
+    try:
+        if full:
+            # Reads every source row, which takes longer than the default statement timeout allows
+            with statement_timeout_override(settings.ANALYTICS_ROLLUP_REBUILD_TIMEOUT_MS):
+                refreshed = analytics_rollups.rebuild(db)
+        else:
+            refreshed = analytics_rollups.refresh_recent(db, days)
+            refreshed += analytics_rollups.refresh_dirty(db)
+    except Exception as e:
+        logger.error(f"Error refreshing analytics rollups: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error refreshing analytics rollups: {str(e)}"
+        )
+
+    return {
+        "success": True,
+        "days_refreshed": refreshed,
+        "full": full,
+    }
+
+
 # TODO: Add more cron endpoints as needed
 # - /process-subscription-renewals - Check for expiring monthly/annual subscriptions
 # - /send-trial-reminder-emails - Send emails 3 days before trial ends
@@ -35,6 +35,7 @@ from app.schemas.dynamic_form import (
     ReviewSubmissionRequest,
     ReviewSubmissionResponse,
 )
+from app.services.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -81,7 +82,6 @@ async def submit_form(
     """
     import secrets
     import string
-    from app.core.security import get_password_hash
     from app.models.user import MembershipTierEnum
 
     # Verify form exists and is published
@@ -141,7 +141,7 @@ async def submit_form(
                 email=email,
                 first_name=first_name or email.split('@')[0],
                 last_name=last_name or "",
-                hashed_password=get_password_hash(generated_password),
+                hashed_password=await password_hasher.hash(generated_password),
                 membership_tier=MembershipTierEnum.FREE,
                 is_active=True,
                 is_admin=False,
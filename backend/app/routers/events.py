@@ -19,6 +19,7 @@ from ..schemas.event import (
     EventSessionResponse
 )
 from ..services.media_service import MediaService
+from ..services.response_cache import response_cache
 
 router = APIRouter()
 
@@ -293,6 +294,7 @@ async def create_event(
             db.add(session)
 
     db.commit()
+    response_cache.purge("events")
     db.refresh(event)
 
     return EventResponse.model_validate(event)
@@ -317,6 +319,7 @@ async def update_event(
 
     event.updated_at = datetime.utcnow()
     db.commit()
+    response_cache.purge("events")
     db.refresh(event)
 
     return EventResponse.model_validate(event)
@@ -336,6 +339,7 @@ async def delete_event(
 
     db.delete(event)
     db.commit()
+    response_cache.purge("events")
 
     return {"message": "Event deleted successfully"}
 
@@ -389,6 +393,7 @@ async def create_event_session(
     )
     db.add(session)
     db.commit()
+    response_cache.purge("events")
     db.refresh(session)
 
     return EventSessionResponse.model_validate(session)
@@ -417,6 +422,7 @@ async def update_event_session(
 
     session.updated_at = datetime.utcnow()
     db.commit()
+    response_cache.purge("events")
     db.refresh(session)
 
     return EventSessionResponse.model_validate(session)
@@ -440,6 +446,7 @@ async def delete_event_session(
 
     db.delete(session)
     db.commit()
+    response_cache.purge("events")
 
     return {"message": "Session deleted successfully"}
 
@@ -24,6 +24,7 @@ from ..schemas.form_templates import (
     FormSubmission as FormSubmissionSchema,
     FormSubmissionResponse,
 )
+from ..services.password_hasher import password_hasher
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -89,13 +90,12 @@ async def submit_form(
         else:
             # Create new user with temporary password
             import secrets
-            from ..core.security import get_password_hash
 
             temp_password = secrets.token_urlsafe(32)
             new_user = User(
                 email=submission.submitter_email,
                 name=submission.submitter_name or submission.submitter_email.split('@')[0],
-                password_hash=get_password_hash(temp_password),
+                password_hash=await password_hasher.hash(temp_password),
                 is_active=True,
                 is_admin=False,
                 membership_tier="FREE",
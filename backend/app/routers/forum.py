@@ -1,6 +1,6 @@
 """Forum API endpoints."""
 from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, func, desc
 from typing import Optional, List
 from datetime import datetime, timedelta
@@ -11,7 +11,11 @@ import shutil
 
 from app.core.database import get_db
 from app.core.deps import get_forum_user, get_current_admin, get_current_user, get_optional_user
+from app.core.pagination import COUNT_MODE_PATTERN, InvalidCursor, SortKey, count_rows, keyset_page
 from app.models.user import User
+from app.services import forum_stats
+from app.services.forum_threads import build_nested_posts, load_thread_posts
+from app.services.principal_cache import principal_cache
 from app.models.forum import (
     ForumCategory,
     ForumThread,
@@ -67,84 +71,39 @@ router = APIRouter()
 UPLOAD_DIR = "public/uploads/forum"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Helper function to build nested post structure
-def build_nested_posts(posts: List[ForumPost], current_user_id: Optional[str], db: Session) -> List[dict]:
-    """Build nested post structure for thread detail view."""
-    # Create a dictionary of posts by ID
-    post_dict = {str(post.id): post for post in posts}
-    root_posts = []
-
-    for post in posts:
-        # Get reaction counts
-        reaction_counts = {}
-        for reaction in post.reactions:
-            reaction_type = reaction.reaction_type.value
-            reaction_counts[reaction_type] = reaction_counts.get(reaction_type, 0) + 1
-
-        # Get user's reaction (only if logged in)
-        user_reaction = None
-        if current_user_id:
-            for reaction in post.reactions:
-                if str(reaction.user_id) == current_user_id:
-                    user_reaction = reaction.reaction_type.value
-                    break
-
-        # Count direct replies
-        reply_count = len([p for p in posts if p.parent_post_id == post.id])
-
-        # Check permissions (only if logged in)
-        can_edit = current_user_id and str(post.user_id) == current_user_id and not post.is_deleted
-        can_delete = False
-        if current_user_id:
-            can_delete = str(post.user_id) == current_user_id or db.query(User).filter(
-                User.id == current_user_id, User.is_admin == True
-            ).first() is not None
-
-        # Build post data
-        post_data = {
-            "id": str(post.id),
-            "thread_id": str(post.thread_id),
+
+def _category_response(category: ForumCategory) -> dict:
+    """Category with its denormalized stats (latest_thread and its user should be eager-loaded)."""
+    latest_thread = category.latest_thread
+    return {
+        "id": str(category.id),
+        "name": category.name,
+        "slug": category.slug,
+        "description": category.description,
+        "icon": category.icon,
+        "order": category.order,
+        "is_active": category.is_active,
+        "created_at": category.created_at,
+        "updated_at": category.updated_at,
+        "thread_count": category.thread_count,
+        "post_count": category.post_count,
+        "latest_thread": {
+            "id": str(latest_thread.id),
+            "title": latest_thread.title,
+            "slug": latest_thread.slug,
             "user": {
-                "id": str(post.user.id),
-                "name": post.user.name,
-                "membership_tier": post.user.membership_tier.value,
+                "id": str(latest_thread.user.id),
+                "name": latest_thread.user.name,
+                "membership_tier": latest_thread.user.membership_tier.value,
             },
-            "parent_post_id": str(post.parent_post_id) if post.parent_post_id else None,
-            "content": post.content if not post.is_deleted else "[This post has been deleted]",
-            "is_deleted": post.is_deleted,
-            "is_edited": post.is_edited,
-            "created_at": post.created_at,
-            "updated_at": post.updated_at,
-            "edited_at": post.edited_at,
-            "reaction_counts": reaction_counts,
-            "user_reaction": user_reaction,
-            "reply_count": reply_count,
-            "replies": [],
-            "attachments": [
-                {
-                    "id": str(att.id),
-                    "file_url": att.file_url,
-                    "file_name": att.file_name,
-                    "file_type": att.file_type,
-                    "file_size": att.file_size,
-                    "created_at": att.created_at,
-                }
-                for att in post.attachments
-            ],
-            "can_edit": can_edit,
-            "can_delete": can_delete,
-        }
-
-        if post.parent_post_id is None:
-            root_posts.append(post_data)
-        else:
-            parent_id = str(post.parent_post_id)
-            if parent_id in post_dict:
-                parent_data = next((p for p in root_posts if p["id"] == parent_id), None)
-                if parent_data:
-                    parent_data["replies"].append(post_data)
-
-    return root_posts
+            "is_pinned": latest_thread.is_pinned,
+            "is_locked": latest_thread.is_locked,
+            "view_count": latest_thread.view_count,
+            "post_count": latest_thread.post_count,
+            "created_at": latest_thread.created_at,
+            "last_post_at": latest_thread.last_post_at,
+        } if latest_thread else None,
+    }
 
 
 # ============================================================================
@@ -217,57 +176,14 @@ def get_categories(
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """Get all active forum categories with thread counts (public endpoint)."""
-    categories = db.query(ForumCategory).filter(
+    # Counters and the latest thread are denormalized onto the category: one query
+    categories = db.query(ForumCategory).options(
+        joinedload(ForumCategory.latest_thread).joinedload(ForumThread.user)
+    ).filter(
         ForumCategory.is_active == True
     ).order_by(ForumCategory.order).all()
 
-    category_data = []
-    for category in categories:
-        # Count threads
-        thread_count = db.query(func.count(ForumThread.id)).filter(
-            ForumThread.category_id == category.id
-        ).scalar() or 0
-
-        # Count posts in threads
-        post_count = db.query(func.count(ForumPost.id)).join(
-            ForumThread, ForumPost.thread_id == ForumThread.id
-        ).filter(ForumThread.category_id == category.id).scalar() or 0
-
-        # Get latest thread
-        latest_thread = db.query(ForumThread).filter(
-            ForumThread.category_id == category.id
-        ).order_by(desc(ForumThread.last_post_at)).first()
-
-        category_response = {
-            "id": str(category.id),
-            "name": category.name,
-            "slug": category.slug,
-            "description": category.description,
-            "icon": category.icon,
-            "order": category.order,
-            "is_active": category.is_active,
-            "created_at": category.created_at,
-            "updated_at": category.updated_at,
-            "thread_count": thread_count,
-            "post_count": post_count,
-            "latest_thread": {
-                "id": str(latest_thread.id),
-                "title": latest_thread.title,
-                "slug": latest_thread.slug,
-                "user": {
-                    "id": str(latest_thread.user.id),
-                    "name": latest_thread.user.name,
-                    "membership_tier": latest_thread.user.membership_tier.value,
-                },
-                "is_pinned": latest_thread.is_pinned,
-                "is_locked": latest_thread.is_locked,
-                "view_count": latest_thread.view_count,
-                "post_count": latest_thread.post_count,
-                "created_at": latest_thread.created_at,
-                "last_post_at": latest_thread.last_post_at,
-            } if latest_thread else None,
-        }
-        category_data.append(category_response)
+    category_data = [_category_response(category) for category in categories]
 
     return {"categories": category_data, "total": len(category_data)}
 
@@ -325,64 +241,44 @@ def get_category(
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """Get a single category by ID (public endpoint)."""
-    category = db.query(ForumCategory).filter(ForumCategory.id == category_id).first()
+    category = db.query(ForumCategory).options(
+        joinedload(ForumCategory.latest_thread).joinedload(ForumThread.user)
+    ).filter(ForumCategory.id == category_id).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    # Count threads and posts
-    thread_count = db.query(func.count(ForumThread.id)).filter(
-        ForumThread.category_id == category.id
-    ).scalar() or 0
+    return _category_response(category)
 
-    post_count = db.query(func.count(ForumPost.id)).join(
-        ForumThread, ForumPost.thread_id == ForumThread.id
-    ).filter(ForumThread.category_id == category.id).scalar() or 0
 
-    latest_thread = db.query(ForumThread).filter(
-        ForumThread.category_id == category.id
-    ).order_by(desc(ForumThread.last_post_at)).first()
-
-    return {
-        "id": str(category.id),
-        "name": category.name,
-        "slug": category.slug,
-        "description": category.description,
-        "icon": category.icon,
-        "order": category.order,
-        "is_active": category.is_active,
-        "created_at": category.created_at,
-        "updated_at": category.updated_at,
-        "thread_count": thread_count,
-        "post_count": post_count,
-        "latest_thread": {
-            "id": str(latest_thread.id),
-            "title": latest_thread.title,
-            "slug": latest_thread.slug,
-            "user": {
-                "id": str(latest_thread.user.id),
-                "name": latest_thread.user.name,
-                "membership_tier": latest_thread.user.membership_tier.value,
-            },
-            "is_pinned": latest_thread.is_pinned,
-            "is_locked": latest_thread.is_locked,
-            "view_count": latest_thread.view_count,
-            "post_count": latest_thread.post_count,
-            "created_at": latest_thread.created_at,
-            "last_post_at": latest_thread.last_post_at,
-        } if latest_thread else None,
-    }
+@router.post("/categories/reconcile-stats")
+def reconcile_category_stats(
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin),
+):
+    """Recompute category thread/post counts and latest threads, repairing drift (admin only)."""
+    repaired = forum_stats.reconcile(db)
+    return {"repaired": repaired, "total": len(repaired)}
 
 
 # ============================================================================
 # THREAD ENDPOINTS
 # ============================================================================
 
+THREAD_SORT_KEYS = (
+    SortKey(ForumThread.is_pinned),
+    SortKey(ForumThread.last_post_at),
+    SortKey(ForumThread.id),
+)
+
+
 @router.get("/threads", response_model=ForumThreadListResponse)
 def get_threads(
     category_id: Optional[str] = None,
     search: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total: exact, estimate or none"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
@@ -397,14 +293,14 @@ def get_threads(
     if search:
         query = query.filter(ForumThread.title.ilike(f"%{search}%"))
 
-    # Order: pinned first, then by last post date
-    query = query.order_by(desc(ForumThread.is_pinned), desc(ForumThread.last_post_at))
-
     # Count total
-    total = query.count()
+    total = count_rows(query, count)
 
-    # Paginate
-    threads = query.offset(skip).limit(limit).all()
+    # Paginate: pinned first, then by last post date
+    try:
+        threads, next_cursor = keyset_page(query, THREAD_SORT_KEYS, limit, cursor=cursor, skip=skip)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     thread_summaries = [
         {
@@ -431,7 +327,8 @@ def get_threads(
         "total": total,
         "page": skip // limit + 1,
         "page_size": limit,
-        "total_pages": (total + limit - 1) // limit,
+        "total_pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
     }
 
 
@@ -480,6 +377,9 @@ def create_thread(
     # Update thread post count
     db_thread.post_count = 1
 
+    # Update category stats in the same transaction
+    forum_stats.thread_created(db, db_thread)
+
     db.commit()
     db.refresh(db_thread)
 
@@ -506,26 +406,33 @@ def create_thread(
 @router.get("/threads/{thread_id}", response_model=ForumThreadDetail)
 def get_thread(
     thread_id: str,
+    posts_limit: Optional[int] = Query(None, ge=1, le=100, description="Top-level posts per page (with all their replies); every post when omitted"),
+    posts_cursor: Optional[str] = Query(None, description="next_posts_cursor from the previous page"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """Get thread details with all posts (public endpoint, but posting requires auth)."""
-    thread = db.query(ForumThread).filter(ForumThread.id == thread_id).first()
+    # Increment view count (first page only)
+    if not posts_cursor:
+        db.query(ForumThread).filter(ForumThread.id == thread_id).update(
+            {ForumThread.view_count: ForumThread.view_count + 1}, synchronize_session=False
+        )
+        db.commit()
+
+    thread = db.query(ForumThread).options(
+        joinedload(ForumThread.user), joinedload(ForumThread.category)
+    ).filter(ForumThread.id == thread_id).first()
     if not thread:
         raise HTTPException(status_code=404, detail="Thread not found")
 
-    # Increment view count
-    thread.view_count += 1
-    db.commit()
-
-    # Get all posts for this thread
-    posts = db.query(ForumPost).filter(
-        ForumPost.thread_id == thread_id
-    ).order_by(ForumPost.created_at).all()
+    # Get the posts (or one page of top-level posts with their replies)
+    try:
+        posts, next_posts_cursor = load_thread_posts(db, thread.id, posts_limit, posts_cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Build nested structure
-    current_user_id = str(current_user.id) if current_user else None
-    nested_posts = build_nested_posts(posts, current_user_id, db)
+    nested_posts = build_nested_posts(db, posts, current_user)
 
     return {
         "id": str(thread.id),
@@ -545,6 +452,7 @@ def get_thread(
         "category": thread.category,
         "updated_at": thread.updated_at,
         "posts": nested_posts,
+        "next_posts_cursor": next_posts_cursor,
     }
 
 
@@ -565,6 +473,7 @@ def update_thread(
         raise HTTPException(status_code=403, detail="Not authorized to edit this thread")
 
     # Update fields
+    old_category_id = thread.category_id
     update_data = thread_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         if field == "title":
@@ -572,6 +481,11 @@ def update_thread(
             thread.slug = slugify(value)
         setattr(thread, field, value)
 
+    # Moving the thread moves its counts to the new category
+    if "category_id" in update_data:
+        db.flush()
+        forum_stats.thread_moved(db, thread, old_category_id)
+
     db.commit()
     db.refresh(thread)
 
@@ -593,6 +507,7 @@ def delete_thread(
     if str(thread.user_id) != str(current_user.id) and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete this thread")
 
+    forum_stats.thread_deleted(db, thread)
     db.delete(thread)
     db.commit()
 
@@ -708,9 +623,10 @@ def create_post(
             )
             db.add(mention)
 
-    # Update thread stats
+    # Update thread and category stats
     thread.post_count += 1
     thread.last_post_at = datetime.utcnow()
+    forum_stats.post_created(db, thread)
 
     db.commit()
     db.refresh(db_post)
@@ -790,7 +706,7 @@ def delete_post(
     if str(post.user_id) != str(current_user.id) and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
 
-    # Soft delete
+    # Soft delete (the post stays in the thread and category post counts)
     post.is_deleted = True
     post.content = "[This post has been deleted]"
 
@@ -987,6 +903,8 @@ def unban_user(
         db.delete(ban)
 
     db.commit()
+    # Deleted bans no longer name their user in the change feed
+    principal_cache.invalidate(user_id)
 
 
 # ============================================================================
@@ -24,7 +24,9 @@ from app.schemas.hidden_tag import (
     HiddenTagReorderBulk,
     HiddenTagWithEntity,
 )
+from app.services.hidden_tag_pages import hidden_tag_pages
 from app.services.media_service import MediaService
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
@@ -67,118 +69,8 @@ async def get_page_tags_with_entities(
     Example: GET /api/hidden-tags/page/homepage/teachings
     Returns teachings with full data (title, thumbnail, etc.)
     """
-    query = db.query(HiddenTag).filter(HiddenTag.page_tag == page_tag)
-
-    if entity_type:
-        query = query.filter(HiddenTag.entity_type == entity_type)
-
-    tags = query.order_by(HiddenTag.order_index.asc()).all()
-
-    # Initialize media service for CDN URL resolution
-    media_service = MediaService(db)
-
-    # Enrich with entity data
-    result = []
-    for tag in tags:
-        entity_data = {}
-
-        # Fetch the actual entity based on type
-        if tag.entity_type == EntityType.TEACHING:
-            teaching = db.query(Teaching).filter(Teaching.id == tag.entity_id).first()
-            if teaching:
-                entity_data = {
-                    "id": str(teaching.id),
-                    "slug": teaching.slug,
-                    "title": teaching.title,
-                    "description": teaching.description,
-                    "thumbnail_url": teaching.thumbnail_url,
-                    "duration": teaching.duration,
-                    "published_date": teaching.published_date.isoformat() if teaching.published_date else None,
-                    "access_level": teaching.access_level,
-                }
-
-        elif tag.entity_type == EntityType.BLOG:
-            blog = db.query(BlogPost).filter(BlogPost.id == tag.entity_id).first()
-            if blog:
-                entity_data = {
-                    "id": str(blog.id),
-                    "slug": blog.slug,
-                    "title": blog.title,
-                    "excerpt": blog.excerpt,
-                    "featured_image": blog.featured_image,
-                    "author_name": blog.author_name,
-                    "author_image": blog.author_image,
-                    "category": {"id": str(blog.category.id), "name": blog.category.name, "slug": blog.category.slug} if blog.category else None,
-                    "read_time": blog.read_time,
-                    "published_at": blog.published_at.isoformat() if blog.published_at else None,
-                }
-
-        elif tag.entity_type == EntityType.PRODUCT:
-            product = db.query(Product).filter(Product.id == tag.entity_id).first()
-            if product:
-                entity_data = {
-                    "id": str(product.id),
-                    "slug": product.slug,
-                    "name": product.name,
-                    "title": product.name,
-                    "description": product.description,
-                    "short_description": product.short_description,
-                    "price": float(product.price) if product.price else None,
-                    "featured_image": product.featured_image,
-                    "type": product.type.value if hasattr(product.type, 'value') else product.type,
-                    "categories": product.categories,
-                    "featured": product.featured,
-                }
-
-        elif tag.entity_type == EntityType.RETREAT:
-            retreat = db.query(Retreat).filter(Retreat.id == tag.entity_id).first()
-            if retreat:
-                entity_data = {
-                    "id": str(retreat.id),
-                    "slug": retreat.slug,
-                    "title": retreat.title,
-                    "description": retreat.description,
-                    "short_description": retreat.short_description,
-                    "featured_image": retreat.featured_image,
-                    "start_date": retreat.start_date.isoformat() if retreat.start_date else None,
-                    "end_date": retreat.end_date.isoformat() if retreat.end_date else None,
-                    "location": retreat.location,
-                    "retreat_type": retreat.retreat_type,
-                    "price": float(retreat.price) if retreat.price else None,
-                }
-
-        elif tag.entity_type == EntityType.EVENT:
-            event = db.query(Event).filter(Event.id == tag.entity_id).first()
-            if event:
-                entity_data = {
-                    "id": str(event.id),
-                    "slug": event.slug,
-                    "title": event.title,
-                    "description": event.description,
-                    "event_type": event.event_type,
-                    "start_time": event.start_time.isoformat() if event.start_time else None,
-                    "end_time": event.end_time.isoformat() if event.end_time else None,
-                    "location": event.location,
-                    "is_online": event.is_online,
-                }
-
-        # Resolve media paths to CDN URLs
-        entity_data = media_service.resolve_dict(entity_data)
-
-        # Build response
-        tag_response = HiddenTagWithEntity(
-            id=tag.id,
-            entity_id=tag.entity_id,
-            entity_type=tag.entity_type,
-            page_tag=tag.page_tag,
-            order_index=tag.order_index,
-            created_at=tag.created_at,
-            updated_at=tag.updated_at,
-            entity_data=entity_data,
-        )
-        result.append(tag_response)
-
-    return result
+    items = hidden_tag_pages.get_page(db, page_tag, entity_type)
+    return [HiddenTagWithEntity(**item) for item in items]
 
 
 @router.get("/{tag_id}", response_model=HiddenTagResponse)
@@ -244,6 +136,7 @@ async def create_hidden_tag(
     tag = HiddenTag(**tag_data.model_dump())
     db.add(tag)
     db.commit()
+    response_cache.purge("hidden-tags")
     db.refresh(tag)
 
     return tag
@@ -274,6 +167,7 @@ async def create_hidden_tags_bulk(
             created_tags.append(tag)
 
     db.commit()
+    response_cache.purge("hidden-tags")
 
     for tag in created_tags:
         db.refresh(tag)
@@ -303,6 +197,7 @@ async def update_hidden_tag(
         setattr(tag, field, value)
 
     db.commit()
+    response_cache.purge("hidden-tags")
     db.refresh(tag)
 
     return tag
@@ -327,6 +222,7 @@ async def reorder_tags(
             tag.order_index = reorder.new_order_index
 
     db.commit()
+    response_cache.purge("hidden-tags")
 
     return {"message": f"Reordered {len(reorder_data.reorders)} tags successfully"}
 
@@ -348,6 +244,7 @@ async def delete_hidden_tag(
 
     db.delete(tag)
     db.commit()
+    response_cache.purge("hidden-tags")
 
 
 @router.get("/available/{entity_type}")
@@ -3,7 +3,7 @@ Products API Router
 Handles product listing, filtering, categories, and CRUD operations
 """
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func
 
@@ -12,6 +12,7 @@ from app.models.user import User
 from app.models.product import Product, ProductType, ProductBookmark, UserProductAccess, Testimonial
 from app.models.retreat import Retreat, RetreatPortal
 from app.schemas.product import ProductResponse, ProductCreate, ProductUpdate
+from app.services.conditional_get import conditional_get, content_version, query_version
 from app.services.media_service import MediaService
 
 router = APIRouter()
@@ -19,6 +20,8 @@ router = APIRouter()
 
 @router.get("/")
 async def get_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
     category: Optional[str] = None,
@@ -94,6 +97,11 @@ async def get_products(
     else:
         query = query.order_by(order_col.asc())
 
+    # Answer If-None-Match from a cheap aggregate before loading the page
+    not_modified = conditional_get(request, response, query_version(query, Product.updated_at), content_version("media"))
+    if not_modified:
+        return not_modified
+
     # Pagination
     products = query.offset(skip).limit(limit).all()
 
@@ -119,12 +127,10 @@ async def get_products(
             "created_at": product.created_at.isoformat() if product.created_at else None,
             "portal_media": product.portal_media,  # Include portal media for retreat packages
         }
-
-        # Resolve all media paths to CDN URLs
-        product_data = media_service.resolve_dict(product_data)
         result.append(product_data)
 
-    return result
+    # Resolve all media paths to CDN URLs in one batch
+    return media_service.resolve_many(result)
 
 
 @router.get("/categories")
@@ -186,12 +192,10 @@ async def get_featured_products(
             "created_at": product.created_at.isoformat() if product.created_at else None,
             "portal_media": product.portal_media,  # Include portal media for retreat packages
         }
-
-        # Resolve all media paths to CDN URLs
-        product_data = media_service.resolve_dict(product_data)
         result.append(product_data)
 
-    return result
+    # Resolve all media paths to CDN URLs in one batch
+    return media_service.resolve_many(result)
 
 
 @router.get("/retreat-packages")
@@ -231,12 +235,10 @@ async def get_retreat_packages(
             "created_at": product.created_at.isoformat() if product.created_at else None,
             "portal_media": product.portal_media,  # Include portal media for retreat packages
         }
-
-        # Resolve all media paths to CDN URLs
-        product_data = media_service.resolve_dict(product_data)
         result.append(product_data)
 
-    return result
+    # Resolve all media paths to CDN URLs in one batch
+    return media_service.resolve_many(result)
 
 
 @router.get("/{slug}")
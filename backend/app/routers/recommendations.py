@@ -7,8 +7,9 @@ from datetime import datetime
 import uuid
 
 from ..core.database import get_db
+from ..core import access_policy
 from ..core.deps import get_current_user, require_admin
-from ..models.user import User, MembershipTierEnum
+from ..models.user import User
 from ..models.recommendation import Recommendation, RecommendationType
 from ..schemas.recommendation import (
     RecommendationCreate,
@@ -30,14 +31,7 @@ def user_can_access_recommendations(user: Optional[User]) -> bool:
     Returns:
         bool: True if user has GYANI+ access, False otherwise
     """
-    if not user:
-        return False
-
-    return user.membership_tier in [
-        MembershipTierEnum.GYANI,
-        MembershipTierEnum.PRAGYANI,
-        MembershipTierEnum.PRAGYANI_PLUS
-    ]
+    return access_policy.has_tier(user, access_policy.GYANI_AND_ABOVE)
 
 
 # ============================================================================
@@ -1,12 +1,15 @@
 """Retreats router with registration and portal access."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from ..core.database import get_db
-from ..core.deps import get_current_user, get_optional_user, get_current_admin
+from ..core.database import get_async_db, get_db
+from ..core.pagination import InvalidCursor
+from ..core.deps import get_current_user, get_optional_user, get_optional_user_async, get_current_admin
 from ..models.user import User
 from ..services.media_service import MediaService
 from ..models.retreat import (
@@ -39,7 +42,7 @@ from ..schemas.retreat import (
     PublishToStoreRequest,
     PublishToStoreResponse,
 )
-from ..services import mixpanel_service
+from ..services import mixpanel_service, retreat_forum
 
 router = APIRouter()
 
@@ -114,24 +117,33 @@ async def get_retreats(
     skip: int = 0,
     limit: int = 50,
     retreat_type: Optional[RetreatType] = None,
-    user: Optional[User] = Depends(get_optional_user),
-    db: Session = Depends(get_db),
+    user: Optional[User] = Depends(get_optional_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all published retreats."""
-    query = db.query(Retreat).filter(Retreat.is_published == True)
+    query = select(Retreat).where(Retreat.is_published == True)
 
     # Filter by type if specified
     if retreat_type:
-        query = query.filter(Retreat.type == retreat_type)
-
-    # Order by start date (upcoming first, then by created date)
-    query = query.order_by(Retreat.start_date.asc())
-
-    retreats = query.offset(skip).limit(limit).all()
-    total = query.count()
-
-    # Initialize media service to resolve image paths to CDN URLs
-    media_service = MediaService(db)
+        query = query.where(Retreat.type == retreat_type)
+
+    retreats = (await db.scalars(
+        # Order by start date (upcoming first, then by created date)
+        query.order_by(Retreat.start_date.asc()).offset(skip).limit(limit)
+    )).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    # The user's registrations for this page, in one query
+    registrations = {}
+    if user and retreats:
+        rows = await db.scalars(
+            select(RetreatRegistration).where(
+                RetreatRegistration.user_id == user.id,
+                RetreatRegistration.retreat_id.in_([retreat.id for retreat in retreats]),
+            )
+        )
+        for registration in rows:
+            registrations.setdefault(registration.retreat_id, registration)
 
     # Build response
     result = []
@@ -177,27 +189,17 @@ async def get_retreats(
             "images": retreat.images,
         }
 
-        # Check registration if user is logged in
-        if user:
-            registration = (
-                db.query(RetreatRegistration)
-                .filter(
-                    RetreatRegistration.user_id == user.id,
-                    RetreatRegistration.retreat_id == retreat.id,
-                )
-                .first()
-            )
-
-            if registration:
-                retreat_data["is_registered"] = True
-                retreat_data["registration_status"] = registration.status.value
-                retreat_data["access_type"] = registration.access_type.value if registration.access_type else None
-
-        # Resolve all image paths to CDN URLs
-        retreat_data = media_service.resolve_dict(retreat_data)
+        registration = registrations.get(retreat.id)
+        if registration:
+            retreat_data["is_registered"] = True
+            retreat_data["registration_status"] = registration.status.value
+            retreat_data["access_type"] = registration.access_type.value if registration.access_type else None
 
         result.append(retreat_data)
 
+    # Resolve all image paths to CDN URLs
+    result = await db.run_sync(lambda session: MediaService(session).resolve_many(result))
+
     return {"retreats": result, "total": total, "skip": skip, "limit": limit}
 
 
@@ -694,66 +696,21 @@ async def get_retreat_members(
 # FORUM ENDPOINTS
 # ============================================================================
 
-def get_post_like_info(post_id: str, user_id: str, db: Session) -> tuple[int, bool]:
-    """Get like count and whether current user has liked a post."""
-    like_count = db.query(RetreatForumPostLike).filter(
-        RetreatForumPostLike.post_id == post_id
-    ).count()
-
-    is_liked = db.query(RetreatForumPostLike).filter(
-        RetreatForumPostLike.post_id == post_id,
-        RetreatForumPostLike.user_id == user_id
-    ).first() is not None
-
-    return like_count, is_liked
-
-
-def get_nested_replies(post_id: str, user_id: str, db: Session) -> list:
-    """Recursively get all nested replies for a post."""
-    replies = (
-        db.query(RetreatForumPost)
-        .filter(RetreatForumPost.parent_id == post_id)
-        .order_by(RetreatForumPost.created_at.asc())
-        .all()
-    )
-
-    replies_data = []
-    for reply in replies:
-        reply_user = db.query(User).filter(User.id == reply.user_id).first()
-        reply_like_count, reply_is_liked = get_post_like_info(str(reply.id), user_id, db)
-
-        # Recursively get nested replies
-        nested_replies = get_nested_replies(str(reply.id), user_id, db)
-
-        replies_data.append({
-            "id": str(reply.id),
-            "retreat_id": str(reply.retreat_id),
-            "user_id": str(reply.user_id),
-            "parent_id": str(reply.parent_id) if reply.parent_id else None,
-            "title": reply.title,
-            "category": reply.category.value if reply.category else None,
-            "content": reply.content,
-            "created_at": reply.created_at.isoformat(),
-            "updated_at": reply.updated_at.isoformat(),
-            "user_name": reply_user.name if reply_user else "Unknown",
-            "user_photo": reply_user.profile.avatar_url if (reply_user and reply_user.profile) else None,
-            "like_count": reply_like_count,
-            "is_liked_by_user": reply_is_liked,
-            "replies": nested_replies
-        })
-
-    return replies_data
-
-
 @router.get("/{slug}/forum", response_model=dict)
 async def get_forum_posts(
     slug: str,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Get forum posts for a retreat (only for registered users)."""
+    """
+    Get forum posts for a retreat (only for registered users).
+
+    Pages by top-level post, newest first; each post carries its full reply
+    tree. Pass `next_cursor` back as `cursor` to fetch the following page.
+    """
     # Get retreat
     retreat = db.query(Retreat).filter(Retreat.slug == slug).first()
     if not retreat:
@@ -790,57 +747,26 @@ async def get_forum_posts(
             detail="Forum is not yet available for this retreat"
         )
 
-    # Get top-level posts (no parent)
-    posts = (
-        db.query(RetreatForumPost)
-        .filter(
-            RetreatForumPost.retreat_id == retreat.id,
-            RetreatForumPost.parent_id == None
+    try:
+        posts, replies, next_cursor = retreat_forum.load_forum_page(
+            db, retreat.id, limit, skip=skip, cursor=cursor
         )
-        .order_by(RetreatForumPost.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     total = db.query(RetreatForumPost).filter(
         RetreatForumPost.retreat_id == retreat.id,
         RetreatForumPost.parent_id == None
     ).count()
 
-    # Build response with user data and replies
-    result = []
-    for post in posts:
-        user = db.query(User).filter(User.id == post.user_id).first()
-
-        # Get all nested replies recursively
-        replies_data = get_nested_replies(str(post.id), str(current_user.id), db)
-
-        # Get like info for the post
-        post_like_count, post_is_liked = get_post_like_info(str(post.id), str(current_user.id), db)
-
-        result.append({
-            "id": str(post.id),
-            "retreat_id": str(post.retreat_id),
-            "user_id": str(post.user_id),
-            "parent_id": None,
-            "title": post.title,
-            "category": post.category.value if post.category else None,
-            "content": post.content,
-            "created_at": post.created_at.isoformat(),
-            "updated_at": post.updated_at.isoformat(),
-            "user_name": user.name if user else "Unknown",
-            "user_photo": user.profile.avatar_url if (user and user.profile) else None,
-            "like_count": post_like_count,
-            "is_liked_by_user": post_is_liked,
-            "replies": replies_data
-        })
+    result = retreat_forum.build_forum_tree(db, posts, replies, current_user.id)
 
     return {
         "posts": result,
         "total": total,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor,
     }
 
 
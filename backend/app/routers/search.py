@@ -3,10 +3,12 @@ Unified Search API
 Search across teachings, courses, products, retreats, and static pages
 """
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
 from typing import Dict, Any, List, Optional
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
+from app.core.db_runtime import statement_timeout
 from app.models.teaching import Teaching
 from app.models.course import Course
 from app.models.product import Product
@@ -14,6 +16,9 @@ from app.models.retreat import Retreat
 from app.models.static_content import PageSection, SectionContent
 from app.models.blog import BlogPost
 from app.services.media_service import MediaService
+from app.services.search_service import SearchService
+from app.services.search_index import highlight_snippet, search_index
+from app.services.suggestions import suggestion_trie
 
 router = APIRouter()
 
@@ -136,15 +141,35 @@ def get_static_navigation_pages():
     ]
 
 
-@router.get("")
+def format_page_result(page: Dict[str, str], score: Optional[float] = None, snippet: Optional[str] = None) -> Dict[str, Any]:
+    """Shape a static navigation page like the other search results"""
+    return {
+        "id": page["page_slug"],
+        "title": page["title"],
+        "description": page["description"],
+        "thumbnail_url": None,
+        "slug": page["page_slug"],
+        "url": page["url"],
+        "type": "page",
+        "eyebrow": None,
+        "score": score,
+        "snippet": snippet
+    }
+
+
+# Search-as-you-type: give up on a slow query rather than hold a connection
+@router.get("", dependencies=[Depends(statement_timeout(5_000))])
 async def search(
     q: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(5, ge=1, le=20, description="Results per category"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Unified search across all content types
 
+    Results are ranked by relevance where full-text search is available; each
+    result includes a `score` and a highlighted `snippet` (null otherwise).
+
     Searches:
     - Teachings (title, description, category)
     - Courses (title, description)
@@ -154,154 +179,37 @@ async def search(
     - Static Pages (page headings, descriptions)
     """
 
-    search_pattern = f"%{q}%"
-    media_service = MediaService(db)
-
-    # ===== SEARCH TEACHINGS =====
-    teachings_query = db.query(Teaching).filter(
-        or_(
-            Teaching.title.ilike(search_pattern),
-            Teaching.description.ilike(search_pattern),
-            Teaching.category.ilike(search_pattern)
-        )
-    ).limit(limit).all()
-
-    teachings_results = [
-        {
-            "id": t.id,
-            "title": t.title,
-            "description": t.description[:150] + "..." if t.description and len(t.description) > 150 else t.description,
-            "thumbnail_url": media_service.resolve_url(t.thumbnail_url) if t.thumbnail_url else None,
-            "slug": t.slug,
-            "url": f"/teachings/{t.slug}",
-            "type": "teaching",
-            "category": t.category
-        }
-        for t in teachings_query
-    ]
-
-    # ===== SEARCH COURSES =====
-    courses_query = db.query(Course).filter(
-        or_(
-            Course.title.ilike(search_pattern),
-            Course.description.ilike(search_pattern)
-        ),
-        Course.is_published == True
-    ).limit(limit).all()
-
-    courses_results = [
-        {
-            "id": c.id,
-            "title": c.title,
-            "description": c.description[:150] + "..." if c.description and len(c.description) > 150 else c.description,
-            "thumbnail_url": media_service.resolve_url(c.thumbnail_url) if c.thumbnail_url else None,
-            "slug": c.slug,
-            "url": f"/courses/{c.slug}",
-            "type": "course",
-            "price": float(c.price) if c.price else None
-        }
-        for c in courses_query
-    ]
-
-    # ===== SEARCH PRODUCTS =====
-    products_query = db.query(Product).filter(
-        or_(
-            Product.title.ilike(search_pattern),
-            Product.description.ilike(search_pattern),
-            Product.short_description.ilike(search_pattern)
-        ),
-        Product.published == True
-    ).limit(limit).all()
-
-    products_results = [
-        {
-            "id": p.id,
-            "title": p.title,
-            "description": p.short_description[:150] + "..." if p.short_description and len(p.short_description) > 150 else p.short_description,
-            "thumbnail_url": media_service.resolve_url(p.thumbnail_url) if p.thumbnail_url else None,
-            "slug": p.slug,
-            "url": f"/store/{p.slug}",
-            "type": "product",
-            "price": float(p.price) if p.price else None
-        }
-        for p in products_query
-    ]
-
-    # ===== SEARCH RETREATS =====
-    retreats_query = db.query(Retreat).filter(
-        or_(
-            Retreat.title.ilike(search_pattern),
-            Retreat.description.ilike(search_pattern)
-        ),
-        Retreat.is_published == True
-    ).limit(limit).all()
-
-    retreats_results = [
-        {
-            "id": r.id,
-            "title": r.title,
-            "description": r.description[:150] + "..." if r.description and len(r.description) > 150 else r.description,
-            "thumbnail_url": media_service.resolve_url(r.thumbnail_url) if r.thumbnail_url else None,
-            "slug": r.slug,
-            "url": f"/retreats/online/{r.slug}" if r.type == "online" else f"/retreats/ashram",
-            "type": "retreat",
-            "retreat_type": r.type,
-            "price": float(r.price_lifetime) if r.price_lifetime else None
-        }
-        for r in retreats_query
-    ]
-
-    # ===== SEARCH BLOG POSTS =====
-    blogs_query = db.query(BlogPost).filter(
-        or_(
-            BlogPost.title.ilike(search_pattern),
-            BlogPost.excerpt.ilike(search_pattern),
-            BlogPost.content.ilike(search_pattern)
-        ),
-        BlogPost.is_published == True
-    ).limit(limit).all()
-
-    blogs_results = [
-        {
-            "id": b.id,
-            "title": b.title,
-            "description": b.excerpt[:150] + "..." if b.excerpt and len(b.excerpt) > 150 else b.excerpt,
-            "thumbnail_url": media_service.resolve_url(b.featured_image) if b.featured_image else None,
-            "slug": b.slug,
-            "url": f"/blog/{b.slug}",
-            "type": "blog",
-            "author": b.author_name,
-            "read_time": b.read_time
-        }
-        for b in blogs_query
-    ]
+    # ===== SEARCH CONTENT TABLES =====
+    # One ranked full-text query on PostgreSQL, the in-process index elsewhere
+    content_results = await db.run_sync(lambda session: SearchService(session).search(q, limit))
+    teachings_results = content_results["teachings"]
+    courses_results = content_results["courses"]
+    products_results = content_results["products"]
+    retreats_results = content_results["retreats"]
+    blogs_results = content_results["blogs"]
 
     # ===== SEARCH STATIC PAGES =====
     # Get all static navigation pages (hardcoded)
     all_static_pages = get_static_navigation_pages()
 
-    # Filter static pages by search pattern
     pages_results = []
-    for page in all_static_pages:
-        # Search in page_slug, title, or description
-        if (q.lower() in page["page_slug"].lower() or
-            q.lower() in page["title"].lower() or
-            q.lower() in page["description"].lower()):
-
-            pages_results.append({
-                "id": page["page_slug"],
-                "title": page["title"],
-                "description": page["description"],
-                "thumbnail_url": None,
-                "slug": page["page_slug"],
-                "url": page["url"],
-                "type": "page",
-                "eyebrow": None
-            })
-
-            # Limit results
-            if len(pages_results) >= limit:
-                break
+    if search_index.is_ready:
+        # Ranked match from the in-process index (pages are indexed at startup)
+        for slug, score, page in search_index.search(q, limit).get("pages", []):
+            pages_results.append(format_page_result(page, score=round(score, 4), snippet=highlight_snippet(page["description"], q)))
+    else:
+        # Filter static pages by search pattern
+        for page in all_static_pages:
+            # Search in page_slug, title, or description
+            if (q.lower() in page["page_slug"].lower() or
+                q.lower() in page["title"].lower() or
+                q.lower() in page["description"].lower()):
+
+                pages_results.append(format_page_result(page))
+
+                # Limit results
+                if len(pages_results) >= limit:
+                    break
 
     # Calculate total results
     total_results = (
@@ -327,6 +235,25 @@ async def search(
     }
 
 
+@router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, description="Partial query as typed"),
+    limit: int = Query(8, ge=1, le=10, description="Number of completions"),
+) -> Dict[str, Any]:
+    """
+    Typeahead completions for the search box
+
+    Matches the start of any word in titles, categories, topics and tags, ranked
+    by popularity. Served from an in-memory trie that is (re)built in the
+    background; until the first build finishes there are no completions.
+    """
+    suggestion_trie.refresh_in_background()
+    return {
+        "query": q,
+        "suggestions": suggestion_trie.suggest(q, limit)
+    }
+
+
 @router.get("/routes")
 async def get_all_routes(db: Session = Depends(get_db)) -> Dict[str, List[Dict[str, str]]]:
     """
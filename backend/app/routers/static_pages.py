@@ -1,10 +1,11 @@
 """
 Static Pages API - Homepage, About, etc.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.static_content import PageSection, AccordionSection, AccordionItem
+from app.services.conditional_get import conditional_get, content_version, query_version
 from app.services.media_service import MediaService
 from typing import Dict, Any, List
 import json
@@ -24,6 +25,8 @@ def to_camel_case(snake_str: str) -> str:
 @router.get("/{page_slug}")
 async def get_page_content(
     page_slug: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -32,17 +35,29 @@ async def get_page_content(
     Pages: homepage, about-satyoga, about-shunyamurti, about-ashram, etc.
     """
 
-    # Get all sections for this page
-    sections = db.query(PageSection).filter(
+    sections_query = db.query(PageSection).filter(
         PageSection.page_slug == page_slug,
         PageSection.is_active == True
-    ).order_by(PageSection.order_index).all()
+    )
+
+    # Section edits move updated_at; accordion and media changes bump the content version
+    not_modified = conditional_get(
+        request,
+        response,
+        query_version(sections_query, PageSection.updated_at),
+        content_version("pages", f"pages:{page_slug}", "media"),
+    )
+    if not_modified:
+        return not_modified
+
+    # Get all sections for this page
+    sections = sections_query.order_by(PageSection.order_index).all()
 
     if not sections:
         raise HTTPException(status_code=404, detail=f"Page '{page_slug}' not found")
 
-    # Initialize media service
-    media_service = MediaService(db)
+    # Collect media paths while building the page, then resolve them in one batch
+    media = MediaService(db).batch()
 
     # Build response
     result = {}
@@ -80,17 +95,17 @@ async def get_page_content(
                     section_data["description"] = desc
             if content.content:
                 # Process content through media service to resolve image URLs
-                section_data["content"] = media_service.resolve_dict(content.content) if isinstance(content.content, dict) else content.content
+                section_data["content"] = media.dict(content.content) if isinstance(content.content, dict) else content.content
 
             # Video/Hero fields
             if content.video_url:
-                section_data["videoUrl"] = media_service.resolve_url(content.video_url)
+                section_data["videoUrl"] = media.url(content.video_url)
             if content.video_thumbnail:
-                section_data["videoThumbnail"] = media_service.resolve_url(content.video_thumbnail)
+                section_data["videoThumbnail"] = media.url(content.video_thumbnail)
             if content.video_type:
                 section_data["videoType"] = content.video_type
             if content.logo_url:
-                section_data["logoUrl"] = media_service.resolve_url(content.logo_url)
+                section_data["logoUrl"] = media.url(content.logo_url)
             if content.logo_alt:
                 section_data["logoAlt"] = content.logo_alt
             if content.subtitle:
@@ -98,25 +113,25 @@ async def get_page_content(
 
             # Image fields
             if content.image_url:
-                section_data["image"] = media_service.resolve_url(content.image_url)
+                section_data["image"] = media.url(content.image_url)
             if content.image_alt:
                 section_data["imageAlt"] = content.image_alt
             if content.background_image:
-                section_data["backgroundImage"] = media_service.resolve_url(content.background_image)
+                section_data["backgroundImage"] = media.url(content.background_image)
             if content.background_decoration:
-                section_data["backgroundDecoration"] = media_service.resolve_url(content.background_decoration)
+                section_data["backgroundDecoration"] = media.url(content.background_decoration)
 
             # Special handling for ashram section images
             if section.section_slug == "ashram" and content.image_url and content.secondary_images:
                 section_data["images"] = {
-                    "main": media_service.resolve_url(content.image_url),
-                    "secondary": media_service.resolve_list(content.secondary_images)
+                    "main": media.url(content.image_url),
+                    "secondary": media.list(content.secondary_images)
                 }
                 # Remove individual image fields since we're using nested structure
                 section_data.pop("image", None)
                 section_data.pop("imageAlt", None)
             elif content.secondary_images:
-                section_data["secondaryImages"] = media_service.resolve_list(content.secondary_images)
+                section_data["secondaryImages"] = media.list(content.secondary_images)
 
             # CTA fields
             if content.button_text:
@@ -130,7 +145,7 @@ async def get_page_content(
             if content.title_line_height:
                 section_data["titleLineHeight"] = content.title_line_height
             if content.background_elements:
-                section_data["backgroundElements"] = media_service.resolve_dict(content.background_elements)
+                section_data["backgroundElements"] = media.dict(content.background_elements)
 
         # Add tabs if exists
         if section.tabs:
@@ -143,7 +158,7 @@ async def get_page_content(
                     "description": tab.description,
                     "buttonText": tab.button_text,
                     "buttonLink": tab.button_link,
-                    "image": media_service.resolve_url(tab.image_url) if tab.image_url else None
+                    "image": media.url(tab.image_url) if tab.image_url else None
                 }
                 for tab in section.tabs
             ]
@@ -151,7 +166,7 @@ async def get_page_content(
         # Add decorations if exists
         if section.decorations:
             section_data["backgroundDecorations"] = {
-                dec.decoration_key: media_service.resolve_url(dec.decoration_url)
+                dec.decoration_key: media.url(dec.decoration_url)
                 for dec in section.decorations
             }
 
@@ -184,7 +199,7 @@ async def get_page_content(
         section_key = to_camel_case(section.section_slug)
         result[section_key] = section_data
 
-    return result
+    return media.resolve(result)
 
 
 @router.get("/")
@@ -1,13 +1,17 @@
 """Teachings router with membership-aware access control."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
+from sqlalchemy import orm, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from ..core.database import get_db
-from ..core.deps import get_current_user, get_optional_user, require_admin
-from ..models.user import User, MembershipTierEnum
+from ..core.database import get_async_db, get_db
+from ..core import access_policy
+from ..core.deps import get_current_user, get_optional_user_async, require_admin
+from ..core.pagination import COUNT_MODE_PATTERN, InvalidCursor, SortKey, count_rows, keyset_page
+from ..models.user import User
 from ..models.teaching import Teaching, TeachingAccess, TeachingFavorite, TeachingComment, TeachingWatchLater, AccessLevel
 from ..schemas.teaching import (
     CommentCreate,
@@ -20,11 +24,16 @@ from ..schemas.teaching import (
 )
 from ..services import mixpanel_service
 from ..services.media_service import MediaService
+from ..services.response_cache import response_cache
 from ..services.cloudflare_service import CloudflareService
+from ..services.conditional_get import conditional_get, content_version
 import uuid
 
 router = APIRouter()
 
+# Most recent first; undated teachings last, id breaks ties so cursors are unambiguous
+TEACHING_SORT_KEYS = (SortKey(Teaching.published_date, nullable=True), SortKey(Teaching.id))
+
 
 def user_can_access_teaching(user: Optional[User], teaching: Teaching) -> dict:
     """
@@ -34,94 +43,16 @@ def user_can_access_teaching(user: Optional[User], teaching: Teaching) -> dict:
         - can_access: bool
         - access_type: "free" | "preview" | "restricted" | "full"
         - preview_duration: int (minutes) if preview
-    """
-    # Free teachings - everyone can access fully
-    if teaching.access_level == 'free':
-        return {
-            "can_access": True,
-            "access_type": "free",
-            "preview_duration": teaching.preview_duration,
-        }
-
-    # Preview teachings - available as preview for non-logged-in users
-    if teaching.access_level == 'preview':
-        if not user or user.membership_tier == MembershipTierEnum.FREE:
-            # Non-logged in or free users get preview
-            return {
-                "can_access": True,
-                "access_type": "preview",
-                "preview_duration": teaching.preview_duration or 30,
-            }
-        else:
-            # Paid members get full access
-            return {
-                "can_access": True,
-                "access_type": "full",
-                "preview_duration": None,
-            }
-
-    # No user and not free/preview - restricted
-    if not user:
-        return {
-            "can_access": False,
-            "access_type": "restricted",
-            "preview_duration": None,
-        }
 
-    # Gyani teachings - for Gyani tier and above
-    if teaching.access_level == 'gyani':
-        if user.membership_tier in [MembershipTierEnum.GYANI, MembershipTierEnum.PRAGYANI, MembershipTierEnum.PRAGYANI_PLUS]:
-            return {
-                "can_access": True,
-                "access_type": "full",
-                "preview_duration": None,
-            }
-        else:
-            return {
-                "can_access": False,
-                "access_type": "restricted",
-                "preview_duration": None,
-            }
-
-    # Pragyani teachings
-    if teaching.access_level == 'pragyani':
-        if user.membership_tier in [MembershipTierEnum.PRAGYANI, MembershipTierEnum.PRAGYANI_PLUS]:
-            return {
-                "can_access": True,
-                "access_type": "full",
-                "preview_duration": None,
-            }
-        else:
-            return {
-                "can_access": False,
-                "access_type": "restricted",
-                "preview_duration": None,
-            }
-
-    # Pragyani+ teachings
-    if teaching.access_level == 'pragyani_plus':
-        if user.membership_tier == MembershipTierEnum.PRAGYANI_PLUS:
-            return {
-                "can_access": True,
-                "access_type": "full",
-                "preview_duration": None,
-            }
-        else:
-            return {
-                "can_access": False,
-                "access_type": "restricted",
-                "preview_duration": None,
-            }
-
-    return {
-        "can_access": False,
-        "access_type": "restricted",
-        "preview_duration": None,
-    }
+    See core/access_policy.py for the tier × access level table.
+    """
+    return access_policy.evaluate_teaching(user, teaching)
 
 
 @router.get("/")
 async def get_teachings(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     content_type: Optional[str] = None,
     access_level: Optional[str] = None,
@@ -129,13 +60,21 @@ async def get_teachings(
     featured: Optional[str] = None,
     of_the_month: Optional[str] = None,
     pinned: Optional[str] = None,
+    accessible_only: bool = Query(False, description="Only return teachings the user can open"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=1000),  # Increased max limit for teachings page
-    user: Optional[User] = Depends(get_optional_user),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total: exact, estimate or none"),
+    user: Optional[User] = Depends(get_optional_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get list of teachings, filtered by user's membership level."""
-    query = db.query(Teaching)
+    """Get list of teachings, filtered by user's membership level.
+
+    Pages can be walked with `skip` or, without the cost of deep offsets, by passing
+    back `next_cursor` as `cursor`.
+    """
+    # Bound to the session inside run_sync (see core/database.py)
+    query = orm.Query(Teaching)
 
     # Apply filters
     if category:
@@ -156,17 +95,36 @@ async def get_teachings(
         query = query.filter(Teaching.of_the_month == of_the_month)
     if pinned is not None:
         query = query.filter(Teaching.pinned == pinned)
+    if accessible_only:
+        query = query.filter(access_policy.access_filter(user, Teaching.access_level))
 
-    # Get teachings - order by published_date desc to get most recent first
-    teachings = query.order_by(Teaching.published_date.desc()).offset(skip).limit(limit).all()
+    def load_page(session: Session):
+        # Get teachings - order by published_date desc to get most recent first
+        return keyset_page(query.with_session(session), TEACHING_SORT_KEYS, limit, cursor=cursor, skip=skip)
 
-    # Initialize media service for CDN URL resolution
-    media_service = MediaService(db)
+    try:
+        teachings, next_cursor = await db.run_sync(load_page)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Answer If-None-Match from the page's own rows and the content version (bumped on any
+    # committed teaching change, so it covers the total) before counting or serializing
+    not_modified = conditional_get(
+        request,
+        response,
+        access_policy.tier_bit(user),
+        [(str(teaching.id), teaching.updated_at.isoformat()) for teaching in teachings],
+        content_version("teachings", "media"),
+        vary="Authorization",
+    )
+    if not_modified:
+        return not_modified
+
+    total = await db.run_sync(lambda session: count_rows(query.with_session(session), count))
 
     # Process teachings based on user access
     result = []
-    for teaching in teachings:
-        access_info = user_can_access_teaching(user, teaching)
+    for teaching, access_info in zip(teachings, access_policy.evaluate_teachings(user, teachings)):
 
         teaching_data = {
             "id": str(teaching.id),
@@ -210,26 +168,28 @@ async def get_teachings(
             teaching_data["youtube_ids"] = []
             teaching_data["dash_preview_duration"] = None
 
-        # Resolve all media paths to CDN URLs
-        teaching_data = media_service.resolve_dict(teaching_data)
         result.append(teaching_data)
 
+    # Resolve all media paths to CDN URLs in one batch
+    result = await db.run_sync(lambda session: MediaService(session).resolve_many(result))
+
     return {
         "teachings": result,
-        "total": query.count(),
+        "total": total,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/{slug}")
 async def get_teaching(
     slug: str,
-    user: Optional[User] = Depends(get_optional_user),
-    db: Session = Depends(get_db),
+    user: Optional[User] = Depends(get_optional_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get a single teaching by slug."""
-    teaching = db.query(Teaching).filter(Teaching.slug == slug).first()
+    teaching = await db.scalar(select(Teaching).where(Teaching.slug == slug).limit(1))
     if not teaching:
         raise HTTPException(status_code=404, detail="Teaching not found")
 
@@ -246,7 +206,7 @@ async def get_teaching(
 
         # Increment view count
         teaching.view_count += 1
-        db.commit()
+        await db.commit()
 
         # Track in analytics
         await mixpanel_service.track_teaching_view(
@@ -256,9 +216,6 @@ async def get_teaching(
             teaching.content_type,
         )
 
-    # Initialize media service for CDN URL resolution
-    media_service = MediaService(db)
-
     teaching_data = {
         "id": str(teaching.id),
         "slug": teaching.slug,
@@ -302,7 +259,7 @@ async def get_teaching(
         teaching_data["dash_preview_duration"] = None
 
     # Resolve all media paths to CDN URLs
-    teaching_data = media_service.resolve_dict(teaching_data)
+    teaching_data = await db.run_sync(lambda session: MediaService(session).resolve_dict(teaching_data))
 
     return teaching_data
 
@@ -358,8 +315,7 @@ async def get_favorites(
     )
 
     result = []
-    for teaching in favorites:
-        access_info = user_can_access_teaching(current_user, teaching)
+    for teaching, access_info in zip(favorites, access_policy.evaluate_teachings(current_user, favorites)):
         result.append({
             "id": str(teaching.id),
             "slug": teaching.slug,
@@ -623,6 +579,7 @@ async def create_teaching(
     teaching = Teaching(**teaching_data.model_dump())
     db.add(teaching)
     db.commit()
+    response_cache.purge("teachings")
     db.refresh(teaching)
 
     return TeachingResponse.model_validate(teaching)
@@ -647,6 +604,7 @@ async def update_teaching(
 
     teaching.updated_at = datetime.utcnow()
     db.commit()
+    response_cache.purge("teachings")
     db.refresh(teaching)
 
     return TeachingResponse.model_validate(teaching)
@@ -666,6 +624,7 @@ async def delete_teaching(
 
     db.delete(teaching)
     db.commit()
+    response_cache.purge("teachings")
 
     return {"message": "Teaching deleted successfully"}
 
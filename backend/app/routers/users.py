@@ -10,7 +10,6 @@ import uuid
 
 from ..core.database import get_db
 from ..core.deps import get_current_user, require_admin
-from ..core.security import get_password_hash
 from ..models.user import User, MembershipTierEnum
 from ..models.product import UserProductAccess, Product, Order
 from ..models.event import Event, UserCalendar
@@ -21,6 +20,7 @@ from ..schemas.user import UserResponse, UserUpdate, UserListResponse, UserCreat
 from ..services.media_service import MediaService
 from ..services.audit_service import AuditService
 from ..services import sendgrid_service
+from ..services.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -691,7 +691,7 @@ async def create_user(
         id=uuid.uuid4(),
         name=user_data.name,
         email=user_data.email,
-        password_hash=get_password_hash(default_password),
+        password_hash=await password_hasher.hash(default_password),
         membership_tier=tier_enum,
         is_admin=user_data.is_admin,
         is_active=True,
@@ -809,7 +809,7 @@ async def create_admin_user(
         id=uuid.uuid4(),
         name=admin_data.name,
         email=admin_data.email,
-        password_hash=get_password_hash(admin_data.password),
+        password_hash=await password_hasher.hash(admin_data.password),
         membership_tier=MembershipTierEnum.FREE,
         is_admin=True,
         is_active=True,
@@ -50,9 +50,10 @@ class AuditLogResponse(BaseModel):
 class AuditLogListResponse(BaseModel):
     """Schema for paginated audit log list."""
     logs: List[AuditLogResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class AuditLogStats(BaseModel):
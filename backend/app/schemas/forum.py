@@ -103,6 +103,7 @@ class ForumThreadResponse(ForumThreadSummary):
 class ForumThreadDetail(ForumThreadResponse):
     """Thread detail with posts."""
     posts: List["ForumPostResponse"] = []
+    next_posts_cursor: Optional[str] = None  # Set when the posts were requested in pages
 
     class Config:
         from_attributes = True
@@ -270,10 +271,11 @@ class ForumCategoryListResponse(BaseModel):
 class ForumThreadListResponse(BaseModel):
     """Paginated list of forum threads."""
     threads: List[ForumThreadSummary]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ForumPostListResponse(BaseModel):
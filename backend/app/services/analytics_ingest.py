@@ -0,0 +1,435 @@
+"""
+Analytics Ingest - Off-request pipeline behind POST /api/analytics/track
+
+The endpoint only validates an event and hands it to `analytics_ingest`, a
+bounded in-process queue. A consumer task started in the app lifespan drains
+the queue every ANALYTICS_FLUSH_SECONDS (sooner once a full batch is waiting)
+and, per batch:
+
+- bulk-inserts the AnalyticsEvent rows,
+- applies the UserAnalytics counters as one UPDATE per user with summed deltas
+  (and marks the affected days for the dashboard rollups),
+- forwards the batch to Mixpanel and GA4.
+
+When ANALYTICS_SPILL_PATH is set, every accepted event is first appended to a
+per-process journal. The consumer rotates the journal before each batch and
+deletes the rotated segment once its events are committed, so a crashed or
+failed batch is replayed later (event ids are generated up front, so replays
+skip rows that were already inserted). Events arriving while the queue is full
+are kept only in the journal instead of being shed; without a spill path they
+are dropped and counted.
+"""
+import asyncio
+import calendar
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import date, datetime
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.analytics import AnalyticsEvent, UserAnalytics
+from app.services.analytics_rollups import analytics_rollups
+from app.services.ga4_service import ga4_service
+from app.services.mixpanel_service import mixpanel_service
+
+logger = logging.getLogger(__name__)
+
+# Events that count as a session for UserAnalytics.total_sessions
+SESSION_EVENTS = {"login", "session_start", "page_view"}
+
+EVENT_COLUMNS = ("id", "user_id", "event_name", "event_properties", "ip_address", "user_agent", "created_at")
+
+
+def user_analytics_deltas(event_name: str) -> Dict[str, int]:
+    """UserAnalytics counters an event increments"""
+    name = event_name.lower()
+    deltas: Dict[str, int] = {}
+    if name in SESSION_EVENTS:
+        deltas["total_sessions"] = 1
+    if "teaching" in name and "view" in name:
+        deltas["teachings_viewed"] = 1
+    elif "course" in name and "enroll" in name:
+        deltas["courses_enrolled"] = 1
+    elif "retreat" in name and "register" in name:
+        deltas["retreats_attended"] = 1
+    return deltas
+
+
+def make_event(
+    event_name: str,
+    distinct_id: str,
+    user_id: Optional[uuid.UUID] = None,
+    event_properties: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> Dict[str, Any]:
+    """An accepted event as queued (AnalyticsEvent columns plus the Mixpanel/GA4 distinct_id)"""
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "event_name": event_name,
+        "event_properties": event_properties or {},
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "created_at": datetime.utcnow(),
+        "distinct_id": distinct_id,
+    }
+
+
+def _dump(event: Dict[str, Any]) -> str:
+    return json.dumps({**event, "created_at": event["created_at"].isoformat()}, default=str)
+
+
+def _load(line: str) -> Dict[str, Any]:
+    event = json.loads(line)
+    event["id"] = uuid.UUID(event["id"])
+    event["user_id"] = uuid.UUID(event["user_id"]) if event.get("user_id") else None
+    event["created_at"] = datetime.fromisoformat(event["created_at"])
+    return event
+
+
+def _chunks(events: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for event in events:
+        chunk.append(event)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AnalyticsIngest:
+    """Bounded event queue with a batching consumer"""
+
+    def __init__(
+        self,
+        max_queue: int = settings.ANALYTICS_QUEUE_MAX,
+        batch_size: int = settings.ANALYTICS_BATCH_SIZE,
+        flush_seconds: float = settings.ANALYTICS_FLUSH_SECONDS,
+        spill_path: Optional[str] = settings.ANALYTICS_SPILL_PATH,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spill_path = spill_path
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._journal: Optional[TextIO] = None
+        self._overflowed = False
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {
+            "accepted": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "persisted": 0,
+            "batches": 0,
+            "flush_errors": 0,
+            "forward_errors": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # ----- producer side -----
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Accept an event; False if it had to be shed because the queue is full"""
+        with self._lock:
+            if self.spill_path:
+                journal = self._journal or self._open_journal()
+                journal.write(_dump(event) + "\n")
+                journal.flush()
+
+            if len(self._queue) < self.max_queue:
+                self._queue.append(event)
+            elif self.spill_path:
+                # Only in the journal; the consumer reads the segment back
+                self._overflowed = True
+                self.stats["spilled"] += 1
+            else:
+                self.stats["dropped"] += 1
+                return False
+
+            self.stats["accepted"] += 1
+            depth = len(self._queue)
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], depth)
+
+        if depth >= self.batch_size:
+            self._wake()
+        return True
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": len(self._queue),
+            "queue_capacity": self.max_queue,
+            "pending_segments": len(self._segments()),
+        }
+
+    # ----- journal -----
+
+    def _journal_path(self) -> str:
+        return f"{self.spill_path}.{os.getpid()}.log"
+
+    def _segment_path(self) -> str:
+        return f"{self.spill_path}.{os.getpid()}.{time.time_ns()}.seg"
+
+    def _open_journal(self) -> TextIO:
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        path = self._journal_path()
+        # A journal left by an earlier process with our pid becomes a segment to replay
+        if os.path.exists(path) and os.path.getsize(path):
+            os.replace(path, self._segment_path())
+        self._journal = open(path, "a", encoding="utf-8")
+        return self._journal
+
+    def _segments(self) -> List[str]:
+        if not self.spill_path:
+            return []
+        return sorted(glob.glob(f"{glob.escape(self.spill_path)}.{os.getpid()}.*.seg"))
+
+    def recover(self) -> int:
+        """
+        Adopt journals and segments of dead processes (and a journal left under
+        our own pid by an earlier process); returns how many files were claimed.
+        """
+        if not self.spill_path:
+            return 0
+        claimed = 0
+        for path in glob.glob(f"{glob.escape(self.spill_path)}.*"):
+            pid = path[len(self.spill_path) + 1:].split(".", 1)[0]
+            if not pid.isdigit():
+                continue
+            if int(pid) == os.getpid():
+                if path != self._journal_path() or self._journal is not None:
+                    continue
+            elif _pid_alive(int(pid)):
+                continue
+            try:
+                os.replace(path, self._segment_path())
+                claimed += 1
+            except FileNotFoundError:
+                # Claimed by another worker first
+                continue
+        return claimed
+
+    def _read_segment(self, path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield _load(line)
+                except (ValueError, KeyError):
+                    # Torn last line of a crashed process
+                    logger.warning("Skipping unreadable analytics spill line in %s", path)
+
+    # ----- consumer side -----
+
+    def _take(self):
+        """Drain the queue and rotate the journal; returns (events, segment)"""
+        with self._lock:
+            events: Optional[List[Dict[str, Any]]] = list(self._queue)
+            self._queue.clear()
+            segment = None
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                segment = self._segment_path()
+                os.replace(self._journal_path(), segment)
+                if self._overflowed:
+                    events = None
+                self._overflowed = False
+        return events, segment
+
+    def _persist(self, db: Session, events: Iterable[Dict[str, Any]], dedupe: bool, persisted: List[Dict[str, Any]]) -> None:
+        """Insert in batch_size transactions, appending each committed chunk to `persisted`"""
+        for chunk in _chunks(events, self.batch_size):
+            if dedupe:
+                existing = {
+                    str(event_id)
+                    for (event_id,) in db.query(AnalyticsEvent.id).filter(
+                        AnalyticsEvent.id.in_([event["id"] for event in chunk])
+                    )
+                }
+                chunk = [event for event in chunk if str(event["id"]) not in existing]
+                if not chunk:
+                    continue
+
+            db.execute(insert(AnalyticsEvent), [{column: event[column] for column in EVENT_COLUMNS} for event in chunk])
+            active_days = self._apply_user_deltas(db, chunk)
+            db.commit()
+            analytics_rollups.mark_dirty(active_days)
+            persisted.extend(chunk)
+            self.stats["batches"] += 1
+            self.stats["persisted"] += len(chunk)
+
+    @staticmethod
+    def _apply_user_deltas(db: Session, events: List[Dict[str, Any]]) -> Set[date]:
+        """Update UserAnalytics; returns the days whose active-user rollup changed"""
+        counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        last_active: Dict[str, datetime] = {}
+        for event in events:
+            if not event["user_id"]:
+                continue
+            user_id = str(event["user_id"])
+            last_active[user_id] = max(last_active.get(user_id, event["created_at"]), event["created_at"])
+            for column, delta in user_analytics_deltas(event["event_name"]).items():
+                counters[user_id][column] += delta
+
+        if not last_active:
+            return set()
+
+        # The users' previous last-active days lose them in the rollups
+        active_days = {active_at.date() for active_at in last_active.values()}
+        for (previous,) in db.query(UserAnalytics.last_active_at).filter(
+            UserAnalytics.user_id.in_([uuid.UUID(user_id) for user_id in last_active]),
+            UserAnalytics.last_active_at.isnot(None),
+        ):
+            active_days.add(previous.date())
+
+        for user_id, active_at in last_active.items():
+            values: Dict[Any, Any] = {UserAnalytics.last_active_at: active_at}
+            for column, delta in counters[user_id].items():
+                attribute = getattr(UserAnalytics, column)
+                values[attribute] = attribute + delta
+            db.query(UserAnalytics).filter(UserAnalytics.user_id == uuid.UUID(user_id)).update(
+                values, synchronize_session=False
+            )
+        return active_days
+
+    def persist_pending(self, db: Optional[Session] = None) -> List[Dict[str, Any]]:
+        """Write everything queued (and any leftover segments); returns the events written"""
+        events, segment = self._take()
+        segments = self._segments()
+        persisted: List[Dict[str, Any]] = []
+        if not events and not segments:
+            return persisted
+
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            if not self.spill_path:
+                try:
+                    self._persist(db, events, False, persisted)
+                except Exception as e:
+                    db.rollback()
+                    self.stats["flush_errors"] += 1
+                    self._requeue(events[len(persisted):])
+                    logger.warning("Analytics batch of %d events failed: %s", len(events), e)
+                return persisted
+
+            for path in segments:
+                from_memory = path == segment and events is not None
+                try:
+                    source = events if from_memory else self._read_segment(path)
+                    self._persist(db, source, not from_memory, persisted)
+                except Exception as e:
+                    db.rollback()
+                    self.stats["flush_errors"] += 1
+                    # The segment stays on disk and is retried (deduplicated) next time
+                    logger.warning("Analytics spill segment %s failed: %s", path, e)
+                    break
+                os.remove(path)
+            return persisted
+        finally:
+            if own_session:
+                db.close()
+
+    def _requeue(self, events: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            room = max(self.max_queue - len(self._queue), 0)
+            self._queue.extendleft(reversed(events[:room]))
+            self.stats["dropped"] += max(len(events) - room, 0)
+
+    async def _forward(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        by_client: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for event in events:
+            by_client[event["distinct_id"]].append({
+                "name": event["event_name"].lower().replace(" ", "_"),
+                "params": event["event_properties"],
+            })
+
+        results = await asyncio.gather(
+            mixpanel_service.track_events([
+                {
+                    "event_name": event["event_name"],
+                    "distinct_id": event["distinct_id"],
+                    "properties": event["event_properties"],
+                    # created_at is naive UTC; .timestamp() would read it as local time
+                    "time": calendar.timegm(event["created_at"].utctimetuple()),
+                }
+                for event in events
+            ]),
+            *(ga4_service.track_events(client_id, client_events) for client_id, client_events in by_client.items()),
+            return_exceptions=True,
+        )
+        self.stats["forward_errors"] += sum(1 for result in results if isinstance(result, Exception))
+
+    async def flush(self) -> int:
+        """Persist and forward everything pending; returns the number of events written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            started = time.perf_counter()
+            persisted = await asyncio.to_thread(self.persist_pending)
+            await self._forward(persisted)
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return len(persisted)
+
+    async def run(self) -> None:
+        """Consume the queue until cancelled (started from the app lifespan)"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.recover()
+        while True:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Analytics ingest flush failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+analytics_ingest = AnalyticsIngest()
@@ -0,0 +1,321 @@
+"""
+Analytics Rollups - Incremental per-day facts for the admin dashboard
+
+The dashboard used to count users, payments, enrollments, orders and
+registrations over the raw tables on every request, so `lifetime` views
+scanned everything. Instead, one row per day in `analytics_daily_rollups`
+(and one per day and payment type in `analytics_daily_revenue`) holds the
+day's totals, and every dashboard figure is a single SUM over at most a few
+thousand rollup rows whatever the timeframe.
+
+A day's row is always recomputed from the source tables (never incremented),
+so refreshing is idempotent and safe to run from several workers. Days are
+marked dirty by:
+- committed ORM writes and deletes of the source models (via content_changes),
+- the analytics ingest pipeline when it moves UserAnalytics.last_active_at,
+and are recomputed every ANALYTICS_ROLLUP_FLUSH_SECONDS by the loop started in
+the app lifespan. The scheduled job (POST /api/cron/refresh-analytics-rollups)
+also recomputes the trailing ANALYTICS_ROLLUP_REFRESH_DAYS days, which picks up
+bulk updates and deletes the hooks cannot see; `full=true` rebuilds everything.
+
+Days are UTC calendar days, so dashboard periods are day-granular.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.db_runtime import statement_timeout_override
+from app.models.analytics import AnalyticsDailyRevenue, AnalyticsDailyRollup, UserAnalytics
+from app.models.course import CourseEnrollment
+from app.models.payment import Payment, PaymentStatus
+from app.models.product import Order, OrderStatus
+from app.models.retreat import RetreatRegistration
+from app.models.user import User
+from app.services import content_changes
+
+logger = logging.getLogger(__name__)
+
+# Count columns of AnalyticsDailyRollup
+COUNT_METRICS = ("signups", "active_users", "enrollments", "orders", "registrations")
+METRICS = COUNT_METRICS + ("revenue",)
+
+# Source model -> timestamp attribute that buckets its rows into days
+DAY_ATTRIBUTES = {
+    User: "created_at",
+    UserAnalytics: "last_active_at",
+    Payment: "created_at",
+    CourseEnrollment: "enrolled_at",
+    Order: "created_at",
+    RetreatRegistration: "registered_at",
+}
+
+
+def _as_date(value: Any) -> date:
+    # func.date() returns a string on SQLite and a date on PostgreSQL
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_bounds(start: date, end: date) -> Tuple[datetime, datetime]:
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+
+def _days_touched(entity: Any) -> Tuple[date, ...]:
+    """
+    Days an entity counts on, before and after this flush.
+
+    Reads only the loaded state, so it also serves deleted rows (including
+    those removed by ORM cascades, e.g. a deleted user's payments).
+    """
+    history = inspect(entity).attrs[DAY_ATTRIBUTES[type(entity)]].history
+    return tuple({_as_date(value) for value in (*history.added, *history.unchanged, *history.deleted) if value is not None})
+
+
+def _keep_history(target, value, oldvalue, initiator):
+    return value
+
+
+def _runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Collapse days into inclusive (start, end) runs of consecutive days"""
+    runs: List[Tuple[date, date]] = []
+    for day in sorted(days):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+class AnalyticsRollups:
+    """Maintains and reads the daily rollup tables"""
+
+    def __init__(self, flush_seconds: float = settings.ANALYTICS_ROLLUP_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.built = False  # the tables have been backfilled; readers may rely on them
+        self._dirty: Set[date] = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.stats = {"days_refreshed": 0, "refreshes": 0, "refresh_errors": 0}
+
+    # ----- change tracking -----
+
+    def register_listeners(self) -> None:
+        """Mark the days of committed writes to the source models dirty"""
+        for model, attribute in DAY_ATTRIBUTES.items():
+            # active_history loads the old timestamp before it is overwritten, so the day it leaves is dirtied too
+            if not event.contains(getattr(model, attribute), "set", _keep_history):
+                event.listen(getattr(model, attribute), "set", _keep_history, active_history=True)
+        content_changes.subscribe(
+            "analytics_rollups", DAY_ATTRIBUTES, _days_touched, self._apply_changes, extract_deleted=_days_touched,
+        )
+
+    def _apply_changes(self, changes: content_changes.ContentChanges) -> None:
+        self.mark_dirty(day for days in changes.values() if days for day in days)
+
+    def mark_dirty(self, days: Iterable[Optional[date]]) -> None:
+        with self._lock:
+            self._dirty.update(_as_date(day) for day in days if day is not None)
+
+    @property
+    def dirty_days(self) -> int:
+        return len(self._dirty)
+
+    # ----- recomputing -----
+
+    def refresh(self, db: Session, start: date, end: date) -> int:
+        """Recompute the rollup rows for start..end (inclusive) and commit; returns the days covered"""
+        with self._refresh_lock:
+            facts = self._compute(db, start, end)
+            # Default synchronisation drops the replaced rows from the session, so the new ones can be added
+            db.query(AnalyticsDailyRollup).filter(AnalyticsDailyRollup.day.between(start, end)).delete()
+            db.query(AnalyticsDailyRevenue).filter(AnalyticsDailyRevenue.day.between(start, end)).delete()
+            for day, values in sorted(facts["days"].items()):
+                db.add(AnalyticsDailyRollup(day=day, **values))
+            for (day, payment_type), (revenue, payments) in sorted(facts["revenue"].items()):
+                db.add(AnalyticsDailyRevenue(day=day, payment_type=payment_type, revenue=revenue, payments=payments))
+            db.commit()
+
+        days = (end - start).days + 1
+        self.stats["refreshes"] += 1
+        self.stats["days_refreshed"] += days
+        return days
+
+    def _compute(self, db: Session, start: date, end: date) -> Dict[str, Dict]:
+        """One grouped query per source table over the whole range"""
+        since, until = _day_bounds(start, end)
+
+        def per_day(column, *filters):
+            day = func.date(column)
+            rows = (
+                db.query(day, func.count())
+                .filter(column >= since, column < until, *filters)
+                .group_by(day)
+                .all()
+            )
+            return {_as_date(bucket): amount for bucket, amount in rows}
+
+        sources = {
+            "signups": per_day(User.created_at),
+            "active_users": per_day(UserAnalytics.last_active_at),
+            "enrollments": per_day(CourseEnrollment.enrolled_at),
+            "orders": per_day(Order.created_at, Order.status == OrderStatus.COMPLETED),
+            "registrations": per_day(RetreatRegistration.registered_at),
+        }
+
+        day = func.date(Payment.created_at)
+        revenue: Dict[Tuple[date, str], Tuple[Decimal, int]] = {}
+        for bucket, payment_type, amount, payments in (
+            db.query(day, Payment.payment_type, func.sum(Payment.amount), func.count())
+            .filter(
+                Payment.created_at >= since,
+                Payment.created_at < until,
+                Payment.status == PaymentStatus.COMPLETED,
+            )
+            .group_by(day, Payment.payment_type)
+            .all()
+        ):
+            key = getattr(payment_type, "value", payment_type)
+            revenue[(_as_date(bucket), key)] = (Decimal(amount or 0), payments)
+
+        days: Dict[date, Dict[str, Any]] = defaultdict(lambda: {**{m: 0 for m in COUNT_METRICS}, "revenue": Decimal(0)})
+        for metric, counts in sources.items():
+            for bucket, count in counts.items():
+                days[bucket][metric] = count
+        for (bucket, _), (amount, _) in revenue.items():
+            days[bucket]["revenue"] += amount
+        return {"days": days, "revenue": revenue}
+
+    def refresh_dirty(self, db: Optional[Session] = None) -> int:
+        """Recompute every day marked dirty; failed days stay dirty for the next run"""
+        with self._lock:
+            days, self._dirty = self._dirty, set()
+        if not days:
+            return 0
+
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        refreshed = 0
+        try:
+            for start, end in _runs(days):
+                try:
+                    refreshed += self.refresh(db, start, end)
+                except Exception as e:
+                    db.rollback()
+                    self.stats["refresh_errors"] += 1
+                    self.mark_dirty(start + timedelta(days=n) for n in range((end - start).days + 1))
+                    logger.warning("Analytics rollup refresh of %s..%s failed: %s", start, end, e)
+        finally:
+            if own_session:
+                db.close()
+        return refreshed
+
+    def refresh_recent(self, db: Session, days: int = settings.ANALYTICS_ROLLUP_REFRESH_DAYS) -> int:
+        """Scheduled job: recompute the trailing `days` days (today included)"""
+        today = datetime.utcnow().date()
+        return self.refresh(db, today - timedelta(days=max(days, 1) - 1), today)
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute every day from the earliest source row to today"""
+        earliest = [
+            db.query(func.min(getattr(model, attribute))).scalar()
+            for model, attribute in DAY_ATTRIBUTES.items()
+        ]
+        earliest = [_as_date(value) for value in earliest if value is not None]
+        today = datetime.utcnow().date()
+        start = min(earliest, default=today)
+        started = time.perf_counter()
+        days = self.refresh(db, start, today)
+        self.built = True
+        logger.info("Analytics rollups rebuilt: %d days in %.1f ms", days, (time.perf_counter() - started) * 1000)
+        return days
+
+    def ensure_built(self, db: Session) -> None:
+        """Backfill on first start, when the rollup table is still empty"""
+        if db.query(AnalyticsDailyRollup.day).first() is None:
+            self.rebuild(db)
+        self.built = True
+
+    async def run(self) -> None:
+        """Backfill if needed, then refresh dirty days periodically until cancelled"""
+        def backfill():
+            db = SessionLocal()
+            try:
+                with statement_timeout_override(settings.ANALYTICS_ROLLUP_REBUILD_TIMEOUT_MS):
+                    self.ensure_built(db)
+            finally:
+                db.close()
+
+        try:
+            await asyncio.to_thread(backfill)
+        except Exception as e:
+            logger.warning("Analytics rollup backfill failed: %s", e)
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await asyncio.to_thread(self.refresh_dirty)
+
+    # ----- reading -----
+
+    def totals(self, db: Session, periods: Dict[str, Optional[Tuple[date, date]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Sum every metric over each named period in one query.
+
+        A period of None means all days. Returns {period: {metric: total}}.
+        """
+        columns = []
+        for name, bounds in periods.items():
+            condition = None if bounds is None else AnalyticsDailyRollup.day.between(*bounds)
+            for metric in METRICS:
+                column = getattr(AnalyticsDailyRollup, metric)
+                value = column if condition is None else case((condition, column), else_=0)
+                columns.append(func.coalesce(func.sum(value), 0).label(f"{name}__{metric}"))
+
+        query = db.query(*columns)
+        if all(bounds is not None for bounds in periods.values()):
+            query = query.filter(
+                and_(
+                    AnalyticsDailyRollup.day >= min(bounds[0] for bounds in periods.values()),
+                    AnalyticsDailyRollup.day <= max(bounds[1] for bounds in periods.values()),
+                )
+            )
+        row = query.one()._asdict()
+
+        result: Dict[str, Dict[str, Any]] = {name: {} for name in periods}
+        for label, value in row.items():
+            name, metric = label.split("__")
+            result[name][metric] = Decimal(value) if metric == "revenue" else int(value)
+        return result
+
+    def revenue_by_type(self, db: Session, start: date, end: date) -> Dict[str, Decimal]:
+        rows = (
+            db.query(AnalyticsDailyRevenue.payment_type, func.sum(AnalyticsDailyRevenue.revenue))
+            .filter(AnalyticsDailyRevenue.day.between(start, end))
+            .group_by(AnalyticsDailyRevenue.payment_type)
+            .all()
+        )
+        return {payment_type: Decimal(total or 0) for payment_type, total in rows}
+
+    def daily(self, db: Session, start: date, end: date) -> List[AnalyticsDailyRollup]:
+        """Rollup rows for days with any activity, oldest first"""
+        return (
+            db.query(AnalyticsDailyRollup)
+            .filter(AnalyticsDailyRollup.day.between(start, end))
+            .order_by(AnalyticsDailyRollup.day)
+            .all()
+        )
+
+
+analytics_rollups = AnalyticsRollups()
@@ -0,0 +1,94 @@
+"""
+Analytics Scans - Live dashboard queries, one pass per table
+
+Used when the daily rollups are not available yet (first start, before the
+backfill finishes) or when an admin asks for `source=live` to cross-check
+them. Each source table is read once for the current and the previous period
+together: the WHERE clause covers both windows and conditional aggregates
+(SUM(CASE WHEN <in window> ...), the portable spelling of COUNT(*) FILTER
+(WHERE ...)) split the rows. The per-table scans are independent, so they run
+concurrently, each on its own pooled connection, and their timings can be
+returned for debugging.
+"""
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# name -> scan(session) returning a row mapping
+Scan = Callable[[Session], Dict[str, Any]]
+Window = Tuple[datetime, datetime]
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ANALYTICS_SCAN_WORKERS, thread_name_prefix="analytics-scan"
+        )
+    return _executor
+
+
+def in_window(column, window: Window):
+    return column.between(*window)
+
+
+def windowed_count(column, window: Window):
+    """COUNT(*) of the rows whose `column` falls in `window`"""
+    return func.coalesce(func.sum(case((in_window(column, window), 1), else_=0)), 0)
+
+
+def windowed_sum(column, value, window: Window):
+    """SUM(value) over the rows whose `column` falls in `window`"""
+    return func.coalesce(func.sum(case((in_window(column, window), value), else_=0)), 0)
+
+
+def any_window(column, *windows: Window):
+    """WHERE clause limiting a scan to the rows the windows need"""
+    return or_(*(in_window(column, window) for window in windows))
+
+
+def _timed(scan: Scan, session: Session) -> Tuple[Dict[str, Any], float]:
+    started = time.perf_counter()
+    result = scan(session)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run_scans(db: Session, scans: Dict[str, Scan]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, float]]:
+    """
+    Run independent scans and return (results, timings_ms) keyed by scan name.
+
+    Each scan gets its own session on the request session's engine, so scans
+    run in parallel on separate pooled connections. With one worker configured
+    (or a single scan) they run one after another on `db`. Scans run in a copy
+    of the caller's context, so a route's statement_timeout applies to them.
+    """
+    if settings.ANALYTICS_SCAN_WORKERS <= 1 or len(scans) <= 1:
+        outcomes = {name: _timed(scan, db) for name, scan in scans.items()}
+    else:
+        bind = db.get_bind()
+
+        def isolated(scan: Scan) -> Tuple[Dict[str, Any], float]:
+            with Session(bind=bind) as session:
+                return _timed(scan, session)
+
+        futures = {
+            name: _get_executor().submit(contextvars.copy_context().run, isolated, scan)
+            for name, scan in scans.items()
+        }
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results = {name: result for name, (result, _) in outcomes.items()}
+    timings = {name: round(elapsed, 2) for name, (_, elapsed) in outcomes.items()}
+    return results, timings
@@ -2,10 +2,11 @@
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, case, extract
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
 import logging
+import time
 
 from ..models.user import User, MembershipTierEnum
 from ..models.payment import Payment, PaymentStatus, PaymentType
@@ -15,6 +16,8 @@ from ..models.product import Product, Order, OrderStatus, UserProductAccess
 from ..models.teaching import Teaching
 from ..models.analytics import AnalyticsEvent, UserAnalytics
 from ..models.membership import Subscription, SubscriptionStatus
+from .analytics_rollups import analytics_rollups
+from .analytics_scans import Scan, any_window, in_window, run_scans, windowed_count, windowed_sum
 
 logger = logging.getLogger(__name__)
 
@@ -75,130 +78,195 @@ class AnalyticsService:
             return 100.0 if current_value > 0 else 0.0
         return round(((current_value - previous_value) / previous_value) * 100, 2)
 
+    @staticmethod
+    def day_periods(start_date: datetime, end_date: datetime) -> Tuple[Tuple[date, date], Tuple[date, date]]:
+        """
+        Day ranges (inclusive) for a timeframe and the equally long period before it.
+
+        The daily rollups are day-granular, so partial days at either end count in full.
+        """
+        start, end = start_date.date(), end_date.date()
+        previous_end = start - timedelta(days=1)
+        return (start, end), (previous_end - (end - start), previous_end)
+
     @staticmethod
     def get_dashboard_summary(
         db: Session,
         timeframe: str = '30d',
         custom_start: Optional[datetime] = None,
-        custom_end: Optional[datetime] = None
+        custom_end: Optional[datetime] = None,
+        source: str = 'auto',
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Get comprehensive dashboard summary with key metrics.
 
+        Args:
+            source: 'rollups' (daily rollup tables), 'live' (scans of the source
+                tables) or 'auto' (rollups once they are built, live until then)
+            debug: Include the source used and per-query timings
+
         Returns:
             Dict with stats for users, revenue, courses, products, and growth percentages
         """
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe, custom_start, custom_end)
+        if source == 'auto':
+            source = 'rollups' if analytics_rollups.built else 'live'
+        if source == 'rollups':
+            figures, timings = AnalyticsService._summary_from_rollups(db, start_date, end_date)
+        elif source == 'live':
+            figures, timings = run_scans(db, AnalyticsService._summary_scans(start_date, end_date))
+        else:
+            raise ValueError(f"Invalid source: {source}")
 
-        # Calculate previous period for comparison
-        period_length = end_date - start_date
-        previous_start = start_date - period_length
-        previous_end = start_date
-
-        # Total users
-        total_users = db.query(func.count(User.id)).scalar() or 0
-        new_users_current = db.query(func.count(User.id)).filter(
-            User.created_at.between(start_date, end_date)
-        ).scalar() or 0
-        new_users_previous = db.query(func.count(User.id)).filter(
-            User.created_at.between(previous_start, previous_end)
-        ).scalar() or 0
-
-        # Active users (logged in or had activity in period)
-        active_users = db.query(func.count(func.distinct(UserAnalytics.user_id))).filter(
-            UserAnalytics.last_active_at.between(start_date, end_date)
-        ).scalar() or 0
-
-        # Revenue
-        revenue_current = db.query(func.sum(Payment.amount)).filter(
-            and_(
-                Payment.status == PaymentStatus.COMPLETED,
-                Payment.created_at.between(start_date, end_date)
-            )
-        ).scalar() or Decimal(0)
-
-        revenue_previous = db.query(func.sum(Payment.amount)).filter(
-            and_(
-                Payment.status == PaymentStatus.COMPLETED,
-                Payment.created_at.between(previous_start, previous_end)
-            )
-        ).scalar() or Decimal(0)
-
-        # Active courses
-        active_courses = db.query(func.count(Course.id)).filter(
-            Course.is_published == True
-        ).scalar() or 0
-
-        # Course enrollments
-        enrollments_current = db.query(func.count(CourseEnrollment.id)).filter(
-            CourseEnrollment.enrolled_at.between(start_date, end_date)
-        ).scalar() or 0
-
-        enrollments_previous = db.query(func.count(CourseEnrollment.id)).filter(
-            CourseEnrollment.enrolled_at.between(previous_start, previous_end)
-        ).scalar() or 0
-
-        # Products sold (orders completed)
-        products_sold_current = db.query(func.count(Order.id)).filter(
-            and_(
-                Order.status == OrderStatus.COMPLETED,
-                Order.created_at.between(start_date, end_date)
-            )
-        ).scalar() or 0
-
-        products_sold_previous = db.query(func.count(Order.id)).filter(
-            and_(
-                Order.status == OrderStatus.COMPLETED,
-                Order.created_at.between(previous_start, previous_end)
-            )
-        ).scalar() or 0
-
-        # Retreat registrations
-        retreat_registrations = db.query(func.count(RetreatRegistration.id)).filter(
-            RetreatRegistration.registered_at.between(start_date, end_date)
-        ).scalar() or 0
+        # Each scan contributes its own figures
+        values = {name: value for result in figures.values() for name, value in result.items()}
 
         # Calculate growth percentages
         users_growth = AnalyticsService.calculate_growth_percentage(
-            float(new_users_current), float(new_users_previous)
+            float(values["new_users"]), float(values["new_users_previous"])
         )
         revenue_growth = AnalyticsService.calculate_growth_percentage(
-            float(revenue_current), float(revenue_previous)
+            float(values["revenue"]), float(values["revenue_previous"])
         )
         enrollments_growth = AnalyticsService.calculate_growth_percentage(
-            float(enrollments_current), float(enrollments_previous)
+            float(values["enrollments"]), float(values["enrollments_previous"])
         )
         products_growth = AnalyticsService.calculate_growth_percentage(
-            float(products_sold_current), float(products_sold_previous)
+            float(values["orders"]), float(values["orders_previous"])
         )
 
-        return {
+        summary = {
             "timeframe": timeframe,
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
             "users": {
-                "total": total_users,
-                "new": new_users_current,
-                "active": active_users,
+                "total": int(values["total_users"]),
+                "new": int(values["new_users"]),
+                "active": int(values["active_users"]),
                 "growth_percentage": users_growth
             },
             "revenue": {
-                "total": float(revenue_current),
-                "previous_period": float(revenue_previous),
+                "total": float(values["revenue"]),
+                "previous_period": float(values["revenue_previous"]),
                 "growth_percentage": revenue_growth
             },
             "courses": {
-                "active": active_courses,
-                "enrollments": enrollments_current,
+                "active": int(values["active_courses"]),
+                "enrollments": int(values["enrollments"]),
                 "growth_percentage": enrollments_growth
             },
             "products": {
-                "sold": products_sold_current,
+                "sold": int(values["orders"]),
                 "growth_percentage": products_growth
             },
             "retreats": {
-                "registrations": retreat_registrations
+                "registrations": int(values["registrations"])
+            }
+        }
+        if debug:
+            summary["debug"] = {"source": source, "timings_ms": timings}
+        return summary
+
+    @staticmethod
+    def _summary_from_rollups(
+        db: Session, start_date: datetime, end_date: datetime
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, float]]:
+        """Summary figures from the daily rollups: one query for every period total"""
+        current, previous = AnalyticsService.day_periods(start_date, end_date)
+
+        def rollups(session: Session) -> Dict[str, Any]:
+            # All-time signups give the user count
+            totals = analytics_rollups.totals(session, {"current": current, "previous": previous, "all": None})
+            now, before = totals["current"], totals["previous"]
+            return {
+                "total_users": totals["all"]["signups"],
+                "new_users": now["signups"],
+                "new_users_previous": before["signups"],
+                "active_users": now["active_users"],
+                "revenue": now["revenue"],
+                "revenue_previous": before["revenue"],
+                "enrollments": now["enrollments"],
+                "enrollments_previous": before["enrollments"],
+                "orders": now["orders"],
+                "orders_previous": before["orders"],
+                "registrations": now["registrations"],
             }
+
+        # Active courses is a current state, not a daily fact
+        scans = {"rollups": rollups, "courses": AnalyticsService._active_courses_scan}
+        figures, timings = {}, {}
+        for name, scan in scans.items():
+            started = time.perf_counter()
+            figures[name] = scan(db)
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return figures, timings
+
+    @staticmethod
+    def _active_courses_scan(session: Session) -> Dict[str, Any]:
+        return {
+            "active_courses": session.query(func.count(Course.id)).filter(
+                Course.is_published == True
+            ).scalar() or 0
+        }
+
+    @staticmethod
+    def _summary_scans(start_date: datetime, end_date: datetime) -> Dict[str, Scan]:
+        """One scan per source table covering the current and previous period together"""
+        current = (start_date, end_date)
+        previous = (start_date - (end_date - start_date), start_date)
+
+        def users(session: Session) -> Dict[str, Any]:
+            return session.query(
+                func.count(User.id).label("total_users"),
+                windowed_count(User.created_at, current).label("new_users"),
+                windowed_count(User.created_at, previous).label("new_users_previous"),
+            ).one()._asdict()
+
+        def active_users(session: Session) -> Dict[str, Any]:
+            # Active users (logged in or had activity in period)
+            return session.query(
+                func.count(func.distinct(UserAnalytics.user_id)).label("active_users")
+            ).filter(in_window(UserAnalytics.last_active_at, current)).one()._asdict()
+
+        def payments(session: Session) -> Dict[str, Any]:
+            return session.query(
+                windowed_sum(Payment.created_at, Payment.amount, current).label("revenue"),
+                windowed_sum(Payment.created_at, Payment.amount, previous).label("revenue_previous"),
+            ).filter(
+                Payment.status == PaymentStatus.COMPLETED,
+                any_window(Payment.created_at, current, previous),
+            ).one()._asdict()
+
+        def enrollments(session: Session) -> Dict[str, Any]:
+            return session.query(
+                windowed_count(CourseEnrollment.enrolled_at, current).label("enrollments"),
+                windowed_count(CourseEnrollment.enrolled_at, previous).label("enrollments_previous"),
+            ).filter(any_window(CourseEnrollment.enrolled_at, current, previous)).one()._asdict()
+
+        def orders(session: Session) -> Dict[str, Any]:
+            # Products sold (orders completed)
+            return session.query(
+                windowed_count(Order.created_at, current).label("orders"),
+                windowed_count(Order.created_at, previous).label("orders_previous"),
+            ).filter(
+                Order.status == OrderStatus.COMPLETED,
+                any_window(Order.created_at, current, previous),
+            ).one()._asdict()
+
+        def registrations(session: Session) -> Dict[str, Any]:
+            return session.query(
+                func.count(RetreatRegistration.id).label("registrations")
+            ).filter(in_window(RetreatRegistration.registered_at, current)).one()._asdict()
+
+        return {
+            "users": users,
+            "user_analytics": active_users,
+            "payments": payments,
+            "courses": AnalyticsService._active_courses_scan,
+            "course_enrollments": enrollments,
+            "orders": orders,
+            "retreat_registrations": registrations,
         }
 
     @staticmethod
@@ -343,30 +411,20 @@ class AnalyticsService:
     def get_sales_summary(db: Session, timeframe: str = '30d') -> Dict[str, Any]:
         """Get sales and revenue summary."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
+        current, _ = AnalyticsService.day_periods(start_date, end_date)
+        totals = analytics_rollups.totals(db, {"current": current})["current"]
 
         # Total sales (completed orders)
-        total_sales = db.query(func.count(Order.id)).filter(
-            and_(
-                Order.status == OrderStatus.COMPLETED,
-                Order.created_at.between(start_date, end_date)
-            )
-        ).scalar() or 0
+        total_sales = totals["orders"]
 
         # Total revenue
-        total_revenue = db.query(func.sum(Payment.amount)).filter(
-            and_(
-                Payment.status == PaymentStatus.COMPLETED,
-                Payment.created_at.between(start_date, end_date)
-            )
-        ).scalar() or Decimal(0)
+        total_revenue = totals["revenue"]
 
         # Average order value
         aov = float(total_revenue / total_sales) if total_sales > 0 else 0
 
         # Conversion rate (completed orders / unique visitors - simplified as active users)
-        unique_visitors = db.query(func.count(func.distinct(UserAnalytics.user_id))).filter(
-            UserAnalytics.last_active_at.between(start_date, end_date)
-        ).scalar() or 1
+        unique_visitors = totals["active_users"] or 1
 
         conversion_rate = round((total_sales / unique_visitors) * 100, 2)
 
@@ -407,11 +465,11 @@ class AnalyticsService:
     def get_customer_summary(db: Session, timeframe: str = '30d') -> Dict[str, Any]:
         """Get customer analytics summary."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
+        current, _ = AnalyticsService.day_periods(start_date, end_date)
+        totals = analytics_rollups.totals(db, {"current": current, "all": None})
 
         # New vs returning customers
-        new_customers = db.query(func.count(User.id)).filter(
-            User.created_at.between(start_date, end_date)
-        ).scalar() or 0
+        new_customers = totals["current"]["signups"]
 
         # Users with previous purchases
         returning_customers = db.query(func.count(func.distinct(Payment.user_id))).filter(
@@ -424,7 +482,7 @@ class AnalyticsService:
 
         # Customer lifetime value (average)
         total_clv = db.query(func.sum(UserAnalytics.total_spent)).scalar() or Decimal(0)
-        total_customers = db.query(func.count(User.id)).scalar() or 1
+        total_customers = totals["all"]["signups"] or 1
         avg_clv = float(total_clv) / total_customers
 
         return {
@@ -460,17 +518,11 @@ class AnalyticsService:
     def get_course_enrollment(db: Session, timeframe: str = '30d') -> Dict[str, Any]:
         """Get course enrollment metrics."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
+        current, previous = AnalyticsService.day_periods(start_date, end_date)
+        totals = analytics_rollups.totals(db, {"current": current, "previous": previous})
 
-        total_enrollments = db.query(func.count(CourseEnrollment.id)).filter(
-            CourseEnrollment.enrolled_at.between(start_date, end_date)
-        ).scalar() or 0
-
-        # Calculate previous period
-        period_length = end_date - start_date
-        prev_start = start_date - period_length
-        prev_enrollments = db.query(func.count(CourseEnrollment.id)).filter(
-            CourseEnrollment.enrolled_at.between(prev_start, start_date)
-        ).scalar() or 0
+        total_enrollments = totals["current"]["enrollments"]
+        prev_enrollments = totals["previous"]["enrollments"]
 
         growth_rate = AnalyticsService.calculate_growth_percentage(
             float(total_enrollments), float(prev_enrollments)
@@ -610,17 +662,13 @@ class AnalyticsService:
     def get_retreat_registration(db: Session, timeframe: str = '30d') -> Dict[str, Any]:
         """Get retreat registration metrics."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
+        current, previous = AnalyticsService.day_periods(start_date, end_date)
+        totals = analytics_rollups.totals(db, {"current": current, "previous": previous})
 
-        total_registrations = db.query(func.count(RetreatRegistration.id)).filter(
-            RetreatRegistration.registered_at.between(start_date, end_date)
-        ).scalar() or 0
+        total_registrations = totals["current"]["registrations"]
 
         # Calculate growth
-        period_length = end_date - start_date
-        prev_start = start_date - period_length
-        prev_registrations = db.query(func.count(RetreatRegistration.id)).filter(
-            RetreatRegistration.registered_at.between(prev_start, start_date)
-        ).scalar() or 0
+        prev_registrations = totals["previous"]["registrations"]
 
         growth_rate = AnalyticsService.calculate_growth_percentage(
             float(total_registrations), float(prev_registrations)
@@ -636,14 +684,10 @@ class AnalyticsService:
     def get_retreat_revenue(db: Session, timeframe: str = '30d') -> Dict[str, Any]:
         """Get retreat revenue metrics."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
+        current, _ = AnalyticsService.day_periods(start_date, end_date)
 
-        total_revenue = db.query(func.sum(Payment.amount)).filter(
-            and_(
-                Payment.payment_type == PaymentType.RETREAT,
-                Payment.status == PaymentStatus.COMPLETED,
-                Payment.created_at.between(start_date, end_date)
-            )
-        ).scalar() or Decimal(0)
+        by_type = analytics_rollups.revenue_by_type(db, *current)
+        total_revenue = by_type.get(PaymentType.RETREAT.value, Decimal(0))
 
         return {
             "total_revenue": float(total_revenue),
@@ -677,68 +721,33 @@ class AnalyticsService:
 
     @staticmethod
     def get_revenue_trend(db: Session, timeframe: str = '30d') -> List[Dict[str, Any]]:
-        """Get revenue trend data for charts."""
+        """Get revenue trend data for charts (one point per day with revenue)."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
-
-        # Determine grouping based on timeframe
-        if timeframe in ['7d']:
-            # Group by day
-            date_format = func.date(Payment.created_at)
-            interval = 'day'
-        elif timeframe in ['30d', 'this_month', 'last_month']:
-            # Group by day
-            date_format = func.date(Payment.created_at)
-            interval = 'day'
-        elif timeframe in ['90d', 'this_year', 'last_year', 'lifetime']:
-            # Group by week
-            date_format = func.date(Payment.created_at)
-            interval = 'week'
-        else:
-            # Default to day
-            date_format = func.date(Payment.created_at)
-            interval = 'day'
-
-        # Query revenue by date
-        trend_data = db.query(
-            date_format.label('date'),
-            func.sum(Payment.amount).label('revenue')
-        ).filter(
-            and_(
-                Payment.status == PaymentStatus.COMPLETED,
-                Payment.created_at.between(start_date, end_date)
-            )
-        ).group_by(date_format).order_by(date_format).all()
+        current, _ = AnalyticsService.day_periods(start_date, end_date)
 
         return [
             {
-                "date": str(item.date),
-                "revenue": float(item.revenue or 0)
-            } for item in trend_data
+                "date": day.day.isoformat(),
+                "revenue": float(day.revenue or 0)
+            } for day in analytics_rollups.daily(db, *current) if day.revenue
         ]
 
     @staticmethod
     def get_user_growth_trend(db: Session, timeframe: str = '30d') -> List[Dict[str, Any]]:
         """Get user growth trend data for charts."""
         start_date, end_date = AnalyticsService.parse_timeframe(timeframe)
-
-        # Group by date
-        date_format = func.date(User.created_at)
-
-        trend_data = db.query(
-            date_format.label('date'),
-            func.count(User.id).label('new_users')
-        ).filter(
-            User.created_at.between(start_date, end_date)
-        ).group_by(date_format).order_by(date_format).all()
+        current, _ = AnalyticsService.day_periods(start_date, end_date)
 
         # Calculate cumulative
         cumulative = 0
         result = []
-        for item in trend_data:
-            cumulative += item.new_users
+        for day in analytics_rollups.daily(db, *current):
+            if not day.signups:
+                continue
+            cumulative += day.signups
             result.append({
-                "date": str(item.date),
-                "new_users": item.new_users,
+                "date": day.day.isoformat(),
+                "new_users": day.signups,
                 "total_users": cumulative
             })
 
@@ -6,11 +6,16 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import uuid
 
+from ..core.pagination import SortKey, count_rows, keyset_page
 from ..models.audit_log import AuditLog, ActionType
 from ..models.user import User
 from ..schemas.audit_log import AuditLogCreate
 
 
+# Newest first; id breaks ties between entries written in the same instant
+AUDIT_LOG_SORT_KEYS = (SortKey(AuditLog.created_at), SortKey(AuditLog.id))
+
+
 class AuditService:
     """Service for creating and querying audit logs."""
 
@@ -82,13 +87,15 @@ class AuditService:
         search: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-    ) -> tuple[List[AuditLog], int]:
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+    ) -> tuple[List[AuditLog], Optional[int], Optional[str]]:
         """
         Get audit logs with filtering and pagination.
 
         Args:
             db: Database session
-            skip: Number of records to skip
+            skip: Number of records to skip (ignored when a cursor is given)
             limit: Maximum number of records to return
             action_type: Filter by action type
             entity_type: Filter by entity type
@@ -97,9 +104,14 @@ class AuditService:
             search: Search in reason, admin_name, target_user_name, or entity_name
             start_date: Filter by created_at >= start_date
             end_date: Filter by created_at <= end_date
+            cursor: Keyset cursor returned with the previous page
+            count_mode: "exact", "estimate" or "none" (see core.pagination.count_rows)
 
         Returns:
-            Tuple of (list of AuditLog instances, total count)
+            Tuple of (list of AuditLog instances, total count, cursor for the next page)
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded
         """
         query = db.query(AuditLog)
 
@@ -134,12 +146,12 @@ class AuditService:
             query = query.filter(AuditLog.created_at <= end_date)
 
         # Get total count
-        total = query.count()
+        total = count_rows(query, count_mode)
 
         # Get logs with pagination
-        logs = query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+        logs, next_cursor = keyset_page(query, AUDIT_LOG_SORT_KEYS, limit, cursor=cursor, skip=skip)
 
-        return logs, total
+        return logs, total, next_cursor
 
     @staticmethod
     def get_user_audit_history(
@@ -7,8 +7,9 @@ from sqlalchemy.orm import Session
 from typing import Optional, Tuple
 from datetime import datetime
 
+from ..core.access_policy import GYANI_AND_ABOVE, has_tier
 from ..models.book_group import BookGroup, BookGroupAccess, BookGroupAccessType, BookGroupStatus
-from ..models.user import User, MembershipTierEnum
+from ..models.user import User
 from ..models.product import Product, ProductType
 from ..models.event import UserCalendar
 
@@ -30,11 +31,7 @@ class BookGroupService:
         # Check if book group requires purchase
         if not book_group.requires_purchase:
             # Free for Gyani+ members
-            if user.membership_tier in [
-                MembershipTierEnum.GYANI,
-                MembershipTierEnum.PRAGYANI,
-                MembershipTierEnum.PRAGYANI_PLUS
-            ]:
+            if has_tier(user, GYANI_AND_ABOVE):
                 return (True, BookGroupAccessType.MEMBERSHIP, "gyani_plus_member")
 
         # Check for explicit access record (purchased or manually granted)
@@ -156,11 +153,7 @@ class BookGroupService:
             user: User who was upgraded
         """
         # Only grant if user is Gyani or higher
-        if user.membership_tier not in [
-            MembershipTierEnum.GYANI,
-            MembershipTierEnum.PRAGYANI,
-            MembershipTierEnum.PRAGYANI_PLUS
-        ]:
+        if not has_tier(user, GYANI_AND_ABOVE):
             return
 
         # Find all book groups that don't require purchase
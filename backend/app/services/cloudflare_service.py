@@ -2,9 +2,9 @@
 Cloudflare Service - Generate URLs for Cloudflare Stream and Images, and upload files
 """
 from typing import Optional, Dict, Any, BinaryIO
-import httpx
 import io
 from ..core.config import settings
+from .http_client import outbound_http
 
 
 class CloudflareService:
@@ -188,30 +188,29 @@ class CloudflareService:
             if "requireSignedURLs" in metadata:
                 data["requireSignedURLs"] = metadata["requireSignedURLs"]
 
-        async with httpx.AsyncClient(timeout=300.0) as client:  # 5 min timeout for large uploads
-            response = await client.post(url, headers=headers, files=files, data=data)
+        response = await outbound_http.post(url, headers=headers, files=files, data=data, timeout=300.0)  # 5 min timeout for large uploads
 
-            if response.status_code not in [200, 201]:
-                error_msg = f"Cloudflare Stream upload failed: {response.status_code} - {response.text}"
-                raise Exception(error_msg)
+        if response.status_code not in [200, 201]:
+            error_msg = f"Cloudflare Stream upload failed: {response.status_code} - {response.text}"
+            raise Exception(error_msg)
 
-            result = response.json()
+        result = response.json()
 
-            if not result.get("success"):
-                errors = result.get("errors", [])
-                error_msg = errors[0].get("message", "Unknown error") if errors else "Upload failed"
-                raise Exception(f"Cloudflare Stream upload error: {error_msg}")
+        if not result.get("success"):
+            errors = result.get("errors", [])
+            error_msg = errors[0].get("message", "Unknown error") if errors else "Upload failed"
+            raise Exception(f"Cloudflare Stream upload error: {error_msg}")
 
-            video_data = result.get("result", {})
+        video_data = result.get("result", {})
 
-            return {
-                "stream_uid": video_data.get("uid"),
-                "status": video_data.get("status"),
-                "duration": video_data.get("duration"),
-                "thumbnail_url": f"https://stream.cloudflare.com/{video_data.get('uid')}/thumbnails/thumbnail.jpg",
-                "embed_url": f"https://stream.cloudflare.com/{video_data.get('uid')}/iframe",
-                "playback_url": f"https://stream.cloudflare.com/{video_data.get('uid')}/manifest/video.m3u8"
-            }
+        return {
+            "stream_uid": video_data.get("uid"),
+            "status": video_data.get("status"),
+            "duration": video_data.get("duration"),
+            "thumbnail_url": f"https://stream.cloudflare.com/{video_data.get('uid')}/thumbnails/thumbnail.jpg",
+            "embed_url": f"https://stream.cloudflare.com/{video_data.get('uid')}/iframe",
+            "playback_url": f"https://stream.cloudflare.com/{video_data.get('uid')}/manifest/video.m3u8"
+        }
 
     @staticmethod
     async def upload_image(
@@ -260,38 +259,37 @@ class CloudflareService:
         if alt_text:
             data["metadata"] = alt_text
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, headers=headers, files=files, data=data)
+        response = await outbound_http.post(url, headers=headers, files=files, data=data, timeout=60.0)
 
-            if response.status_code not in [200, 201]:
-                error_msg = f"Cloudflare Images upload failed: {response.status_code} - {response.text}"
-                raise Exception(error_msg)
+        if response.status_code not in [200, 201]:
+            error_msg = f"Cloudflare Images upload failed: {response.status_code} - {response.text}"
+            raise Exception(error_msg)
 
-            result = response.json()
+        result = response.json()
 
-            if not result.get("success"):
-                errors = result.get("errors", [])
-                error_msg = errors[0].get("message", "Unknown error") if errors else "Upload failed"
-                raise Exception(f"Cloudflare Images upload error: {error_msg}")
+        if not result.get("success"):
+            errors = result.get("errors", [])
+            error_msg = errors[0].get("message", "Unknown error") if errors else "Upload failed"
+            raise Exception(f"Cloudflare Images upload error: {error_msg}")
 
-            image_data = result.get("result", {})
-            image_id = image_data.get("id")
+        image_data = result.get("result", {})
+        image_id = image_data.get("id")
 
-            # Get delivery URLs
-            variants = image_data.get("variants", [])
-            public_url = next((v for v in variants if "public" in v), variants[0] if variants else "")
+        # Get delivery URLs
+        variants = image_data.get("variants", [])
+        public_url = next((v for v in variants if "public" in v), variants[0] if variants else "")
 
-            # Construct standard URL if account_hash is available
-            if account_hash and image_id:
-                public_url = f"https://imagedelivery.net/{account_hash}/{image_id}/public"
+        # Construct standard URL if account_hash is available
+        if account_hash and image_id:
+            public_url = f"https://imagedelivery.net/{account_hash}/{image_id}/public"
 
-            return {
-                "image_id": image_id,
-                "filename": image_data.get("filename"),
-                "url": public_url,
-                "variants": variants,
-                "uploaded": image_data.get("uploaded")
-            }
+        return {
+            "image_id": image_id,
+            "filename": image_data.get("filename"),
+            "url": public_url,
+            "variants": variants,
+            "uploaded": image_data.get("uploaded")
+        }
 
     @staticmethod
     async def upload_video_to_r2(
@@ -0,0 +1,129 @@
+"""
+Conditional GET - ETag / If-None-Match support for read endpoints
+
+ConditionalGetMiddleware gives every successful JSON GET a strong ETag (a hash
+of the body, unless the endpoint already set one) and answers a matching
+If-None-Match with 304 Not Modified, so clients skip the download.
+
+Hot endpoints go further with `conditional_get()`: they build the ETag from a
+cheap version token before doing the expensive part, e.g. max(updated_at) and
+count(*) of the rows they are about to list, or the ids and updated_at of the
+page they just loaded, plus the content-version counter that writes bump (see
+response_cache.content_version), and return the 304 without counting,
+hydrating or serializing anything.
+
+Admin endpoints purge their tags explicitly; `track_content_version()` also
+bumps a tag whenever this process commits a change to the given models.
+"""
+import hashlib
+from typing import Any, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func, inspect
+from sqlalchemy.orm import Query
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.services import content_changes
+from app.services.response_cache import response_cache
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers `etag` (weak comparison, as RFC 9110 requires for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str, vary: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+def query_version(query: Query, updated_at_column) -> Tuple[Any, int]:
+    """
+    (max(updated_at), count) of the rows a query matches.
+
+    One aggregate over the filtered rows; the count catches deletes, which do
+    not move max(updated_at).
+    """
+    latest, total = query.with_entities(func.max(updated_at_column), func.count()).order_by(None).one()
+    return latest.isoformat() if latest else None, total
+
+
+def content_version(*tags: str) -> str:
+    return response_cache.content_version(*tags)
+
+
+def track_content_version(tag: str, models: Iterable[type], ignored: Iterable[str] = ()) -> None:
+    """
+    Purge `tag` after every commit that inserts, deletes or changes a row of
+    `models`; updates that only touch `ignored` columns (counters) do not count.
+    """
+    ignored = frozenset(ignored)
+
+    def changed(entity: Any) -> bool:
+        return any(
+            attribute.history.has_changes()
+            for attribute in inspect(entity).attrs
+            if attribute.key not in ignored
+        )
+
+    def apply(changes: content_changes.ContentChanges) -> None:
+        # Deleted rows arrive as None
+        if any(value is not False for value in changes.values()):
+            response_cache.purge(tag)
+
+    content_changes.subscribe(f"content_version:{tag}", models, changed, apply)
+
+
+def conditional_get(request: Request, response: Response, *version_parts: Any, vary: Optional[str] = None) -> Optional[Response]:
+    """
+    Tag the response with an ETag built from `version_parts`.
+
+    Returns a 304 response to send instead when the client already has this
+    version, otherwise None (the endpoint carries on and the ETag header is
+    added to its response).
+    """
+    etag = make_etag(request.url.path, str(request.query_params), *version_parts)
+    if etag_matches(request, etag):
+        return not_modified(etag, vary)
+    response.headers["ETag"] = etag
+    if vary:
+        response.headers["Vary"] = vary
+    return None
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    """ETag every JSON GET response and turn matching If-None-Match requests into 304s"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method != "GET" or response.status_code != 200:
+            return response
+
+        etag = response.headers.get("etag")
+        if etag is None:
+            if not response.headers.get("content-type", "").startswith("application/json"):
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+            # Raw headers, not a dict, so repeated ones (Set-Cookie) survive
+            raw_headers = [(k, v) for k, v in response.raw_headers if k.lower() != b"content-length"]
+            response = Response(content=body, status_code=response.status_code)
+            response.raw_headers[:0] = raw_headers
+            response.headers.append("ETag", etag)
+
+        if etag_matches(request, etag):
+            return not_modified(etag, response.headers.get("vary"))
+        return response
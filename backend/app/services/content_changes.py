@@ -0,0 +1,110 @@
+"""
+Content Changes - In-process feed of committed model changes
+
+In-memory structures derived from the database (search index, suggestion trie,
+caches) subscribe here to learn about rows that were inserted, updated or deleted
+by any Session in this process. Values are extracted at flush time, while the rows
+are still loaded, and delivered only after the transaction commits; rolled back
+changes are dropped.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# (model class, str(primary key)) -> extracted value; for a deleted row None,
+# or what the subscriber's extract_deleted returned
+ContentChanges = Dict[Tuple[type, str], Any]
+
+_PENDING_KEY = "content_changes"
+
+
+class _Subscription:
+    def __init__(
+        self,
+        models: Iterable[type],
+        extract: Callable[[Any], Any],
+        apply: Callable[[ContentChanges], None],
+        extract_deleted: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.models = tuple(models)
+        self.extract = extract
+        self.apply = apply
+        self.extract_deleted = extract_deleted
+
+
+_subscriptions: Dict[str, _Subscription] = {}
+_lock = threading.Lock()
+_listeners_registered = False
+
+
+def subscribe(
+    name: str,
+    models: Iterable[type],
+    extract: Callable[[Any], Any],
+    apply: Callable[[ContentChanges], None],
+    extract_deleted: Optional[Callable[[Any], Any]] = None,
+) -> None:
+    """
+    Register (or replace) a subscriber.
+
+    extract(entity) runs during flush for every new or modified instance of
+    `models`; apply(changes) runs after commit with everything the transaction
+    touched. extract should be cheap and must not query the database.
+
+    Deleted instances are reported as None, or as extract_deleted(entity) when
+    given; the row is already gone, so it may only read what is still loaded.
+    """
+    global _listeners_registered
+    with _lock:
+        _subscriptions[name] = _Subscription(models, extract, apply, extract_deleted)
+        if not _listeners_registered:
+            event.listen(Session, "after_flush", _collect_changes)
+            event.listen(Session, "after_commit", _apply_changes)
+            event.listen(Session, "after_rollback", _discard_changes)
+            _listeners_registered = True
+
+
+def unsubscribe(name: str) -> None:
+    with _lock:
+        _subscriptions.pop(name, None)
+
+
+def _collect_changes(session: Session, flush_context) -> None:
+    if not _subscriptions:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    changed = list(session.new) + list(session.dirty)
+    deleted = list(session.deleted)
+    for name, subscription in list(_subscriptions.items()):
+        changes = pending.setdefault(name, {})
+        for entity in changed:
+            if isinstance(entity, subscription.models):
+                changes[(type(entity), str(entity.id))] = subscription.extract(entity)
+        for entity in deleted:
+            if isinstance(entity, subscription.models):
+                extract_deleted = subscription.extract_deleted
+                changes[(type(entity), str(entity.id))] = extract_deleted(entity) if extract_deleted else None
+
+
+def _apply_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for name, changes in pending.items():
+        subscription = _subscriptions.get(name)
+        if subscription is None or not changes:
+            continue
+        try:
+            subscription.apply(changes)
+        except Exception:
+            # The transaction is already committed; never fail the request over a derived structure
+            logger.exception("Content change subscriber %s failed", name)
+
+
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
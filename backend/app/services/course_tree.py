@@ -0,0 +1,196 @@
+"""
+Course Tree - Load a course's classes, components and progress in a fixed number of queries
+
+The course page, component navigation and progress endpoints all walk the same
+class → component → sub-component hierarchy. CourseTree loads it with one query
+for the classes, one (selectin) for every component of those classes and, for an
+enrolled user, one for their progress rows, then assembles the hierarchy in
+memory. Nothing is lazy loaded afterwards, so the query count does not grow with
+the size of the course.
+
+CourseIndex is the flattened, precomputed view navigation and progress need:
+the ordered top-level component ids with their positions, the component count
+and the total duration. `course_index` caches one per course; the admin class
+and component endpoints invalidate it, and a TTL bounds staleness in other
+workers.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models.course import CourseClass, CourseComponent, CourseEnrollment, CourseProgress
+
+
+class CourseTree:
+    """In-memory class/component hierarchy of one course"""
+
+    def __init__(self, classes: List[CourseClass], progress_rows: Optional[List[CourseProgress]] = None):
+        self.classes = classes
+        self.components_by_id: Dict[str, CourseComponent] = {}
+        self.top_level: Dict[str, List[CourseComponent]] = {}
+        self.sub_components: Dict[str, List[CourseComponent]] = defaultdict(list)
+        self.class_durations: Dict[str, int] = {}
+
+        for cls in classes:
+            # cls.components is already loaded and ordered by order_index
+            self.top_level[str(cls.id)] = []
+            self.class_durations[str(cls.id)] = sum(c.duration for c in cls.components if c.duration)
+            for component in cls.components:
+                self.components_by_id[str(component.id)] = component
+                if component.parent_component_id is None:
+                    self.top_level[str(cls.id)].append(component)
+                else:
+                    self.sub_components[str(component.parent_component_id)].append(component)
+
+        self.progress_rows = progress_rows or []
+        self.progress: Dict[str, CourseProgress] = {
+            str(p.component_id): p for p in self.progress_rows if p.component_id is not None
+        }
+
+    @classmethod
+    def load(cls, db: Session, course_id, enrollment: Optional[CourseEnrollment] = None) -> "CourseTree":
+        classes = (
+            db.query(CourseClass)
+            .options(selectinload(CourseClass.components))
+            .filter(CourseClass.course_id == course_id)
+            .order_by(CourseClass.order_index)
+            .all()
+        )
+        progress_rows = None
+        if enrollment is not None:
+            progress_rows = (
+                db.query(CourseProgress)
+                .filter(CourseProgress.enrollment_id == enrollment.id)
+                .all()
+            )
+        return cls(classes, progress_rows)
+
+    # ----- derived values -----
+
+    @property
+    def total_duration(self) -> int:
+        return sum(self.class_durations.values())
+
+    @property
+    def total_components(self) -> int:
+        """Every component of the course, sub-components included (the basis of progress percentages)"""
+        return len(self.components_by_id)
+
+    def ordered_components(self) -> List[CourseComponent]:
+        """Top-level components across all classes in course order"""
+        return [component for cls in self.classes for component in self.top_level[str(cls.id)]]
+
+    def progress_percentage(self) -> float:
+        """Same figure as calculate_course_progress, from the loaded progress rows"""
+        if not self.total_components:
+            return 0.0
+        completed = sum(1 for p in self.progress_rows if p.completed)
+        return (completed / self.total_components) * 100
+
+    def progress_for(self, component_id) -> Optional[CourseProgress]:
+        return self.progress.get(str(component_id))
+
+    def sub_components_of(self, component_id) -> List[CourseComponent]:
+        return sorted(self.sub_components.get(str(component_id), []), key=lambda c: c.order_index)
+
+
+class IndexedComponent(NamedTuple):
+    id: str
+    title: str
+    component_category: Optional[str]
+
+
+class CourseIndex:
+    """Precomputed component ordering of one course"""
+
+    def __init__(self, ordered: List[IndexedComponent], total_components: int, total_duration: int):
+        self.ordered = ordered
+        self.positions: Dict[str, int] = {component.id: i for i, component in enumerate(ordered)}
+        self.total_components = total_components
+        self.total_duration = total_duration
+
+    @classmethod
+    def build(cls, db: Session, course_id) -> "CourseIndex":
+        """One column-only query over every component of the course, in course order"""
+        rows = (
+            db.query(
+                CourseComponent.id,
+                CourseComponent.parent_component_id,
+                CourseComponent.title,
+                CourseComponent.component_category,
+                CourseComponent.duration,
+            )
+            .join(CourseClass, CourseComponent.class_id == CourseClass.id)
+            .filter(CourseClass.course_id == course_id)
+            .order_by(CourseClass.order_index, CourseComponent.order_index)
+            .all()
+        )
+        ordered = [
+            IndexedComponent(str(row.id), row.title, row.component_category.value if row.component_category else None)
+            for row in rows
+            if row.parent_component_id is None
+        ]
+        return cls(ordered, len(rows), sum(row.duration for row in rows if row.duration))
+
+    @classmethod
+    def from_tree(cls, tree: CourseTree) -> "CourseIndex":
+        ordered = [
+            IndexedComponent(str(c.id), c.title, c.component_category.value if c.component_category else None)
+            for c in tree.ordered_components()
+        ]
+        return cls(ordered, tree.total_components, tree.total_duration)
+
+    def neighbours(self, component_id) -> Optional[Tuple[int, Optional[IndexedComponent], Optional[IndexedComponent]]]:
+        """(position, previous, next) of a top-level component, or None if it is not in this course"""
+        position = self.positions.get(str(component_id))
+        if position is None:
+            return None
+        previous = self.ordered[position - 1] if position > 0 else None
+        next_component = self.ordered[position + 1] if position + 1 < len(self.ordered) else None
+        return position, previous, next_component
+
+    def progress_percentage(self, completed_components: int) -> float:
+        if not self.total_components:
+            return 0.0
+        return (completed_components / self.total_components) * 100
+
+
+class CourseIndexCache:
+    """Process-wide course_id -> CourseIndex cache"""
+
+    def __init__(self, ttl_seconds: int = settings.COURSE_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._indexes: Dict[str, Tuple[CourseIndex, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, course_id) -> CourseIndex:
+        cached = self._indexes.get(str(course_id))
+        if cached is not None:
+            index, built_at = cached
+            if not self.ttl_seconds or time.monotonic() - built_at <= self.ttl_seconds:
+                return index
+        return self.rebuild(db, course_id)
+
+    def rebuild(self, db: Session, course_id) -> CourseIndex:
+        index = CourseIndex.build(db, course_id)
+        self.put(course_id, index)
+        return index
+
+    def put(self, course_id, index: CourseIndex) -> None:
+        with self._lock:
+            self._indexes[str(course_id)] = (index, time.monotonic())
+
+    def invalidate(self, course_id=None) -> None:
+        """Drop one course's index (or all of them) so the next read rebuilds it"""
+        with self._lock:
+            if course_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(str(course_id), None)
+
+
+course_index = CourseIndexCache()
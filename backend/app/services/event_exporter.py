@@ -0,0 +1,188 @@
+"""
+Event Exporter - Batches outgoing Mixpanel and GA4 events
+
+`mixpanel_service` and `ga4_service` hand their events to `event_exporter`
+instead of posting one event per request. Events are buffered per destination
+(and per GA4 client) and sent in batches of up to the vendor's per-request
+limit (50 events for Mixpanel /track, 25 for a GA4 Measurement Protocol
+request), as soon as a batch is full or every EVENT_EXPORT_FLUSH_SECONDS.
+
+A batch the vendor rejects (or that cannot be delivered) is retried with
+exponential backoff, up to EVENT_EXPORT_MAX_ATTEMPTS sends. Mixpanel events
+carry an $insert_id, so a retried batch that did arrive the first time is
+deduplicated on their side.
+
+The exporter only buffers while its loop is running (started in the app
+lifespan); otherwise, e.g. in scripts, the services send directly.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# sender(group, items) -> True if the vendor accepted the batch
+Sender = Callable[[Hashable, List[Any]], Awaitable[bool]]
+
+MAX_BACKOFF_SECONDS = 300.0
+
+
+class Destination(NamedTuple):
+    sender: Sender
+    batch_size: int
+
+
+class _Batch:
+    def __init__(self, destination: str, group: Hashable, items: List[Any]):
+        self.destination = destination
+        self.group = group
+        self.items = items
+        self.attempts = 0
+        self.next_attempt = 0.0
+
+
+class EventExporter:
+    """Size/time triggered batching with backoff retries"""
+
+    def __init__(
+        self,
+        flush_seconds: float = settings.EVENT_EXPORT_FLUSH_SECONDS,
+        max_attempts: int = settings.EVENT_EXPORT_MAX_ATTEMPTS,
+        backoff_seconds: float = settings.EVENT_EXPORT_BACKOFF_SECONDS,
+        max_buffered: int = settings.EVENT_EXPORT_MAX_BUFFERED,
+    ):
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_buffered = max_buffered
+        self.running = False
+        self._destinations: Dict[str, Destination] = {}
+        self._buffers: Dict[Tuple[str, Hashable], List[Any]] = defaultdict(list)
+        self._retries: List[_Batch] = []
+        self._buffered = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.stats = {
+            "events_queued": 0,
+            "events_sent": 0,
+            "events_dropped": 0,
+            "batches_sent": 0,
+            "batches_failed": 0,
+            "batches_retried": 0,
+        }
+
+    def register(self, name: str, sender: Sender, batch_size: int) -> None:
+        self._destinations[name] = Destination(sender, batch_size)
+
+    def add(self, destination: str, item: Any, group: Hashable = None) -> bool:
+        """Buffer one event; False if the buffer is full and the event was dropped"""
+        if self._buffered >= self.max_buffered:
+            self.stats["events_dropped"] += 1
+            return False
+        buffer = self._buffers[(destination, group)]
+        buffer.append(item)
+        self._buffered += 1
+        self.stats["events_queued"] += 1
+        if len(buffer) >= self._destinations[destination].batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "buffered": self._buffered,
+            "pending_retries": len(self._retries),
+        }
+
+    def _take_batches(self, flush_all: bool, final: bool) -> List[_Batch]:
+        """Full batches (every buffered event when flush_all) plus retries that are due (all when final)"""
+        batches: List[_Batch] = []
+        for key in list(self._buffers):
+            destination, group = key
+            items = self._buffers[key]
+            size = self._destinations[destination].batch_size
+            while len(items) >= size or (flush_all and items):
+                batch, items = items[:size], items[size:]
+                batches.append(_Batch(destination, group, batch))
+                self._buffered -= len(batch)
+            if items:
+                self._buffers[key] = items
+            else:
+                del self._buffers[key]
+
+        now = time.monotonic()
+        waiting: List[_Batch] = []
+        for batch in self._retries:
+            (batches if final or batch.next_attempt <= now else waiting).append(batch)
+        self._retries = waiting
+        return batches
+
+    async def _send(self, batch: _Batch, final: bool) -> None:
+        sender = self._destinations[batch.destination].sender
+        try:
+            ok = await sender(batch.group, batch.items)
+        except Exception as e:
+            logger.warning("%s batch of %d events raised: %s", batch.destination, len(batch.items), e)
+            ok = False
+
+        batch.attempts += 1
+        if ok:
+            self.stats["batches_sent"] += 1
+            self.stats["events_sent"] += len(batch.items)
+            return
+
+        self.stats["batches_failed"] += 1
+        if final or batch.attempts >= self.max_attempts:
+            self.stats["events_dropped"] += len(batch.items)
+            logger.warning(
+                "Dropping %s batch of %d events after %d attempts", batch.destination, len(batch.items), batch.attempts
+            )
+            return
+        delay = min(self.backoff_seconds * 2 ** (batch.attempts - 1), MAX_BACKOFF_SECONDS)
+        batch.next_attempt = time.monotonic() + delay * random.uniform(0.5, 1.0)
+        self.stats["batches_retried"] += 1
+        self._retries.append(batch)
+
+    async def flush(self, flush_all: bool = True, final: bool = False) -> int:
+        """Send pending batches; returns how many were attempted"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            batches = self._take_batches(flush_all, final)
+            await asyncio.gather(*(self._send(batch, final) for batch in batches))
+            return len(batches)
+
+    async def run(self) -> None:
+        """Flush on size and time triggers until stopped (started from the app lifespan)"""
+        self._wakeup = asyncio.Event()
+        self.running = True
+        deadline = time.monotonic() + self.flush_seconds
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                timer_fired = time.monotonic() >= deadline
+                if timer_fired:
+                    deadline = time.monotonic() + self.flush_seconds
+                try:
+                    await self.flush(flush_all=timer_fired)
+                except Exception as e:
+                    logger.warning("Event export flush failed: %s", e)
+        finally:
+            self.running = False
+
+    async def stop(self) -> None:
+        """Stop buffering and make one last attempt at everything pending"""
+        self.running = False
+        await self.flush(flush_all=True, final=True)
+
+
+event_exporter = EventExporter()
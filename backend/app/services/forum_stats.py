@@ -0,0 +1,122 @@
+"""
+Forum Stats - Denormalized per-category counters
+
+ForumCategory.thread_count, post_count and latest_thread_id are kept up to
+date by the thread and post endpoints, in the same transaction as the write,
+with relative UPDATEs (`count = count + n`) so concurrent writers do not lose
+increments. Listing categories is then a single query.
+
+post_count counts every post in the category's threads, soft-deleted ones
+included, like the per-request COUNT it replaces (deleting a post only marks
+it deleted). reconcile() recomputes everything from the threads and posts and
+repairs any drift, e.g. after rows were changed outside the API.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+
+from app.models.forum import ForumCategory, ForumPost, ForumThread
+
+logger = logging.getLogger(__name__)
+
+
+def _adjust(db: Session, category_id, threads: int = 0, posts: int = 0, **values: Any) -> None:
+    db.query(ForumCategory).filter(ForumCategory.id == category_id).update(
+        {
+            ForumCategory.thread_count: ForumCategory.thread_count + threads,
+            ForumCategory.post_count: ForumCategory.post_count + posts,
+            **{getattr(ForumCategory, name): value for name, value in values.items()},
+        },
+        synchronize_session=False,
+    )
+
+
+def _latest_thread_id(db: Session, category_id, exclude_id=None) -> Optional[Any]:
+    query = db.query(ForumThread.id).filter(ForumThread.category_id == category_id)
+    if exclude_id is not None:
+        query = query.filter(ForumThread.id != exclude_id)
+    row = query.order_by(desc(ForumThread.last_post_at), desc(ForumThread.id)).first()
+    return row[0] if row else None
+
+
+def thread_created(db: Session, thread: ForumThread) -> None:
+    """A new thread (with its initial post) is now the category's latest"""
+    _adjust(db, thread.category_id, threads=1, posts=1, latest_thread_id=thread.id)
+
+
+def post_created(db: Session, thread: ForumThread) -> None:
+    """A reply bumps the thread's last_post_at, making it the category's latest"""
+    _adjust(db, thread.category_id, posts=1, latest_thread_id=thread.id)
+
+
+def thread_deleted(db: Session, thread: ForumThread) -> None:
+    """Call before deleting the thread: removes it and its posts from the counters"""
+    posts = db.query(func.count(ForumPost.id)).filter(ForumPost.thread_id == thread.id).scalar() or 0
+    category = db.query(ForumCategory.latest_thread_id).filter(ForumCategory.id == thread.category_id).first()
+    values: Dict[str, Any] = {}
+    if category is not None and str(category.latest_thread_id) == str(thread.id):
+        values["latest_thread_id"] = _latest_thread_id(db, thread.category_id, exclude_id=thread.id)
+    _adjust(db, thread.category_id, threads=-1, posts=-posts, **values)
+
+
+def thread_moved(db: Session, thread: ForumThread, old_category_id) -> None:
+    """Call after changing thread.category_id (flushed): moves its counts between categories"""
+    if str(old_category_id) == str(thread.category_id):
+        return
+    posts = db.query(func.count(ForumPost.id)).filter(ForumPost.thread_id == thread.id).scalar() or 0
+    _adjust(db, old_category_id, threads=-1, posts=-posts, latest_thread_id=_latest_thread_id(db, old_category_id))
+    _adjust(db, thread.category_id, threads=1, posts=posts, latest_thread_id=_latest_thread_id(db, thread.category_id))
+
+
+def reconcile(db: Session) -> List[Dict[str, Any]]:
+    """
+    Recompute every category's counters and latest thread, fix the ones that
+    drifted and commit. Returns what was changed.
+    """
+    thread_counts = dict(
+        db.query(ForumThread.category_id, func.count(ForumThread.id)).group_by(ForumThread.category_id).all()
+    )
+    post_counts = dict(
+        db.query(ForumThread.category_id, func.count(ForumPost.id))
+        .join(ForumPost, ForumPost.thread_id == ForumThread.id)
+        .group_by(ForumThread.category_id)
+        .all()
+    )
+    # Latest thread per category: the first row per category in last_post_at order
+    latest: Dict[Any, Any] = {}
+    for category_id, thread_id in db.query(ForumThread.category_id, ForumThread.id).order_by(
+        ForumThread.category_id, desc(ForumThread.last_post_at), desc(ForumThread.id)
+    ):
+        latest.setdefault(str(category_id), thread_id)
+    thread_counts = {str(key): value for key, value in thread_counts.items()}
+    post_counts = {str(key): value for key, value in post_counts.items()}
+
+    repaired = []
+    for category in db.query(ForumCategory).all():
+        key = str(category.id)
+        expected = {
+            "thread_count": thread_counts.get(key, 0),
+            "post_count": post_counts.get(key, 0),
+            "latest_thread_id": latest.get(key),
+        }
+        actual = {
+            "thread_count": category.thread_count,
+            "post_count": category.post_count,
+            "latest_thread_id": category.latest_thread_id,
+        }
+        drift = {
+            name: {"was": actual[name], "now": value}
+            for name, value in expected.items()
+            if str(actual[name]) != str(value)
+        }
+        if drift:
+            for name, value in expected.items():
+                setattr(category, name, value)
+            repaired.append({"category_id": key, "slug": category.slug, "changes": drift})
+
+    db.commit()
+    if repaired:
+        logger.warning("Forum category stats drifted in %d categories; repaired", len(repaired))
+    return repaired
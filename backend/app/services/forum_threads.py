@@ -0,0 +1,170 @@
+"""
+Forum Threads - Loads and renders the post tree of a thread
+
+A thread is rendered from a fixed number of queries however many posts it
+has: the posts with their authors and attachments, one GROUP BY for reaction
+counts and one lookup of the viewer's own reactions. The reply tree is then
+assembled in a single pass over the posts (children are attached through a
+dict keyed by id), at any depth.
+
+Large threads can be read in pages of top-level posts: each page carries the
+complete reply trees of its top-level posts, and the next page continues after
+the last top-level post via a keyset cursor.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.pagination import SortKey, keyset_page
+from app.models.forum import ForumPost, ForumPostReaction
+from app.models.user import User
+
+DELETED_POST_CONTENT = "[This post has been deleted]"
+
+# Top-level posts per page when a cursor is given without a limit
+DEFAULT_PAGE_SIZE = 20
+
+# Oldest first, like the thread view
+POST_SORT_KEYS = [SortKey(ForumPost.created_at, descending=False), SortKey(ForumPost.id, descending=False)]
+
+
+def _post_query(db: Session):
+    return db.query(ForumPost).options(
+        joinedload(ForumPost.user),
+        selectinload(ForumPost.attachments),
+    )
+
+
+def load_thread_posts(
+    db: Session,
+    thread_id,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[ForumPost], Optional[str]]:
+    """
+    Posts of a thread, oldest first, with authors and attachments loaded.
+
+    Without a limit every post is returned. With one, a page of top-level posts
+    is returned together with all of their replies (found with a recursive
+    query), plus the cursor of the next page. Raises InvalidCursor.
+    """
+    if limit is None and cursor:
+        limit = DEFAULT_PAGE_SIZE
+    if limit is None:
+        posts = _post_query(db).filter(ForumPost.thread_id == thread_id).order_by(
+            ForumPost.created_at, ForumPost.id
+        ).all()
+        return posts, None
+
+    roots, next_cursor = keyset_page(
+        _post_query(db).filter(ForumPost.thread_id == thread_id, ForumPost.parent_post_id.is_(None)),
+        POST_SORT_KEYS,
+        limit,
+        cursor=cursor,
+    )
+    if not roots:
+        return [], None
+
+    descendants = select(ForumPost.id).where(
+        ForumPost.parent_post_id.in_([root.id for root in roots])
+    ).cte("descendants", recursive=True)
+    descendants = descendants.union_all(
+        select(ForumPost.id).where(ForumPost.parent_post_id == descendants.c.id)
+    )
+    replies = _post_query(db).filter(ForumPost.id.in_(select(descendants.c.id))).order_by(
+        ForumPost.created_at, ForumPost.id
+    ).all()
+    return roots + replies, next_cursor
+
+
+def reaction_summary(
+    db: Session, post_ids: Sequence[Any], viewer_id: Optional[Any]
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, str]]:
+    """Reaction counts per post and the viewer's own reaction per post, in two queries"""
+    counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+    viewer_reactions: Dict[str, str] = {}
+    if not post_ids:
+        return counts, viewer_reactions
+
+    for post_id, reaction_type, count in db.query(
+        ForumPostReaction.post_id, ForumPostReaction.reaction_type, func.count()
+    ).filter(
+        ForumPostReaction.post_id.in_(post_ids)
+    ).group_by(ForumPostReaction.post_id, ForumPostReaction.reaction_type):
+        counts[str(post_id)][reaction_type.value] = count
+
+    if viewer_id is not None:
+        for post_id, reaction_type in db.query(
+            ForumPostReaction.post_id, ForumPostReaction.reaction_type
+        ).filter(
+            ForumPostReaction.post_id.in_(post_ids),
+            ForumPostReaction.user_id == viewer_id,
+        ).order_by(ForumPostReaction.created_at):
+            # First reaction wins, as before
+            viewer_reactions.setdefault(str(post_id), reaction_type.value)
+
+    return counts, viewer_reactions
+
+
+def build_nested_posts(db: Session, posts: List[ForumPost], viewer: Optional[User]) -> List[dict]:
+    """
+    Nested post structure for the thread detail view.
+
+    `posts` must be ordered oldest first; replies whose parent is not among
+    them are left out.
+    """
+    viewer_id = str(viewer.id) if viewer else None
+    # Resolved once for the whole thread rather than per post
+    viewer_is_admin = bool(viewer and viewer.is_admin)
+    counts, viewer_reactions = reaction_summary(db, [post.id for post in posts], viewer.id if viewer else None)
+
+    nodes: Dict[str, dict] = {}
+    for post in posts:
+        post_id = str(post.id)
+        is_own = viewer_id is not None and str(post.user_id) == viewer_id
+        nodes[post_id] = {
+            "id": post_id,
+            "thread_id": str(post.thread_id),
+            "user": {
+                "id": str(post.user.id),
+                "name": post.user.name,
+                "membership_tier": post.user.membership_tier.value,
+            },
+            "parent_post_id": str(post.parent_post_id) if post.parent_post_id else None,
+            "content": post.content if not post.is_deleted else DELETED_POST_CONTENT,
+            "is_deleted": post.is_deleted,
+            "is_edited": post.is_edited,
+            "created_at": post.created_at,
+            "updated_at": post.updated_at,
+            "edited_at": post.edited_at,
+            "reaction_counts": counts.get(post_id, {}),
+            "user_reaction": viewer_reactions.get(post_id),
+            "reply_count": 0,
+            "replies": [],
+            "attachments": [
+                {
+                    "id": str(att.id),
+                    "file_url": att.file_url,
+                    "file_name": att.file_name,
+                    "file_type": att.file_type,
+                    "file_size": att.file_size,
+                    "created_at": att.created_at,
+                }
+                for att in post.attachments
+            ],
+            "can_edit": is_own and not post.is_deleted,
+            "can_delete": is_own or (viewer_id is not None and viewer_is_admin),
+        }
+
+    root_posts = []
+    for node in nodes.values():
+        parent_id = node["parent_post_id"]
+        if parent_id is None:
+            root_posts.append(node)
+        elif parent_id in nodes:
+            parent = nodes[parent_id]
+            parent["replies"].append(node)
+            parent["reply_count"] += 1
+    return root_posts
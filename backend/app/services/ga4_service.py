@@ -1,10 +1,16 @@
 """Google Analytics 4 Service."""
 
-from typing import Dict, Any, Optional
-import httpx
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import json
 
 from ..core.config import settings
+from .event_exporter import event_exporter
+from .http_client import outbound_http
+
+
+# Most events the Measurement Protocol accepts in one request
+EVENTS_PER_REQUEST = 25
 
 
 class GA4Service:
@@ -14,6 +20,49 @@ class GA4Service:
         self.measurement_id = settings.GA4_MEASUREMENT_ID
         self.api_secret = settings.GA4_API_SECRET
         self.api_url = "https://www.google-analytics.com/mp/collect"
+        event_exporter.register("ga4", self.send_batch, EVENTS_PER_REQUEST)
+
+    def _url(self) -> str:
+        return f"{self.api_url}?measurement_id={self.measurement_id}&api_secret={self.api_secret}"
+
+    async def send_batch(self, group: Tuple[str, Optional[str]], events: List[Dict[str, Any]]) -> bool:
+        """
+        Post up to EVENTS_PER_REQUEST events of one client in one request.
+
+        Args:
+            group: (client_id, JSON encoded user properties or None)
+            events: Dicts with name and params
+
+        Returns:
+            True if GA4 accepted the batch
+        """
+        client_id, user_properties = group
+        try:
+            payload = {"client_id": client_id, "events": events}
+            if user_properties:
+                payload["user_properties"] = json.loads(user_properties)
+
+            response = await outbound_http.post(self._url(), json=payload, timeout=10.0)
+            return response.status_code in [200, 201, 202, 204]
+
+        except Exception as e:
+            print(f"GA4 track error: {e}")
+            return False
+
+    async def _submit(
+        self, client_id: str, events: List[Dict[str, Any]], user_properties: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        events = [{"name": event["name"], "params": event.get("params") or {}} for event in events]
+        group = (client_id, json.dumps(user_properties, sort_keys=True, default=str) if user_properties else None)
+
+        # Batched by the exporter while it runs, sent straight away otherwise
+        if event_exporter.running:
+            return all([event_exporter.add("ga4", event, group) for event in events])
+
+        ok = True
+        for start in range(0, len(events), EVENTS_PER_REQUEST):
+            ok = await self.send_batch(group, events[start:start + EVENTS_PER_REQUEST]) and ok
+        return ok
 
     async def track_event(
         self,
@@ -32,37 +81,29 @@ class GA4Service:
             user_properties: User properties
 
         Returns:
-            True if successful
+            True if the event was queued for export (or sent)
         """
         if not self.measurement_id or not self.api_secret:
             return False
 
-        try:
-            payload = {
-                "client_id": client_id,
-                "events": [
-                    {
-                        "name": event_name,
-                        "params": event_params or {},
-                    }
-                ],
-            }
+        return await self._submit(client_id, [{"name": event_name, "params": event_params}], user_properties)
 
-            if user_properties:
-                payload["user_properties"] = user_properties
+    async def track_events(self, client_id: str, events: List[Dict[str, Any]]) -> bool:
+        """
+        Track several events for one client with as few requests as possible.
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}?measurement_id={self.measurement_id}&api_secret={self.api_secret}",
-                    json=payload,
-                    timeout=10.0,
-                )
-                return response.status_code in [200, 201, 202, 204]
+        Args:
+            client_id: Unique identifier for the user
+            events: Dicts with name and params
 
-        except Exception as e:
-            print(f"GA4 track error: {e}")
+        Returns:
+            True if every event was queued for export (or sent)
+        """
+        if not self.measurement_id or not self.api_secret or not events:
             return False
 
+        return await self._submit(client_id, events)
+
     # Predefined event tracking methods
     async def track_page_view(self, client_id: str, page_location: str, page_title: str = None):
         """Track page view."""
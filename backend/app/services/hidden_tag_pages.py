@@ -0,0 +1,320 @@
+"""
+Hidden Tag Pages - Hydrated entity payloads for the marketing pages
+
+A marketing page section is a list of hidden tags pointing at teachings, blog
+posts, products, retreats or events. The tags are grouped by EntityType and
+each type is fetched with a single IN query (blog posts with their category
+joined in), so a page costs one query per entity type present rather than one
+per tag.
+
+The hydrated payload (before media resolution) is cached per page tag. Media
+paths are resolved on every hit in one batch against the shared media index,
+which needs no query once loaded and follows asset uploads on its own. A
+cached page is dropped when:
+- the "hidden-tags" response cache tag is purged (admin tag writes do this,
+  and are seen by every worker with the file backend);
+- a hidden tag is committed in this process, or a commit changes a column a
+  referenced entity or blog category is serialized from (via content_changes;
+  view count bumps and other unrelated updates leave the page alone), which
+  also purges "hidden-tags" so other workers and the response cache follow;
+- it is older than HIDDEN_TAG_PAGE_CACHE_SECONDS, which bounds staleness
+  after writes made by other processes.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.models.blog import BlogCategory, BlogPost
+from app.models.event import Event, LocationType
+from app.models.hidden_tag import EntityType, HiddenTag
+from app.models.product import Product
+from app.models.retreat import Retreat
+from app.models.teaching import Teaching
+from app.services import content_changes
+from app.services.media_service import MediaService
+from app.services.response_cache import response_cache
+
+# (model, str(primary key)), the same keys content_changes reports
+EntityKey = Tuple[type, str]
+
+ENTITY_MODELS: Dict[EntityType, type] = {
+    EntityType.TEACHING: Teaching,
+    EntityType.BLOG: BlogPost,
+    EntityType.PRODUCT: Product,
+    EntityType.RETREAT: Retreat,
+    EntityType.EVENT: Event,
+}
+
+# Relationships the serializers read, loaded with the entities
+_LOAD_OPTIONS = {
+    EntityType.BLOG: (joinedload(BlogPost.category),),
+}
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _enum_value(value) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+def _teaching_data(teaching: Teaching) -> dict:
+    return {
+        "id": str(teaching.id),
+        "slug": teaching.slug,
+        "title": teaching.title,
+        "description": teaching.description,
+        "thumbnail_url": teaching.thumbnail_url,
+        "duration": teaching.duration,
+        "published_date": _isoformat(teaching.published_date),
+        "access_level": teaching.access_level,
+    }
+
+
+def _blog_data(blog: BlogPost) -> dict:
+    return {
+        "id": str(blog.id),
+        "slug": blog.slug,
+        "title": blog.title,
+        "excerpt": blog.excerpt,
+        "featured_image": blog.featured_image,
+        "author_name": blog.author_name,
+        "author_image": blog.author_image,
+        "category": {"id": str(blog.category.id), "name": blog.category.name, "slug": blog.category.slug} if blog.category else None,
+        "read_time": blog.read_time,
+        "published_at": _isoformat(blog.published_at),
+    }
+
+
+def _product_data(product: Product) -> dict:
+    return {
+        "id": str(product.id),
+        "slug": product.slug,
+        "name": product.title,
+        "title": product.title,
+        "description": product.description,
+        "short_description": product.short_description,
+        "price": float(product.price) if product.price else None,
+        "featured_image": product.featured_image,
+        "type": _enum_value(product.type),
+        "categories": product.categories,
+        "featured": product.featured,
+    }
+
+
+def _retreat_data(retreat: Retreat) -> dict:
+    price = retreat.price_lifetime if retreat.price_lifetime is not None else retreat.price_onsite
+    return {
+        "id": str(retreat.id),
+        "slug": retreat.slug,
+        "title": retreat.title,
+        "description": retreat.description,
+        "short_description": retreat.subtitle,
+        "featured_image": retreat.thumbnail_url,
+        "start_date": _isoformat(retreat.start_date),
+        "end_date": _isoformat(retreat.end_date),
+        "location": retreat.location,
+        "retreat_type": _enum_value(retreat.type),
+        "price": float(price) if price else None,
+    }
+
+
+def _event_data(event: Event) -> dict:
+    return {
+        "id": str(event.id),
+        "slug": event.slug,
+        "title": event.title,
+        "description": event.description,
+        "event_type": _enum_value(event.type),
+        "start_time": _isoformat(event.start_datetime),
+        "end_time": _isoformat(event.end_datetime),
+        "location": event.location,
+        "is_online": event.location_type == LocationType.ONLINE,
+    }
+
+
+SERIALIZERS: Dict[EntityType, Callable[[Any], dict]] = {
+    EntityType.TEACHING: _teaching_data,
+    EntityType.BLOG: _blog_data,
+    EntityType.PRODUCT: _product_data,
+    EntityType.RETREAT: _retreat_data,
+    EntityType.EVENT: _event_data,
+}
+
+
+class _AttributeRecorder:
+    """Stands in for an entity to find out which attributes a serializer reads"""
+
+    def __init__(self):
+        self.read = set()
+
+    def __getattr__(self, name: str) -> None:
+        self.read.add(name)
+        return None
+
+
+def _serialized_attributes(serialize: Callable[[Any], dict]) -> FrozenSet[str]:
+    recorder = _AttributeRecorder()
+    serialize(recorder)
+    return frozenset(recorder.read)
+
+
+# Attributes a cached page shows of each referenced model
+PAYLOAD_ATTRIBUTES: Dict[type, FrozenSet[str]] = {
+    ENTITY_MODELS[entity_type]: _serialized_attributes(serialize) for entity_type, serialize in SERIALIZERS.items()
+}
+PAYLOAD_ATTRIBUTES[BlogPost] |= {"category_id"}
+PAYLOAD_ATTRIBUTES[BlogCategory] = frozenset({"name", "slug"})
+
+
+def _payload_changed(entity: Any) -> bool:
+    """Whether a flush changed anything a cached page shows of `entity` (always true for tags)"""
+    if isinstance(entity, HiddenTag):
+        return True
+    attrs = inspect(entity).attrs
+    return any(attrs[name].history.has_changes() for name in PAYLOAD_ATTRIBUTES[type(entity)])
+
+
+def _dependencies(entity_type: EntityType, entity: Any) -> List[EntityKey]:
+    keys = [(ENTITY_MODELS[entity_type], str(entity.id))]
+    if entity_type == EntityType.BLOG and entity.category_id:
+        keys.append((BlogCategory, str(entity.category_id)))
+    return keys
+
+
+def hydrate_entities(db: Session, tags: List[HiddenTag]) -> Tuple[Dict[Tuple[EntityType, str], dict], FrozenSet[EntityKey]]:
+    """
+    Entity data for `tags`, one query per entity type.
+
+    Returns {(entity_type, str(entity_id)): entity_data} for the entities that
+    exist, and the keys of every row the data was read from.
+    """
+    ids_by_type: Dict[EntityType, Dict[str, Any]] = defaultdict(dict)
+    for tag in tags:
+        ids_by_type[tag.entity_type][str(tag.entity_id)] = tag.entity_id
+
+    data: Dict[Tuple[EntityType, str], dict] = {}
+    dependencies = set()
+    for entity_type, ids in ids_by_type.items():
+        model = ENTITY_MODELS[entity_type]
+        # BlogPost ids are strings; the UUID columns take the UUID values
+        values = list(ids) if entity_type == EntityType.BLOG else list(ids.values())
+        query = db.query(model).options(*_LOAD_OPTIONS.get(entity_type, ())).filter(model.id.in_(values))
+        for entity in query:
+            data[(entity_type, str(entity.id))] = SERIALIZERS[entity_type](entity)
+            dependencies.update(_dependencies(entity_type, entity))
+    return data, frozenset(dependencies)
+
+
+def _tag_payload(tag: HiddenTag, entity_data: dict) -> dict:
+    return {
+        "id": tag.id,
+        "entity_id": tag.entity_id,
+        "entity_type": tag.entity_type,
+        "page_tag": tag.page_tag,
+        "order_index": tag.order_index,
+        "created_at": tag.created_at,
+        "updated_at": tag.updated_at,
+        "entity_data": entity_data,
+    }
+
+
+class _CachedPage(NamedTuple):
+    version: str
+    expires_at: float
+    items: List[dict]
+    dependencies: FrozenSet[EntityKey]
+
+
+class HiddenTagPageCache:
+    """LRU of hydrated page payloads keyed by (page_tag, entity_type filter)"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.HIDDEN_TAG_PAGE_CACHE_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.HIDDEN_TAG_PAGE_CACHE_MAX_ENTRIES
+        self._pages: "OrderedDict[Tuple[str, Optional[str]], _CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._subscribed = False
+        self.hits = 0
+        self.misses = 0
+
+    def get_page(self, db: Session, page_tag: str, entity_type: Optional[EntityType] = None) -> List[dict]:
+        """Tags of a page with their entity data and media URLs resolved"""
+        self._subscribe()
+        key = (page_tag, entity_type.value if entity_type else None)
+        # Read before building, so a purge racing with the build leaves the entry stale, not wrong
+        version = response_cache.content_version("hidden-tags")
+
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None and cached.version == version and cached.expires_at > time.monotonic():
+                self._pages.move_to_end(key)
+                self.hits += 1
+            else:
+                cached = None
+                self.misses += 1
+
+        if cached is None:
+            items, dependencies = self._build(db, page_tag, entity_type)
+            cached = _CachedPage(version, time.monotonic() + self.ttl_seconds, items, dependencies)
+            if self.ttl_seconds > 0 and self.max_entries > 0:
+                with self._lock:
+                    self._pages[key] = cached
+                    self._pages.move_to_end(key)
+                    while len(self._pages) > self.max_entries:
+                        self._pages.popitem(last=False)
+
+        batch = MediaService(db).batch()
+        return batch.resolve([{**item, "entity_data": batch.dict(item["entity_data"])} for item in cached.items])
+
+    def _build(self, db: Session, page_tag: str, entity_type: Optional[EntityType]) -> Tuple[List[dict], FrozenSet[EntityKey]]:
+        query = db.query(HiddenTag).filter(HiddenTag.page_tag == page_tag)
+        if entity_type:
+            query = query.filter(HiddenTag.entity_type == entity_type)
+        tags = query.order_by(HiddenTag.order_index.asc()).all()
+
+        data, dependencies = hydrate_entities(db, tags)
+        items = [_tag_payload(tag, data.get((tag.entity_type, str(tag.entity_id)), {})) for tag in tags]
+        return items, dependencies
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+    # ----- invalidation -----
+
+    def _subscribe(self) -> None:
+        if self._subscribed:
+            return
+        content_changes.subscribe(
+            "hidden_tag_pages",
+            (HiddenTag, BlogCategory, *ENTITY_MODELS.values()),
+            _payload_changed,
+            self._apply_changes,
+        )
+        self._subscribed = True
+
+    def _apply_changes(self, changes: content_changes.ContentChanges) -> None:
+        if any(model is HiddenTag for model, _ in changes):
+            # Tags may have moved between pages; they change rarely, so start over
+            self.clear()
+            return
+        # Deleted rows arrive as None and always count
+        changed = {key for key, payload_changed in changes.items() if payload_changed is not False}
+        if not changed:
+            return
+        with self._lock:
+            stale = [key for key, page in self._pages.items() if page.dependencies & changed]
+            for key in stale:
+                del self._pages[key]
+        if stale:
+            response_cache.purge("hidden-tags")
+
+
+hidden_tag_pages = HiddenTagPageCache()
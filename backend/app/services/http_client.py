@@ -0,0 +1,185 @@
+"""
+Outbound HTTP - App-scoped client for Mixpanel, GA4, Tilopay, Cloudflare and
+the Next.js revalidation hook
+
+One httpx.AsyncClient is opened in the app lifespan and shared by every
+service, so connections (pooled per origin by httpx) and TLS sessions are
+reused instead of being set up for each event or payment call. HTTP/2 is
+negotiated where the host supports it when the optional `h2` package is
+installed.
+
+`outbound_http.request()` adds:
+- default timeouts (OUTBOUND_HTTP_TIMEOUT_SECONDS / _CONNECT_TIMEOUT_SECONDS),
+  which callers can override per call (e.g. long uploads),
+- retries with full-jitter exponential backoff. Connection failures are
+  retried for any method since nothing was sent; timeouts, read errors and
+  429/502/503/504 responses only for idempotent requests (GET/PUT/DELETE, or
+  idempotent=True), so payments are never submitted twice,
+- per-destination request, error, retry and latency metrics (`stats()`).
+"""
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Failures where the request never reached the server
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+MAX_BACKOFF_SECONDS = 5.0
+LATENCY_SAMPLES = 512
+
+
+class HostMetrics:
+    """Counters and recent latencies for one destination host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses: Counter = Counter()
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, elapsed_ms: float, status_code: Optional[int] = None) -> None:
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+        if status_code is None:
+            self.errors += 1
+            self.statuses["error"] += 1
+        else:
+            if status_code >= 500:
+                self.errors += 1
+            self.statuses[f"{status_code // 100}xx"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 1) if ordered else 0.0
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "statuses": dict(self.statuses),
+            "latency_ms": {
+                "avg": round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(self.max_ms, 1),
+            },
+        }
+
+
+class OutboundHTTP:
+    """Shared, pooled AsyncClient with retries and per-host metrics"""
+
+    def __init__(self):
+        self.retries = settings.OUTBOUND_HTTP_RETRIES
+        self.backoff_seconds = settings.OUTBOUND_HTTP_BACKOFF_SECONDS
+        self._client: Optional[httpx.AsyncClient] = None
+        self._metrics: Dict[str, HostMetrics] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.OUTBOUND_HTTP2 and HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(
+                settings.OUTBOUND_HTTP_TIMEOUT_SECONDS,
+                connect=settings.OUTBOUND_HTTP_CONNECT_TIMEOUT_SECONDS,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.OUTBOUND_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OUTBOUND_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use when the lifespan did not start it (scripts, tests)
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        return random.uniform(0, min(self.backoff_seconds * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS))
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: Optional[int] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request through the shared client; raises httpx errors like client.request()"""
+        retries = self.retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        host = httpx.URL(url).host
+        metrics = self._metrics.setdefault(host, HostMetrics())
+
+        attempt = 0
+        while True:
+            response = None
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                metrics.record((time.perf_counter() - started) * 1000)
+                if attempt >= retries or not (idempotent or isinstance(e, CONNECT_ERRORS)):
+                    raise
+                logger.info("Retrying %s %s after %s", method, host, type(e).__name__)
+            else:
+                metrics.record((time.perf_counter() - started) * 1000, response.status_code)
+                if attempt >= retries or not idempotent or response.status_code not in RETRY_STATUSES:
+                    return response
+                logger.info("Retrying %s %s after HTTP %d", method, host, response.status_code)
+
+            attempt += 1
+            metrics.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": settings.OUTBOUND_HTTP2 and HTTP2_AVAILABLE,
+            "hosts": {host: metrics.snapshot() for host, metrics in sorted(self._metrics.items())},
+        }
+
+
+outbound_http = OutboundHTTP()
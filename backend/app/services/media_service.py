@@ -3,8 +3,202 @@ Media Service - Resolves original image paths to Cloudflare CDN URLs
 """
 from sqlalchemy.orm import Session
 from app.models.static_content import MediaAsset
-from typing import Dict, Any, Optional, List
+from app.core.config import settings
+from typing import Dict, Any, Optional, List, Set, Iterable
 from urllib.parse import quote
+import threading
+import time
+
+
+def normalize_media_path(path: str) -> str:
+    """Normalize a media path for lookups (case-insensitive, leading slash optional)"""
+    key = path.lower()
+    if key.startswith('/'):
+        key = key[1:]
+    return key
+
+
+class MediaIndex:
+    """
+    Process-wide original_path -> CDN URL index.
+
+    All active MediaAsset rows are loaded in a single query the first time a
+    lookup is made, after which lookups are plain dict reads. Paths that are
+    not in the index are remembered as misses so they are only reported once.
+    The index is rebuilt after invalidate() (called when assets are uploaded)
+    or once it is older than MEDIA_INDEX_TTL_SECONDS, which keeps other
+    workers from serving stale URLs forever.
+    """
+
+    def __init__(self, ttl_seconds: int = settings.MEDIA_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._urls: Optional[Dict[str, str]] = None
+        self._misses: Set[str] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        if self._urls is None:
+            return False
+        if self.ttl_seconds and time.monotonic() - self._loaded_at > self.ttl_seconds:
+            return False
+        return True
+
+    def load(self, db: Session) -> Dict[str, str]:
+        """Load every active media asset into the index"""
+        rows = db.query(MediaAsset.original_path, MediaAsset.cdn_url).filter(
+            MediaAsset.is_active == True
+        ).all()
+
+        urls: Dict[str, str] = {}
+        for original_path, cdn_url in rows:
+            if not original_path or not cdn_url:
+                continue
+            # First row wins, matching the old .first() lookup
+            urls.setdefault(normalize_media_path(original_path), self._absolute_url(cdn_url))
+
+        with self._lock:
+            self._urls = urls
+            self._misses = set()
+            self._loaded_at = time.monotonic()
+        return urls
+
+    def ensure_loaded(self, db: Session) -> Dict[str, str]:
+        """Load the index if needed and return the current path -> URL mapping"""
+        urls = self._urls
+        if urls is None or not self.is_loaded:
+            urls = self.load(db)
+        return urls
+
+    def lookup(self, db: Session, original_path: str) -> Optional[str]:
+        """
+        Return the CDN URL for a path, or None if no active asset matches.
+        """
+        urls = self.ensure_loaded(db)
+        cdn_url = urls.get(normalize_media_path(original_path))
+        if cdn_url is None:
+            self._record_miss(original_path)
+        return cdn_url
+
+    def lookup_many(self, db: Session, paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Resolve a batch of paths against a single snapshot of the index.
+
+        Returns a mapping of the given paths to CDN URLs; unmatched paths are omitted.
+        """
+        urls = self.ensure_loaded(db)
+        found: Dict[str, str] = {}
+        for path in paths:
+            cdn_url = urls.get(normalize_media_path(path))
+            if cdn_url is None:
+                self._record_miss(path)
+            else:
+                found[path] = cdn_url
+        return found
+
+    def _record_miss(self, original_path: str) -> None:
+        key = normalize_media_path(original_path)
+        if key in self._misses:
+            return
+        with self._lock:
+            self._misses.add(key)
+        # Admin can fix this by uploading the image through the content management UI
+        print(f"⚠️  No CDN URL found for: {original_path} - returning empty string to prevent 404")
+
+    def invalidate(self) -> None:
+        """Drop the index so the next lookup reloads it from the database"""
+        with self._lock:
+            self._urls = None
+            self._misses = set()
+            self._loaded_at = 0.0
+
+    @staticmethod
+    def _absolute_url(cdn_url: str) -> str:
+        # If CDN URL is a relative path (starts with /media/), prepend backend URL
+        if cdn_url.startswith('/media/'):
+            # Use FRONTEND_URL as base since media is served from same backend
+            return f"{settings.FRONTEND_URL.replace('3000', '8000')}{cdn_url}"
+        return cdn_url
+
+
+media_index = MediaIndex()
+
+
+class _DeferredMedia:
+    """Placeholder left in a response by MediaBatch until the batch is resolved"""
+
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind: str, value: Any):
+        self.kind = kind
+        self.value = value
+
+
+class MediaBatch:
+    """
+    Two-phase media resolution for a whole response.
+
+    Build the response with batch.url() / batch.dict() / batch.list() in place of
+    the MediaService methods of the same meaning; each call records the paths it
+    will need and leaves a placeholder. batch.resolve(payload) then looks every
+    path up in one pass and substitutes the placeholders.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._paths: Set[str] = set()
+
+    def url(self, original_path: Optional[str]) -> _DeferredMedia:
+        """Deferred equivalent of MediaService.resolve_url"""
+        if original_path and not _is_full_url(original_path):
+            self._paths.add(original_path)
+        return _DeferredMedia("url", original_path)
+
+    def dict(self, data: Any) -> _DeferredMedia:
+        """Deferred equivalent of MediaService.resolve_dict"""
+        if isinstance(data, dict):
+            self._collect(data)
+        return _DeferredMedia("dict", data)
+
+    def list(self, data: Any) -> _DeferredMedia:
+        """Deferred equivalent of MediaService.resolve_list"""
+        for item in data:
+            self._collect(item)
+        return _DeferredMedia("list", data)
+
+    def resolve(self, payload: Any) -> Any:
+        """Resolve every collected path at once and replace placeholders in payload"""
+        resolver = _ResolvedMediaService(media_index.lookup_many(self.db, self._paths))
+        return self._substitute(payload, resolver)
+
+    def _collect(self, value: Any) -> None:
+        if isinstance(value, str):
+            if MediaService._is_image_path(value) and not _is_full_url(value):
+                self._paths.add(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self._collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                self._collect(item)
+
+    def _substitute(self, value: Any, resolver: "MediaService") -> Any:
+        if isinstance(value, _DeferredMedia):
+            if value.kind == "url":
+                return resolver.resolve_url(value.value)
+            if value.kind == "dict":
+                return resolver.resolve_dict(value.value)
+            return resolver.resolve_list(value.value)
+        if isinstance(value, dict):
+            return {key: self._substitute(item, resolver) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._substitute(item, resolver) for item in value]
+        return value
+
+
+def _is_full_url(path: str) -> bool:
+    return path.startswith('http://') or path.startswith('https://')
 
 
 class MediaService:
@@ -12,7 +206,6 @@ class MediaService:
 
     def __init__(self, db: Session):
         self.db = db
-        self._cache: Dict[str, str] = {}
 
     def resolve_url(self, original_path: Optional[str]) -> str:
         """Convert /public path to CDN URL (case-insensitive)"""
@@ -21,54 +214,20 @@ class MediaService:
             return ""
 
         # If already a full URL (starts with http:// or https://), return as-is
-        if original_path.startswith('http://') or original_path.startswith('https://'):
+        if _is_full_url(original_path):
             return original_path
 
-        # Check cache first
-        if original_path in self._cache:
-            return self._cache[original_path]
-
-        # Normalize the path - try both with and without leading slash
-        paths_to_try = [original_path]
-
-        # If path doesn't start with /, also try with / prefix
-        if not original_path.startswith('/'):
-            paths_to_try.append(f"/{original_path}")
-        # If path starts with /, also try without / prefix
-        elif original_path.startswith('/'):
-            paths_to_try.append(original_path[1:])
-
-        # Query database (case-insensitive, try all path variations)
-        from sqlalchemy import func, or_
-        conditions = [
-            func.lower(MediaAsset.original_path) == path.lower()
-            for path in paths_to_try
-        ]
-
-        asset = self.db.query(MediaAsset).filter(
-            or_(*conditions),
-            MediaAsset.is_active == True
-        ).first()
-
-        if asset:
-            cdn_url = asset.cdn_url
-
-            # If CDN URL is a relative path (starts with /media/), prepend backend URL
-            if cdn_url.startswith('/media/'):
-                from app.core.config import settings
-                # Use FRONTEND_URL as base since media is served from same backend
-                cdn_url = f"{settings.FRONTEND_URL.replace('3000', '8000')}{cdn_url}"
-
-            self._cache[original_path] = cdn_url
-            return cdn_url
-
         # Fallback: Return empty string to prevent 404 errors
-        # Admin can fix this by uploading the image through the content management UI
-        print(f"⚠️  No CDN URL found for: {original_path} - returning empty string to prevent 404")
+        return media_index.lookup(self.db, original_path) or ""
 
-        # Cache empty string
-        self._cache[original_path] = ""
-        return ""
+    def batch(self) -> MediaBatch:
+        """Start a two-phase resolution (see MediaBatch)"""
+        return MediaBatch(self.db)
+
+    def resolve_many(self, items: List[Any]) -> List[Any]:
+        """resolve_dict over a list of response items, with a single batched lookup"""
+        batch = self.batch()
+        return batch.resolve([batch.dict(item) for item in items])
 
     def resolve_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Recursively replace image paths with CDN URLs in a dictionary"""
@@ -123,15 +282,21 @@ class MediaService:
         return any(value.lower().endswith(ext) for ext in media_extensions)
 
     def preload_cache(self, paths: List[str]):
-        """Preload multiple paths into cache for performance"""
+        """Warm the shared media index (paths are accepted for backwards compatibility)"""
 
-        if not paths:
-            return
+        media_index.ensure_loaded(self.db)
 
-        assets = self.db.query(MediaAsset).filter(
-            MediaAsset.original_path.in_(paths),
-            MediaAsset.is_active == True
-        ).all()
 
-        for asset in assets:
-            self._cache[asset.original_path] = asset.cdn_url
+class _ResolvedMediaService(MediaService):
+    """MediaService that answers from an already resolved path -> URL mapping"""
+
+    def __init__(self, urls: Dict[str, str]):
+        self.db = None
+        self._urls = urls
+
+    def resolve_url(self, original_path: Optional[str]) -> str:
+        if not original_path:
+            return ""
+        if _is_full_url(original_path):
+            return original_path
+        return self._urls.get(original_path, "")
@@ -1,10 +1,16 @@
 """Mixpanel Analytics Service."""
 
-from typing import Dict, Any, Optional
-from datetime import datetime
-import httpx
+from typing import Dict, Any, Hashable, List, Optional
+from datetime import datetime, timezone
+import uuid
 
 from ..core.config import settings
+from .event_exporter import event_exporter
+from .http_client import outbound_http
+
+
+# Most events Mixpanel accepts in one /track request
+TRACK_BATCH_SIZE = 50
 
 
 class MixpanelService:
@@ -13,6 +19,55 @@ class MixpanelService:
     def __init__(self):
         self.token = settings.MIXPANEL_TOKEN
         self.api_url = "https://api.mixpanel.com"
+        event_exporter.register("mixpanel", self.send_batch, TRACK_BATCH_SIZE)
+
+    def _event_payload(
+        self,
+        event_name: str,
+        distinct_id: str,
+        properties: Optional[Dict[str, Any]] = None,
+        time: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "event": event_name,
+            "properties": {
+                "token": self.token,
+                "distinct_id": distinct_id,
+                "time": time or int(datetime.now(timezone.utc).timestamp()),
+                # Lets Mixpanel drop duplicates when a batch is retried
+                "$insert_id": uuid.uuid4().hex,
+                **(properties or {}),
+            },
+        }
+
+    async def send_batch(self, group: Hashable, payload: List[Dict[str, Any]]) -> bool:
+        """
+        Post up to TRACK_BATCH_SIZE prepared events in one /track request.
+
+        Returns:
+            True if Mixpanel accepted the batch
+        """
+        try:
+            response = await outbound_http.post(
+                f"{self.api_url}/track",
+                json=payload,
+                timeout=10.0,
+            )
+            return response.status_code == 200
+
+        except Exception as e:
+            print(f"Mixpanel track error: {e}")
+            return False
+
+    async def _submit(self, payload: List[Dict[str, Any]]) -> bool:
+        # Batched by the exporter while it runs, sent straight away otherwise
+        if event_exporter.running:
+            return all([event_exporter.add("mixpanel", event) for event in payload])
+
+        ok = True
+        for start in range(0, len(payload), TRACK_BATCH_SIZE):
+            ok = await self.send_batch(None, payload[start:start + TRACK_BATCH_SIZE]) and ok
+        return ok
 
     async def track_event(
         self,
@@ -29,34 +84,32 @@ class MixpanelService:
             properties: Additional event properties
 
         Returns:
-            True if successful
+            True if the event was queued for export (or sent)
         """
         if not self.token:
             return False
 
-        try:
-            event_data = {
-                "event": event_name,
-                "properties": {
-                    "token": self.token,
-                    "distinct_id": distinct_id,
-                    "time": int(datetime.utcnow().timestamp()),
-                    **(properties or {}),
-                },
-            }
+        return await self._submit([self._event_payload(event_name, distinct_id, properties)])
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/track",
-                    json=[event_data],
-                    timeout=10.0,
-                )
-                return response.status_code == 200
+    async def track_events(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Track several events with as few requests as possible.
 
-        except Exception as e:
-            print(f"Mixpanel track error: {e}")
+        Args:
+            events: Dicts with event_name, distinct_id, properties and an
+                optional time (unix seconds, defaults to now)
+
+        Returns:
+            True if every event was queued for export (or sent)
+        """
+        if not self.token or not events:
             return False
 
+        return await self._submit([
+            self._event_payload(event["event_name"], event["distinct_id"], event.get("properties"), event.get("time"))
+            for event in events
+        ])
+
     async def identify_user(
         self, distinct_id: str, properties: Dict[str, Any]
     ) -> bool:
@@ -80,13 +133,12 @@ class MixpanelService:
                 "$set": properties,
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/engage",
-                    json=[engagement_data],
-                    timeout=10.0,
-                )
-                return response.status_code == 200
+            response = await outbound_http.post(
+                f"{self.api_url}/engage",
+                json=[engagement_data],
+                timeout=10.0,
+            )
+            return response.status_code == 200
 
         except Exception as e:
             print(f"Mixpanel identify error: {e}")
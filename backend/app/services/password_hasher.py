@@ -0,0 +1,110 @@
+"""
+Password Hasher - bcrypt off the event loop
+
+A bcrypt hash or verification takes tens to hundreds of milliseconds of CPU.
+Called directly from an async handler it stalls every other request on the
+worker, so hashing runs on a small dedicated thread pool
+(PASSWORD_HASH_WORKERS threads) instead. A burst of logins then queues behind
+those threads while the event loop keeps serving everything else, and bcrypt
+(which releases the GIL) never takes more than that many cores.
+
+stats() reports the queue depth and the wait and run times, so a pool that
+is too small for the login rate is visible on the admin metrics endpoint.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password
+
+
+class PasswordHasher:
+    """Bounded executor for password hashing with queue metrics"""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers if workers is not None else settings.PASSWORD_HASH_WORKERS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rehashed = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        def task() -> Any:
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    wait_ms = (started - submitted) * 1000
+                    self.total_wait_ms += wait_ms
+                    self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                    self.total_run_ms += (finished - started) * 1000
+
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), task)
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password with the configured cost"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its stored hash.
+
+        Returns (valid, new_hash); new_hash is set when the password is valid but
+        was stored with another cost than BCRYPT_ROUNDS and should be replaced.
+        """
+        valid, new_hash = await self._run(verify_and_update_password, password, hashed_password)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "queued": self.queued,
+                "running": self.running,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "rehashed": self.rehashed,
+                "wait_ms": {
+                    "avg": round(self.total_wait_ms / self.completed, 1) if self.completed else 0.0,
+                    "max": round(self.max_wait_ms, 1),
+                },
+                "run_ms_avg": round(self.total_run_ms / self.completed, 1) if self.completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,210 @@
+"""
+Principal Cache - Authenticated users without a users query per request
+
+Every authenticated request used to load its user row (and forum requests the
+user's bans as well). The column values of that row are cached here for a
+short TTL, keyed by (user id, token version), where the token version is the
+token's issue time (or expiry), so a fresh login always starts from the
+database. On a hit the user is attached to the request's session without a
+query (see attach_user): access checks read tier, is_admin and is_active from
+it, relationships still lazy-load and changes made through it are flushed as
+usual.
+
+Entries are dropped when a User or ForumUserBan row is committed in this
+process (via content_changes; unban deletes rows, so the forum router
+invalidates explicitly), which covers users.update_user, membership changes
+and bans. Changes made by other processes are picked up once the TTL expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.forum import ForumUserBan
+from app.models.user import User
+from app.services import content_changes
+
+
+class BanState(NamedTuple):
+    is_permanent: bool
+    expires_at: Optional[datetime]
+    reason: Optional[str]
+
+    @property
+    def is_active(self) -> bool:
+        return self.is_permanent or (self.expires_at is not None and self.expires_at > datetime.utcnow())
+
+
+class _Entry(NamedTuple):
+    values: Dict[str, Any]
+    expires_at: float
+
+
+def token_version(payload: Dict[str, Any]) -> Any:
+    """Version of a decoded token: when it was issued, or when it expires"""
+    return payload.get("iat") or payload.get("exp")
+
+
+def attach_user(db: Session, values: Dict[str, Any]) -> User:
+    """A persistent User in `db` built from cached column values, without a query"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    # Returns the session's own instance if it already has this user
+    return db.merge(user, load=False)
+
+
+def _column_values(user: User) -> Dict[str, Any]:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+class PrincipalCache:
+    """LRU of user column values per (user id, token version)"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.PRINCIPAL_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.PRINCIPAL_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Tuple[str, Any], _Entry]" = OrderedDict()
+        self._versions: Dict[str, Set[Any]] = {}
+        self._bans: "OrderedDict[str, Tuple[Optional[BanState], float]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._subscribed = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _get_entry(self, key: Tuple[str, Any]) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, user_id: Any, version: Any) -> Optional[Dict[str, Any]]:
+        """Cached column values, or None on a miss"""
+        with self._lock:
+            entry = self._get_entry((str(user_id), version))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.values
+
+    def load(self, db: Session, user_id: Any, version: Any) -> Optional[Dict[str, Any]]:
+        """Column values from the database (None if there is no such user), cached for next time"""
+        self._subscribe()
+        generation = self._generation
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        values = _column_values(user)
+        self._store((str(user_id), version), values, generation)
+        return values
+
+    def load_user(self, db: Session, user_id: Any, version: Any) -> Optional[User]:
+        """The user behind a verified token, attached to `db`; one query at most"""
+        values = self.get(user_id, version)
+        if values is None:
+            if not self.enabled:
+                return db.query(User).filter(User.id == user_id).first()
+            values = self.load(db, user_id, version)
+            if values is None:
+                return None
+        return attach_user(db, values)
+
+    def active_ban(self, db: Session, user_id: Any) -> Optional[BanState]:
+        """The user's active forum ban, if any, cached alongside their principal"""
+        self._subscribe()
+        key = str(user_id)
+        with self._lock:
+            cached = self._bans.get(key)
+            generation = self._generation
+        if cached is not None and cached[1] > time.monotonic():
+            ban = cached[0]
+        else:
+            row = db.query(ForumUserBan).filter(
+                ForumUserBan.user_id == user_id,
+                (ForumUserBan.is_permanent == True) | (ForumUserBan.expires_at > datetime.utcnow())
+            ).first()
+            ban = BanState(row.is_permanent, row.expires_at, row.reason) if row else None
+            if self.enabled:
+                with self._lock:
+                    if generation == self._generation:
+                        self._bans[key] = (ban, time.monotonic() + self.ttl_seconds)
+                        while len(self._bans) > self.max_entries:
+                            self._bans.popitem(last=False)
+
+        # A temporary ban may have run out while cached
+        return ban if ban is not None and ban.is_active else None
+
+    def _store(self, key: Tuple[str, Any], values: Dict[str, Any], generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # Skip if the user was invalidated while we were reading it
+            if generation != self._generation:
+                return
+            self._entries[key] = _Entry(values, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            self._versions.setdefault(key[0], set()).add(key[1])
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple[str, Any]) -> None:
+        self._entries.pop(key, None)
+        versions = self._versions.get(key[0])
+        if versions is not None:
+            versions.discard(key[1])
+            if not versions:
+                del self._versions[key[0]]
+
+    def invalidate(self, *user_ids: Any) -> None:
+        """Drop every cached principal of `user_ids`"""
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._bans.pop(str(user_id), None)
+                for version in self._versions.pop(str(user_id), ()):
+                    self._entries.pop((str(user_id), version), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._versions.clear()
+            self._bans.clear()
+
+    # ----- invalidation -----
+
+    def _subscribe(self) -> None:
+        if self._subscribed:
+            return
+        content_changes.subscribe("principal_cache", (User, ForumUserBan), _affected_user, self._apply_changes)
+        self._subscribed = True
+
+    def _apply_changes(self, changes: content_changes.ContentChanges) -> None:
+        user_ids = set()
+        for (model, entity_id), user_id in changes.items():
+            if model is User:
+                user_ids.add(entity_id)
+            elif user_id is not None:
+                user_ids.add(user_id)
+        self.invalidate(*user_ids)
+
+
+def _affected_user(entity: Any) -> str:
+    return str(entity.id) if isinstance(entity, User) else str(entity.user_id)
+
+
+principal_cache = PrincipalCache()
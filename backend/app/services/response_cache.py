@@ -0,0 +1,369 @@
+"""
+Response Cache - Whole-response cache for public content endpoints
+
+Public pages (static page sections, FAQs, membership content, hidden-tag
+landing pages, the teachings library and the events calendar) rebuild the same
+JSON from several tables on every hit. ResponseCacheMiddleware stores the
+rendered body of successful GETs keyed by path, query string and the viewer's
+tier bucket ("public" for endpoints that do not depend on the viewer), with a
+TTL and LRU eviction.
+
+Entries carry tags. Admin writes call `response_cache.purge(tag)`, which bumps
+the tag's generation so every entry stored under an older generation is
+treated as a miss. Generations live in the backend, so with the file backend
+(point RESPONSE_CACHE_DIR at /dev/shm for a shared-memory cache) a purge in one
+uvicorn worker is seen by all of them. They are kept even when caching is off,
+since they double as content-version counters for ETags (conditional_get.py).
+"""
+import abc
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status_code: int
+    headers: Dict[str, str]
+    expires_at: float  # wall clock, so entries can be shared between processes
+    tag_versions: Dict[str, int]
+
+
+class CacheBackend(abc.ABC):
+    """Storage for cached responses and tag generations"""
+
+    max_entries: int
+    epoch: str  # changes whenever generations may have been reset (restart, cleared directory)
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, entry: CachedResponse) -> None:
+        ...
+
+    @abc.abstractmethod
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        ...
+
+    @abc.abstractmethod
+    def bump(self, tags: Iterable[str]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drop every entry; tag generations are kept so content versions never repeat"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU dict"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.epoch = uuid.uuid4().hex
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    Directory shared by every worker on the host.
+
+    Each entry is one file (a JSON header line followed by the body), replaced
+    atomically. A tag's generation is the size of its tag file, so a purge is a
+    single one-byte append and needs no locking across processes. Reads touch
+    the entry's mtime, which is what LRU eviction sorts by.
+    """
+
+    EVICT_EVERY = 64
+
+    def __init__(self, directory: str, max_entries: int):
+        self.max_entries = max_entries
+        self.entries_dir = os.path.join(directory, "entries")
+        self.tags_dir = os.path.join(directory, "tags")
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.tags_dir, exist_ok=True)
+        self._writes = 0
+        self.epoch = self._read_epoch(os.path.join(directory, "epoch"))
+
+    @staticmethod
+    def _read_epoch(path: str) -> str:
+        try:
+            # O_EXCL: only the first worker to start writes the epoch
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            with os.fdopen(fd, "w") as f:
+                f.write(uuid.uuid4().hex)
+        except FileExistsError:
+            pass
+        with open(path) as f:
+            return f.read().strip()
+
+    @staticmethod
+    def _name(value: str) -> str:
+        return hashlib.sha1(value.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        path = os.path.join(self.entries_dir, self._name(key))
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(body, header["status_code"], header["headers"], header["expires_at"], header["tag_versions"])
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        header = {
+            "status_code": entry.status_code,
+            "headers": entry.headers,
+            "expires_at": entry.expires_at,
+            "tag_versions": entry.tag_versions,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.entries_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n" + entry.body)
+            os.replace(tmp_path, os.path.join(self.entries_dir, self._name(key)))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = [e for e in os.scandir(self.entries_dir) if not e.name.startswith(".tmp-")]
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:excess]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        versions = {}
+        for tag in tags:
+            try:
+                versions[tag] = os.stat(os.path.join(self.tags_dir, self._name(tag))).st_size
+            except OSError:
+                versions[tag] = 0
+        return versions
+
+    def bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            with open(os.path.join(self.tags_dir, self._name(tag)), "ab") as f:
+                f.write(b".")
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.entries_dir):
+            os.unlink(entry.path)
+
+
+class CacheRule(NamedTuple):
+    pattern: "re.Pattern"
+    tags: Tuple[str, ...]  # may use the pattern's named groups, e.g. "pages:{slug}"
+    vary_tier: bool = False  # response depends on the viewer's membership tier
+
+
+# Every cached response embeds resolved media URLs, hence the shared "media" tag
+CACHE_RULES: List[CacheRule] = [
+    CacheRule(re.compile(r"^/api/pages/(?P<slug>[^/]+)$"), ("pages", "pages:{slug}", "media")),
+    CacheRule(re.compile(r"^/api/faqs(/.*)?$"), ("faqs", "media")),
+    CacheRule(re.compile(r"^/api/membership/.+$"), ("membership", "media")),
+    CacheRule(re.compile(r"^/api/hidden-tags/page/[^/]+$"), ("hidden-tags", "teachings", "events", "media")),
+    CacheRule(re.compile(r"^/api/teachings/$"), ("teachings", "media"), vary_tier=True),
+    CacheRule(re.compile(r"^/api/events/$"), ("events", "media")),
+]
+
+
+def match_rule(path: str) -> Optional[Tuple[CacheRule, Tuple[str, ...]]]:
+    for rule in CACHE_RULES:
+        match = rule.pattern.match(path)
+        if match:
+            return rule, tuple(tag.format(**match.groupdict()) for tag in rule.tags)
+    return None
+
+
+def build_backend() -> CacheBackend:
+    backend = settings.RESPONSE_CACHE_BACKEND
+    if backend == "file":
+        directory = settings.RESPONSE_CACHE_DIR or os.path.join(tempfile.gettempdir(), "satyoga-response-cache")
+        return FileCacheBackend(directory, settings.RESPONSE_CACHE_MAX_ENTRIES)
+    # "none" keeps no entries but still tracks tag generations
+    return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES if backend == "memory" else 0)
+
+
+class ResponseCache:
+    """Tag-aware response cache on top of a pluggable backend"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl_seconds: Optional[int] = None):
+        self.backend = backend or MemoryCacheBackend(0)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.RESPONSE_CACHE_TTL_SECONDS
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend.max_entries > 0
+
+    def get(self, key: str, tags: Iterable[str]) -> Optional[CachedResponse]:
+        entry = self.backend.get(key)
+        if entry is None or entry.expires_at <= time.time() or entry.tag_versions != self.backend.tag_versions(tags):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        return self.backend.tag_versions(tags)
+
+    def set(self, key: str, tag_versions: Dict[str, int], body: bytes, status_code: int, headers: Dict[str, str]) -> None:
+        """Store a response; tag_versions must be read before the response was built"""
+        entry = CachedResponse(body, status_code, headers, time.time() + self.ttl_seconds, tag_versions)
+        try:
+            self.backend.set(key, entry)
+        except OSError as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    def purge(self, *tags: str) -> None:
+        """Invalidate every cached response carrying any of `tags` (and bump their content versions)"""
+        try:
+            self.backend.bump(tags)
+        except OSError as e:
+            logger.warning("Response cache purge of %s failed: %s", tags, e)
+            return
+        logger.info("Response cache purged: %s", ", ".join(tags))
+
+    def content_version(self, *tags: str) -> str:
+        """Opaque token that changes whenever any of `tags` is purged"""
+        versions = self.backend.tag_versions(tags)
+        return self.backend.epoch + ":" + ".".join(str(versions[tag]) for tag in tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+response_cache = ResponseCache(build_backend())
+
+
+def resolve_tier_bucket(request: Request) -> str:
+    """The viewer's membership tier, resolved the same way get_optional_user does"""
+    authorization = request.headers.get("authorization")
+    if not authorization or not authorization.startswith("Bearer "):
+        return "anonymous"
+
+    from app.core.database import SessionLocal
+    from app.core.security import decode_token
+    from app.services.principal_cache import principal_cache, token_version
+
+    payload = decode_token(authorization.replace("Bearer ", ""))
+    user_id = payload.get("sub") if payload else None
+    if not user_id:
+        return "anonymous"
+
+    # Shares the principal get_current_user caches for this token
+    values = principal_cache.get(user_id, token_version(payload))
+    if values is None:
+        db = SessionLocal()
+        try:
+            values = principal_cache.load(db, user_id, token_version(payload))
+        finally:
+            db.close()
+    if values is None or not values["is_active"]:
+        return "anonymous"
+    tier = values["membership_tier"]
+    return getattr(tier, "value", tier) or "anonymous"
+
+
+def cache_key(request: Request, bucket: str) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}#{bucket}"
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve cacheable GETs from response_cache (see CACHE_RULES)"""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method != "GET" or not response_cache.enabled:
+            return await call_next(request)
+        matched = match_rule(request.url.path)
+        if matched is None:
+            return await call_next(request)
+        rule, tags = matched
+
+        bucket = await run_in_threadpool(resolve_tier_bucket, request) if rule.vary_tier else "public"
+        key = cache_key(request, bucket)
+
+        if "no-cache" not in request.headers.get("cache-control", ""):
+            cached = response_cache.get(key, tags)
+            if cached is not None:
+                return Response(content=cached.body, status_code=cached.status_code, headers={**cached.headers, "X-Cache": "HIT"})
+
+        # Read generations first so a purge racing with this request leaves the entry stale, not wrong
+        tag_versions = response_cache.tag_versions(tags)
+        response = await call_next(request)
+        if response.status_code != 200 or not response.headers.get("content-type", "").startswith("application/json"):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        # Cookies are never stored; the live response keeps all of its (raw, possibly repeated) headers
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "set-cookie")}
+        response_cache.set(key, tag_versions, body, response.status_code, headers)
+        raw_headers = [(k, v) for k, v in response.raw_headers if k.lower() != b"content-length"]
+        response = Response(content=body, status_code=response.status_code)
+        response.raw_headers[:0] = raw_headers
+        response.headers.append("X-Cache", "MISS")
+        return response
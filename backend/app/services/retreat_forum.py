@@ -0,0 +1,133 @@
+"""
+Retreat Forum - Loads and renders a page of a retreat's discussion forum
+
+A page is a window of top-level posts (newest first) together with their
+complete reply trees, at any depth. It is rendered from a fixed number of
+queries however many replies there are: the top-level posts, their replies
+(one recursive query), the authors with their profiles, one GROUP BY for like
+counts and one lookup of the viewer's own likes. The tree is then assembled
+in memory in a single pass over the posts.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.pagination import SortKey, keyset_page
+from app.models.retreat import RetreatForumPost, RetreatForumPostLike
+from app.models.user import User
+
+# Newest top-level posts first, like the forum view
+TOP_LEVEL_SORT_KEYS = [SortKey(RetreatForumPost.created_at), SortKey(RetreatForumPost.id)]
+
+
+def load_forum_page(
+    db: Session,
+    retreat_id,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[RetreatForumPost], List[RetreatForumPost], Optional[str]]:
+    """
+    One page of top-level posts and all of their replies (oldest first).
+
+    Returns (top_level_posts, replies, next_cursor). The page starts after
+    `cursor` when given, otherwise at the `skip` offset. Raises InvalidCursor.
+    """
+    roots, next_cursor = keyset_page(
+        db.query(RetreatForumPost).filter(
+            RetreatForumPost.retreat_id == retreat_id,
+            RetreatForumPost.parent_id.is_(None),
+        ),
+        TOP_LEVEL_SORT_KEYS,
+        limit,
+        cursor=cursor,
+        skip=skip,
+    )
+    if not roots:
+        return [], [], None
+
+    descendants = select(RetreatForumPost.id).where(
+        RetreatForumPost.parent_id.in_([root.id for root in roots])
+    ).cte("descendants", recursive=True)
+    descendants = descendants.union_all(
+        select(RetreatForumPost.id).where(RetreatForumPost.parent_id == descendants.c.id)
+    )
+    replies = db.query(RetreatForumPost).filter(
+        RetreatForumPost.id.in_(select(descendants.c.id))
+    ).order_by(RetreatForumPost.created_at.asc(), RetreatForumPost.id.asc()).all()
+    return roots, replies, next_cursor
+
+
+def like_summary(db: Session, post_ids: Sequence[Any], viewer_id: Optional[Any]) -> Tuple[Dict[str, int], Set[str]]:
+    """Like counts per post and the ids of the posts the viewer liked, in two queries"""
+    if not post_ids:
+        return {}, set()
+
+    counts = {
+        str(post_id): count
+        for post_id, count in db.query(RetreatForumPostLike.post_id, func.count(RetreatForumPostLike.id))
+        .filter(RetreatForumPostLike.post_id.in_(post_ids))
+        .group_by(RetreatForumPostLike.post_id)
+    }
+    liked: Set[str] = set()
+    if viewer_id is not None:
+        liked = {
+            str(post_id)
+            for (post_id,) in db.query(RetreatForumPostLike.post_id).filter(
+                RetreatForumPostLike.post_id.in_(post_ids),
+                RetreatForumPostLike.user_id == viewer_id,
+            )
+        }
+    return counts, liked
+
+
+def _authors(db: Session, posts: Sequence[RetreatForumPost]) -> Dict[str, User]:
+    user_ids = {post.user_id for post in posts}
+    if not user_ids:
+        return {}
+    users = db.query(User).options(joinedload(User.profile)).filter(User.id.in_(user_ids)).all()
+    return {str(user.id): user for user in users}
+
+
+def build_forum_tree(
+    db: Session,
+    roots: List[RetreatForumPost],
+    replies: List[RetreatForumPost],
+    viewer_id: Optional[Any],
+) -> List[dict]:
+    """
+    Nested post structure for the forum view: `roots` in their given order,
+    each with its replies nested oldest first. Replies whose parent is not on
+    the page are left out.
+    """
+    posts = roots + replies
+    users = _authors(db, posts)
+    counts, liked = like_summary(db, [post.id for post in posts], viewer_id)
+
+    nodes: Dict[str, dict] = {}
+    for post in posts:
+        post_id = str(post.id)
+        user = users.get(str(post.user_id))
+        nodes[post_id] = {
+            "id": post_id,
+            "retreat_id": str(post.retreat_id),
+            "user_id": str(post.user_id),
+            "parent_id": str(post.parent_id) if post.parent_id else None,
+            "title": post.title,
+            "category": post.category.value if post.category else None,
+            "content": post.content,
+            "created_at": post.created_at.isoformat(),
+            "updated_at": post.updated_at.isoformat(),
+            "user_name": user.name if user else "Unknown",
+            "user_photo": user.profile.avatar_url if (user and user.profile) else None,
+            "like_count": counts.get(post_id, 0),
+            "is_liked_by_user": post_id in liked,
+            "replies": [],
+        }
+
+    for post in replies:
+        parent = nodes.get(str(post.parent_id))
+        if parent is not None:
+            parent["replies"].append(nodes[str(post.id)])
+    return [nodes[str(root.id)] for root in roots]
@@ -0,0 +1,514 @@
+"""
+Search Index - In-process inverted index used by /api/search where PostgreSQL
+full-text search is not available (SQLite dev databases and tests).
+
+Documents are tokenized, stemmed (Porter) and stored as weighted term
+frequencies; queries are scored with BM25 and the last query word is matched as
+a prefix so results keep up with as-you-type queries. The index is kept current
+through the content change feed (applied on commit) and can be snapshotted to disk so
+a restart only re-indexes rows changed since the snapshot.
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.blog import BlogPost
+from app.models.course import Course
+from app.models.product import Product
+from app.models.retreat import Retreat
+from app.models.teaching import Teaching
+from app.services import content_changes
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Per-field weights: matches in titles count more than matches deep in body text
+FIELD_WEIGHTS = {"title": 3.0, "summary": 2.0, "body": 1.0}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or that the
+their there these this to was were will with
+""".split())
+
+
+# ===== TOKENIZER & STEMMER =====
+
+def _is_consonant(word: str, i: int) -> bool:
+    ch = word[i]
+    if ch in "aeiou":
+        return False
+    if ch == "y":
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """Number of vowel-consonant sequences (the Porter 'm')"""
+    m = 0
+    previous_vowel = False
+    for i in range(len(stem)):
+        consonant = _is_consonant(stem, i)
+        if consonant and previous_vowel:
+            m += 1
+        previous_vowel = not consonant
+    return m
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+
+def _ends_double_consonant(word: str) -> bool:
+    return len(word) >= 2 and word[-1] == word[-2] and _is_consonant(word, len(word) - 1)
+
+
+def _ends_cvc(word: str) -> bool:
+    return (
+        len(word) >= 3
+        and _is_consonant(word, len(word) - 3)
+        and not _is_consonant(word, len(word) - 2)
+        and _is_consonant(word, len(word) - 1)
+        and word[-1] not in "wxy"
+    )
+
+
+def _replace_suffix(word: str, rules: Iterable[Tuple[str, str]], min_measure: int) -> str:
+    for suffix, replacement in rules:
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)]
+            return stem + replacement if _measure(stem) > min_measure else word
+    return word
+
+
+_STEP2_RULES = (
+    ("ational", "ate"), ("tional", "tion"), ("enci", "ence"), ("anci", "ance"),
+    ("izer", "ize"), ("abli", "able"), ("alli", "al"), ("entli", "ent"), ("eli", "e"),
+    ("ousli", "ous"), ("ization", "ize"), ("ation", "ate"), ("ator", "ate"),
+    ("alism", "al"), ("iveness", "ive"), ("fulness", "ful"), ("ousness", "ous"),
+    ("aliti", "al"), ("iviti", "ive"), ("biliti", "ble"),
+)
+_STEP3_RULES = (
+    ("icate", "ic"), ("ative", ""), ("alize", "al"), ("iciti", "ic"),
+    ("ical", "ic"), ("ful", ""), ("ness", ""),
+)
+_STEP4_SUFFIXES = (
+    "al", "ance", "ence", "er", "ic", "able", "ible", "ant", "ement", "ment", "ent",
+    "ion", "ou", "ism", "ate", "iti", "ous", "ive", "ize",
+)
+
+
+def stem(word: str) -> str:
+    """Porter stemmer (M.F. Porter, 1980)"""
+    if len(word) <= 2:
+        return word
+
+    # Step 1a
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies"):
+        word = word[:-2]
+    elif word.endswith("ss"):
+        pass
+    elif word.endswith("s"):
+        word = word[:-1]
+
+    # Step 1b
+    extra_step = False
+    if word.endswith("eed"):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    elif word.endswith("ed") and _has_vowel(word[:-2]):
+        word = word[:-2]
+        extra_step = True
+    elif word.endswith("ing") and _has_vowel(word[:-3]):
+        word = word[:-3]
+        extra_step = True
+    if extra_step:
+        if word.endswith(("at", "bl", "iz")):
+            word += "e"
+        elif _ends_double_consonant(word) and word[-1] not in "lsz":
+            word = word[:-1]
+        elif _measure(word) == 1 and _ends_cvc(word):
+            word += "e"
+
+    # Step 1c
+    if word.endswith("y") and _has_vowel(word[:-1]):
+        word = word[:-1] + "i"
+
+    # Steps 2 and 3
+    word = _replace_suffix(word, _STEP2_RULES, 0)
+    word = _replace_suffix(word, _STEP3_RULES, 0)
+
+    # Step 4
+    for suffix in sorted(_STEP4_SUFFIXES, key=len, reverse=True):
+        if word.endswith(suffix):
+            stem_part = word[:-len(suffix)]
+            if _measure(stem_part) > 1:
+                if suffix != "ion" or stem_part.endswith(("s", "t")):
+                    word = stem_part
+            break
+
+    # Step 5
+    if word.endswith("e"):
+        stem_part = word[:-1]
+        m = _measure(stem_part)
+        if m > 1 or (m == 1 and not _ends_cvc(stem_part)):
+            word = stem_part
+    if _measure(word) > 1 and _ends_double_consonant(word) and word.endswith("l"):
+        word = word[:-1]
+
+    return word
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Lowercase, split on non-word characters, drop stop words and stem"""
+    if not value:
+        return []
+    return [stem(word) for word in re.findall(r"\w+", value.lower()) if word not in STOP_WORDS]
+
+
+def highlight_snippet(value: Optional[str], q: str, width: int = 160) -> Optional[str]:
+    """Cut a window of text around the first query match and wrap matches in <mark>"""
+    if not value:
+        return None
+    words = [re.escape(word) for word in re.findall(r"\w+", q.lower()) if word not in STOP_WORDS]
+    if not words:
+        return None
+    pattern = re.compile(r"\b(" + "|".join(words) + r")\w*", re.IGNORECASE)
+    match = pattern.search(value)
+    if not match:
+        return None
+    start = max(0, match.start() - width // 3)
+    window = value[start:start + width]
+    snippet = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", window)
+    return ("..." if start > 0 else "") + snippet + ("..." if start + width < len(value) else "")
+
+
+# ===== DOCUMENT EXTRACTION =====
+
+def _join(*values: Any) -> str:
+    parts = []
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(v) for v in value if v)
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def _teaching_fields(t: Teaching) -> Optional[Dict[str, str]]:
+    return {
+        "title": t.title,
+        "summary": _join(t.category, t.topic),
+        "body": t.description,
+    }
+
+
+def _course_fields(c: Course) -> Optional[Dict[str, str]]:
+    if not c.is_published:
+        return None
+    return {"title": c.title, "summary": "", "body": c.description}
+
+
+def _product_fields(p: Product) -> Optional[Dict[str, str]]:
+    if not p.published:
+        return None
+    return {"title": p.title, "summary": p.short_description, "body": p.description}
+
+
+def _retreat_fields(r: Retreat) -> Optional[Dict[str, str]]:
+    if not r.is_published:
+        return None
+    return {"title": r.title, "summary": r.subtitle, "body": r.description}
+
+
+def _blog_fields(b: BlogPost) -> Optional[Dict[str, str]]:
+    if not b.is_published:
+        return None
+    return {"title": b.title, "summary": b.excerpt, "body": b.content}
+
+
+# Content type -> (model, field extractor). Extractors return None for rows that
+# must not appear in search results (e.g. unpublished).
+INDEXED_MODELS: Dict[str, Tuple[Any, Callable[[Any], Optional[Dict[str, str]]]]] = {
+    "teachings": (Teaching, _teaching_fields),
+    "courses": (Course, _course_fields),
+    "products": (Product, _product_fields),
+    "retreats": (Retreat, _retreat_fields),
+    "blogs": (BlogPost, _blog_fields),
+}
+
+_KIND_BY_MODEL = {model: kind for kind, (model, _) in INDEXED_MODELS.items()}
+
+
+# ===== INDEX =====
+
+class SearchIndex:
+    """
+    Inverted index over content rows and the static navigation pages.
+
+    Documents are keyed "<kind>:<id>". Each keeps its weighted term frequencies
+    so it can be removed or replaced without rescanning the postings.
+    """
+
+    def __init__(self):
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._total_length = 0.0
+        self._sorted_terms: Optional[List[str]] = None
+        self._lock = threading.RLock()
+        self.is_ready = False
+        self.built_at: Optional[datetime] = None
+        self.snapshot_path: Optional[str] = None
+
+    # ----- document maintenance -----
+
+    def add(self, kind: str, doc_id: str, fields: Dict[str, Optional[str]], payload: Optional[Dict[str, Any]] = None) -> None:
+        """Index (or re-index) a document"""
+        terms: Dict[str, float] = {}
+        for field, value in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for term in tokenize(value):
+                terms[term] = terms.get(term, 0.0) + weight
+        self._add_terms(f"{kind}:{doc_id}", kind, str(doc_id), terms, payload)
+
+    def _add_terms(self, key: str, kind: str, doc_id: str, terms: Dict[str, float], payload: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._remove_key(key)
+            length = sum(terms.values())
+            self._docs[key] = {"kind": kind, "id": doc_id, "length": length, "terms": terms, "payload": payload}
+            self._total_length += length
+            for term, weight in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._sorted_terms = None
+                postings[key] = weight
+
+    def remove(self, kind: str, doc_id: str) -> None:
+        with self._lock:
+            self._remove_key(f"{kind}:{doc_id}")
+
+    def _remove_key(self, key: str) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        self._total_length -= doc["length"]
+        for term in doc["terms"]:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+
+    def index_entity(self, entity: Any) -> None:
+        """Index a model instance, or drop it if it is no longer searchable"""
+        kind = _KIND_BY_MODEL.get(type(entity))
+        if kind is None:
+            return
+        fields = INDEXED_MODELS[kind][1](entity)
+        if fields is None:
+            self.remove(kind, str(entity.id))
+        else:
+            self.add(kind, str(entity.id), fields)
+
+    def set_static_pages(self, pages: List[Dict[str, str]]) -> None:
+        """Replace the indexed navigation pages"""
+        with self._lock:
+            for key in [key for key, doc in self._docs.items() if doc["kind"] == "pages"]:
+                self._remove_key(key)
+            for page in pages:
+                self.add(
+                    "pages",
+                    page["page_slug"],
+                    {"title": page["title"], "summary": page["page_slug"].replace("-", " "), "body": page["description"]},
+                    payload=page,
+                )
+
+    # ----- querying -----
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        terms = self._sorted_terms
+        if terms is None:
+            terms = self._sorted_terms = sorted(self._postings)
+        start = bisect.bisect_left(terms, prefix)
+        end = bisect.bisect_left(terms, prefix + "\uffff")
+        return terms[start:end]
+
+    def _query_terms(self, q: str) -> List[List[str]]:
+        """Each query word becomes a list of index terms that satisfy it"""
+        words = [word for word in re.findall(r"\w+", q.lower()) if word not in STOP_WORDS]
+        groups = [[stem(word)] for word in words[:-1]]
+        if words:
+            # Last word may be incomplete: match it (and its stem) as a prefix
+            last = words[-1]
+            groups.append(sorted(set(self._expand_prefix(last)) | set(self._expand_prefix(stem(last)))))
+        return groups
+
+    def search(self, q: str, limit: int) -> Dict[str, List[Tuple[str, float, Optional[Dict[str, Any]]]]]:
+        """
+        BM25 search requiring every query word to match.
+
+        Returns {kind: [(doc_id, score, payload), ...]} with at most `limit`
+        documents per kind, best first.
+        """
+        with self._lock:
+            groups = self._query_terms(q)
+            if not groups or not self._docs:
+                return {}
+
+            doc_count = len(self._docs)
+            avg_length = self._total_length / doc_count if doc_count else 0.0
+            scores: Optional[Dict[str, float]] = None
+
+            for group in groups:
+                group_scores: Dict[str, float] = {}
+                for term in group:
+                    postings = self._postings.get(term, {})
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for key, tf in postings.items():
+                        length = self._docs[key]["length"]
+                        norm = 1 - BM25_B + BM25_B * (length / avg_length if avg_length else 0.0)
+                        score = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                        # A prefix can expand to several terms; count the best one per document
+                        if score > group_scores.get(key, 0.0):
+                            group_scores[key] = score
+                if scores is None:
+                    scores = group_scores
+                else:
+                    scores = {key: total + group_scores[key] for key, total in scores.items() if key in group_scores}
+                if not scores:
+                    return {}
+
+            results: Dict[str, List[Tuple[str, float, Optional[Dict[str, Any]]]]] = {}
+            for key, score in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+                doc = self._docs[key]
+                hits = results.setdefault(doc["kind"], [])
+                if len(hits) < limit:
+                    hits.append((doc["id"], score, doc["payload"]))
+            return results
+
+    # ----- building, snapshots and change tracking -----
+
+    def build(self, db: Session, since: Optional[datetime] = None) -> int:
+        """Index every row of the indexed models (or only rows updated after `since`)"""
+        count = 0
+        for kind, (model, _) in INDEXED_MODELS.items():
+            query = db.query(model)
+            if since is not None:
+                query = query.filter(or_(model.created_at > since, model.updated_at > since))
+            for entity in query.yield_per(500):
+                self.index_entity(entity)
+                count += 1
+        return count
+
+    def remove_missing(self, db: Session) -> int:
+        """Drop documents whose rows no longer exist (deleted while nothing was following commits)"""
+        removed = 0
+        for kind, (model, _) in INDEXED_MODELS.items():
+            existing = {str(row_id) for (row_id,) in db.query(model.id)}
+            with self._lock:
+                missing = [doc["id"] for doc in self._docs.values() if doc["kind"] == kind and doc["id"] not in existing]
+            for doc_id in missing:
+                self.remove(kind, doc_id)
+            removed += len(missing)
+        return removed
+
+    def start(self, db: Session, static_pages: List[Dict[str, str]], snapshot_path: Optional[str] = None) -> None:
+        """
+        Load the snapshot (re-indexing only rows changed since it was taken and
+        dropping rows deleted since) or build from scratch, then start
+        following commits.
+        """
+        started = time.perf_counter()
+        self.snapshot_path = snapshot_path
+        built_at = datetime.utcnow()
+
+        snapshot_time = self.load_snapshot(snapshot_path) if snapshot_path else None
+        if snapshot_time is not None:
+            count = self.build(db, since=snapshot_time)
+            removed = self.remove_missing(db)
+            logger.info(
+                "Search index loaded from %s (%d rows re-indexed, %d removed)", snapshot_path, count, removed
+            )
+        else:
+            count = self.build(db)
+            logger.info("Search index built from database (%d rows)", count)
+
+        self.set_static_pages(static_pages)
+        self.built_at = built_at
+        self.register_listeners()
+        self.is_ready = True
+        logger.info("Search index ready: %d documents in %.1f ms", len(self._docs), (time.perf_counter() - started) * 1000)
+
+    def save_snapshot(self, path: Optional[str] = None) -> None:
+        path = path or self.snapshot_path
+        if not path:
+            return
+        with self._lock:
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "built_at": (self.built_at or datetime.utcnow()).isoformat(),
+                "docs": {
+                    key: {"kind": doc["kind"], "id": doc["id"], "terms": doc["terms"]}
+                    for key, doc in self._docs.items()
+                    if doc["kind"] != "pages"
+                },
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path: str) -> Optional[datetime]:
+        """Load a snapshot; returns the time it was taken, or None if unusable"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable search index snapshot %s: %s", path, e)
+            return None
+
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        for key, doc in data["docs"].items():
+            self._add_terms(key, doc["kind"], doc["id"], doc["terms"], None)
+        return datetime.fromisoformat(data["built_at"])
+
+    def register_listeners(self) -> None:
+        """Follow committed changes to indexed models"""
+        content_changes.subscribe("search_index", _KIND_BY_MODEL, _extract_fields, self._apply_changes)
+
+    def _apply_changes(self, changes: content_changes.ContentChanges) -> None:
+        for (model, doc_id), fields in changes.items():
+            kind = _KIND_BY_MODEL[model]
+            if fields is None:
+                self.remove(kind, doc_id)
+            else:
+                self.add(kind, doc_id, fields)
+
+
+def _extract_fields(entity: Any) -> Optional[Dict[str, str]]:
+    return INDEXED_MODELS[_KIND_BY_MODEL[type(entity)]][1](entity)
+
+
+search_index = SearchIndex()
@@ -0,0 +1,310 @@
+"""
+Search Service - Ranked full-text search across teachings, courses, products, retreats and blogs
+
+On PostgreSQL every searchable table carries a weighted, generated `search_vector`
+tsvector column (see migrations/025_add_search_vectors.sql), so a search is one
+combined query over GIN indexes that returns the top hits per content type with a
+relevance score and a highlighted snippet. Other databases use the in-process
+BM25 index from search_index.py once it has been started, and ILIKE scans until
+then (or on PostgreSQL databases where the migration has not been applied yet).
+"""
+import logging
+import re
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.db_types import UUID_TYPE
+from app.models.blog import BlogPost
+from app.models.course import Course
+from app.models.product import Product
+from app.models.retreat import Retreat
+from app.models.teaching import Teaching
+from app.services.media_service import MediaBatch, MediaService
+from app.services.search_index import highlight_snippet, search_index
+
+logger = logging.getLogger(__name__)
+
+# Content types in response order, with the model each one is hydrated from
+SEARCH_MODELS = {
+    "teachings": Teaching,
+    "courses": Course,
+    "products": Product,
+    "retreats": Retreat,
+    "blogs": BlogPost,
+}
+
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=12, MaxFragments=1"
+
+# One pass over every table's GIN index. Snippets are only built for the rows that
+# survive the per-type limit, since ts_headline has to re-parse the document.
+FULLTEXT_QUERY = text(f"""
+    WITH q AS (SELECT to_tsquery('english', :tsquery) AS query),
+    hits AS (
+        SELECT 'teachings' AS kind, t.id::text AS id,
+               ts_rank_cd(t.search_vector, q.query) AS rank,
+               coalesce(t.description, '') AS body
+        FROM teachings t, q
+        WHERE t.search_vector @@ q.query
+        UNION ALL
+        SELECT 'courses', c.id::text, ts_rank_cd(c.search_vector, q.query), coalesce(c.description, '')
+        FROM courses c, q
+        WHERE c.search_vector @@ q.query AND c.is_published
+        UNION ALL
+        SELECT 'products', p.id::text, ts_rank_cd(p.search_vector, q.query),
+               coalesce(p.short_description, '') || ' ' || coalesce(p.description, '')
+        FROM products p, q
+        WHERE p.search_vector @@ q.query AND p.published
+        UNION ALL
+        SELECT 'retreats', r.id::text, ts_rank_cd(r.search_vector, q.query), coalesce(r.description, '')
+        FROM retreats r, q
+        WHERE r.search_vector @@ q.query AND r.is_published
+        UNION ALL
+        SELECT 'blogs', b.id::text, ts_rank_cd(b.search_vector, q.query),
+               coalesce(b.excerpt, '') || ' ' || coalesce(b.content, '')
+        FROM blog_posts b, q
+        WHERE b.search_vector @@ q.query AND b.is_published
+    ),
+    ranked AS (
+        SELECT hits.*, row_number() OVER (PARTITION BY kind ORDER BY rank DESC, id) AS position
+        FROM hits
+    )
+    SELECT kind, id, rank, ts_headline('english', body, q.query, '{SNIPPET_OPTIONS}') AS snippet
+    FROM ranked, q
+    WHERE position <= :limit
+    ORDER BY kind, rank DESC, id
+""")
+
+
+def build_prefix_tsquery(q: str) -> Optional[str]:
+    """
+    Turn free text into a to_tsquery() expression.
+
+    All words must match; the last one is a prefix match so results keep up with
+    as-you-type queries ("medit" finds "meditation").
+    """
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return None
+    return " & ".join(words[:-1] + [f"{words[-1]}:*"])
+
+
+def _truncate(value: Optional[str], length: int = 150) -> Optional[str]:
+    return value[:length] + "..." if value and len(value) > length else value
+
+
+def format_teaching(t: Teaching, media: MediaBatch) -> Dict[str, Any]:
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": _truncate(t.description),
+        "thumbnail_url": media.url(t.thumbnail_url) if t.thumbnail_url else None,
+        "slug": t.slug,
+        "url": f"/teachings/{t.slug}",
+        "type": "teaching",
+        "category": t.category
+    }
+
+
+def format_course(c: Course, media: MediaBatch) -> Dict[str, Any]:
+    return {
+        "id": c.id,
+        "title": c.title,
+        "description": _truncate(c.description),
+        "thumbnail_url": media.url(c.thumbnail_url) if c.thumbnail_url else None,
+        "slug": c.slug,
+        "url": f"/courses/{c.slug}",
+        "type": "course",
+        "price": float(c.price) if c.price else None
+    }
+
+
+def format_product(p: Product, media: MediaBatch) -> Dict[str, Any]:
+    return {
+        "id": p.id,
+        "title": p.title,
+        "description": _truncate(p.short_description),
+        "thumbnail_url": media.url(p.thumbnail_url) if p.thumbnail_url else None,
+        "slug": p.slug,
+        "url": f"/store/{p.slug}",
+        "type": "product",
+        "price": float(p.price) if p.price else None
+    }
+
+
+def format_retreat(r: Retreat, media: MediaBatch) -> Dict[str, Any]:
+    return {
+        "id": r.id,
+        "title": r.title,
+        "description": _truncate(r.description),
+        "thumbnail_url": media.url(r.thumbnail_url) if r.thumbnail_url else None,
+        "slug": r.slug,
+        "url": f"/retreats/online/{r.slug}" if r.type == "online" else f"/retreats/ashram",
+        "type": "retreat",
+        "retreat_type": r.type,
+        "price": float(r.price_lifetime) if r.price_lifetime else None
+    }
+
+
+def format_blog(b: BlogPost, media: MediaBatch) -> Dict[str, Any]:
+    return {
+        "id": b.id,
+        "title": b.title,
+        "description": _truncate(b.excerpt),
+        "thumbnail_url": media.url(b.featured_image) if b.featured_image else None,
+        "slug": b.slug,
+        "url": f"/blog/{b.slug}",
+        "type": "blog",
+        "author": b.author_name,
+        "read_time": b.read_time
+    }
+
+
+RESULT_FORMATTERS = {
+    "teachings": format_teaching,
+    "courses": format_course,
+    "products": format_product,
+    "retreats": format_retreat,
+    "blogs": format_blog,
+}
+
+
+class SearchService:
+    """Service for ranked search over the content tables"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, q: str, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Search every content type, returning up to `limit` results per type.
+
+        Each result carries a relevance `score` and a highlighted `snippet`
+        (both None when the ILIKE fallback is used).
+        """
+        hits = None
+        tsquery = build_prefix_tsquery(q)
+        if tsquery and self.db.get_bind().dialect.name == "postgresql":
+            hits = self._search_fulltext(tsquery, limit)
+        elif search_index.is_ready:
+            hits = self._search_index(q, limit)
+
+        media = MediaService(self.db).batch()
+        if hits is None:
+            results = self._search_like(q, limit, media)
+        else:
+            results = self._hydrate(hits, media)
+            for items in results.values():
+                for result in items:
+                    if result["snippet"] is None:
+                        result["snippet"] = highlight_snippet(result["description"], q)
+        return media.resolve(results)
+
+    def _search_fulltext(self, tsquery: str, limit: int) -> Optional[Dict[str, List[Tuple[str, float, str]]]]:
+        """Run the combined tsvector query; returns None if the search columns are missing"""
+        try:
+            rows = self.db.execute(FULLTEXT_QUERY, {"tsquery": tsquery, "limit": limit}).all()
+        except DBAPIError as e:
+            self.db.rollback()
+            logger.warning("Full-text search unavailable, falling back to ILIKE: %s", e.orig)
+            return None
+
+        hits: Dict[str, List[Tuple[str, float, str]]] = {kind: [] for kind in SEARCH_MODELS}
+        for kind, entity_id, rank, snippet in rows:
+            hits[kind].append((entity_id, float(rank), snippet))
+        return hits
+
+    def _search_index(self, q: str, limit: int) -> Dict[str, List[Tuple[str, float, Optional[str]]]]:
+        """Query the in-process index; snippets are built after hydration"""
+        found = search_index.search(q, limit)
+        return {
+            kind: [(doc_id, score, None) for doc_id, score, _ in found.get(kind, [])]
+            for kind in SEARCH_MODELS
+        }
+
+    def _hydrate(self, hits: Dict[str, List[Tuple[str, float, str]]], media: MediaBatch) -> Dict[str, List[Dict[str, Any]]]:
+        """Load the matched rows (one IN query per content type that had hits) in rank order"""
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for kind, model in SEARCH_MODELS.items():
+            ranked = hits.get(kind, [])
+            if not ranked:
+                results[kind] = []
+                continue
+
+            ids = [_coerce_id(model, entity_id) for entity_id, _, _ in ranked]
+            entities = {str(e.id): e for e in self.db.query(model).filter(model.id.in_(ids)).all()}
+
+            results[kind] = []
+            for entity_id, score, snippet in ranked:
+                entity = entities.get(entity_id)
+                if entity is None:
+                    continue
+                result = RESULT_FORMATTERS[kind](entity, media)
+                result["score"] = round(score, 4)
+                result["snippet"] = snippet
+                results[kind].append(result)
+        return results
+
+    def _search_like(self, q: str, limit: int, media: MediaBatch) -> Dict[str, List[Dict[str, Any]]]:
+        """Substring search used where full-text search is not available"""
+        search_pattern = f"%{q}%"
+
+        queries = {
+            "teachings": self.db.query(Teaching).filter(
+                or_(
+                    Teaching.title.ilike(search_pattern),
+                    Teaching.description.ilike(search_pattern),
+                    Teaching.category.ilike(search_pattern)
+                )
+            ),
+            "courses": self.db.query(Course).filter(
+                or_(
+                    Course.title.ilike(search_pattern),
+                    Course.description.ilike(search_pattern)
+                ),
+                Course.is_published == True
+            ),
+            "products": self.db.query(Product).filter(
+                or_(
+                    Product.title.ilike(search_pattern),
+                    Product.description.ilike(search_pattern),
+                    Product.short_description.ilike(search_pattern)
+                ),
+                Product.published == True
+            ),
+            "retreats": self.db.query(Retreat).filter(
+                or_(
+                    Retreat.title.ilike(search_pattern),
+                    Retreat.description.ilike(search_pattern)
+                ),
+                Retreat.is_published == True
+            ),
+            "blogs": self.db.query(BlogPost).filter(
+                or_(
+                    BlogPost.title.ilike(search_pattern),
+                    BlogPost.excerpt.ilike(search_pattern),
+                    BlogPost.content.ilike(search_pattern)
+                ),
+                BlogPost.is_published == True
+            ),
+        }
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for kind, query in queries.items():
+            results[kind] = []
+            for entity in query.limit(limit).all():
+                result = RESULT_FORMATTERS[kind](entity, media)
+                result["score"] = None
+                result["snippet"] = None
+                results[kind].append(result)
+        return results
+
+
+def _coerce_id(model, entity_id: str):
+    """Convert a text id from the search query back to the column's Python type"""
+    if isinstance(model.id.type, UUID_TYPE):
+        return uuid.UUID(entity_id)
+    return entity_id
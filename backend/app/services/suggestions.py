@@ -0,0 +1,315 @@
+"""
+Suggestions - Prefix trie behind the /api/search/suggest typeahead endpoint
+
+Titles, categories, topics and filter tags of teachings, courses, products,
+retreats and blog posts are inserted under every word they contain, so "medit"
+completes both "Meditation" and "Guided Meditation". Every trie node keeps its
+best MAX_SUGGESTIONS phrases precomputed, which makes a lookup a walk down the
+prefix plus a slice. Phrases are weighted by popularity (Teaching.view_count).
+
+The trie follows commits made in this process through the content change
+feed, and is rebuilt from the database once it is older than
+SUGGESTION_TRIE_TTL_SECONDS so content written by other workers shows up (or
+disappears) too. A rebuild loads into a new trie without holding the lock and
+swaps it in at the end; changes committed meanwhile are replayed onto it.
+Requests never build: refresh_in_background() starts the (re)build on a worker
+thread and the current trie (empty until the first build) keeps serving.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.blog import BlogPost
+from app.models.course import Course
+from app.models.product import Product
+from app.models.retreat import Retreat
+from app.models.teaching import Teaching
+from app.services import content_changes
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 10
+
+# (normalized phrase, display text, suggestion type, url, weight)
+Contribution = Tuple[str, str, str, Optional[str], float]
+
+
+def normalize_phrase(value: str) -> str:
+    return " ".join(re.findall(r"\w+", value.lower()))
+
+
+def _popularity(view_count: Optional[int]) -> float:
+    # Log scale so a handful of very popular teachings do not crowd out everything else
+    return 1.0 + math.log1p(view_count or 0)
+
+
+def _labels(*values: Any) -> List[str]:
+    labels = []
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            labels.extend(str(v) for v in value if v)
+        elif value:
+            labels.append(str(value))
+    return labels
+
+
+def _teaching_contributions(t: Teaching) -> List[Contribution]:
+    weight = _popularity(t.view_count)
+    items = [(t.title, "teaching", f"/teachings/{t.slug}", weight)]
+    items += [(label, "category", None, weight) for label in _labels(t.category)]
+    items += [(label, "topic", None, weight) for label in _labels(t.topic)]
+    items += [(label, "tag", None, weight) for label in _labels(t.filter_tags)]
+    return items
+
+
+def _course_contributions(c: Course) -> List[Contribution]:
+    if not c.is_published:
+        return []
+    return [(c.title, "course", f"/courses/{c.slug}", 1.0)]
+
+
+def _product_contributions(p: Product) -> List[Contribution]:
+    if not p.published:
+        return []
+    items = [(p.title, "product", f"/store/{p.slug}", 1.0)]
+    items += [(label, "category", None, 1.0) for label in _labels(p.categories)]
+    return items
+
+
+def _retreat_contributions(r: Retreat) -> List[Contribution]:
+    if not r.is_published:
+        return []
+    url = f"/retreats/online/{r.slug}" if r.type == "online" else "/retreats/ashram"
+    return [(r.title, "retreat", url, 1.0)]
+
+
+def _blog_contributions(b: BlogPost) -> List[Contribution]:
+    if not b.is_published:
+        return []
+    return [(b.title, "blog", f"/blog/{b.slug}", 1.0)]
+
+
+SUGGESTION_SOURCES = {
+    Teaching: _teaching_contributions,
+    Course: _course_contributions,
+    Product: _product_contributions,
+    Retreat: _retreat_contributions,
+    BlogPost: _blog_contributions,
+}
+
+
+def _extract(entity: Any) -> List[Contribution]:
+    contributions = []
+    for text, suggestion_type, url, weight in SUGGESTION_SOURCES[type(entity)](entity):
+        key = normalize_phrase(text or "")
+        if key:
+            contributions.append((key, text.strip(), suggestion_type, url, weight))
+    return contributions
+
+
+class _Node:
+    __slots__ = ("children", "phrases", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.phrases: set = set()  # phrases with a word starting exactly here
+        self.top: List[Tuple[float, str]] = []  # best (-weight, phrase) in this subtree
+
+
+class _Trie:
+    """The trie itself; not thread-safe, SuggestionTrie guards it"""
+
+    def __init__(self):
+        self.root = _Node()
+        self.phrases: Dict[str, Dict[str, Any]] = {}  # phrase -> text/type/url/weight
+        self.sources: Dict[Tuple[type, str], List[Contribution]] = {}
+
+    def set_source(self, model: type, entity_id: str, contributions: List[Contribution]) -> None:
+        touched: Dict[str, float] = {}
+        for key, text, suggestion_type, url, weight in self.sources.pop((model, entity_id), []):
+            touched[key] = touched.get(key, 0.0) - weight
+            self.phrases[key]["weight"] -= weight
+        if contributions:
+            self.sources[(model, entity_id)] = contributions
+        for key, text, suggestion_type, url, weight in contributions:
+            phrase = self.phrases.get(key)
+            if phrase is None:
+                phrase = self.phrases[key] = {"text": text, "type": suggestion_type, "url": url, "weight": 0.0}
+            phrase["weight"] += weight
+            touched[key] = touched.get(key, 0.0) + weight
+
+        for key in touched:
+            if self.phrases[key]["weight"] <= 1e-9:
+                del self.phrases[key]
+            self._reindex_phrase(key)
+
+    def apply(self, changes: content_changes.ContentChanges) -> None:
+        for (model, entity_id), contributions in changes.items():
+            self.set_source(model, entity_id, contributions or [])
+
+    def _reindex_phrase(self, key: str) -> None:
+        """Insert/remove a phrase under each of its word starts and refresh top lists on those paths"""
+        present = key in self.phrases
+        words = key.split(" ")
+        for i in range(len(words)):
+            suffix = " ".join(words[i:])
+            path = [self.root]
+            node = self.root
+            for ch in suffix:
+                child = node.children.get(ch)
+                if child is None:
+                    if not present:
+                        break
+                    child = node.children[ch] = _Node()
+                node = child
+                path.append(node)
+            else:
+                if present:
+                    node.phrases.add(key)
+                else:
+                    node.phrases.discard(key)
+            for depth in range(len(path) - 1, -1, -1):
+                self._refresh_top(path[depth])
+                if depth and not path[depth].top and not path[depth].children:
+                    # Prune empty branches
+                    del path[depth - 1].children[suffix[depth - 1]]
+
+    def _refresh_top(self, node: _Node) -> None:
+        candidates = {key: -self.phrases[key]["weight"] for key in node.phrases}
+        for child in node.children.values():
+            for weight, key in child.top:
+                candidates[key] = weight
+        node.top = sorted((weight, key) for key, weight in candidates.items())[:MAX_SUGGESTIONS]
+
+    def suggest(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        results = []
+        for _, phrase_key in node.top[:limit]:
+            phrase = self.phrases[phrase_key]
+            results.append({"text": phrase["text"], "type": phrase["type"], "url": phrase["url"]})
+        return results
+
+
+class SuggestionTrie:
+    """Popularity-weighted prefix trie with precomputed top-k per node"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.SUGGESTION_TRIE_TTL_SECONDS
+        self._trie = _Trie()
+        self._lock = threading.Lock()  # guards the current trie; never held across a query
+        self._build_lock = threading.Lock()  # one (re)build at a time
+        self._replay: Optional[List[content_changes.ContentChanges]] = None  # changes seen during a rebuild
+        self._built_at = 0.0
+        self._subscribed = False
+        self.is_ready = False
+
+    @property
+    def is_fresh(self) -> bool:
+        if not self.is_ready:
+            return False
+        return not self.ttl_seconds or time.monotonic() - self._built_at <= self.ttl_seconds
+
+    # ----- maintenance -----
+
+    def set_source(self, model: type, entity_id: str, contributions: List[Contribution]) -> None:
+        """Replace everything one row contributes to the trie"""
+        with self._lock:
+            self._trie.set_source(model, entity_id, contributions)
+
+    def index_entity(self, entity: Any) -> None:
+        self.set_source(type(entity), str(entity.id), _extract(entity))
+
+    # ----- querying -----
+
+    def suggest(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> List[Dict[str, Any]]:
+        """Best completions for a prefix (matched against the start of any word)"""
+        key = normalize_phrase(prefix)
+        if prefix.endswith(" ") and key:
+            key += " "
+        if not key:
+            return []
+        with self._lock:
+            return self._trie.suggest(key, limit)
+
+    # ----- building -----
+
+    def ensure_built(self, db: Session) -> None:
+        """Build on first use and rebuild once older than the TTL"""
+        if self.is_fresh:
+            return
+        # Once there is a trie to serve, requests do not wait for someone else's rebuild
+        if not self._build_lock.acquire(blocking=not self.is_ready):
+            return
+        try:
+            if not self.is_fresh:
+                self._build(db)
+        finally:
+            self._build_lock.release()
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """Start a (re)build on a worker thread if the trie is missing or stale; never waits"""
+        if self.is_fresh or self._build_lock.locked():
+            return None
+        thread = threading.Thread(target=self._build_in_background, name="suggestion-trie", daemon=True)
+        thread.start()
+        return thread
+
+    def _build_in_background(self) -> None:
+        db = SessionLocal()
+        try:
+            self.ensure_built(db)
+        except Exception as e:
+            logger.warning("Suggestion trie build failed: %s", e)
+        finally:
+            db.close()
+
+    def _build(self, db: Session) -> None:
+        started = time.perf_counter()
+        if not self._subscribed:
+            # Subscribe first so nothing committed while loading is missed
+            content_changes.subscribe("suggestions", SUGGESTION_SOURCES, _extract, self._apply_changes)
+            self._subscribed = True
+        with self._lock:
+            self._replay = []
+
+        trie = _Trie()
+        count = 0
+        try:
+            for model in SUGGESTION_SOURCES:
+                for entity in db.query(model).yield_per(500):
+                    trie.set_source(model, str(entity.id), _extract(entity))
+                    count += 1
+        finally:
+            with self._lock:
+                replay, self._replay = self._replay, None
+        with self._lock:
+            # Re-applying a change the load already saw is harmless: set_source replaces
+            for changes in replay:
+                trie.apply(changes)
+            self._trie = trie
+            self._built_at = time.monotonic()
+            self.is_ready = True
+        logger.info(
+            "Suggestion trie built: %d phrases from %d rows in %.1f ms",
+            len(trie.phrases), count, (time.perf_counter() - started) * 1000,
+        )
+
+    def _apply_changes(self, changes: content_changes.ContentChanges) -> None:
+        with self._lock:
+            self._trie.apply(changes)
+            if self._replay is not None:
+                self._replay.append(changes)
+
+
+suggestion_trie = SuggestionTrie()
@@ -15,6 +15,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 
 from ..core.config import settings
+from .http_client import outbound_http
 
 
 class TilopayService:
@@ -50,26 +51,26 @@ class TilopayService:
             Dict with token for SDK initialization
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/loginSdk",
-                    json={
-                        "apiuser": settings.TILOPAY_API_USER,
-                        "password": settings.TILOPAY_API_PASSWORD,
-                        "key": self.api_key,
-                    },
-                    headers={"Content-Type": "application/json"},
-                    timeout=30.0,
-                )
-
-                response.raise_for_status()
-                result = response.json()
-
-                return {
-                    "success": True,
-                    "token": result.get("access_token"),  # loginSdk returns "access_token" not "token"
-                    "data": result,
-                }
+            response = await outbound_http.post(
+                f"{self.base_url}/loginSdk",
+                json={
+                    "apiuser": settings.TILOPAY_API_USER,
+                    "password": settings.TILOPAY_API_PASSWORD,
+                    "key": self.api_key,
+                },
+                headers={"Content-Type": "application/json"},
+                timeout=30.0,
+                idempotent=True,  # Only issues a token, safe to retry
+            )
+
+            response.raise_for_status()
+            result = response.json()
+
+            return {
+                "success": True,
+                "token": result.get("access_token"),  # loginSdk returns "access_token" not "token"
+                "data": result,
+            }
 
         except httpx.HTTPError as e:
             return {
@@ -201,24 +202,23 @@ class TilopayService:
             payment_data["signature"] = self._generate_signature(payment_data)
 
             # Send request to Tilopay
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/orders/create",
-                    json=payment_data,
-                    headers={"Content-Type": "application/json"},
-                    timeout=30.0,
-                )
-
-                response.raise_for_status()
-                result = response.json()
-
-                return {
-                    "success": True,
-                    "payment_url": result.get("url"),
-                    "order_id": result.get("orderId"),
-                    "transaction_id": result.get("transactionId"),
-                    "data": result,
-                }
+            response = await outbound_http.post(
+                f"{self.base_url}/orders/create",
+                json=payment_data,
+                headers={"Content-Type": "application/json"},
+                timeout=30.0,
+            )
+
+            response.raise_for_status()
+            result = response.json()
+
+            return {
+                "success": True,
+                "payment_url": result.get("url"),
+                "order_id": result.get("orderId"),
+                "transaction_id": result.get("transactionId"),
+                "data": result,
+            }
 
         except httpx.HTTPError as e:
             return {
@@ -238,24 +238,23 @@ class TilopayService:
             Payment status and details
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/orders/{transaction_id}",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    timeout=30.0,
-                )
-
-                response.raise_for_status()
-                result = response.json()
-
-                return {
-                    "success": True,
-                    "status": result.get("status"),
-                    "paid": result.get("paid", False),
-                    "amount": result.get("amount"),
-                    "currency": result.get("currency"),
-                    "data": result,
-                }
+            response = await outbound_http.get(
+                f"{self.base_url}/orders/{transaction_id}",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=30.0,
+            )
+
+            response.raise_for_status()
+            result = response.json()
+
+            return {
+                "success": True,
+                "status": result.get("status"),
+                "paid": result.get("paid", False),
+                "amount": result.get("amount"),
+                "currency": result.get("currency"),
+                "data": result,
+            }
 
         except httpx.HTTPError as e:
             return {
@@ -328,23 +327,22 @@ class TilopayService:
 
             refund_data["signature"] = self._generate_signature(refund_data)
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/refunds",
-                    json=refund_data,
-                    headers={"Content-Type": "application/json"},
-                    timeout=30.0,
-                )
-
-                response.raise_for_status()
-                result = response.json()
-
-                return {
-                    "success": True,
-                    "refund_id": result.get("refundId"),
-                    "status": result.get("status"),
-                    "data": result,
-                }
+            response = await outbound_http.post(
+                f"{self.base_url}/refunds",
+                json=refund_data,
+                headers={"Content-Type": "application/json"},
+                timeout=30.0,
+            )
+
+            response.raise_for_status()
+            result = response.json()
+
+            return {
+                "success": True,
+                "refund_id": result.get("refundId"),
+                "status": result.get("status"),
+                "data": result,
+            }
 
         except httpx.HTTPError as e:
             return {
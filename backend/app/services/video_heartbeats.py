@@ -0,0 +1,301 @@
+"""
+Video Heartbeats - Write-behind buffer for course player resume positions
+
+The course player posts its position every few seconds. Instead of a
+read-modify-commit per heartbeat, the latest position per (enrollment,
+component) is kept in memory and written out as one batch of coalesced
+upserts every VIDEO_HEARTBEAT_FLUSH_SECONDS, when the buffer grows past
+VIDEO_HEARTBEAT_MAX_PENDING (the background loop is woken; requests never
+wait for a write) and on shutdown. Reads go through the buffer, including a
+batch that is still being written, so resume always sees the newest position.
+
+The component/enrollment lookup that validates a heartbeat, together with the
+component's stored completion and percentage, is cached per (user, component),
+so a steady heartbeat costs no queries at all. Positions buffered when a
+worker dies without a clean shutdown are lost; at most one flush interval of
+playback.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.course import CourseClass, CourseComponent, CourseEnrollment, CourseProgress
+
+logger = logging.getLogger(__name__)
+
+# Watching this share of a video marks the component completed
+COMPLETION_PERCENTAGE = 95
+
+# Cached (user, component) -> enrollment lookups
+TARGET_CACHE_SIZE = 10000
+TARGET_TTL_SECONDS = 300
+
+
+class HeartbeatTarget(NamedTuple):
+    user_id: str
+    enrollment_id: str
+    class_id: str
+    duration: Optional[int]
+    # The component's progress row as last known (stored, or buffered by this process)
+    progress_percentage: int
+    completed: bool
+
+
+class PendingPosition(NamedTuple):
+    class_id: str
+    timestamp: int
+    progress_percentage: Optional[int]  # None when the component has no duration
+    completed: bool
+    last_accessed: datetime
+
+
+class ComponentNotFound(LookupError):
+    pass
+
+
+class NotEnrolled(PermissionError):
+    pass
+
+
+def position_for(target: HeartbeatTarget, timestamp: int) -> PendingPosition:
+    """Progress implied by a heartbeat, same rule as the old per-request write"""
+    percentage = None
+    if target.duration and target.duration > 0:
+        percentage = min(int((timestamp / target.duration) * 100), 100)
+    completed = percentage is not None and percentage >= COMPLETION_PERCENTAGE
+    return PendingPosition(target.class_id, timestamp, percentage, completed, datetime.utcnow())
+
+
+def merged_progress(position: PendingPosition, stored: Optional[Any]) -> Tuple[int, bool]:
+    """
+    (progress_percentage, completed) of a component once `position` is written
+    over its progress row (a CourseProgress or HeartbeatTarget): completion is
+    never undone, and a component without a duration keeps its stored
+    percentage (as _write does).
+    """
+    percentage = position.progress_percentage
+    if percentage is None:
+        percentage = (stored.progress_percentage or 0) if stored else 0
+    return percentage, position.completed or bool(stored and stored.completed)
+
+
+class VideoHeartbeatBuffer:
+    """Latest unsaved position per (enrollment_id, component_id)"""
+
+    def __init__(
+        self,
+        flush_seconds: int = settings.VIDEO_HEARTBEAT_FLUSH_SECONDS,
+        max_pending: int = settings.VIDEO_HEARTBEAT_MAX_PENDING,
+    ):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], PendingPosition] = {}
+        self._inflight: Dict[Tuple[str, str], PendingPosition] = {}  # the batch being written
+        self._targets: "OrderedDict[Tuple[str, str], Tuple[HeartbeatTarget, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {"received": 0, "flushes": 0, "rows_written": 0, "flush_errors": 0}
+
+    @property
+    def write_through(self) -> bool:
+        return self.flush_seconds <= 0
+
+    # ----- ingestion -----
+
+    def resolve_target(self, db: Session, user_id, component_id) -> HeartbeatTarget:
+        """
+        Enrollment and class a heartbeat belongs to.
+
+        Raises ComponentNotFound or NotEnrolled; only successful lookups are cached.
+        """
+        key = (str(user_id), str(component_id))
+        cached = self._targets.get(key)
+        if cached is not None and time.monotonic() - cached[1] <= TARGET_TTL_SECONDS:
+            return cached[0]
+
+        row = (
+            db.query(
+                CourseComponent.class_id,
+                CourseComponent.duration,
+                CourseEnrollment.id,
+                CourseProgress.progress_percentage,
+                CourseProgress.completed,
+            )
+            .join(CourseClass, CourseComponent.class_id == CourseClass.id)
+            .outerjoin(
+                CourseEnrollment,
+                and_(CourseEnrollment.course_id == CourseClass.course_id, CourseEnrollment.user_id == user_id),
+            )
+            .outerjoin(
+                CourseProgress,
+                and_(CourseProgress.enrollment_id == CourseEnrollment.id, CourseProgress.component_id == CourseComponent.id),
+            )
+            .filter(CourseComponent.id == str(component_id))
+            .first()
+        )
+        if row is None:
+            raise ComponentNotFound(str(component_id))
+        class_id, duration, enrollment_id, percentage, completed = row
+        if enrollment_id is None:
+            raise NotEnrolled(str(component_id))
+
+        target = HeartbeatTarget(
+            key[0], str(enrollment_id), str(class_id), duration, percentage or 0, bool(completed)
+        )
+        self._remember(key, target)
+        return target
+
+    def _remember(self, key: Tuple[str, str], target: HeartbeatTarget, loaded_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._targets[key] = (target, time.monotonic() if loaded_at is None else loaded_at)
+            self._targets.move_to_end(key)
+            while len(self._targets) > TARGET_CACHE_SIZE:
+                self._targets.popitem(last=False)
+
+    def record(self, target: HeartbeatTarget, component_id, timestamp: int) -> PendingPosition:
+        """Buffer a position (replacing any unsaved one for the same component)"""
+        key = (target.enrollment_id, str(component_id))
+        position = position_for(target, timestamp)
+        with self._lock:
+            previous = self._pending.get(key) or self._inflight.get(key)
+            if not position.completed and (target.completed or (previous is not None and previous.completed)):
+                position = position._replace(completed=True)
+            self._pending[key] = position
+            self.stats["received"] += 1
+            pending = len(self._pending)
+            cached = self._targets.get((target.user_id, str(component_id)))
+
+        # Remember a completion in the cached lookup, so it is still reported once flushed
+        if position.completed and cached is not None and not cached[0].completed:
+            self._remember((target.user_id, str(component_id)), cached[0]._replace(completed=True), cached[1])
+
+        if self.write_through:
+            self.flush()
+        elif pending >= self.max_pending:
+            self._wake()
+        return position
+
+    def peek(self, enrollment_id, component_id) -> Optional[PendingPosition]:
+        key = (str(enrollment_id), str(component_id))
+        with self._lock:
+            return self._pending.get(key) or self._inflight.get(key)
+
+    def _wake(self) -> None:
+        """Have the background loop flush now; without one (scripts, tests) flush here"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        else:
+            self.flush()
+
+    # ----- flushing -----
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write every buffered position in one transaction; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                # Still visible to peek() until committed
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            own_session = db is None
+            if own_session:
+                db = SessionLocal()
+            try:
+                written = self._write(db, batch)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self._requeue(batch)
+                self.stats["flush_errors"] += 1
+                logger.warning("Video heartbeat flush of %d positions failed: %s", len(batch), e)
+                return 0
+            finally:
+                with self._lock:
+                    self._inflight = {}
+                if own_session:
+                    db.close()
+
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += written
+            return written
+
+    def _write(self, db: Session, batch: Dict[Tuple[str, str], PendingPosition]) -> int:
+        enrollment_ids = {enrollment_id for enrollment_id, _ in batch}
+        component_ids = {component_id for _, component_id in batch}
+
+        existing: Dict[Tuple[str, str], CourseProgress] = {}
+        for progress in (
+            db.query(CourseProgress)
+            .filter(
+                CourseProgress.enrollment_id.in_(enrollment_ids),
+                CourseProgress.component_id.in_(component_ids),
+            )
+            .all()
+        ):
+            existing[(str(progress.enrollment_id), str(progress.component_id))] = progress
+
+        # Enrollments deleted since the heartbeat was accepted are skipped
+        live_enrollments = {
+            str(enrollment_id)
+            for (enrollment_id,) in db.query(CourseEnrollment.id).filter(CourseEnrollment.id.in_(enrollment_ids))
+        }
+
+        written = 0
+        for (enrollment_id, component_id), position in batch.items():
+            if enrollment_id not in live_enrollments:
+                continue
+            progress = existing.get((enrollment_id, component_id))
+            if progress is None:
+                progress = CourseProgress(
+                    enrollment_id=enrollment_id,
+                    class_id=position.class_id,
+                    component_id=component_id,
+                )
+                db.add(progress)
+            progress.video_timestamp = position.timestamp
+            progress.last_accessed = position.last_accessed
+            if position.progress_percentage is not None:
+                progress.progress_percentage = position.progress_percentage
+            if position.completed:
+                progress.completed = True
+            written += 1
+        return written
+
+    def _requeue(self, batch: Dict[Tuple[str, str], PendingPosition]) -> None:
+        """Put a failed batch back without overwriting newer heartbeats"""
+        with self._lock:
+            for key, position in batch.items():
+                self._pending.setdefault(key, position)
+
+    async def run(self) -> None:
+        """Flush periodically, or when woken by a full buffer, until cancelled (started from the app lifespan)"""
+        if self.write_through:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await asyncio.to_thread(self.flush)
+        finally:
+            self._loop = self._wakeup = None
+
+
+video_heartbeats = VideoHeartbeatBuffer()
@@ -0,0 +1,49 @@
+-- Migration: Add weighted full-text search vectors
+-- Description: Generated tsvector columns + GIN indexes used by /api/search.
+-- The columns are maintained by PostgreSQL on every INSERT/UPDATE, so no
+-- application code has to keep them in sync. Requires PostgreSQL 12+.
+-- Weights: A = title, B = short summary fields, C = description, D = long body text
+
+ALTER TABLE teachings ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '') || ' ' || coalesce(topic, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+
+ALTER TABLE retreats ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(subtitle, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED;
+
+ALTER TABLE blog_posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'D')
+    ) STORED;
+
+-- GIN indexes make @@ matches (including prefix matches) index lookups
+CREATE INDEX IF NOT EXISTS idx_teachings_search_vector ON teachings USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_courses_search_vector ON courses USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_retreats_search_vector ON retreats USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_blog_posts_search_vector ON blog_posts USING GIN (search_vector);
+
+COMMENT ON COLUMN teachings.search_vector IS 'Weighted full-text vector (title A, category/topic B, description C)';
+COMMENT ON COLUMN blog_posts.search_vector IS 'Weighted full-text vector (title A, excerpt B, content D)';
@@ -0,0 +1,16 @@
+-- Migration: Add keyset pagination indexes
+-- Description: Composite indexes matching the cursor orderings used by
+-- GET /api/teachings, GET /api/forum/threads and GET /api/audit-logs, so each
+-- page is a bounded index range scan instead of an OFFSET walk
+
+-- Teachings: most recent first, undated last
+CREATE INDEX IF NOT EXISTS idx_teachings_published_date_id
+    ON teachings (published_date DESC NULLS LAST, id DESC);
+
+-- Forum threads: pinned first, then latest activity
+CREATE INDEX IF NOT EXISTS idx_forum_threads_pinned_last_post_id
+    ON forum_threads (is_pinned DESC, last_post_at DESC, id DESC);
+
+-- Audit logs: newest first
+CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at_id
+    ON audit_logs (created_at DESC, id DESC);
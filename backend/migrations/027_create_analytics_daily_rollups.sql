@@ -0,0 +1,31 @@
+-- Migration: Create analytics daily rollups
+-- Description: Per-day dashboard facts maintained by app.services.analytics_rollups
+-- (backfilled automatically on first start, or via
+-- POST /api/cron/refresh-analytics-rollups?full=true), plus indexes on the
+-- timestamps each day is recomputed from
+
+CREATE TABLE IF NOT EXISTS analytics_daily_rollups (
+    day DATE PRIMARY KEY,
+    signups INTEGER NOT NULL DEFAULT 0,
+    active_users INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    enrollments INTEGER NOT NULL DEFAULT 0,
+    orders INTEGER NOT NULL DEFAULT 0,
+    registrations INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS analytics_daily_revenue (
+    day DATE NOT NULL,
+    payment_type VARCHAR(50) NOT NULL,
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    payments INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, payment_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at);
+CREATE INDEX IF NOT EXISTS idx_user_analytics_last_active_at ON user_analytics (last_active_at);
+CREATE INDEX IF NOT EXISTS idx_payments_created_at ON payments (created_at);
+CREATE INDEX IF NOT EXISTS idx_course_enrollments_enrolled_at ON course_enrollments (enrolled_at);
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS idx_retreat_registrations_registered_at ON retreat_registrations (registered_at);
@@ -0,0 +1,23 @@
+-- Migration: Add denormalized forum category stats
+-- Description: Thread/post counters and the latest-thread pointer on
+-- forum_categories, maintained by the forum endpoints so the category list is
+-- a single query. POST /api/forum/categories/reconcile-stats repairs drift.
+
+ALTER TABLE forum_categories ADD COLUMN IF NOT EXISTS thread_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE forum_categories ADD COLUMN IF NOT EXISTS post_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE forum_categories ADD COLUMN IF NOT EXISTS latest_thread_id UUID;
+
+-- Backfill
+UPDATE forum_categories c SET
+    thread_count = (SELECT COUNT(*) FROM forum_threads t WHERE t.category_id = c.id),
+    post_count = (
+        SELECT COUNT(*) FROM forum_posts p
+        JOIN forum_threads t ON p.thread_id = t.id
+        WHERE t.category_id = c.id
+    ),
+    latest_thread_id = (
+        SELECT t.id FROM forum_threads t
+        WHERE t.category_id = c.id
+        ORDER BY t.last_post_at DESC, t.id DESC
+        LIMIT 1
+    );
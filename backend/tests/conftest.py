@@ -6,6 +6,7 @@ import sys
 import os
 from typing import Generator
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from fastapi.testclient import TestClient
 
@@ -13,7 +14,7 @@ from fastapi.testclient import TestClient
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import Base FIRST so models can inherit from it
-from app.core.database import Base, get_db
+from app.core.database import AsyncSessionLocal, Base, get_async_db, get_db
 from app.core.security import get_password_hash, create_access_token
 
 # Now import ALL models to register them with Base
@@ -28,25 +29,27 @@ from app.models.product import Product, Order, OrderItem, UserProductAccess
 from app.models.payment import Payment
 from app.models.membership import MembershipTier, Subscription
 from app.models.event import Event, UserCalendar
-from app.models.blog import Blog
+from app.models.blog import BlogPost
 from app.models.forms import Application, ContactSubmission
 from app.models.email import NewsletterSubscriber, EmailTemplate, EmailCampaign, EmailAutomation, EmailSent
 from app.models.analytics import AnalyticsEvent, UserAnalytics
 
 # Import the main app
-# Note: app.main creates tables on startup via lifespan, but we'll override get_db
+# Note: app.main creates tables on startup via lifespan, but we'll override get_db and get_async_db
 # so tests use the test database
 from app.main import app
 
 
-# Test database URL (in-memory SQLite)
-TEST_DATABASE_URL = "sqlite:///:memory:"
+# Test database URL (in-memory SQLite, shared by every connection in the process
+# so the sync and async engines see the same tables)
+TEST_DATABASE_URL = "sqlite:///file:testdb?mode=memory&cache=shared&uri=true"
 
-# Create test engine
+# Create test engines
 test_engine = create_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
 )
+test_async_engine = create_async_engine(TEST_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
 
 # Create test session maker
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
@@ -79,7 +82,12 @@ def client(db_session: Session) -> TestClient:
         finally:
             pass
 
+    async def override_get_async_db():
+        async with AsyncSessionLocal(bind=test_async_engine) as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     # Use TestClient without triggering lifespan (which creates tables on production DB)
     with TestClient(app, raise_server_exceptions=True) as test_client:
@@ -169,6 +177,41 @@ def admin_auth_headers(test_admin_user: User) -> dict:
     return {"Authorization": f"Bearer {access_token}"}
 
 
+# ============================================================================
+# UNIT TEST DATABASES
+# ============================================================================
+
+@pytest.fixture
+def make_db(tmp_path):
+    """
+    Factory for a session on a throwaway SQLite database holding only `tables`
+    (names or Table objects of `metadata`; every table when None).
+
+    With `file=True` the database is a file, so other connections (scan
+    threads, the aiosqlite driver) see the same data. Sessions are closed and
+    engines disposed after the test.
+    """
+    created = []
+
+    def make(tables=None, file: bool = False, metadata=Base.metadata) -> Session:
+        if file:
+            url = f"sqlite:///{tmp_path / f'unit{len(created)}.db'}"
+            engine = create_engine(url, connect_args={"check_same_thread": False})
+        else:
+            engine = create_engine("sqlite:///:memory:")
+        if tables is not None:
+            tables = [metadata.tables[table] if isinstance(table, str) else table for table in tables]
+        metadata.create_all(engine, tables=tables)
+        session = sessionmaker(bind=engine)()
+        created.append((session, engine))
+        return session
+
+    yield make
+    for session, engine in created:
+        session.close()
+        engine.dispose()
+
+
 # ============================================================================
 # MOCK EXTERNAL SERVICES
 # ============================================================================
@@ -0,0 +1,91 @@
+"""Unit tests for the membership access policy table."""
+import pytest
+
+from app.core import access_policy
+from app.models.teaching import Teaching, AccessLevel, ContentType
+from app.models.user import User, MembershipTierEnum
+
+
+def make_user(tier):
+    return User(email=f"{tier.value}@test.com", name=tier.value, password_hash="hash", membership_tier=tier)
+
+
+ANON = None
+FREE = make_user(MembershipTierEnum.FREE)
+GYANI = make_user(MembershipTierEnum.GYANI)
+PRAGYANI = make_user(MembershipTierEnum.PRAGYANI)
+PLUS = make_user(MembershipTierEnum.PRAGYANI_PLUS)
+
+# access level -> expected access_type for anonymous, free, gyani, pragyani, pragyani+
+EXPECTED = {
+    "free": ["free"] * 5,
+    "preview": ["preview", "preview", "full", "full", "full"],
+    "gyani": ["restricted", "restricted", "full", "full", "full"],
+    "pragyani": ["restricted", "restricted", "restricted", "full", "full"],
+    "pragyani_plus": ["restricted"] * 4 + ["full"],
+}
+
+
+def make_teaching(level, slug=None, preview_duration=None):
+    return Teaching(
+        slug=slug or f"{level}-teaching",
+        title=f"{level} teaching",
+        content_type=ContentType.VIDEO,
+        access_level=level,
+        preview_duration=preview_duration,
+    )
+
+
+class TestAccessPolicy:
+    """Test the precomputed tier x access level outcomes."""
+
+    @pytest.mark.parametrize("level", list(EXPECTED))
+    def test_table(self, level):
+        teaching = make_teaching(AccessLevel(level))
+        types = [access_policy.evaluate_teaching(u, teaching)["access_type"] for u in (ANON, FREE, GYANI, PRAGYANI, PLUS)]
+        assert types == EXPECTED[level]
+
+    def test_access_info(self):
+        preview = make_teaching("preview")
+        assert access_policy.evaluate_teaching(FREE, preview) == {
+            "can_access": True, "access_type": "preview", "preview_duration": 30,
+        }
+        assert access_policy.evaluate_teaching(GYANI, preview) == {
+            "can_access": True, "access_type": "full", "preview_duration": None,
+        }
+        free = make_teaching("free", preview_duration=10)
+        assert access_policy.evaluate_teaching(ANON, free)["preview_duration"] == 10
+        assert access_policy.evaluate_teaching(PLUS, make_teaching("unknown"))["can_access"] is False
+
+    def test_evaluate_page(self):
+        page = [make_teaching(level) for level in EXPECTED]
+        results = access_policy.evaluate_teachings(PRAGYANI, page)
+        assert [r["access_type"] for r in results] == [EXPECTED[level][3] for level in EXPECTED]
+
+    def test_has_tier(self):
+        assert not access_policy.has_tier(ANON, access_policy.GYANI_AND_ABOVE)
+        assert not access_policy.has_tier(FREE, access_policy.GYANI_AND_ABOVE)
+        assert access_policy.has_tier(GYANI, access_policy.GYANI_AND_ABOVE)
+        assert access_policy.has_tier(FREE, access_policy.MEMBERS)
+
+
+class TestAccessPolicySQL:
+    """Test filtering and annotating rows inside the query."""
+
+    @pytest.fixture
+    def db(self, make_db):
+        session = make_db([Teaching.__table__])
+        for level in EXPECTED:
+            session.add(make_teaching(level))
+        session.commit()
+        return session
+
+    def test_access_filter(self, db):
+        query = db.query(Teaching.access_level).filter(access_policy.access_filter(GYANI, Teaching.access_level))
+        assert sorted(row[0] for row in query) == ["free", "gyani", "preview"]
+        assert db.query(Teaching).filter(access_policy.access_filter(ANON, Teaching.access_level)).count() == 2
+
+    def test_access_type_expression(self, db):
+        expression = access_policy.access_type_expression(FREE, Teaching.access_level)
+        rows = dict(db.query(Teaching.access_level, expression).all())
+        assert rows == {level: EXPECTED[level][1] for level in EXPECTED}
@@ -0,0 +1,104 @@
+"""Unit tests for the batched analytics ingestion pipeline."""
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.models.analytics import AnalyticsEvent, UserAnalytics
+from app.services import analytics_ingest
+from app.services.analytics_ingest import AnalyticsIngest, make_event, user_analytics_deltas
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(["analytics_events", "user_analytics"])
+
+
+def event(name="page_view", user_id=None):
+    return make_event(name, str(user_id or "anon"), user_id=user_id, event_properties={"path": "/"})
+
+
+class TestAnalyticsIngest:
+    """Test queueing, batched writes, backpressure and the spill journal."""
+
+    def test_deltas(self):
+        assert user_analytics_deltas("page_view") == {"total_sessions": 1}
+        assert user_analytics_deltas("Teaching Viewed") == {"teachings_viewed": 1}
+        assert user_analytics_deltas("button_click") == {}
+
+    def test_batch_insert_and_aggregated_counters(self, db):
+        user_id = uuid.uuid4()
+        db.add(UserAnalytics(user_id=user_id))
+        db.commit()
+
+        ingest = AnalyticsIngest(max_queue=100, batch_size=2)
+        for name in ("page_view", "page_view", "teaching_view", "button_click"):
+            assert ingest.submit(event(name, user_id))
+        ingest.submit(event())
+
+        assert len(ingest.persist_pending(db)) == 5
+        assert db.query(AnalyticsEvent).count() == 5
+        assert ingest.stats["batches"] == 3
+        analytics = db.query(UserAnalytics).one()
+        db.refresh(analytics)
+        assert (analytics.total_sessions, analytics.teachings_viewed) == (2, 1)
+        assert analytics.last_active_at is not None
+
+    def test_forwarded_time_is_utc(self, monkeypatch):
+        sent = []
+
+        async def track_events(events):
+            sent.extend(events)
+
+        async def track_ga4(client_id, events):
+            pass
+
+        monkeypatch.setattr(analytics_ingest.mixpanel_service, "track_events", track_events)
+        monkeypatch.setattr(analytics_ingest.ga4_service, "track_events", track_ga4)
+        monkeypatch.setenv("TZ", "America/Costa_Rica")
+        time.tzset()
+        try:
+            forwarded = event()
+            forwarded["created_at"] = datetime(2025, 3, 10, 12, 0)
+            asyncio.run(AnalyticsIngest()._forward([forwarded]))
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+        assert sent[0]["time"] == 1741608000  # 2025-03-10T12:00:00Z
+
+    def test_sheds_when_full_without_spill(self, db):
+        ingest = AnalyticsIngest(max_queue=1, batch_size=10)
+        assert ingest.submit(event())
+        assert not ingest.submit(event())
+        assert ingest.metrics()["dropped"] == 1
+        assert ingest.metrics()["queue_depth"] == 1
+
+    def test_overflow_spills_to_journal(self, db, tmp_path):
+        ingest = AnalyticsIngest(max_queue=1, batch_size=10, spill_path=str(tmp_path / "analytics"))
+        for _ in range(3):
+            assert ingest.submit(event())
+        assert ingest.stats["spilled"] == 2
+
+        assert len(ingest.persist_pending(db)) == 3
+        assert db.query(AnalyticsEvent).count() == 3
+        assert ingest.metrics()["pending_segments"] == 0
+        ingest.close()
+
+    def test_replay_after_crash_skips_inserted_events(self, db, tmp_path):
+        spill_path = str(tmp_path / "analytics")
+        crashed = AnalyticsIngest(max_queue=10, batch_size=10, spill_path=spill_path)
+        first, second = event(), event()
+        crashed.submit(first)
+        crashed.submit(second)
+        # The first event was committed before the crash
+        db.add(AnalyticsEvent(id=first["id"], event_name=first["event_name"], created_at=first["created_at"]))
+        db.commit()
+        crashed.close()
+
+        restarted = AnalyticsIngest(max_queue=10, batch_size=10, spill_path=spill_path)
+        assert restarted.recover() == 1
+        persisted = restarted.persist_pending(db)
+        assert [e["id"] for e in persisted] == [second["id"]]
+        assert db.query(AnalyticsEvent).count() == 2
@@ -0,0 +1,190 @@
+"""Unit tests for the daily analytics rollups."""
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, inspect
+
+from app.core import db_runtime
+from app.core.config import settings
+from app.core.database import Base
+from app.models.analytics import AnalyticsDailyRollup, UserAnalytics
+from app.models.course import CourseEnrollment
+from app.models.payment import Payment, PaymentStatus, PaymentType
+from app.models.product import Order, OrderStatus
+from app.models.retreat import RetreatRegistration
+from app.models.user import User
+from app.routers import cron
+from app.services import content_changes
+from app.services.analytics_rollups import AnalyticsRollups, _runs
+from app.services.analytics_service import AnalyticsService
+
+TABLES = [
+    "users",
+    "user_analytics",
+    "payments",
+    "course_enrollments",
+    "orders",
+    "retreat_registrations",
+    "analytics_daily_rollups",
+    "analytics_daily_revenue",
+]
+
+DAY = date(2025, 3, 10)
+
+
+def at(day: date, hour: int = 12) -> datetime:
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def rollups():
+    rollups = AnalyticsRollups(flush_seconds=60)
+    yield rollups
+    content_changes.unsubscribe("analytics_rollups")
+
+
+def user(created_at: datetime) -> User:
+    return User(email=f"{uuid.uuid4()}@example.com", name="User", password_hash="x", created_at=created_at)
+
+
+def payment(amount: str, payment_type: PaymentType, created_at: datetime, status=PaymentStatus.COMPLETED) -> Payment:
+    return Payment(amount=Decimal(amount), payment_type=payment_type, status=status, created_at=created_at)
+
+
+@pytest.fixture
+def history(db):
+    db.add_all([
+        user(at(DAY)),
+        user(at(DAY)),
+        user(at(DAY - timedelta(days=1))),
+        payment("100.00", PaymentType.RETREAT, at(DAY)),
+        payment("25.50", PaymentType.DONATION, at(DAY)),
+        payment("40.00", PaymentType.COURSE, at(DAY - timedelta(days=1))),
+        payment("999.00", PaymentType.COURSE, at(DAY), status=PaymentStatus.FAILED),
+        CourseEnrollment(user_id=uuid.uuid4(), course_id=uuid.uuid4(), enrolled_at=at(DAY)),
+        Order(user_id=uuid.uuid4(), order_number="A-1", total_amount=Decimal("10"), status=OrderStatus.COMPLETED, created_at=at(DAY)),
+        Order(user_id=uuid.uuid4(), order_number="A-2", total_amount=Decimal("10"), status=OrderStatus.PENDING, created_at=at(DAY)),
+        RetreatRegistration(user_id=uuid.uuid4(), retreat_id=uuid.uuid4(), registered_at=at(DAY, 23)),
+        UserAnalytics(user_id=uuid.uuid4(), last_active_at=at(DAY)),
+    ])
+    db.commit()
+
+
+class TestAnalyticsRollups:
+    """Test recomputing days, period totals and write hooks."""
+
+    def test_runs(self):
+        days = [DAY, DAY + timedelta(days=1), DAY + timedelta(days=5)]
+        assert _runs(days) == [(DAY, DAY + timedelta(days=1)), (DAY + timedelta(days=5), DAY + timedelta(days=5))]
+
+    def test_refresh_computes_daily_facts(self, db, rollups, history):
+        rollups.refresh(db, DAY - timedelta(days=1), DAY)
+
+        row = db.get(AnalyticsDailyRollup, DAY)
+        loaded = db.query(AnalyticsDailyRollup).all()
+        assert len(loaded) == 2
+        assert (row.signups, row.active_users, row.enrollments, row.orders, row.registrations) == (2, 1, 1, 1, 1)
+        assert row.revenue == Decimal("125.50")
+        assert rollups.revenue_by_type(db, DAY, DAY) == {"retreat": Decimal("100.00"), "donation": Decimal("25.50")}
+
+        # Refreshing again replaces rather than adds, even with the old rows loaded
+        rollups.refresh(db, DAY - timedelta(days=1), DAY)
+        assert db.query(AnalyticsDailyRollup).count() == 2
+        assert db.get(AnalyticsDailyRollup, DAY).signups == 2
+
+    def test_totals_in_one_query(self, db, rollups, history):
+        rollups.rebuild(db)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        totals = rollups.totals(db, {
+            "current": (DAY, DAY),
+            "previous": (DAY - timedelta(days=1), DAY - timedelta(days=1)),
+            "all": None,
+        })
+        assert len(statements) == 1
+        assert totals["current"]["signups"] == 2
+        assert totals["previous"]["signups"] == 1
+        assert totals["all"]["signups"] == 3
+        assert totals["previous"]["revenue"] == Decimal("40.00")
+
+    def test_write_hooks_mark_days_dirty(self, db, rollups):
+        rollups.register_listeners()
+        pending = payment("10.00", PaymentType.PRODUCT, at(DAY), status=PaymentStatus.PENDING)
+        db.add(pending)
+        db.commit()
+        assert rollups.refresh_dirty(db) == 1
+        assert db.get(AnalyticsDailyRollup, DAY) is None
+
+        # Completing the payment dirties its day again
+        pending.status = PaymentStatus.COMPLETED
+        db.commit()
+        rollups.refresh_dirty(db)
+        assert db.get(AnalyticsDailyRollup, DAY).revenue == Decimal("10.00")
+
+        # Moving last activity dirties both the old and the new day
+        analytics = UserAnalytics(user_id=uuid.uuid4(), last_active_at=at(DAY))
+        db.add(analytics)
+        db.commit()
+        rollups.refresh_dirty(db)
+        analytics.last_active_at = at(DAY + timedelta(days=2))
+        db.commit()
+        assert rollups.dirty_days == 2
+        rollups.refresh_dirty(db)
+        assert db.get(AnalyticsDailyRollup, DAY).active_users == 0
+        assert db.get(AnalyticsDailyRollup, DAY + timedelta(days=2)).active_users == 1
+
+    def test_deleting_an_old_user_updates_its_days(self, db, rollups):
+        # Every table User cascades to, so the delete can load and remove them
+        cascaded = {rel.mapper.local_table.name for rel in inspect(User).relationships}
+        Base.metadata.create_all(db.get_bind(), tables=[Base.metadata.tables[name] for name in cascaded])
+        old_day = date.today() - timedelta(days=700)
+        member = user(at(old_day))
+        member.payments.append(payment("80.00", PaymentType.COURSE, at(old_day)))
+        db.add(member)
+        db.commit()
+        rollups.rebuild(db)
+        assert rollups.totals(db, {"all": None})["all"]["signups"] == 1
+
+        # Far outside the scheduled refresh window: the delete itself dirties the day
+        rollups.register_listeners()
+        db.delete(member)
+        db.commit()
+        assert rollups.dirty_days == 1
+        rollups.refresh_dirty(db)
+        totals = rollups.totals(db, {"all": None})["all"]
+        assert (totals["signups"], totals["revenue"]) == (0, Decimal(0))
+
+    def test_full_rebuilds_get_a_longer_statement_timeout(self, db, rollups, monkeypatch):
+        timeouts = []
+        record = lambda *args: timeouts.append(db_runtime._route_timeout_ms.get()) or 0
+        monkeypatch.setattr(cron.analytics_rollups, "rebuild", record)
+        monkeypatch.setattr(cron.analytics_rollups, "refresh_recent", record)
+        cron.refresh_analytics_rollups(days=2, full=True, db=db, authenticated=True)
+        cron.refresh_analytics_rollups(days=2, full=False, db=db, authenticated=True)
+        assert timeouts == [settings.ANALYTICS_ROLLUP_REBUILD_TIMEOUT_MS, None]
+
+        # The startup backfill; stops at the first periodic refresh
+        def stop():
+            raise asyncio.CancelledError
+
+        monkeypatch.setattr(rollups, "ensure_built", record)
+        monkeypatch.setattr("app.services.analytics_rollups.SessionLocal", lambda: db)
+        monkeypatch.setattr(rollups, "flush_seconds", 0)
+        monkeypatch.setattr(rollups, "refresh_dirty", stop)
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(rollups.run())
+        assert timeouts[-1] == settings.ANALYTICS_ROLLUP_REBUILD_TIMEOUT_MS
+
+    def test_day_periods(self):
+        current, previous = AnalyticsService.day_periods(at(DAY), at(DAY + timedelta(days=6)))
+        assert current == (DAY, DAY + timedelta(days=6))
+        assert previous == (DAY - timedelta(days=7), DAY - timedelta(days=1))
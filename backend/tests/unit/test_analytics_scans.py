@@ -0,0 +1,104 @@
+"""Unit tests for the live dashboard scans."""
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.core import db_runtime
+from app.core.config import settings
+from app.models.analytics import UserAnalytics
+from app.models.course import Course, CourseEnrollment
+from app.models.payment import Payment, PaymentStatus, PaymentType
+from app.models.product import Order, OrderStatus
+from app.models.retreat import RetreatRegistration
+from app.models.user import User
+from app.services.analytics_rollups import analytics_rollups
+from app.services.analytics_scans import run_scans
+from app.services.analytics_service import AnalyticsService
+
+TABLES = [
+    "users",
+    "user_analytics",
+    "payments",
+    "instructors",
+    "courses",
+    "course_enrollments",
+    "orders",
+    "retreat_registrations",
+    "analytics_daily_rollups",
+    "analytics_daily_revenue",
+]
+
+DAY = date(2025, 3, 10)
+
+
+def at(day: date, hour: int = 12) -> datetime:
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+@pytest.fixture
+def db(make_db):
+    # A file database, so concurrent scans on other connections see the same data
+    session = make_db(TABLES, file=True)
+    previous_day = DAY - timedelta(days=1)
+    session.add_all([
+        User(email="a@example.com", name="A", password_hash="x", created_at=at(DAY)),
+        User(email="b@example.com", name="B", password_hash="x", created_at=at(previous_day)),
+        UserAnalytics(user_id=uuid.uuid4(), last_active_at=at(DAY)),
+        Payment(amount=Decimal("80.00"), payment_type=PaymentType.COURSE, status=PaymentStatus.COMPLETED, created_at=at(DAY)),
+        Payment(amount=Decimal("40.00"), payment_type=PaymentType.COURSE, status=PaymentStatus.COMPLETED, created_at=at(previous_day)),
+        Course(slug="published", title="Published", is_published=True),
+        CourseEnrollment(user_id=uuid.uuid4(), course_id=uuid.uuid4(), enrolled_at=at(DAY)),
+        Order(user_id=uuid.uuid4(), order_number="A-1", total_amount=Decimal("10"), status=OrderStatus.COMPLETED, created_at=at(previous_day)),
+        RetreatRegistration(user_id=uuid.uuid4(), retreat_id=uuid.uuid4(), registered_at=at(DAY)),
+    ])
+    session.commit()
+    return session
+
+
+def summary(db, **kwargs):
+    return AnalyticsService.get_dashboard_summary(
+        db, "custom", at(DAY, 0), at(DAY, 0) + timedelta(days=1, microseconds=-1), **kwargs
+    )
+
+
+class TestLiveDashboardScans:
+    """Test single-pass conditional aggregation and concurrent scans."""
+
+    def test_one_statement_per_table(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "ANALYTICS_SCAN_WORKERS", 1)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        result = summary(db, source="live", debug=True)
+        assert len(statements) == 7
+        assert result["debug"]["source"] == "live"
+        assert set(result["debug"]["timings_ms"]) == {
+            "users", "user_analytics", "payments", "courses", "course_enrollments", "orders", "retreat_registrations",
+        }
+        assert result["users"] == {"total": 2, "new": 1, "active": 1, "growth_percentage": 0.0}
+        assert result["revenue"] == {"total": 80.0, "previous_period": 40.0, "growth_percentage": 100.0}
+        assert result["products"] == {"sold": 0, "growth_percentage": -100.0}
+
+    def test_concurrent_scans_match_rollups(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "ANALYTICS_SCAN_WORKERS", 4)
+        monkeypatch.setattr(analytics_rollups, "built", False)
+        live = summary(db, source="live")
+        analytics_rollups.rebuild(db)
+        rollups = summary(db, source="rollups", debug=True)
+
+        assert rollups.pop("debug")["source"] == "rollups"
+        assert live == rollups
+
+    def test_concurrent_scans_keep_the_statement_timeout(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "ANALYTICS_SCAN_WORKERS", 4)
+        scan = lambda session: {"timeout_ms": db_runtime._route_timeout_ms.get()}
+        with db_runtime.statement_timeout_override(120_000):
+            results, _ = run_scans(db, {"users": scan, "payments": scan})
+        assert results == {"users": {"timeout_ms": 120_000}, "payments": {"timeout_ms": 120_000}}
+
+    def test_invalid_source(self, db):
+        with pytest.raises(ValueError):
+            summary(db, source="cache")
@@ -0,0 +1,122 @@
+"""Unit tests for the async database layer and the endpoints moved onto it."""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import AsyncSessionLocal, async_database_url
+from app.models.course import Course, CourseClass, CourseComponent, CourseEnrollment, CourseProgress, Instructor
+from app.models.retreat import RegistrationStatus, Retreat, RetreatRegistration, RetreatType
+from app.models.user import User
+from app.routers.courses import get_courses
+from app.routers.retreats import get_retreats
+from app.services.course_tree import course_index
+from app.services.media_service import media_index
+
+TABLES = [
+    "instructors", "courses", "course_classes", "course_components", "course_enrollments", "course_progress",
+    "retreats", "retreat_registrations",
+]
+
+
+@pytest.fixture
+def database(make_db, monkeypatch):
+    """A SQLite file seen through a sync session (setup) and the aiosqlite engine (endpoints)"""
+    db = make_db(TABLES, file=True)
+    monkeypatch.setattr(media_index, "load", lambda db: {"retreats/hero.jpg": "https://cdn.example.com/hero"})
+    course_index.invalidate()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db.get_bind().url.database}")
+    yield db, async_engine
+    course_index.invalidate()
+    asyncio.run(async_engine.dispose())
+
+
+def call(async_engine, endpoint, **params):
+    """Run an endpoint on a fresh AsyncSession; returns (response, statements executed)"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    async def main():
+        async with AsyncSessionLocal(bind=async_engine) as db:
+            return await endpoint(db=db, **params)
+
+    try:
+        return asyncio.run(main()), statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+
+
+def test_async_database_url():
+    assert async_database_url("postgresql://u:p@db/satyoga") == "postgresql+asyncpg://u:p@db/satyoga"
+    assert async_database_url("postgresql+psycopg2://u:p@db/satyoga") == "postgresql+asyncpg://u:p@db/satyoga"
+    assert async_database_url("sqlite:///./satyoga.db") == "sqlite+aiosqlite:///./satyoga.db"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/satyoga")
+
+
+class TestAsyncEndpoints:
+    """Course and retreat listings on an AsyncSession run a fixed number of queries."""
+
+    def test_course_list(self, database):
+        db, async_engine = database
+        user = User(id=uuid.uuid4())
+        instructor = Instructor(name="Shunyamurti")
+        courses = [
+            Course(slug=f"course-{i}", title=f"Course {i}", is_published=True, instructor=instructor if i else None)
+            for i in range(3)
+        ]
+        courses.append(Course(slug="draft", title="Draft", is_published=False))
+        db.add_all(courses)
+        db.flush()
+        course_class = CourseClass(course_id=courses[1].id, title="Class", order_index=0)
+        db.add(course_class)
+        db.flush()
+        components = [CourseComponent(class_id=course_class.id, title=f"Part {i}", order_index=i) for i in range(4)]
+        enrollment = CourseEnrollment(user_id=user.id, course_id=courses[1].id)
+        db.add_all(components + [enrollment])
+        db.flush()
+        db.add(CourseProgress(enrollment_id=enrollment.id, class_id=course_class.id, component_id=components[0].id, completed=True))
+        db.commit()
+
+        response, statements = call(async_engine, get_courses, skip=0, limit=50, user=user)
+        # courses, instructors, count, enrollments, completed counts, the enrolled course's index
+        assert len(statements) == 6
+        assert response["total"] == 3
+        by_slug = {course["slug"]: course for course in response["courses"]}
+        assert set(by_slug) == {"course-0", "course-1", "course-2"}
+        assert by_slug["course-1"]["instructor_name"] == "Shunyamurti"
+        assert (by_slug["course-1"]["is_enrolled"], by_slug["course-1"]["progress_percentage"]) == (True, 25.0)
+        assert (by_slug["course-0"]["is_enrolled"], by_slug["course-0"]["instructor_name"]) == (False, None)
+
+        # Anonymous: no enrollment queries
+        _, statements = call(async_engine, get_courses, skip=0, limit=50, user=None)
+        assert len(statements) == 3
+
+    def test_retreat_list(self, database):
+        db, async_engine = database
+        user = User(id=uuid.uuid4())
+        retreats = [
+            Retreat(
+                slug=f"retreat-{i}", title=f"Retreat {i}", type=RetreatType.ONLINE, is_published=True,
+                start_date=datetime(2025, 3, i + 1), end_date=datetime(2025, 3, i + 5),
+                hero_background="/retreats/hero.jpg",
+            )
+            for i in range(3)
+        ]
+        db.add_all(retreats)
+        db.flush()
+        db.add(RetreatRegistration(user_id=user.id, retreat_id=retreats[2].id, status=RegistrationStatus.CONFIRMED))
+        db.commit()
+
+        response, statements = call(async_engine, get_retreats, skip=0, limit=50, retreat_type=None, user=user)
+        # retreats, count, the user's registrations; images resolve against the media index
+        assert len(statements) == 3
+        assert [retreat["slug"] for retreat in response["retreats"]] == ["retreat-0", "retreat-1", "retreat-2"]
+        assert response["retreats"][0]["fixed_date"] == "March 1-5, 2025"
+        assert response["retreats"][0]["hero_background"] == "https://cdn.example.com/hero"
+        assert [retreat["is_registered"] for retreat in response["retreats"]] == [False, False, True]
+        assert response["retreats"][2]["registration_status"] == "confirmed"
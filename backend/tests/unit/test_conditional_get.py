@@ -0,0 +1,213 @@
+"""Unit tests for ETag / conditional GET support."""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import AsyncSessionLocal, Base
+from app.models.teaching import Teaching, ContentType
+from app.routers.teachings import get_teachings
+from app.services import content_changes
+from app.services import conditional_get as conditional_get_module
+from app.services import response_cache as response_cache_module
+from app.services.conditional_get import (
+    ConditionalGetMiddleware,
+    conditional_get,
+    content_version,
+    etag_matches,
+    query_version,
+    track_content_version,
+)
+from app.services.media_service import media_index
+from app.services.response_cache import MemoryCacheBackend, ResponseCache, ResponseCacheMiddleware
+
+
+def request_with(if_none_match):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+
+class TestETagMatching:
+    """Test If-None-Match parsing."""
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc"', True),
+        ('"xyz"', False),
+        ("*", True),
+    ])
+    def test_etag_matches(self, header, expected):
+        assert etag_matches(request_with(header), '"abc"') is expected
+
+
+class TestConditionalGet:
+    """Test 304 responses from the middleware and the per-endpoint helper."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        cache = ResponseCache(MemoryCacheBackend(10), ttl_seconds=60)
+        monkeypatch.setattr(response_cache_module, "response_cache", cache)
+        monkeypatch.setattr(conditional_get_module, "response_cache", cache)
+        calls = {"plain": 0, "versioned": 0}
+
+        app = FastAPI()
+        app.add_middleware(ResponseCacheMiddleware)
+        app.add_middleware(ConditionalGetMiddleware)
+
+        @app.get("/plain")
+        def plain():
+            calls["plain"] += 1
+            return {"value": 1}
+
+        @app.get("/login")
+        def login(response: Response):
+            response.set_cookie("session", "a")
+            response.set_cookie("csrf", "b")
+            return {"value": 3}
+
+        @app.get("/api/events/")
+        def versioned(request: Request, response: Response):
+            not_modified = conditional_get(request, response, content_version("events"))
+            if not_modified:
+                return not_modified
+            calls["versioned"] += 1
+            return {"value": 2}
+
+        return TestClient(app), cache, calls
+
+    def test_body_hash_etag(self, client):
+        client, _, calls = client
+        first = client.get("/plain")
+        etag = first.headers["ETag"]
+        second = client.get("/plain", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert client.get("/plain", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_body_hash_etag_keeps_repeated_headers(self, client):
+        client, _, _ = client
+        response = client.get("/login")
+        assert "ETag" in response.headers
+        assert len(response.headers.get_list("set-cookie")) == 2
+        assert response.headers["content-length"] == str(len(response.content))
+
+    def test_version_etag_skips_the_endpoint(self, client):
+        client, cache, calls = client
+        etag = client.get("/api/events/").headers["ETag"]
+        assert calls["versioned"] == 1
+
+        # Served from the response cache, answered with 304 by the middleware
+        assert client.get("/api/events/", headers={"If-None-Match": etag}).status_code == 304
+        cache.clear()
+        # Answered with 304 by the endpoint helper before any work
+        assert client.get("/api/events/", headers={"If-None-Match": etag}).status_code == 304
+        assert calls["versioned"] == 1
+
+        cache.purge("events")
+        response = client.get("/api/events/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+class TestQueryVersion:
+    """Test the max(updated_at)/count version token."""
+
+    def test_query_version_changes_on_update_and_delete(self, make_db):
+        db = make_db([name for name in Base.metadata.tables if name.startswith("teaching")])
+        for slug in ("a", "b"):
+            db.add(Teaching(slug=slug, title=slug, content_type=ContentType.VIDEO, access_level="free"))
+        db.commit()
+
+        first = query_version(db.query(Teaching).order_by(Teaching.title), Teaching.updated_at)
+        assert first[1] == 2
+
+        teaching = db.query(Teaching).filter(Teaching.slug == "a").one()
+        teaching.title = "A"
+        db.commit()
+        second = query_version(db.query(Teaching), Teaching.updated_at)
+        assert second != first
+
+        db.delete(db.query(Teaching).filter(Teaching.slug == "b").one())
+        db.commit()
+        assert query_version(db.query(Teaching), Teaching.updated_at)[1] == 1
+
+
+class TestTeachingsListing:
+    """Test that /api/teachings/ answers If-None-Match without counting."""
+
+    @pytest.fixture
+    def database(self, make_db, monkeypatch):
+        cache = ResponseCache(MemoryCacheBackend(10), ttl_seconds=60)
+        monkeypatch.setattr(conditional_get_module, "response_cache", cache)
+        monkeypatch.setattr(media_index, "load", lambda db: {})
+        track_content_version("teachings", [Teaching], ignored=("view_count", "updated_at"))
+        db = make_db([name for name in Base.metadata.tables if name.startswith("teaching")], file=True)
+        db.add_all([
+            Teaching(slug=slug, title=slug, content_type=ContentType.VIDEO, access_level="free", published_date=datetime(2025, 3, day))
+            for day, slug in ((2, "new"), (1, "old"))
+        ])
+        db.commit()
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{db.get_bind().url.database}")
+        yield db, async_engine
+        content_changes.unsubscribe("content_version:teachings")
+        asyncio.run(async_engine.dispose())
+
+    def call(self, async_engine, if_none_match=None, count="exact"):
+        """(status, etag, statements) of one listing of the first teaching"""
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+        query_string = f"limit=1&count={count}".encode()
+        request = Request({
+            "type": "http", "method": "GET", "path": "/api/teachings/", "query_string": query_string,
+            "headers": request_with(if_none_match).scope["headers"],
+        })
+        response = Response()
+
+        async def main():
+            async with AsyncSessionLocal(bind=async_engine) as db:
+                return await get_teachings(
+                    request, response, category=None, content_type=None, access_level=None, search=None,
+                    featured=None, of_the_month=None, pinned=None, accessible_only=False, skip=0, limit=1,
+                    cursor=None, count=count, user=None, db=db,
+                )
+
+        try:
+            result = asyncio.run(main())
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+        if isinstance(result, Response):
+            return result.status_code, result.headers["ETag"], statements
+        return 200, response.headers["ETag"], statements
+
+    def test_not_modified_skips_the_count(self, database):
+        db, async_engine = database
+        status, etag, statements = self.call(async_engine)
+        assert status == 200
+        assert any("count(" in statement.lower() for statement in statements)
+
+        status, _, statements = self.call(async_engine, if_none_match=etag)
+        assert status == 304
+        assert len(statements) == 1  # the page itself
+
+        # A view count bump on another page keeps the ETag
+        db.query(Teaching).filter(Teaching.slug == "old").one().view_count += 1
+        db.commit()
+        assert self.call(async_engine, if_none_match=etag)[0] == 304
+
+        # A row added on another page changes the total
+        db.add(Teaching(slug="older", title="older", content_type=ContentType.VIDEO, access_level="free"))
+        db.commit()
+        assert self.call(async_engine, if_none_match=etag)[0] == 200
+
+    def test_count_none_runs_only_the_page(self, database):
+        _, async_engine = database
+        status, _, statements = self.call(async_engine, count="none")
+        assert status == 200
+        assert not any("count(" in statement.lower() for statement in statements)
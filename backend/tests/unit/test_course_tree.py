@@ -0,0 +1,118 @@
+"""Unit tests for the eager course tree loader."""
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.models.course import Course, CourseClass, CourseComponent, CourseEnrollment, CourseProgress
+from app.services.course_tree import CourseIndex, CourseIndexCache, CourseTree
+
+TABLES = ["instructors", "courses", "course_classes", "course_components", "course_enrollments", "course_progress"]
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def course(db):
+    course = Course(slug="course", title="Course")
+    db.add(course)
+    db.flush()
+    for class_index in (1, 0):
+        cls = CourseClass(course_id=course.id, title=f"Class {class_index}", order_index=class_index)
+        db.add(cls)
+        db.flush()
+        for comp_index in (1, 0):
+            parent = CourseComponent(
+                class_id=cls.id, title=f"C{class_index}.{comp_index}", order_index=comp_index, duration=60, has_tabs=True,
+            )
+            db.add(parent)
+            db.flush()
+            db.add(CourseComponent(
+                class_id=cls.id, parent_component_id=parent.id, title=f"C{class_index}.{comp_index}.tab",
+                order_index=0, duration=30,
+            ))
+    db.commit()
+    return course
+
+
+def count_queries(db):
+    counter = {"queries": 0}
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def before_cursor_execute(*args):
+        counter["queries"] += 1
+
+    return counter
+
+
+class TestCourseTree:
+    """Test building the class/component hierarchy in a fixed number of queries."""
+
+    def test_hierarchy(self, db, course):
+        course_id = course.id
+        counter = count_queries(db)
+        tree = CourseTree.load(db, course_id)
+
+        titles = [component.title for component in tree.ordered_components()]
+        assert titles == ["C0.0", "C0.1", "C1.0", "C1.1"]
+        first = tree.ordered_components()[0]
+        assert [sub.title for sub in tree.sub_components_of(first.id)] == ["C0.0.tab"]
+        assert tree.total_components == 8
+        assert tree.total_duration == 360
+        assert set(tree.class_durations.values()) == {180}
+        assert counter["queries"] == 2
+
+    def test_progress(self, db, course):
+        enrollment = CourseEnrollment(user_id=uuid.uuid4(), course_id=course.id)
+        db.add(enrollment)
+        db.flush()
+        components = CourseTree.load(db, course.id).ordered_components()
+        for component in components[:2]:
+            db.add(CourseProgress(
+                enrollment_id=enrollment.id, class_id=component.class_id, component_id=component.id, completed=True,
+            ))
+        db.commit()
+        course_id = course.id
+        db.refresh(enrollment)
+
+        counter = count_queries(db)
+        tree = CourseTree.load(db, course_id, enrollment)
+        assert tree.progress_percentage() == 25.0
+        assert tree.progress_for(components[0].id).completed
+        assert tree.progress_for(components[2].id) is None
+        assert counter["queries"] == 3
+
+
+class TestCourseIndex:
+    """Test the precomputed component ordering and its cache."""
+
+    def test_build_matches_tree(self, db, course):
+        index = CourseIndex.build(db, course.id)
+        from_tree = CourseIndex.from_tree(CourseTree.load(db, course.id))
+        assert index.ordered == from_tree.ordered
+        assert [component.title for component in index.ordered] == ["C0.0", "C0.1", "C1.0", "C1.1"]
+        assert (index.total_components, index.total_duration) == (8, 360)
+        assert index.progress_percentage(2) == 25.0
+
+    def test_neighbours(self, db, course):
+        index = CourseIndex.build(db, course.id)
+        first, second, third, last = index.ordered
+        assert index.neighbours(first.id) == (0, None, second)
+        assert index.neighbours(third.id) == (2, second, last)
+        assert index.neighbours(last.id) == (3, third, None)
+        assert index.neighbours(uuid.uuid4()) is None
+
+    def test_cache_invalidation(self, db, course):
+        course_id = course.id
+        cache = CourseIndexCache(ttl_seconds=0)
+        counter = count_queries(db)
+        first = cache.get(db, course_id)
+        assert cache.get(db, course_id) is first
+        assert counter["queries"] == 1
+
+        cache.invalidate(course_id)
+        assert cache.get(db, course_id) is not first
+        assert counter["queries"] == 2
@@ -0,0 +1,98 @@
+"""Unit tests for pool settings, statement timeouts and pool metrics."""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from app.core import db_runtime
+from app.core.config import settings
+from app.core.database import database_pool_stats
+from app.core.db_runtime import (
+    MeteredAsyncQueuePool,
+    MeteredQueuePool,
+    engine_options,
+    pool_stats,
+    statement_timeout,
+)
+
+
+class RecordingConnection:
+    """Stands in for a Connection in the begin event, recording raw cursor SQL"""
+
+    def __init__(self):
+        self.statements = []
+        self.connection = self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def close(self):
+        pass
+
+
+def test_engine_options(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_STATEMENT_TIMEOUT_MS", 15000)
+    options = engine_options("postgresql://u:p@db/satyoga")
+    assert options["poolclass"] is MeteredQueuePool
+    assert (options["pool_size"], options["pool_pre_ping"]) == (settings.DATABASE_POOL_SIZE, True)
+    assert options["connect_args"] == {"options": "-c statement_timeout=15000"}
+
+    options = engine_options("postgresql+asyncpg://u:p@db/satyoga", is_async=True)
+    assert options["poolclass"] is MeteredAsyncQueuePool
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "15000"}}
+
+    monkeypatch.setattr(settings, "DATABASE_STATEMENT_TIMEOUT_MS", 0)
+    assert "connect_args" not in engine_options("postgresql://u:p@db/satyoga")
+    assert engine_options("sqlite:///./satyoga.db") == {"connect_args": {"check_same_thread": False}}
+    assert engine_options("sqlite+aiosqlite:///./satyoga.db", is_async=True) == {}
+
+
+def test_route_statement_timeout():
+    connection = RecordingConnection()
+    app = FastAPI()
+
+    @app.get("/report", dependencies=[Depends(statement_timeout(120_000))])
+    async def report():
+        db_runtime._apply_route_timeout(connection)
+
+    @app.get("/sync-report", dependencies=[Depends(statement_timeout(60_000))])
+    def sync_report():
+        db_runtime._apply_route_timeout(connection)
+
+    @app.get("/plain")
+    async def plain():
+        db_runtime._apply_route_timeout(connection)
+
+    with TestClient(app) as client:
+        for path in ("/report", "/sync-report", "/plain"):
+            assert client.get(path).status_code == 200
+    assert connection.statements == ["SET LOCAL statement_timeout = 120000", "SET LOCAL statement_timeout = 60000"]
+
+
+def test_pool_metrics(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    held = engine.connect()
+    held.execute(text("SELECT 1"))
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = pool_stats(engine)
+    assert (stats["pool"], stats["size"], stats["checked_out"], stats["overflow"]) == ("MeteredQueuePool", 1, 1, 0)
+    assert (stats["checkouts"], stats["timeouts"], stats["peak_checked_out"]) == (1, 1, 1)
+    assert stats["wait_ms"]["max"] >= 50
+
+    held.close()
+    assert pool_stats(engine)["checked_in"] == 1
+    engine.dispose()
+
+
+def test_admin_stats_cover_both_engines():
+    stats = database_pool_stats()
+    assert "pool" in stats["sync"]
+    assert stats["statement_timeout_ms"] == settings.DATABASE_STATEMENT_TIMEOUT_MS
@@ -0,0 +1,66 @@
+"""Unit tests for the Mixpanel/GA4 batch exporter."""
+import asyncio
+
+from app.services.event_exporter import EventExporter
+
+
+def make_exporter(results=None, batch_size=3):
+    """Exporter with one destination that records batches and answers from `results`"""
+    sent = []
+    results = list(results or [])
+
+    async def sender(group, items):
+        sent.append((group, list(items)))
+        return results.pop(0) if results else True
+
+    exporter = EventExporter(flush_seconds=60, max_attempts=3, backoff_seconds=0, max_buffered=10)
+    exporter.register("vendor", sender, batch_size)
+    return exporter, sent
+
+
+class TestEventExporter:
+    """Test size/time triggers, grouping and retries."""
+
+    def test_full_batches_go_first(self):
+        exporter, sent = make_exporter()
+        for i in range(7):
+            exporter.add("vendor", i)
+
+        assert asyncio.run(exporter.flush(flush_all=False)) == 2
+        assert [items for _, items in sent] == [[0, 1, 2], [3, 4, 5]]
+        assert exporter.metrics()["buffered"] == 1
+
+        asyncio.run(exporter.flush())
+        assert sent[-1] == (None, [6])
+        assert exporter.stats["events_sent"] == 7
+
+    def test_groups_are_batched_separately(self):
+        exporter, sent = make_exporter()
+        exporter.add("vendor", "a1", group="a")
+        exporter.add("vendor", "b1", group="b")
+        exporter.add("vendor", "a2", group="a")
+        asyncio.run(exporter.flush())
+        assert sorted(sent) == [("a", ["a1", "a2"]), ("b", ["b1"])]
+
+    def test_failed_batches_retry_then_drop(self):
+        exporter, sent = make_exporter(results=[False, True])
+        exporter.add("vendor", 1)
+        asyncio.run(exporter.flush())
+        assert exporter.metrics()["pending_retries"] == 1
+
+        asyncio.run(exporter.flush())
+        assert len(sent) == 2
+        assert exporter.stats["events_sent"] == 1
+
+        exporter, sent = make_exporter(results=[False] * 5)
+        exporter.add("vendor", 1)
+        for _ in range(4):
+            asyncio.run(exporter.flush())
+        assert len(sent) == 3
+        assert exporter.stats["events_dropped"] == 1
+
+    def test_buffer_is_bounded(self):
+        exporter, _ = make_exporter(batch_size=100)
+        assert all(exporter.add("vendor", i) for i in range(10))
+        assert not exporter.add("vendor", 10)
+        assert exporter.stats["events_dropped"] == 1
@@ -0,0 +1,106 @@
+"""Unit tests for the denormalized forum category stats."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.forum import ForumCategory, ForumPost, ForumThread
+from app.models.user import User
+from app.routers.forum import get_categories
+from app.services import forum_stats
+
+TABLES = ["users", "forum_categories", "forum_threads", "forum_posts"]
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def forum(db):
+    author = User(email="author@example.com", name="Author", password_hash="x")
+    general = ForumCategory(name="General", slug="general", order=0)
+    practice = ForumCategory(name="Practice", slug="practice", order=1)
+    db.add_all([author, general, practice])
+    db.commit()
+    return author, general, practice
+
+
+def create_thread(db, author, category, title, last_post_at):
+    thread = ForumThread(
+        category_id=category.id, user_id=author.id, title=title, slug=title, post_count=1, last_post_at=last_post_at
+    )
+    db.add(thread)
+    db.flush()
+    db.add(ForumPost(thread_id=thread.id, user_id=author.id, content="first"))
+    forum_stats.thread_created(db, thread)
+    db.commit()
+    return thread
+
+
+class TestForumStats:
+    """Test counter maintenance, the single-query listing and reconciliation."""
+
+    def test_counters_follow_writes(self, db, forum):
+        author, general, practice = forum
+        now = datetime.utcnow()
+        older = create_thread(db, author, general, "older", now - timedelta(hours=1))
+        newer = create_thread(db, author, general, "newer", now)
+
+        db.add(ForumPost(thread_id=older.id, user_id=author.id, content="reply"))
+        older.last_post_at = now + timedelta(minutes=1)
+        forum_stats.post_created(db, older)
+        db.commit()
+        db.refresh(general)
+        assert (general.thread_count, general.post_count) == (2, 3)
+        assert general.latest_thread_id == older.id
+
+        # Deleting the latest thread points the category at the next one
+        forum_stats.thread_deleted(db, older)
+        db.query(ForumPost).filter(ForumPost.thread_id == older.id).delete()
+        db.delete(older)
+        db.commit()
+        db.refresh(general)
+        assert (general.thread_count, general.post_count) == (1, 1)
+        assert general.latest_thread_id == newer.id
+
+        # Moving a thread moves its counts
+        newer.category_id = practice.id
+        db.flush()
+        forum_stats.thread_moved(db, newer, general.id)
+        db.commit()
+        db.refresh(general)
+        db.refresh(practice)
+        assert (general.thread_count, general.post_count, general.latest_thread_id) == (0, 0, None)
+        assert (practice.thread_count, practice.post_count, practice.latest_thread_id) == (1, 1, newer.id)
+
+    def test_category_list_is_one_query(self, db, forum):
+        author, general, practice = forum
+        create_thread(db, author, general, "hello", datetime.utcnow())
+        db.expire_all()
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        result = get_categories(db=db, current_user=None)
+        assert len(statements) == 1
+        listed = {category["slug"]: category for category in result["categories"]}
+        assert listed["general"]["thread_count"] == 1
+        assert listed["general"]["latest_thread"]["user"]["name"] == "Author"
+        assert listed["practice"]["latest_thread"] is None
+
+    def test_reconcile_repairs_drift(self, db, forum):
+        author, general, practice = forum
+        thread = create_thread(db, author, general, "hello", datetime.utcnow())
+        general.thread_count = 7
+        general.post_count = 0
+        practice.latest_thread_id = thread.id
+        db.commit()
+
+        repaired = forum_stats.reconcile(db)
+        assert {entry["slug"] for entry in repaired} == {"general", "practice"}
+        db.refresh(general)
+        db.refresh(practice)
+        assert (general.thread_count, general.post_count, general.latest_thread_id) == (1, 1, thread.id)
+        assert practice.latest_thread_id is None
+        assert forum_stats.reconcile(db) == []
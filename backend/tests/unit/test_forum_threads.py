@@ -0,0 +1,115 @@
+"""Unit tests for the forum thread renderer."""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from app.models.forum import ForumCategory, ForumPost, ForumPostAttachment, ForumPostReaction, ForumThread, ReactionType
+from app.models.user import User
+from app.services.forum_threads import build_nested_posts, load_thread_posts
+
+TABLES = [
+    "users",
+    "forum_categories",
+    "forum_threads",
+    "forum_posts",
+    "forum_post_reactions",
+    "forum_post_attachments",
+]
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def thread(db):
+    """Two top-level posts; the first has a reply chain three levels deep"""
+    author = User(email="author@example.com", name="Author", password_hash="x")
+    viewer = User(email="viewer@example.com", name="Viewer", password_hash="x")
+    category = ForumCategory(name="General", slug="general")
+    db.add_all([author, viewer, category])
+    db.flush()
+    thread = ForumThread(category_id=category.id, user_id=author.id, title="Thread", slug="thread")
+    db.add(thread)
+    db.flush()
+
+    start = datetime(2025, 1, 1)
+    posts = {}
+
+    def post(name, minutes, parent=None, user=author):
+        posts[name] = ForumPost(
+            thread_id=thread.id,
+            user_id=user.id,
+            parent_post_id=posts[parent].id if parent else None,
+            content=name,
+            created_at=start + timedelta(minutes=minutes),
+        )
+        db.add(posts[name])
+        db.flush()
+
+    post("first", 0)
+    post("reply", 1, parent="first", user=viewer)
+    post("nested", 2, parent="reply")
+    post("deepest", 3, parent="nested")
+    post("second", 4)
+    db.add_all([
+        ForumPostReaction(post_id=posts["first"].id, user_id=viewer.id, reaction_type=ReactionType.LIKE),
+        ForumPostReaction(post_id=posts["first"].id, user_id=author.id, reaction_type=ReactionType.LIKE),
+        ForumPostReaction(post_id=posts["first"].id, user_id=author.id, reaction_type=ReactionType.LOVE),
+        ForumPostAttachment(post_id=posts["second"].id, file_url="/a.png", file_name="a.png", file_type="image/png", file_size=1),
+    ])
+    db.commit()
+    return thread, viewer
+
+
+class TestForumThreadRenderer:
+    """Test tree building, batched loading and paging."""
+
+    def test_nested_at_any_depth(self, db, thread):
+        thread, viewer = thread
+        posts, next_cursor = load_thread_posts(db, thread.id)
+        tree = build_nested_posts(db, posts, viewer)
+
+        assert next_cursor is None
+        assert [post["content"] for post in tree] == ["first", "second"]
+        first = tree[0]
+        assert first["reply_count"] == 1
+        assert first["reaction_counts"] == {"like": 2, "love": 1}
+        assert first["user_reaction"] == "like"
+        assert (first["can_edit"], first["can_delete"]) == (False, False)
+
+        reply = first["replies"][0]
+        assert (reply["content"], reply["can_edit"], reply["can_delete"]) == ("reply", True, True)
+        assert reply["replies"][0]["replies"][0]["content"] == "deepest"
+        assert tree[1]["attachments"][0]["file_name"] == "a.png"
+
+    def test_query_count_is_constant(self, db, thread):
+        thread, viewer = thread
+        thread_id = thread.id
+        db.expire_all()
+        db.refresh(viewer)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        posts, _ = load_thread_posts(db, thread_id)
+        build_nested_posts(db, posts, viewer)
+        # posts + users (joined), attachments, reaction counts, the viewer's reactions
+        assert len(statements) == 4
+
+    def test_pages_of_top_level_posts(self, db, thread):
+        thread, viewer = thread
+        posts, next_cursor = load_thread_posts(db, thread.id, limit=1)
+        assert [post.content for post in posts] == ["first", "reply", "nested", "deepest"]
+        assert next_cursor is not None
+
+        posts, next_cursor = load_thread_posts(db, thread.id, limit=1, cursor=next_cursor)
+        assert [post.content for post in posts] == ["second"]
+        assert next_cursor is None
+
+    def test_anonymous_viewer(self, db, thread):
+        thread, _ = thread
+        posts, _ = load_thread_posts(db, thread.id)
+        tree = build_nested_posts(db, posts, None)
+        assert tree[0]["user_reaction"] is None
+        assert not tree[0]["can_edit"] and not tree[0]["can_delete"]
@@ -0,0 +1,128 @@
+"""Unit tests for hidden-tag page hydration and caching."""
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+
+from app.models.blog import BlogCategory, BlogPost
+from app.models.event import Event, EventType
+from app.models.hidden_tag import EntityType, HiddenTag
+from app.models.teaching import Teaching
+from app.services.hidden_tag_pages import HiddenTagPageCache
+from app.services.media_service import media_index
+from app.services.response_cache import response_cache
+
+TABLES = ["teachings", "blog_categories", "blog_posts", "events", "hidden_tags"]
+
+
+@pytest.fixture
+def db(make_db, monkeypatch):
+    monkeypatch.setattr(media_index, "load", lambda db: {"blog/post.jpg": "https://cdn.example.com/post"})
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def page(db):
+    """homepage/featured: two teachings, a blog post and an event"""
+    category = BlogCategory(name="Essays", slug="essays")
+    db.add(category)
+    db.flush()
+    entities = [
+        (EntityType.TEACHING, Teaching(slug="one", title="One", content_type="video")),
+        (EntityType.BLOG, BlogPost(
+            title="Post", slug="post", content="...", category_id=category.id,
+            featured_image="/blog/post.jpg",
+        )),
+        (EntityType.TEACHING, Teaching(slug="two", title="Two", content_type="audio")),
+        (EntityType.EVENT, Event(slug="event", title="Event", type=list(EventType)[0], start_datetime=datetime(2025, 1, 1))),
+    ]
+    db.add_all([entity for _, entity in entities])
+    db.flush()
+    for index, (entity_type, entity) in enumerate(entities):
+        db.add(HiddenTag(entity_type=entity_type, entity_id=entity.id, page_tag="homepage/featured", order_index=index))
+    db.commit()
+    return {entity.slug: entity for _, entity in entities}
+
+
+def count_statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestHiddenTagPages:
+    """Test batched hydration, caching and invalidation."""
+
+    def test_one_query_per_entity_type(self, db, page):
+        cache = HiddenTagPageCache(ttl_seconds=0)
+        db.expire_all()
+        statements = count_statements(db)
+
+        items = cache.get_page(db, "homepage/featured")
+        # tags, teachings, blog posts + categories (joined), events; media resolves against the index
+        assert len(statements) == 4
+        assert [item["entity_data"]["slug"] for item in items] == ["one", "post", "two", "event"]
+        blog = items[1]["entity_data"]
+        assert blog["category"]["slug"] == "essays"
+        assert blog["featured_image"] == "https://cdn.example.com/post"
+        assert items[3]["entity_data"]["start_time"] == "2025-01-01T00:00:00"
+
+    def test_entity_type_filter(self, db, page):
+        items = HiddenTagPageCache(ttl_seconds=0).get_page(db, "homepage/featured", EntityType.TEACHING)
+        assert [item["entity_data"]["slug"] for item in items] == ["one", "two"]
+
+    def test_cached_until_a_referenced_row_changes(self, db, page):
+        cache = HiddenTagPageCache(ttl_seconds=300)
+        cache.get_page(db, "homepage/featured")
+        cache.get_page(db, "other/page")
+        statements = count_statements(db)
+
+        items = cache.get_page(db, "homepage/featured")
+        assert statements == []
+        assert items[0]["entity_data"]["title"] == "One"
+
+        page["one"].title = "Renamed"
+        db.commit()
+        items = cache.get_page(db, "homepage/featured")
+        assert items[0]["entity_data"]["title"] == "Renamed"
+        assert cache.misses == 3
+
+        # A blog category change reaches the posts that embed it
+        db.query(BlogCategory).one().name = "Letters"
+        db.commit()
+        items = cache.get_page(db, "homepage/featured")
+        assert items[1]["entity_data"]["category"]["name"] == "Letters"
+
+        # Rows no page references leave the cache alone
+        cache.get_page(db, "other/page")
+        db.add(Teaching(slug="untagged", title="Untagged", content_type="text"))
+        db.commit()
+        statements.clear()
+        cache.get_page(db, "homepage/featured")
+        cache.get_page(db, "other/page")
+        assert statements == []
+
+    def test_view_count_bumps_keep_the_page(self, db, page):
+        cache = HiddenTagPageCache(ttl_seconds=300)
+        cache.get_page(db, "homepage/featured")
+        version = response_cache.content_version("hidden-tags")
+
+        # Columns the page does not show: no purge, no refetch
+        page["one"].view_count = (page["one"].view_count or 0) + 1
+        db.commit()
+        statements = count_statements(db)
+        cache.get_page(db, "homepage/featured")
+        assert statements == []
+        assert response_cache.content_version("hidden-tags") == version
+
+        page["one"].description = "Now with a description"
+        db.commit()
+        assert response_cache.content_version("hidden-tags") != version
+        assert cache.get_page(db, "homepage/featured")[0]["entity_data"]["description"] == "Now with a description"
+
+    def test_tag_changes_clear_the_cache(self, db, page):
+        cache = HiddenTagPageCache(ttl_seconds=300)
+        assert len(cache.get_page(db, "homepage/featured")) == 4
+
+        db.query(HiddenTag).filter(HiddenTag.entity_id == page["two"].id).one().page_tag = "elsewhere"
+        db.commit()
+        assert [item["entity_data"]["slug"] for item in cache.get_page(db, "homepage/featured")] == ["one", "post", "event"]
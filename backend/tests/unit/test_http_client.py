@@ -0,0 +1,59 @@
+"""Unit tests for the shared outbound HTTP client."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_client import OutboundHTTP
+
+
+def make_client(responses):
+    """OutboundHTTP whose transport replays `responses` (status codes or exceptions)"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        outcome = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    outbound = OutboundHTTP()
+    outbound.backoff_seconds = 0
+    outbound._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return outbound, calls
+
+
+class TestOutboundHTTP:
+    """Test retry rules and per-host metrics."""
+
+    def test_idempotent_requests_retry_on_503(self):
+        outbound, calls = make_client([503, 503, 200])
+        response = asyncio.run(outbound.get("https://api.example.com/orders/1"))
+        assert response.status_code == 200
+        assert len(calls) == 3
+
+        stats = outbound.stats()["hosts"]["api.example.com"]
+        assert (stats["requests"], stats["retries"], stats["errors"]) == (3, 2, 2)
+        assert stats["statuses"] == {"5xx": 2, "2xx": 1}
+
+    def test_posts_are_not_resubmitted(self):
+        outbound, calls = make_client([503, 200])
+        assert asyncio.run(outbound.post("https://api.example.com/refunds")).status_code == 503
+        assert len(calls) == 1
+
+        outbound, calls = make_client([httpx.ReadTimeout("slow"), 200])
+        with pytest.raises(httpx.ReadTimeout):
+            asyncio.run(outbound.post("https://api.example.com/refunds"))
+        assert len(calls) == 1
+
+    def test_connect_errors_retry_any_method(self):
+        outbound, calls = make_client([httpx.ConnectError("refused"), 200])
+        assert asyncio.run(outbound.post("https://api.example.com/track")).status_code == 200
+        assert len(calls) == 2
+
+    def test_retries_are_bounded(self):
+        outbound, calls = make_client([502])
+        outbound.retries = 1
+        assert asyncio.run(outbound.get("https://api.example.com/")).status_code == 502
+        assert len(calls) == 2
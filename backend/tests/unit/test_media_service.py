@@ -0,0 +1,145 @@
+"""Unit tests for the shared media index used by MediaService."""
+import pytest
+from unittest.mock import Mock
+from app.services.media_service import MediaIndex, MediaService, normalize_media_path
+import app.services.media_service as media_module
+
+
+def make_db(rows):
+    """Build a mock session whose asset query returns the given (path, url) rows."""
+    db = Mock()
+    db.query.return_value.filter.return_value.all.return_value = rows
+    return db
+
+
+class TestMediaIndex:
+    """Test process-wide media path resolution."""
+
+    def test_normalize_media_path(self):
+        assert normalize_media_path("/Images/Hero.JPG") == "images/hero.jpg"
+        assert normalize_media_path("images/hero.jpg") == "images/hero.jpg"
+
+    def test_lookup_loads_once(self):
+        db = make_db([("/hero.jpg", "https://cdn.example.com/hero")])
+        index = MediaIndex(ttl_seconds=0)
+
+        assert index.lookup(db, "/hero.jpg") == "https://cdn.example.com/hero"
+        assert index.lookup(db, "HERO.jpg") == "https://cdn.example.com/hero"
+        assert index.lookup(db, "/missing.jpg") is None
+        assert index.lookup(db, "/missing.jpg") is None
+
+        assert db.query.call_count == 1
+
+    def test_invalidate_reloads(self):
+        db = make_db([])
+        index = MediaIndex(ttl_seconds=0)
+        assert index.lookup(db, "/new.png") is None
+
+        db.query.return_value.filter.return_value.all.return_value = [
+            ("new.png", "https://cdn.example.com/new"),
+        ]
+        index.invalidate()
+
+        assert index.lookup(db, "/new.png") == "https://cdn.example.com/new"
+        assert db.query.call_count == 2
+
+    def test_ttl_expiry_reloads(self):
+        db = make_db([("a.png", "https://cdn.example.com/a")])
+        index = MediaIndex(ttl_seconds=60)
+        index.lookup(db, "a.png")
+
+        index._loaded_at -= 61
+        index.lookup(db, "a.png")
+
+        assert db.query.call_count == 2
+
+    def test_relative_media_url_made_absolute(self):
+        db = make_db([("/video.mp4", "/media/video.mp4")])
+        index = MediaIndex(ttl_seconds=0)
+
+        assert index.lookup(db, "/video.mp4").endswith("/media/video.mp4")
+        assert index.lookup(db, "/video.mp4").startswith("http")
+
+
+class TestMediaServiceResolve:
+    """Test MediaService against the shared index."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_index(self, monkeypatch):
+        monkeypatch.setattr(media_module, "media_index", MediaIndex(ttl_seconds=0))
+
+    def test_full_urls_pass_through(self):
+        db = make_db([])
+        service = MediaService(db)
+
+        assert service.resolve_url("https://example.com/a.jpg") == "https://example.com/a.jpg"
+        assert service.resolve_url(None) == ""
+        db.query.assert_not_called()
+
+    def test_resolve_dict_shares_index_across_services(self):
+        db = make_db([("/a.jpg", "https://cdn.example.com/a")])
+
+        first = MediaService(db).resolve_dict({"image": "/a.jpg", "title": "A"})
+        second = MediaService(db).resolve_dict({"items": [{"image": "a.jpg"}]})
+
+        assert first == {"image": "https://cdn.example.com/a", "title": "A"}
+        assert second == {"items": [{"image": "https://cdn.example.com/a"}]}
+        assert db.query.call_count == 1
+
+
+class TestMediaBatch:
+    """Test two-phase (collect, resolve, substitute) media resolution."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_index(self, monkeypatch):
+        monkeypatch.setattr(media_module, "media_index", MediaIndex(ttl_seconds=0))
+
+    def test_resolve_many_matches_resolve_dict(self):
+        db = make_db([
+            ("/a.jpg", "https://cdn.example.com/a"),
+            ("/b.png", "https://cdn.example.com/b"),
+        ])
+        items = [
+            {"thumbnail_url": "/a.jpg", "title": "A", "tags": ["b.png", "plain"]},
+            {"thumbnail_url": "/missing.jpg", "nested": {"image": "/B.PNG"}},
+            {"thumbnail_url": "https://example.com/c.jpg"},
+        ]
+
+        service = MediaService(db)
+        expected = [service.resolve_dict(item) for item in items]
+
+        assert service.resolve_many(items) == expected
+        assert expected[0] == {
+            "thumbnail_url": "https://cdn.example.com/a",
+            "title": "A",
+            "tags": ["https://cdn.example.com/b", "plain"],
+        }
+        assert expected[1]["thumbnail_url"] == ""
+
+    def test_batch_placeholders_resolved_in_one_lookup(self, monkeypatch):
+        db = make_db([("/logo.svg", "https://cdn.example.com/logo")])
+        lookups = []
+        index = media_module.media_index
+        original = index.lookup_many
+        monkeypatch.setattr(index, "lookup_many", lambda db, paths: lookups.append(set(paths)) or original(db, paths))
+
+        batch = MediaService(db).batch()
+        page = {
+            "hero": {
+                "logoUrl": batch.url("/logo.svg"),
+                "videoUrl": batch.url("/hero-video"),
+                "content": batch.dict({"icon": "logo.svg"}),
+            },
+            "gallery": {"secondaryImages": batch.list(["/logo.svg", "caption"])},
+        }
+        resolved = batch.resolve(page)
+
+        assert resolved == {
+            "hero": {
+                "logoUrl": "https://cdn.example.com/logo",
+                "videoUrl": "",
+                "content": {"icon": "https://cdn.example.com/logo"},
+            },
+            "gallery": {"secondaryImages": ["https://cdn.example.com/logo", "caption"]},
+        }
+        assert lookups == [{"/logo.svg", "/hero-video", "logo.svg"}]
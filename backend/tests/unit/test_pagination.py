@@ -0,0 +1,131 @@
+"""Unit tests for keyset (cursor) pagination helpers."""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Boolean, Column, DateTime, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base
+
+from app.core import pagination
+from app.core.db_types import UUID_TYPE
+from app.core.pagination import (
+    InvalidCursor,
+    SortKey,
+    _Explain,
+    count_rows,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+)
+
+ModelBase = declarative_base()
+
+
+class Item(ModelBase):
+    __tablename__ = "pagination_items"
+
+    id = Column(UUID_TYPE, primary_key=True, default=uuid.uuid4)
+    is_pinned = Column(Boolean, default=False, nullable=False)
+    published_date = Column(DateTime, nullable=True)
+
+
+DATED_KEYS = (SortKey(Item.published_date, nullable=True), SortKey(Item.id))
+PINNED_KEYS = (SortKey(Item.is_pinned), SortKey(Item.published_date), SortKey(Item.id))
+
+
+@pytest.fixture
+def db(make_db):
+    session = make_db(metadata=ModelBase.metadata)
+    base = datetime(2024, 1, 1)
+    # Duplicate dates and undated rows exercise the tie-breaker and NULL handling
+    for i in range(23):
+        date = None if i % 7 == 0 else base + timedelta(days=i // 3)
+        session.add(Item(is_pinned=i % 5 == 0, published_date=date))
+    session.commit()
+    return session
+
+
+def walk(db, keys, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = keyset_page(db.query(Item), keys, limit, cursor=cursor)
+        items.extend(rows)
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+
+class TestKeysetPage:
+    """Test walking a table page by page with cursors."""
+
+    def test_nullable_key_matches_full_ordering(self, db):
+        dates = [item.published_date for item in db.query(Item).all()]
+        expected = sorted((d for d in dates if d), reverse=True) + [d for d in dates if d is None]
+        items, pages = walk(db, DATED_KEYS, limit=4)
+
+        assert pages == 6
+        assert len({item.id for item in items}) == 23
+        assert [item.published_date for item in items] == expected
+        # Undated rows come last, newest first before them
+        assert all(item.published_date is None for item in items[-4:])
+
+    def test_row_value_comparison_for_non_nullable_keys(self, db):
+        db.query(Item).filter(Item.published_date.is_(None)).delete()
+        db.commit()
+        items, _ = walk(db, PINNED_KEYS, limit=5)
+
+        assert len({item.id for item in items}) == 19
+        keys = [(item.is_pinned, item.published_date, str(item.id)) for item in items]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_skip_is_used_without_cursor(self, db):
+        first, cursor = keyset_page(db.query(Item), DATED_KEYS, 4)
+        skipped, _ = keyset_page(db.query(Item), DATED_KEYS, 4, skip=4)
+        following, _ = keyset_page(db.query(Item), DATED_KEYS, 4, cursor=cursor)
+
+        assert [item.id for item in skipped] == [item.id for item in following]
+        assert first[0].id not in {item.id for item in skipped}
+
+    def test_last_page_has_no_cursor(self, db):
+        rows, cursor = keyset_page(db.query(Item), DATED_KEYS, 100)
+        assert len(rows) == 23
+        assert cursor is None
+
+
+class TestCursors:
+    """Test cursor encoding."""
+
+    def test_round_trip(self):
+        values = [datetime(2024, 5, 1, 12, 30), uuid.uuid4()]
+        assert decode_cursor(encode_cursor(values), DATED_KEYS) == values
+        assert decode_cursor(encode_cursor([None, values[1]]), DATED_KEYS) == [None, values[1]]
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor([1]), encode_cursor(["x", "y"])])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, DATED_KEYS)
+
+
+class TestCountRows:
+    """Test exact, estimated and skipped counts."""
+
+    def test_modes(self, db):
+        query = db.query(Item).filter(Item.is_pinned == True)
+        assert count_rows(query, "exact") == 5
+        assert count_rows(query, "none") is None
+
+    def test_estimate_reuses_cached_count_off_postgres(self, db, monkeypatch):
+        monkeypatch.setattr(pagination, "_count_cache", {})
+        query = db.query(Item)
+        assert count_rows(query, "estimate") == 23
+
+        db.add(Item())
+        db.commit()
+        assert count_rows(db.query(Item), "estimate") == 23
+        assert count_rows(db.query(Item), "exact") == 24
+
+    def test_explain_compiles_for_postgres(self):
+        statement = select(Item).where(Item.is_pinned == True)
+        sql = str(_Explain(statement).compile(dialect=postgresql.dialect()))
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
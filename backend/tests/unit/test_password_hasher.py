@@ -0,0 +1,57 @@
+"""Unit tests for the off-loop password hasher."""
+import asyncio
+import threading
+import time
+
+import pytest
+from passlib.context import CryptContext
+
+import app.core.security as security
+from app.services.password_hasher import PasswordHasher
+
+
+@pytest.fixture
+def rounds(monkeypatch):
+    """Cheap bcrypt costs: the configured one is 5, older hashes used 4"""
+    monkeypatch.setattr(security, "pwd_context", CryptContext(
+        schemes=["bcrypt"], bcrypt__default_rounds=5, bcrypt__min_rounds=5, bcrypt__max_rounds=5,
+    ))
+    return CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+
+
+class TestPasswordHasher:
+    """Test hashing off the event loop, rehash detection and metrics."""
+
+    def test_runs_on_the_pool(self, rounds, monkeypatch):
+        hasher = PasswordHasher(workers=1)
+        threads = []
+        original = security.pwd_context.hash
+
+        def tracked_hash(password):
+            threads.append(threading.current_thread().name)
+            time.sleep(0.02)  # keep the single worker busy while the others queue
+            return original(password)
+
+        monkeypatch.setattr(security.pwd_context, "hash", tracked_hash)
+
+        async def main():
+            return await asyncio.gather(*(hasher.hash("secret") for _ in range(3)))
+
+        hashes = asyncio.run(main())
+        assert all(security.pwd_context.verify("secret", h) for h in hashes)
+        assert threads and all(name.startswith("password-hash") for name in threads)
+        stats = hasher.stats()
+        assert (stats["completed"], stats["queued"], stats["running"]) == (3, 0, 0)
+        assert stats["peak_queued"] >= 2  # one worker, three requests
+        hasher.shutdown()
+
+    def test_rehash_when_cost_changes(self, rounds):
+        hasher = PasswordHasher(workers=1)
+        old_hash = rounds.hash("secret")
+
+        assert asyncio.run(hasher.verify("wrong", old_hash)) == (False, None)
+        valid, new_hash = asyncio.run(hasher.verify("secret", old_hash))
+        assert valid and new_hash.startswith("$2b$05$")
+        assert asyncio.run(hasher.verify("secret", new_hash)) == (True, None)
+        assert hasher.stats()["rehashed"] == 1
+        hasher.shutdown()
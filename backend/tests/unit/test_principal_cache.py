@@ -0,0 +1,107 @@
+"""Unit tests for the authenticated principal cache."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.deps import get_current_user, get_forum_user
+from app.core.security import create_access_token
+from app.models.forum import ForumUserBan
+from app.models.user import MembershipTierEnum, User
+from app.services.principal_cache import principal_cache
+
+TABLES = ["users", "forum_user_bans"]
+TOKENS = {}
+
+
+@pytest.fixture
+def db(make_db):
+    make_session = sessionmaker(bind=make_db(TABLES).get_bind())
+    principal_cache.clear()
+    yield make_session
+    principal_cache.clear()
+
+
+@pytest.fixture
+def member(db):
+    session = db()
+    user = User(email="member@example.com", name="Member", password_hash="x", membership_tier=MembershipTierEnum.GYANI)
+    admin = User(email="admin@example.com", name="Admin", password_hash="x", is_admin=True)
+    session.add_all([user, admin])
+    session.commit()
+    ids = user.id, admin.id
+    session.close()
+    return ids
+
+
+def authenticate(session, user_id, dependency=get_current_user):
+    # One token per user, so every call presents the same token version
+    token = TOKENS.setdefault(user_id, create_access_token({"sub": str(user_id)}))
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    user = asyncio.run(get_current_user(credentials, session))
+    if dependency is get_forum_user:
+        user = asyncio.run(get_forum_user(user, session))
+    return user
+
+
+def count_statements(session):
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestPrincipalCache:
+    """Test the cached auth path and its invalidation."""
+
+    def test_second_request_skips_the_users_table(self, db, member):
+        user_id, _ = member
+        assert authenticate(db(), user_id).name == "Member"
+
+        session = db()
+        statements = count_statements(session)
+        user = authenticate(session, user_id)
+        assert statements == []
+        assert (user.name, user.membership_tier, user.is_admin) == ("Member", MembershipTierEnum.GYANI, False)
+
+        # The cached user is a normal persistent instance of the request's session
+        user.name = "Renamed"
+        session.commit()
+        assert db().query(User).filter(User.id == user_id).one().name == "Renamed"
+
+    def test_committed_user_changes_invalidate(self, db, member):
+        user_id, _ = member
+        authenticate(db(), user_id)
+
+        session = db()
+        session.query(User).filter(User.id == user_id).one().is_active = False
+        session.commit()
+
+        with pytest.raises(HTTPException) as error:
+            authenticate(db(), user_id)
+        assert error.value.status_code == 403
+
+    def test_forum_ban_state(self, db, member):
+        user_id, admin_id = member
+        authenticate(db(), user_id, get_forum_user)
+
+        session = db()
+        statements = count_statements(session)
+        authenticate(session, user_id, get_forum_user)
+        assert statements == []
+
+        # A new ban reaches the cache through the change feed
+        session.add(ForumUserBan(user_id=user_id, banned_by=admin_id, reason="spam", expires_at=datetime.utcnow() + timedelta(days=1)))
+        session.commit()
+        with pytest.raises(HTTPException) as error:
+            authenticate(db(), user_id, get_forum_user)
+        assert "temporarily banned" in error.value.detail
+
+        # Deleted bans are invalidated explicitly, as unban_user does
+        session.query(ForumUserBan).delete()
+        session.commit()
+        principal_cache.invalidate(user_id)
+        assert authenticate(db(), user_id, get_forum_user).id == user_id
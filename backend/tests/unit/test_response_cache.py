@@ -0,0 +1,128 @@
+"""Unit tests for the public response cache."""
+import time
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import (
+    CacheBackend,
+    CachedResponse,
+    FileCacheBackend,
+    MemoryCacheBackend,
+    ResponseCache,
+    ResponseCacheMiddleware,
+    match_rule,
+)
+
+
+def entry(body=b"{}", tag_versions=None, ttl=60):
+    return CachedResponse(body, 200, {"content-type": "application/json"}, time.time() + ttl, tag_versions or {})
+
+
+class TestBackends:
+    """Test LRU eviction, TTL and tag purges."""
+
+    def test_incomplete_backend_fails_on_instantiation(self):
+        class NoClear(CacheBackend):
+            get = set = tag_versions = bump = lambda self, *args: None
+
+        with pytest.raises(TypeError):
+            NoClear()
+
+    def test_memory_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", entry(b"a"))
+        backend.set("b", entry(b"b"))
+        backend.get("a")
+        backend.set("c", entry(b"c"))
+        assert backend.get("b") is None
+        assert backend.get("a").body == b"a"
+
+    @pytest.mark.parametrize("make_backend", [
+        lambda tmp_path: MemoryCacheBackend(10),
+        lambda tmp_path: FileCacheBackend(str(tmp_path), 10),
+    ])
+    def test_purge_and_ttl(self, make_backend, tmp_path):
+        cache = ResponseCache(make_backend(tmp_path), ttl_seconds=60)
+        tags = ("pages", "pages:homepage")
+        cache.set("home", cache.tag_versions(tags), b'{"a": 1}', 200, {"content-type": "application/json"})
+        assert cache.get("home", tags).body == b'{"a": 1}'
+
+        cache.purge("pages:about")
+        assert cache.get("home", tags) is not None
+        cache.purge("pages:homepage")
+        assert cache.get("home", tags) is None
+
+        cache.ttl_seconds = 0
+        cache.set("home", cache.tag_versions(tags), b"{}", 200, {})
+        assert cache.get("home", tags) is None
+
+    def test_file_backend_is_shared_between_instances(self, tmp_path):
+        writer = ResponseCache(FileCacheBackend(str(tmp_path), 10))
+        reader = ResponseCache(FileCacheBackend(str(tmp_path), 10))
+        writer.set("key", writer.tag_versions(["events"]), b"[]", 200, {})
+        assert reader.get("key", ["events"]).body == b"[]"
+        reader.purge("events")
+        assert writer.get("key", ["events"]) is None
+
+
+class TestMiddleware:
+    """Test serving matching GETs from the cache."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        cache = ResponseCache(MemoryCacheBackend(10), ttl_seconds=60)
+        monkeypatch.setattr(response_cache_module, "response_cache", cache)
+        calls = {"events": 0, "other": 0}
+
+        app = FastAPI()
+        app.add_middleware(ResponseCacheMiddleware)
+
+        @app.get("/api/events/")
+        def events(response: Response, limit: int = 10):
+            response.set_cookie("seen", "1")
+            response.set_cookie("tier", "free")
+            calls["events"] += 1
+            return {"limit": limit, "calls": calls["events"]}
+
+        @app.get("/api/other")
+        def other():
+            calls["other"] += 1
+            return {"calls": calls["other"]}
+
+        return TestClient(app), cache, calls
+
+    def test_hit_miss_and_purge(self, client):
+        client, cache, calls = client
+        first = client.get("/api/events/?limit=5")
+        assert first.headers["X-Cache"] == "MISS"
+        assert len(first.headers.get_list("set-cookie")) == 2
+        second = client.get("/api/events/?limit=5")
+        assert second.headers["X-Cache"] == "HIT"
+        assert "set-cookie" not in second.headers
+        assert second.json() == first.json()
+        assert calls["events"] == 1
+
+        client.get("/api/events/?limit=6")
+        assert calls["events"] == 2
+
+        cache.purge("events")
+        assert client.get("/api/events/?limit=5").json()["calls"] == 3
+
+    def test_uncached_paths_and_no_cache(self, client):
+        client, cache, calls = client
+        client.get("/api/other")
+        client.get("/api/other")
+        assert calls["other"] == 2
+
+        client.get("/api/events/")
+        client.get("/api/events/", headers={"Cache-Control": "no-cache"})
+        assert calls["events"] == 2
+
+    def test_rules(self):
+        rule, tags = match_rule("/api/pages/homepage")
+        assert tags == ("pages", "pages:homepage", "media")
+        assert match_rule("/api/teachings/")[0].vary_tier
+        assert match_rule("/api/teachings/some-slug") is None
@@ -0,0 +1,105 @@
+"""Unit tests for the retreat forum tree loader."""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from app.models.retreat import Retreat, RetreatForumPost, RetreatForumPostLike, RetreatType
+from app.models.user import User, UserProfile
+from app.services.retreat_forum import build_forum_tree, load_forum_page
+
+TABLES = ["users", "user_profiles", "retreats", "retreat_forum_posts", "retreat_forum_post_likes"]
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def forum(db):
+    """Two top-level posts; the older one has a reply chain three levels deep"""
+    author = User(email="author@example.com", name="Author", password_hash="x")
+    viewer = User(email="viewer@example.com", name="Viewer", password_hash="x")
+    retreat = Retreat(slug="retreat", title="Retreat", type=RetreatType.ONLINE, forum_enabled=True)
+    db.add_all([author, viewer, retreat])
+    db.flush()
+    db.add(UserProfile(user_id=author.id, avatar_url="/author.png"))
+
+    start = datetime(2025, 1, 1)
+    posts = {}
+
+    def post(name, minutes, parent=None, user=author):
+        posts[name] = RetreatForumPost(
+            retreat_id=retreat.id,
+            user_id=user.id,
+            parent_id=posts[parent].id if parent else None,
+            title=None if parent else name,
+            content=name,
+            created_at=start + timedelta(minutes=minutes),
+        )
+        db.add(posts[name])
+        db.flush()
+
+    post("older", 0)
+    post("reply", 1, parent="older", user=viewer)
+    post("nested", 2, parent="reply")
+    post("deepest", 3, parent="nested")
+    post("sibling", 4, parent="older")
+    post("newer", 5)
+    db.add_all([
+        RetreatForumPostLike(post_id=posts["older"].id, user_id=viewer.id),
+        RetreatForumPostLike(post_id=posts["older"].id, user_id=author.id),
+        RetreatForumPostLike(post_id=posts["nested"].id, user_id=viewer.id),
+    ])
+    db.commit()
+    return retreat, viewer
+
+
+class TestRetreatForum:
+    """Test tree building, batched loading and paging."""
+
+    def test_nested_at_any_depth(self, db, forum):
+        retreat, viewer = forum
+        roots, replies, next_cursor = load_forum_page(db, retreat.id, limit=50)
+        tree = build_forum_tree(db, roots, replies, viewer.id)
+
+        assert next_cursor is None
+        assert [post["content"] for post in tree] == ["newer", "older"]
+        older = tree[1]
+        assert (older["like_count"], older["is_liked_by_user"]) == (2, True)
+        assert (older["user_name"], older["user_photo"]) == ("Author", "/author.png")
+        assert [reply["content"] for reply in older["replies"]] == ["reply", "sibling"]
+
+        reply = older["replies"][0]
+        assert (reply["user_name"], reply["user_photo"]) == ("Viewer", None)
+        nested = reply["replies"][0]
+        assert (nested["content"], nested["like_count"], nested["is_liked_by_user"]) == ("nested", 1, True)
+        assert nested["replies"][0]["content"] == "deepest"
+        assert tree[0] == {**tree[0], "like_count": 0, "is_liked_by_user": False, "replies": []}
+
+    def test_query_count_is_constant(self, db, forum):
+        retreat, viewer = forum
+        retreat_id, viewer_id = retreat.id, viewer.id
+        db.expire_all()
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        roots, replies, _ = load_forum_page(db, retreat_id, limit=50)
+        build_forum_tree(db, roots, replies, viewer_id)
+        # top-level posts, replies, users + profiles (joined), like counts, the viewer's likes
+        assert len(statements) == 5
+
+    def test_pages_of_top_level_posts(self, db, forum):
+        retreat, viewer = forum
+        roots, replies, next_cursor = load_forum_page(db, retreat.id, limit=1)
+        assert [post.content for post in roots] == ["newer"]
+        assert replies == []
+        assert next_cursor is not None
+
+        roots, replies, next_cursor = load_forum_page(db, retreat.id, limit=1, cursor=next_cursor)
+        assert [post.content for post in roots] == ["older"]
+        assert [post.content for post in replies] == ["reply", "nested", "deepest", "sibling"]
+        assert next_cursor is None
+
+        roots, _, _ = load_forum_page(db, retreat.id, limit=1, skip=1)
+        assert [post.content for post in roots] == ["older"]
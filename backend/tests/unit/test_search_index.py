@@ -0,0 +1,123 @@
+"""Unit tests for the in-process search index."""
+import pytest
+from app.core.database import Base
+from app.models.teaching import Teaching
+from app.services import content_changes
+from app.services.search_index import SearchIndex, highlight_snippet, stem, tokenize
+
+
+class TestTokenizer:
+    """Test tokenizing and stemming."""
+
+    def test_stem(self):
+        assert stem("meditation") == stem("meditating") == stem("meditate") == "medit"
+        assert stem("ponies") == "poni"
+        assert stem("caresses") == "caress"
+
+    def test_tokenize_drops_stop_words(self):
+        assert tokenize("The Art of Meditating") == ["art", "medit"]
+        assert tokenize(None) == []
+
+    def test_highlight_snippet(self):
+        snippet = highlight_snippet("A guided meditation for beginners", "medit")
+        assert snippet == "A guided <mark>meditation</mark> for beginners"
+        assert highlight_snippet("Nothing here", "medit") is None
+
+
+class TestSearchIndex:
+    """Test BM25 ranking, prefix matching and incremental updates."""
+
+    @pytest.fixture
+    def index(self):
+        index = SearchIndex()
+        index.add("teachings", "1", {"title": "Meditation for beginners", "body": "Sit quietly."})
+        index.add("teachings", "2", {"title": "Satsang", "body": "A talk about meditation and silence."})
+        index.add("blogs", "3", {"title": "Silence", "body": "Notes on retreat life."})
+        return index
+
+    def test_title_matches_rank_first(self, index):
+        hits = index.search("meditation", 5)
+        assert [doc_id for doc_id, _, _ in hits["teachings"]] == ["1", "2"]
+        assert "blogs" not in hits
+
+    def test_last_word_is_prefix(self, index):
+        hits = index.search("silen", 5)
+        assert {doc_id for doc_id, _, _ in hits["teachings"]} == {"2"}
+        assert [doc_id for doc_id, _, _ in hits["blogs"]] == ["3"]
+
+    def test_all_words_required(self, index):
+        hits = index.search("meditation silence", 5)
+        assert [doc_id for doc_id, _, _ in hits["teachings"]] == ["2"]
+
+    def test_limit_per_kind(self, index):
+        assert len(index.search("medit", 1)["teachings"]) == 1
+
+    def test_remove_and_replace(self, index):
+        index.remove("teachings", "1")
+        index.add("teachings", "2", {"title": "Satsang", "body": "Questions and answers."})
+        assert index.search("meditation", 5) == {}
+
+    def test_static_pages_carry_payload(self, index):
+        page = {"page_slug": "about-ashram", "title": "Our Ashram", "description": "Visit us", "url": "/about/ashram"}
+        index.set_static_pages([page])
+        assert index.search("ashram", 5)["pages"][0][2] == page
+
+    def test_snapshot_round_trip(self, index, tmp_path):
+        path = str(tmp_path / "search_index.json")
+        index.save_snapshot(path)
+
+        restored = SearchIndex()
+        assert restored.load_snapshot(path) is not None
+        assert restored.search("meditation", 5) == index.search("meditation", 5)
+
+    def test_missing_snapshot(self, tmp_path):
+        assert SearchIndex().load_snapshot(str(tmp_path / "missing.json")) is None
+
+
+class TestSearchIndexListeners:
+    """Test that committed changes reach the index."""
+
+    @pytest.fixture
+    def session(self, make_db):
+        return make_db([name for name in Base.metadata.tables if name.startswith("teaching")])
+
+    @pytest.fixture
+    def index(self, session):
+        index = SearchIndex()
+        index.register_listeners()
+        yield index
+        content_changes.unsubscribe("search_index")
+
+    def test_commit_and_rollback(self, session, index):
+        teaching = Teaching(slug="t1", title="Morning Meditation", content_type="video")
+        session.add(teaching)
+        session.commit()
+        assert index.search("meditation", 5)["teachings"][0][0] == str(teaching.id)
+
+        teaching.title = "Evening Satsang"
+        session.flush()
+        session.rollback()
+        assert "teachings" in index.search("meditation", 5)
+
+        session.delete(session.get(Teaching, teaching.id))
+        session.commit()
+        assert index.search("meditation", 5) == {}
+
+    def test_snapshot_drops_rows_deleted_while_down(self, make_db, tmp_path):
+        db = make_db(["teachings", "courses", "products", "retreats", "blog_categories", "blog_posts"])
+        teachings = [Teaching(slug=f"t{i}", title=f"Meditation {i}", content_type="video") for i in range(2)]
+        db.add_all(teachings)
+        db.commit()
+        path = str(tmp_path / "search_index.json")
+        index = SearchIndex()
+        index.build(db)
+        index.save_snapshot(path)
+
+        # Deleted with no listener running
+        db.execute(Teaching.__table__.delete().where(Teaching.id == teachings[1].id))
+        db.commit()
+
+        restored = SearchIndex()
+        restored.start(db, [], snapshot_path=path)
+        content_changes.unsubscribe("search_index")
+        assert [hit[0] for hit in restored.search("meditation", 5)["teachings"]] == [str(teachings[0].id)]
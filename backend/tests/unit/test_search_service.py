@@ -0,0 +1,35 @@
+"""Unit tests for search query construction and result formatting."""
+import pytest
+from unittest.mock import Mock
+from app.services.search_service import SearchService, build_prefix_tsquery
+
+
+class TestPrefixTsquery:
+    """Test free text to tsquery conversion."""
+
+    def test_last_word_is_prefix(self):
+        assert build_prefix_tsquery("Medit") == "medit:*"
+        assert build_prefix_tsquery("guided medit") == "guided & medit:*"
+
+    def test_punctuation_is_dropped(self):
+        # Characters with tsquery meaning must never reach to_tsquery()
+        assert build_prefix_tsquery("self-realization & (truth)!") == "self & realization & truth:*"
+
+    def test_no_words(self):
+        assert build_prefix_tsquery("  !? ") is None
+
+
+class TestSearchFallback:
+    """Test that non-PostgreSQL databases use the ILIKE path."""
+
+    def test_sqlite_skips_fulltext_query(self):
+        db = Mock()
+        db.get_bind.return_value.dialect.name = "sqlite"
+        db.query.return_value.filter.return_value.limit.return_value.all.return_value = []
+        db.query.return_value.filter.return_value.all.return_value = []
+
+        results = SearchService(db).search("meditation", 5)
+
+        assert set(results) == {"teachings", "courses", "products", "retreats", "blogs"}
+        assert all(items == [] for items in results.values())
+        db.execute.assert_not_called()
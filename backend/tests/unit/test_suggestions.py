@@ -0,0 +1,131 @@
+"""Unit tests for the typeahead suggestion trie."""
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.course import Course
+from app.models.teaching import Teaching
+from app.services import content_changes
+from app.services import suggestions
+from app.services.suggestions import SuggestionTrie, _extract, normalize_phrase
+
+TABLES = ["teachings", "courses", "products", "retreats", "blog_categories", "blog_posts"]
+
+
+def teaching(id, title, view_count=0, category=None, topic=None, filter_tags=None):
+    return Teaching(
+        id=id, slug=f"t-{id}", title=title, content_type="video",
+        view_count=view_count, category=category, topic=topic, filter_tags=filter_tags,
+    )
+
+
+class TestSuggestionTrie:
+    """Test prefix completion, ranking and incremental updates."""
+
+    @pytest.fixture
+    def trie(self):
+        trie = SuggestionTrie()
+        trie.index_entity(teaching("1", "Guided Meditation", view_count=500, category="Meditation"))
+        trie.index_entity(teaching("2", "Meditation on Silence", view_count=5, topic="Silence"))
+        trie.index_entity(teaching("3", "Mercy and Truth", view_count=50, filter_tags=["Truth"]))
+        return trie
+
+    def test_normalize_phrase(self):
+        assert normalize_phrase("  Guided   Meditation! ") == "guided meditation"
+
+    def test_matches_any_word_start(self, trie):
+        texts = [s["text"] for s in trie.suggest("medit")]
+        assert "Guided Meditation" in texts
+        assert "Meditation on Silence" in texts
+        assert "Mercy and Truth" not in texts
+
+    def test_ranked_by_popularity(self, trie):
+        assert [s["text"] for s in trie.suggest("me", 3)][:2] == ["Guided Meditation", "Meditation"]
+
+    def test_result_shape(self, trie):
+        assert trie.suggest("guided") == [{"text": "Guided Meditation", "type": "teaching", "url": "/teachings/t-1"}]
+        assert trie.suggest("sile")[-1]["type"] == "topic"
+
+    def test_update_and_remove(self, trie):
+        trie.index_entity(teaching("1", "Guided Contemplation", view_count=500))
+        assert "Guided Meditation" not in [s["text"] for s in trie.suggest("medit")]
+        assert trie.suggest("contem")[0]["text"] == "Guided Contemplation"
+
+        trie.set_source(Teaching, "1", [])
+        assert trie.suggest("contem") == []
+        assert trie.suggest("guided") == []
+
+    def test_unpublished_content_is_skipped(self):
+        trie = SuggestionTrie()
+        trie.index_entity(Course(id="c1", slug="c", title="Hidden Course", is_published=False))
+        assert trie.suggest("hidden") == []
+
+    def test_empty_prefix(self, trie):
+        assert trie.suggest("  ") == []
+
+
+class TestRebuild:
+    """Test that a stale trie picks up writes it never saw a change event for."""
+
+    @pytest.fixture
+    def db(self, make_db):
+        yield make_db(TABLES)
+        content_changes.unsubscribe("suggestions")
+
+    def test_rebuilds_after_ttl(self, db):
+        db.add(Teaching(slug="t-1", title="Guided Meditation", content_type="video"))
+        db.commit()
+        trie = SuggestionTrie(ttl_seconds=60)
+        trie.ensure_built(db)
+        assert [s["text"] for s in trie.suggest("guided")] == ["Guided Meditation"]
+
+        # Another worker's writes: no change events reach this process
+        teachings = Teaching.__table__
+        db.execute(teachings.delete())
+        db.execute(teachings.insert().values(id=uuid.uuid4(), slug="t-2", title="Silent Retreat", content_type="video"))
+        db.commit()
+        trie.ensure_built(db)
+        assert trie.suggest("silent") == []
+
+        trie._built_at -= 61
+        trie.ensure_built(db)
+        assert trie.suggest("guided") == []
+        assert [s["text"] for s in trie.suggest("silent")] == ["Silent Retreat"]
+
+        # Commits in this process still apply immediately
+        db.add(Teaching(slug="t-3", title="Satsang", content_type="video"))
+        db.commit()
+        assert [s["text"] for s in trie.suggest("sats")] == ["Satsang"]
+
+    def test_changes_during_a_rebuild_are_kept(self, db):
+        trie = SuggestionTrie(ttl_seconds=60)
+        trie.ensure_built(db)
+        trie._built_at -= 61
+        committed = []
+
+        def commit_elsewhere(conn, cursor, statement, *args):
+            # Another thread commits while the rebuild is loading; its row is not in what the rebuild reads
+            if "FROM teachings" in statement and not committed:
+                committed.append(True)
+                trie._apply_changes({(Teaching, "9"): _extract(teaching("9", "Satsang"))})
+
+        event.listen(db.get_bind(), "before_cursor_execute", commit_elsewhere)
+        trie.ensure_built(db)
+        event.remove(db.get_bind(), "before_cursor_execute", commit_elsewhere)
+        assert committed
+        assert [s["text"] for s in trie.suggest("sats")] == ["Satsang"]
+
+    def test_requests_build_in_the_background(self, make_db, monkeypatch):
+        # A file database: the build reads it from another thread
+        db = make_db(TABLES, file=True)
+        db.add(Teaching(slug="t-1", title="Guided Meditation", content_type="video"))
+        db.commit()
+        monkeypatch.setattr(suggestions, "SessionLocal", sessionmaker(bind=db.get_bind()))
+        trie = SuggestionTrie(ttl_seconds=60)
+
+        trie.refresh_in_background().join()
+        content_changes.unsubscribe("suggestions")
+        assert [s["text"] for s in trie.suggest("guided")] == ["Guided Meditation"]
+        assert trie.refresh_in_background() is None  # fresh
@@ -0,0 +1,162 @@
+"""Unit tests for the video heartbeat write-behind buffer."""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.models.course import Course, CourseClass, CourseComponent, CourseEnrollment, CourseProgress
+from app.models.user import User
+from app.routers import courses
+from app.schemas.course import VideoTimestampUpdate
+from app.services.video_heartbeats import ComponentNotFound, NotEnrolled, VideoHeartbeatBuffer
+
+TABLES = ["instructors", "courses", "course_classes", "course_components", "course_enrollments", "course_progress"]
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(TABLES)
+
+
+@pytest.fixture
+def setup(db):
+    course = Course(slug="course", title="Course")
+    db.add(course)
+    db.flush()
+    course_class = CourseClass(course_id=course.id, title="Class", order_index=0)
+    db.add(course_class)
+    db.flush()
+    video = CourseComponent(class_id=course_class.id, title="Video", order_index=0, duration=100)
+    db.add(video)
+    user_id = uuid.uuid4()
+    enrollment = CourseEnrollment(user_id=user_id, course_id=course.id)
+    db.add(enrollment)
+    db.commit()
+    return user_id, video.id, enrollment.id
+
+
+class TestVideoHeartbeatBuffer:
+    """Test coalescing, read-through and batched flushes."""
+
+    def test_resolve_target(self, db, setup):
+        user_id, video_id, enrollment_id = setup
+        buffer = VideoHeartbeatBuffer(flush_seconds=5)
+        target = buffer.resolve_target(db, user_id, video_id)
+        assert target.enrollment_id == str(enrollment_id)
+        assert target.duration == 100
+
+        with pytest.raises(NotEnrolled):
+            buffer.resolve_target(db, uuid.uuid4(), video_id)
+        with pytest.raises(ComponentNotFound):
+            buffer.resolve_target(db, user_id, uuid.uuid4())
+
+    def test_coalesced_flush(self, db, setup):
+        user_id, video_id, enrollment_id = setup
+        buffer = VideoHeartbeatBuffer(flush_seconds=5)
+        target = buffer.resolve_target(db, user_id, video_id)
+
+        buffer.record(target, video_id, 10)
+        buffer.record(target, video_id, 97)
+        buffer.record(target, video_id, 40)
+        assert db.query(CourseProgress).count() == 0
+
+        pending = buffer.peek(enrollment_id, video_id)
+        assert (pending.timestamp, pending.progress_percentage, pending.completed) == (40, 40, True)
+
+        assert buffer.flush(db) == 1
+        assert buffer.peek(enrollment_id, video_id) is None
+        progress = db.query(CourseProgress).one()
+        assert (progress.video_timestamp, progress.progress_percentage, progress.completed) == (40, 40, True)
+
+        # Later flushes update the existing row
+        buffer.record(target, video_id, 50)
+        buffer.flush(db)
+        assert db.query(CourseProgress).one().video_timestamp == 50
+
+    def test_batch_being_written_stays_visible(self, db, setup, monkeypatch):
+        user_id, video_id, enrollment_id = setup
+        buffer = VideoHeartbeatBuffer(flush_seconds=5)
+        target = buffer.resolve_target(db, user_id, video_id)
+        buffer.record(target, video_id, 40)
+
+        seen = []
+        write = buffer._write
+        monkeypatch.setattr(buffer, "_write", lambda *args: seen.append(buffer.peek(enrollment_id, video_id)) or write(*args))
+        buffer.flush(db)
+        assert seen[0].timestamp == 40
+        assert buffer.peek(enrollment_id, video_id) is None
+
+    def test_full_buffer_wakes_the_flush_loop(self, db, setup, monkeypatch):
+        user_id, video_id, enrollment_id = setup
+        buffer = VideoHeartbeatBuffer(flush_seconds=60, max_pending=1)
+        target = buffer.resolve_target(db, user_id, video_id)
+        flushed = []
+        monkeypatch.setattr(buffer, "flush", lambda db=None: flushed.append(True))
+
+        async def main():
+            loop = asyncio.create_task(buffer.run())
+            await asyncio.sleep(0)
+            buffer.record(target, video_id, 40)
+            assert not flushed  # not on the caller
+            await asyncio.sleep(0.05)
+            loop.cancel()
+
+        asyncio.run(main())
+        assert flushed
+
+    def test_deleted_enrollment_is_skipped(self, db, setup):
+        user_id, video_id, enrollment_id = setup
+        buffer = VideoHeartbeatBuffer(flush_seconds=5)
+        target = buffer.resolve_target(db, user_id, video_id)
+        buffer.record(target, video_id, 10)
+
+        db.query(CourseEnrollment).delete()
+        db.commit()
+        assert buffer.flush(db) == 0
+        assert db.query(CourseProgress).count() == 0
+
+    def test_response_keeps_stored_progress(self, db, setup, monkeypatch):
+        user_id, video_id, enrollment_id = setup
+        monkeypatch.setattr(courses, "video_heartbeats", VideoHeartbeatBuffer(flush_seconds=5))
+        audio = CourseComponent(class_id=db.query(CourseClass).one().id, title="Audio", order_index=1)
+        db.add(audio)
+        db.flush()
+        class_id = audio.class_id
+        db.add_all([
+            CourseProgress(enrollment_id=enrollment_id, class_id=class_id, component_id=video_id, completed=True, progress_percentage=100),
+            CourseProgress(enrollment_id=enrollment_id, class_id=class_id, component_id=audio.id, progress_percentage=60),
+        ])
+        db.commit()
+
+        def heartbeat(component_id, timestamp):
+            data = VideoTimestampUpdate(component_id=component_id, timestamp=timestamp)
+            return asyncio.run(courses.save_video_timestamp(data, current_user=User(id=user_id), db=db))
+
+        # Rewatching a completed video below 95% does not un-complete it
+        response = heartbeat(video_id, 30)
+        assert (response["progress_percentage"], response["completed"]) == (30, True)
+
+        # Without a duration the saved percentage stands
+        response = heartbeat(audio.id, 30)
+        assert (response["progress_percentage"], response["completed"]) == (60, False)
+
+        # Steady heartbeats run no queries
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert heartbeat(audio.id, 40)["progress_percentage"] == 60
+        assert statements == []
+
+    def test_response_keeps_flushed_completion(self, db, setup, monkeypatch):
+        user_id, video_id, enrollment_id = setup
+        buffer = VideoHeartbeatBuffer(flush_seconds=5)
+        monkeypatch.setattr(courses, "video_heartbeats", buffer)
+
+        def heartbeat(timestamp):
+            data = VideoTimestampUpdate(component_id=video_id, timestamp=timestamp)
+            return asyncio.run(courses.save_video_timestamp(data, current_user=User(id=user_id), db=db))
+
+        assert heartbeat(97)["completed"] is True
+        buffer.flush(db)
+        assert heartbeat(30)["completed"] is True
+